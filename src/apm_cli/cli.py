@@ -1,8 +1,10 @@
 """Command-line interface for Agent Package Manager (APM)."""
 
+import shutil
 import sys
 import os
 import click
+from contextlib import nullcontext
 from pathlib import Path
 from colorama import init, Fore, Style
 from typing import List
@@ -10,11 +12,13 @@ from typing import List
 # APM imports - use absolute imports everywhere for consistency
 from apm_cli.version import get_version
 from apm_cli.compilation import AgentsCompiler, CompilationConfig
+from apm_cli.primitives.cache import PrimitiveCache
 from apm_cli.primitives.discovery import discover_primitives
 from apm_cli.utils.console import (
     _rich_success, _rich_error, _rich_info, _rich_warning, _rich_echo, 
     _rich_panel, _create_files_table, _get_console, STATUS_SYMBOLS
 )
+from apm_cli.commands.cache import cache
 from apm_cli.commands.deps import deps
 
 # APM Dependencies - Import for Task 5 integration
@@ -22,6 +26,10 @@ try:
     from apm_cli.models.apm_package import APMPackage, DependencyReference
     from apm_cli.deps.apm_resolver import APMDependencyResolver
     from apm_cli.deps.github_downloader import GitHubPackageDownloader
+    from apm_cli.deps.install_timings import PHASES, InstallTimings
+    from apm_cli.deps.installer import InstallTask, get_install_path, install_packages
+    from apm_cli.deps.integrity import check_installed_package
+    from apm_cli.deps.lockfile import LOCKFILE_NAME, LockedDependency, Lockfile, LockfileError
     APM_DEPS_AVAILABLE = True
 except ImportError as e:
     # Graceful fallback if APM dependencies are not available
@@ -217,6 +225,7 @@ def cli(ctx):
 
 # Register command groups
 cli.add_command(deps)
+cli.add_command(cache)
 
 
 @cli.command(help="Initialize a new APM project")
@@ -426,8 +435,15 @@ def _validate_package_exists(package):
 @click.option('--only', type=click.Choice(['apm', 'mcp']), help="Install only specific dependency type")
 @click.option('--update', is_flag=True, help="Update dependencies to latest Git references")
 @click.option('--dry-run', is_flag=True, help="Show what would be installed without installing")
+@click.option('--jobs', '-j', type=click.IntRange(min=1), help="Number of packages downloaded concurrently (default: 4 per CPU, up to 16)")
+@click.option('--fail-fast', is_flag=True, help="Stop at the first package that fails to install")
+@click.option('--frozen', is_flag=True, help="Install exactly the commits in apm.lock; fail if it is missing or out of date")
+@click.option('--verify', is_flag=True, help="Hash the files of installed packages instead of comparing sizes and modification times")
+@click.option('--timings', 'show_timings', is_flag=True, help="Show how long each APM package took to resolve, download and validate")
+@click.option('--timings-json', type=click.Path(dir_okay=False), help="Write the APM package timings to a file, one JSON object per line")
 @click.pass_context
-def install(ctx, packages, runtime, exclude, only, update, dry_run):
+def install(ctx, packages, runtime, exclude, only, update, dry_run, jobs, fail_fast, frozen, verify,
+            show_timings, timings_json):
     """Install APM and MCP dependencies from apm.yml (like npm install).
     
     This command automatically detects AI runtimes from your apm.yml scripts and installs
@@ -443,8 +459,17 @@ def install(ctx, packages, runtime, exclude, only, update, dry_run):
         apm install --only=mcp                  # Install only MCP dependencies
         apm install --update                    # Update dependencies to latest Git refs
         apm install --dry-run                   # Show what would be installed
+        apm install --jobs 4 --fail-fast        # 4 concurrent downloads, stop on first failure
+        apm install --frozen                    # Install apm.lock as is (CI)
+        apm install --verify                    # Re-download packages whose files changed
+        apm install --timings                   # Show where the install time went
+        apm install --timings-json t.ndjson     # Record timings for CI trends
     """
     try:
+        if frozen and (update or packages):
+            _rich_error("--frozen cannot be combined with --update or with packages to add")
+            sys.exit(1)
+        
         # Check if apm.yml exists
         if not Path('apm.yml').exists():
             _rich_error("No apm.yml found. Run 'apm init' first.")
@@ -502,11 +527,17 @@ def install(ctx, packages, runtime, exclude, only, update, dry_run):
                 _rich_info(f"Import error: {_APM_IMPORT_ERROR}")
                 sys.exit(1)
             
+            timings = InstallTimings() if show_timings or timings_json else None
             try:
-                _install_apm_dependencies(apm_package, update)
+                with timings.stage("total") if timings is not None else nullcontext():
+                    _install_apm_dependencies(apm_package, update, jobs=jobs, fail_fast=fail_fast, frozen=frozen,
+                                              verify=verify, timings=timings)
             except Exception as e:
                 _rich_error(f"Failed to install APM dependencies: {e}")
                 sys.exit(1)
+            finally:
+                if timings is not None:
+                    _report_install_timings(timings, show_timings, timings_json)
         elif should_install_apm and not apm_deps:
             _rich_info("No APM dependencies found in apm.yml")
         
@@ -768,12 +799,24 @@ def uninstall(ctx, packages, dry_run):
         _rich_error(f"Error uninstalling packages: {e}")
         sys.exit(1)
 
-def _install_apm_dependencies(apm_package: 'APMPackage', update_refs: bool = False):
+def _install_apm_dependencies(apm_package: 'APMPackage', update_refs: bool = False,
+                              jobs: int = None, fail_fast: bool = False, frozen: bool = False,
+                              verify: bool = False, timings: 'InstallTimings' = None):
     """Install APM package dependencies.
     
+    Dependencies locked in apm.lock are installed at their locked commit without
+    resolving their reference; the others are resolved, and apm.lock is rewritten
+    once every dependency is installed. Packages already installed at that
+    commit are kept if their files match their integrity manifest.
+    
     Args:
         apm_package: Parsed APM package with dependencies
-        update_refs: Whether to update existing packages to latest refs
+        update_refs: Whether to update existing packages to latest refs (ignores apm.lock)
+        jobs: Number of packages downloaded concurrently (default: DEFAULT_INSTALL_JOBS)
+        fail_fast: Stop at the first failed package instead of installing the others
+        frozen: Install apm.lock as is; fail if it is missing or out of date
+        verify: Check installed packages by hashing their files, not by stat
+        timings: Records per-package timings (``--timings``)
     """
     if not APM_DEPS_AVAILABLE:
         raise RuntimeError("APM dependency system not available")
@@ -784,11 +827,25 @@ def _install_apm_dependencies(apm_package: 'APMPackage', update_refs: bool = Fal
     
     _rich_info(f"Installing APM dependencies ({len(apm_deps)})...")
     
-    # Resolve dependencies
-    resolver = APMDependencyResolver()
     project_root = Path.cwd()
     
     try:
+        # Load the commits recorded by the previous install
+        lockfile_path = project_root / LOCKFILE_NAME
+        try:
+            lockfile = Lockfile.load(lockfile_path)
+        except LockfileError as e:
+            if frozen:
+                raise
+            _rich_warning(f"{e} - resolving all dependencies again")
+            lockfile = None
+        if update_refs:
+            lockfile = None
+        
+        # Resolve dependencies, reading sub-dependencies at the locked commits
+        downloader = GitHubPackageDownloader(timings=timings)
+        resolver = APMDependencyResolver(downloader=downloader, lockfile=lockfile,
+                                         use_installed=not update_refs, jobs=jobs, timings=timings)
         dependency_graph = resolver.resolve_dependencies(project_root)
         
         # Check for circular dependencies
@@ -807,60 +864,159 @@ def _install_apm_dependencies(apm_package: 'APMPackage', update_refs: bool = Fal
             _rich_info("No APM dependencies to install", symbol="check")
             return
         
+        if frozen:
+            if lockfile is None:
+                raise RuntimeError(f"--frozen requires {LOCKFILE_NAME}; run 'apm install' to create it")
+            problems = lockfile.find_outdated(deps_to_install)
+            if problems:
+                raise RuntimeError(f"{LOCKFILE_NAME} is out of date with apm.yml: " + "; ".join(problems)
+                                   + ". Run 'apm install' to update it")
+        if lockfile is None:
+            lockfile = Lockfile()
+        
+        # Repository that declared each transitive dependency
+        parents = {node.dependency_ref.repo_url: node.parent.dependency_ref.repo_url
+                   for node in dependency_graph.dependency_tree.nodes.values() if node.parent}
+        
         # Create apm_modules directory
         apm_modules_dir = project_root / "apm_modules"
         apm_modules_dir.mkdir(exist_ok=True)
         
-        # Install each dependency
-        downloader = GitHubPackageDownloader()
-        installed_count = 0
-        
+        # Determine what to download; packages intact at the commit to install are kept
+        new_lockfile = Lockfile()
+        tasks = []
         for dep_ref in deps_to_install:
-            # Determine installation directory using namespaced structure
-            # e.g., danielmeppiel/design-guidelines -> apm_modules/danielmeppiel/design-guidelines/
-            if dep_ref.alias:
-                # If alias is provided, use it directly (assume user handles namespacing)
-                install_name = dep_ref.alias
-                install_path = apm_modules_dir / install_name
+            install_path = get_install_path(apm_modules_dir, dep_ref)
+            locked = lockfile.get(dep_ref)
+            # Install the commit from apm.lock, or the one resolved while fetching its apm.yml
+            resolved = resolver.get_resolved_reference(dep_ref)
+            commit = locked.resolved_commit if locked else resolved.resolved_commit if resolved else None
+            if commit is not None:
+                manifest, problem = check_installed_package(install_path, commit, deep=verify)
+                if problem is None and locked is not None and locked.tree and manifest.tree != locked.tree:
+                    problem = f"files do not match the tree hash in {LOCKFILE_NAME}"
+                if problem is None:
+                    _rich_info(f"✓ {dep_ref.repo_url} (cached)")
+                    if timings is not None:
+                        timings.set_source(dep_ref.repo_url, "installed")
+                    new_lockfile.dependencies[dep_ref.repo_url] = locked or LockedDependency(
+                        dep_ref.repo_url, dep_ref.reference, resolved.ref_type.value, commit,
+                        manifest.tree, parents.get(dep_ref.repo_url))
+                    continue
+                if install_path.exists():
+                    _rich_info(f"↻ {dep_ref.repo_url}: {problem} - installing again")
+            tasks.append(InstallTask(dep_ref, install_path, commit))
+        
+        # Download concurrently, reporting each package as it finishes
+        finished = 0
+        # Tasks sharing an install path are downloaded once
+        total = len({task.install_path for task in tasks})
+        
+        def download(repo_ref: str, install_path: Path, locked_commit: str = None):
+            package_info = downloader.download_package(repo_ref, install_path, locked_commit=locked_commit)
+            locked = lockfile.get(DependencyReference.parse(repo_ref))
+            if locked is not None and locked.tree and package_info.tree_hash != locked.tree:
+                shutil.rmtree(install_path, ignore_errors=True)
+                raise RuntimeError(f"files at commit {locked_commit[:8]} do not match the tree hash in {LOCKFILE_NAME}")
+            return package_info
+        
+        def report(result):
+            nonlocal finished
+            finished += 1
+            dep_ref = result.task.dep_ref
+            progress = f"[{finished}/{total}]"
+            if timings is not None and not result.skipped:
+                package_timings = timings.package(dep_ref.repo_url)
+                package_timings.elapsed = result.elapsed
+                package_timings.error = str(result.error) if result.error is not None else None
+            if result.success:
+                _rich_success(f"{progress} ✓ {dep_ref.repo_url}#{dep_ref.reference or 'main'} ({result.elapsed:.1f}s)")
             else:
-                # Use org/repo structure to prevent collisions
-                repo_parts = dep_ref.repo_url.split('/')
-                if len(repo_parts) >= 2:
-                    org_name = repo_parts[0]
-                    repo_name = repo_parts[1]
-                    install_path = apm_modules_dir / org_name / repo_name
-                else:
-                    # Fallback for invalid repo URLs
-                    install_path = apm_modules_dir / dep_ref.repo_url
-            
-            # Skip if already exists and not updating
-            if install_path.exists() and not update_refs:
-                _rich_info(f"✓ {dep_ref.repo_url} (cached)")
-                continue
-            
-            # Download the package
-            try:
-                _rich_info(f"  {dep_ref.repo_url}#{dep_ref.reference or 'main'}")
-                
-                package_info = downloader.download_package(str(dep_ref), install_path)
-                installed_count += 1
-                
-                _rich_success(f"✓ {dep_ref.repo_url}")
-                
-            except Exception as e:
-                _rich_error(f"❌ Failed to install {dep_ref.repo_url}: {e}")
-                # Continue with other packages instead of failing completely
-                continue
+                _rich_error(f"{progress} ❌ Failed to install {dep_ref.repo_url}: {result.error}")
+        
+        with timings.stage("download") if timings is not None else nullcontext():
+            results = install_packages(tasks, download, jobs=jobs, fail_fast=fail_fast, on_result=report)
+        installed_count = sum(1 for result in results if result.success)
+        failed = [result for result in results if result.error is not None]
+        skipped = [result for result in results if result.skipped]
         
         # Update .gitignore
         _update_gitignore_for_apm_modules()
         
+        # Record what was installed; a partial install leaves apm.lock as it was
+        if not frozen and not failed:
+            for result in results:
+                if not result.success:
+                    continue
+                dep_ref = result.task.dep_ref
+                locked = lockfile.get(dep_ref)
+                if locked is not None:
+                    locked.tree = result.package_info.tree_hash
+                    new_lockfile.dependencies[dep_ref.repo_url] = locked
+                else:
+                    new_lockfile.record(dep_ref, result.package_info, parents.get(dep_ref.repo_url),
+                                        resolver.get_resolved_reference(dep_ref))
+            new_lockfile.save(lockfile_path)
+        
         _rich_success(f"Installed {installed_count} APM dependencies")
+        if failed:
+            # Listed in installation order, whatever order the downloads finished in
+            _rich_warning(f"Failed to install {len(failed)} APM dependencies: "
+                          + ", ".join(result.task.dep_ref.repo_url for result in failed))
+        if fail_fast and failed:
+            if skipped:
+                _rich_info(f"Skipped {len(skipped)} APM dependencies after the first failure")
+            raise RuntimeError(f"Failed to install {failed[0].task.dep_ref.repo_url}: {failed[0].error}")
         
     except Exception as e:
         raise RuntimeError(f"Failed to resolve APM dependencies: {e}")
 
 
+def _report_install_timings(timings: 'InstallTimings', show: bool, json_path: str = None):
+    """Show the APM package timings as a table and/or write them as NDJSON.
+    
+    Args:
+        timings: Timings recorded by ``_install_apm_dependencies``
+        show: Print the table (``--timings``)
+        json_path: File to write one JSON object per package to (``--timings-json``)
+    """
+    if show and timings.packages:
+        headers = ["Package", "Source", *(phase if phase == "apm.yml" else phase.capitalize() for phase in PHASES),
+                   "Total", "Bytes"]
+        stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.stages.items())
+        console = _get_console()
+        if console:
+            try:
+                from rich.table import Table
+                table = Table(title="⏱️  APM Install Timings", show_header=True, header_style="bold cyan",
+                              box=None, pad_edge=False, collapse_padding=True)
+                # Narrow terminals fold package names rather than truncate the figures
+                table.add_column(headers[0], style="bold white", overflow="fold")
+                for index, header in enumerate(headers[1:], start=1):
+                    table.add_column(header, style="white", justify="left" if index == 1 else "right",
+                                     no_wrap=True, min_width=len(header))
+                for row in timings.rows():
+                    table.add_row(*row)
+                console.print(table)
+                if stages:
+                    console.print(f"[muted]{stages}[/muted]")
+            except Exception:
+                console = None
+        if not console:
+            click.echo("\t".join(headers))
+            for row in timings.rows():
+                click.echo("\t".join(row))
+            if stages:
+                click.echo(stages)
+    
+    if json_path:
+        try:
+            timings.write_ndjson(Path(json_path))
+            _rich_info(f"Timings written to {json_path}")
+        except OSError as e:
+            _rich_warning(f"Could not write timings to {json_path}: {e}")
+
+
 def _install_mcp_dependencies(mcp_deps: List[str], runtime: str = None, exclude: str = None):
     """Install MCP dependencies using existing logic.
     
@@ -1003,7 +1159,8 @@ def _install_mcp_dependencies(mcp_deps: List[str], runtime: str = None, exclude:
             # Install for each target runtime using cached server info and shared variables
             for rt in target_runtimes:
                 _rich_info(f"Configuring {rt}...")
-                _install_for_runtime(rt, servers_to_install, shared_env_vars, server_info_cache, shared_runtime_vars)
+                _install_for_runtime(rt, servers_to_install, shared_env_vars, server_info_cache, shared_runtime_vars,
+                                     session=operations.session)
                 
     except ImportError:
         _rich_warning("Registry operations not available")
@@ -1109,7 +1266,8 @@ def _filter_available_runtimes(detected_runtimes: List[str]) -> List[str]:
         return [rt for rt in mcp_compatible if shutil.which(rt)]
 
 
-def _install_for_runtime(runtime: str, mcp_deps: List[str], shared_env_vars: dict = None, server_info_cache: dict = None, shared_runtime_vars: dict = None):
+def _install_for_runtime(runtime: str, mcp_deps: List[str], shared_env_vars: dict = None, server_info_cache: dict = None, shared_runtime_vars: dict = None,
+                         session=None):
     """Install MCP dependencies for a specific runtime."""
     try:
         from apm_cli.factory import ClientFactory
@@ -1121,7 +1279,8 @@ def _install_for_runtime(runtime: str, mcp_deps: List[str], shared_env_vars: dic
         for dep in mcp_deps:
             click.echo(f"  Installing {dep}...")
             try:
-                result = install_package(runtime, dep, shared_env_vars=shared_env_vars, server_info_cache=server_info_cache, shared_runtime_vars=shared_runtime_vars)
+                result = install_package(runtime, dep, shared_env_vars=shared_env_vars, server_info_cache=server_info_cache,
+                                         shared_runtime_vars=shared_runtime_vars, session=session)
                 # Only show warnings for actual failures, not skips due to conflicts
                 if result['failed']:
                     click.echo(f"  ✗ Failed to install {dep}")
@@ -1611,9 +1770,11 @@ def _watch_mode(output, chatmode, no_links, dry_run):
 @click.option('--verbose', '-v', is_flag=True, help="🔍 Show detailed source attribution and optimizer analysis")
 @click.option('--local-only', is_flag=True, help="🏠 Ignore dependencies, compile only local primitives")
 @click.option('--clean', is_flag=True, help="🧹 Remove orphaned AGENTS.md files that are no longer generated")
+@click.option('--no-cache', is_flag=True, help="♻️  Ignore and do not update the incremental compile and primitive caches (.apm/cache)")
+@click.option('--jobs', '-j', type=click.IntRange(min=1), help="⚡ Number of threads parsing primitive files (default: CPU count, up to 8)")
 @click.pass_context
 def compile(ctx, output, dry_run, no_links, chatmode, watch, validate, with_constitution, 
-           single_agents, verbose, local_only, clean):
+           single_agents, verbose, local_only, clean, no_cache, jobs):
     """Compile APM context into distributed AGENTS.md files.
     
     By default, uses distributed compilation to generate multiple focused AGENTS.md 
@@ -1626,6 +1787,8 @@ def compile(ctx, output, dry_run, no_links, chatmode, watch, validate, with_cons
     • --verbose: Show detailed source attribution and optimizer analysis
     • --local-only: Ignore dependencies, compile only local .apm/ primitives
     • --clean: Remove orphaned AGENTS.md files that are no longer generated
+    • --no-cache: Recompile everything from scratch without the compile cache
+    • --jobs N: Parse primitive files on N threads
     """
     try:
         # Check if this is an APM project first
@@ -1672,8 +1835,12 @@ def compile(ctx, output, dry_run, no_links, chatmode, watch, validate, with_cons
         if validate:
             _rich_info("Validating APM context...", symbol="gear")
             compiler = AgentsCompiler(".")
+            validate_config = CompilationConfig.from_apm_yml(use_cache=False if no_cache else None, jobs=jobs)
+            primitive_cache = PrimitiveCache.load(".") if validate_config.use_cache else None
             try:
-                primitives = discover_primitives(".")
+                primitives = discover_primitives(".", cache=primitive_cache, jobs=validate_config.jobs)
+                if primitive_cache is not None:
+                    primitive_cache.save()
             except Exception as e:
                 _rich_error(f"Failed to discover primitives: {e}")
                 _rich_info(f"💡 Error details: {type(e).__name__}")
@@ -1707,7 +1874,9 @@ def compile(ctx, output, dry_run, no_links, chatmode, watch, validate, with_cons
             trace=verbose,
             local_only=local_only,
             debug=verbose,
-            clean_orphaned=clean
+            clean_orphaned=clean,
+            use_cache=False if no_cache else None,
+            jobs=jobs
         )
         config.with_constitution = with_constitution
 
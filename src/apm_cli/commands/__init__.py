@@ -1,5 +1,6 @@
 """Commands package for APM CLI."""
 
+from .cache import cache
 from .deps import deps
 
-__all__ = ['deps']
\ No newline at end of file
+__all__ = ['cache', 'deps']
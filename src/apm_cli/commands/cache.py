@@ -0,0 +1,91 @@
+"""APM package store commands."""
+
+import re
+import sys
+import time
+
+import click
+
+from ..deps.package_store import DEFAULT_STORE_MAX_SIZE, PackageStore
+from ..utils.console import _rich_error, _rich_info, _rich_success
+
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(value: str) -> int:
+    """Parse a size such as ``500M``, ``2GB`` or ``1048576`` into bytes.
+
+    Raises:
+        ValueError: If the size cannot be parsed.
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:i?B)?\s*", value, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size '{value}' (expected e.g. 500M or 2G)")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def format_size(size: int) -> str:
+    """Format a byte count for display."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def _format_age(timestamp: float) -> str:
+    """Format how long ago a timestamp was."""
+    seconds = max(0, time.time() - timestamp)
+    for unit, length in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= length:
+            return f"{int(seconds // length)}{unit} ago"
+    return "just now"
+
+
+@click.group(help="Manage the machine-wide APM package store")
+def cache():
+    """APM package store commands."""
+    pass
+
+
+@cache.command(help="📊 Show package store usage")
+def stats():
+    """Show the size of the package store and its least and most recently used packages."""
+    store = PackageStore()
+    entries = store.entries()
+    _rich_info(f"Package store: {store.root}")
+    if not entries:
+        _rich_info("No packages stored yet")
+        return
+
+    total = sum(entry.size for entry in entries)
+    files = sum(entry.files for entry in entries)
+    _rich_info(f"Packages: {len(entries)} ({files} files, {format_size(total)})")
+    _rich_info(f"Least recently used: {entries[0].source} ({_format_age(entries[0].last_used)})")
+    _rich_info(f"Most recently used: {entries[-1].source} ({_format_age(entries[-1].last_used)})")
+
+
+@cache.command(help="🧹 Evict least recently used packages above a size cap")
+@click.option('--max-size', default=None, help=f"Size to shrink the store to, e.g. 500M (default: {format_size(DEFAULT_STORE_MAX_SIZE)})")
+@click.option('--dry-run', is_flag=True, help="Show what would be evicted without removing anything")
+def prune(max_size, dry_run):
+    """Evict packages, least recently used first, until the store fits in the size cap."""
+    try:
+        limit = parse_size(max_size) if max_size is not None else DEFAULT_STORE_MAX_SIZE
+    except ValueError as e:
+        _rich_error(str(e))
+        sys.exit(1)
+
+    store = PackageStore()
+    evicted = store.prune(max_size=limit, dry_run=dry_run)
+    if not evicted:
+        _rich_success(f"Package store is within {format_size(limit)} - nothing to evict")
+        return
+
+    freed = sum(entry.size for entry in evicted)
+    for entry in evicted:
+        _rich_info(f"  - {entry.source}@{entry.commit[:8]} ({format_size(entry.size)}, used {_format_age(entry.last_used)})")
+    if dry_run:
+        _rich_info(f"Would evict {len(evicted)} packages ({format_size(freed)})")
+    else:
+        _rich_success(f"Evicted {len(evicted)} packages ({format_size(freed)})")
@@ -8,11 +8,14 @@ from typing import List, Optional, Dict, Any
 
 # Import existing APM components
 from ..models.apm_package import APMPackage, ValidationResult, validate_apm_package
+from ..primitives.package_index import load_package_index
 from ..utils.console import _rich_success, _rich_error, _rich_info, _rich_warning
 
 # Import APM dependency system components (with fallback)
 from ..deps.github_downloader import GitHubPackageDownloader
 from ..deps.apm_resolver import APMDependencyResolver
+from ..deps.installer import get_install_path
+from ..deps.lockfile import LOCKFILE_NAME, Lockfile, LockfileError
 
 
 
@@ -351,12 +354,20 @@ def update(package: Optional[str]):
         _rich_error(f"Error reading apm.yml: {e}")
         return
     
+    # Packages still at their locked commit are not downloaded again
+    try:
+        lockfile = Lockfile.load(project_root / LOCKFILE_NAME)
+    except LockfileError:
+        lockfile = None
+    
     if package:
         # Update specific package
-        _update_single_package(package, project_deps, apm_modules_path)
+        updated = _update_single_package(package, project_deps, apm_modules_path, lockfile)
     else:
         # Update all packages
-        _update_all_packages(project_deps, apm_modules_path)
+        updated = _update_all_packages(project_deps, apm_modules_path, lockfile)
+    
+    _record_updates_in_lockfile(project_root / LOCKFILE_NAME, updated)
 
 
 @deps.command(help="ℹ️ Show detailed package information")
@@ -471,33 +482,14 @@ def info(package: str):
 def _count_package_files(package_path: Path) -> tuple[int, int]:
     """Count context files and workflows in a package.
     
+    Read from the package's install-time manifest (rescanned if missing or stale).
+    
     Returns:
         tuple: (context_count, workflow_count)
     """
-    apm_dir = package_path / ".apm"
-    if not apm_dir.exists():
-        # Also check root directory for .prompt.md files
-        workflow_count = len(list(package_path.glob("*.prompt.md")))
-        return 0, workflow_count
-    
-    context_count = 0
-    context_dirs = ['instructions', 'chatmodes', 'contexts']
-    
-    for context_dir in context_dirs:
-        context_path = apm_dir / context_dir
-        if context_path.exists() and context_path.is_dir():
-            context_count += len(list(context_path.glob("*.md")))
-    
-    # Count workflows in both .apm/prompts and root directory
-    workflow_count = 0
-    prompts_path = apm_dir / "prompts"
-    if prompts_path.exists() and prompts_path.is_dir():
-        workflow_count += len(list(prompts_path.glob("*.prompt.md")))
-    
-    # Also check root directory for .prompt.md files
-    workflow_count += len(list(package_path.glob("*.prompt.md")))
-    
-    return context_count, workflow_count
+    index = load_package_index(package_path)
+    context_count = len(index.files("chatmode", "instruction", "context"))
+    return context_count, index.count("prompt")
 
 
 def _count_workflows(package_path: Path) -> int:
@@ -508,26 +500,12 @@ def _count_workflows(package_path: Path) -> int:
 
 def _get_detailed_context_counts(package_path: Path) -> Dict[str, int]:
     """Get detailed context file counts by type."""
-    apm_dir = package_path / ".apm"
-    if not apm_dir.exists():
-        return {'instructions': 0, 'chatmodes': 0, 'contexts': 0}
-    
-    counts = {}
-    context_directories = {
-        'instructions': 'instructions',
-        'chatmodes': 'chatmodes', 
-        'contexts': 'context'  # Note: directory is 'context', not 'contexts'
+    index = load_package_index(package_path)
+    return {
+        'instructions': index.count("instruction"),
+        'chatmodes': index.count("chatmode"),
+        'contexts': index.count("context"),  # .context.md and .memory.md files
     }
-    
-    for context_type, directory_name in context_directories.items():
-        count = 0
-        context_path = apm_dir / directory_name
-        if context_path.exists() and context_path.is_dir():
-            # Count all .md files in the directory regardless of specific naming
-            count = len(list(context_path.glob("*.md")))
-        counts[context_type] = count
-    
-    return counts
 
 
 def _get_package_display_info(package_path: Path) -> Dict[str, str]:
@@ -598,8 +576,32 @@ def _get_detailed_package_info(package_path: Path) -> Dict[str, Any]:
         }
 
 
-def _update_single_package(package_name: str, project_deps: List, apm_modules_path: Path):
-    """Update a specific package."""
+def _record_updates_in_lockfile(lockfile_path: Path, updated: List):
+    """Lock updated packages at their new commits, if the project has an apm.lock."""
+    if not updated:
+        return
+    try:
+        lockfile = Lockfile.load(lockfile_path)
+    except LockfileError as e:
+        _rich_warning(f"{e} - not updated")
+        return
+    if lockfile is None:
+        return
+    for dep, package_info in updated:
+        parent = lockfile.dependencies[dep.repo_url].parent if dep.repo_url in lockfile.dependencies else None
+        lockfile.record(dep, package_info, parent)
+    lockfile.save(lockfile_path)
+
+
+def _installed_commit(lockfile: Optional[Lockfile], dep) -> Optional[str]:
+    """Get the commit apm.lock says a dependency is installed at."""
+    locked = lockfile.get(dep) if lockfile is not None else None
+    return locked.resolved_commit if locked is not None else None
+
+
+def _update_single_package(package_name: str, project_deps: List, apm_modules_path: Path,
+                           lockfile: Optional[Lockfile] = None) -> List:
+    """Update a specific package, returning (dependency, package info) if it was updated."""
     # Find the dependency reference for this package
     target_dep = None
     for dep in project_deps:
@@ -609,64 +611,66 @@ def _update_single_package(package_name: str, project_deps: List, apm_modules_pa
     
     if not target_dep:
         _rich_error(f"Package '{package_name}' not found in apm.yml dependencies")
-        return
+        return []
     
     # Find the installed package directory
-    package_dir = None
-    if target_dep.alias:
-        package_dir = apm_modules_path / target_dep.alias
-    else:
-        package_dir = apm_modules_path / package_name
+    package_dir = get_install_path(apm_modules_path, target_dep)
         
     if not package_dir.exists():
         _rich_error(f"Package '{package_name}' not installed in apm_modules/")
         _rich_info(f"Run 'apm install' to install it first")
-        return
+        return []
     
     try:
         downloader = GitHubPackageDownloader()
         _rich_info(f"Updating {target_dep.repo_url}...")
         
-        # Download latest version
-        package_info = downloader.download_package(str(target_dep), package_dir)
+        # Download the latest version, unless it is installed already
+        package_info = downloader.update_package(str(target_dep), package_dir,
+                                                 _installed_commit(lockfile, target_dep))
+        if package_info is None:
+            _rich_success(f"✅ {target_dep.repo_url} is up to date")
+            return []
         
         _rich_success(f"✅ Updated {target_dep.repo_url}")
+        return [(target_dep, package_info)]
         
     except Exception as e:
         _rich_error(f"Failed to update {package_name}: {e}")
+        return []
 
 
-def _update_all_packages(project_deps: List, apm_modules_path: Path):
-    """Update all packages."""
+def _update_all_packages(project_deps: List, apm_modules_path: Path, lockfile: Optional[Lockfile] = None) -> List:
+    """Update all packages, returning (dependency, package info) of each updated one."""
     if not project_deps:
         _rich_info("No APM dependencies to update")
-        return
+        return []
         
     _rich_info(f"Updating {len(project_deps)} APM dependencies...")
     
     downloader = GitHubPackageDownloader()
-    updated_count = 0
+    updated = []
+    up_to_date = 0
     
     for dep in project_deps:
         # Determine package directory
-        if dep.alias:
-            package_dir = apm_modules_path / dep.alias
-        else:
-            package_dir = apm_modules_path / dep.repo_url.split('/')[-1]
+        package_dir = get_install_path(apm_modules_path, dep)
             
         if not package_dir.exists():
             _rich_warning(f"⚠️ {dep.repo_url} not installed - skipping")
             continue
             
         try:
-            _rich_info(f"  Updating {dep.repo_url}...")
-            package_info = downloader.download_package(str(dep), package_dir)
-            updated_count += 1
+            package_info = downloader.update_package(str(dep), package_dir, _installed_commit(lockfile, dep))
+            if package_info is None:
+                up_to_date += 1
+                continue
+            updated.append((dep, package_info))
             _rich_success(f"  ✅ {dep.repo_url}")
             
         except Exception as e:
             _rich_error(f"  ❌ Failed to update {dep.repo_url}: {e}")
             continue
     
-    _rich_success(f"Updated {updated_count} of {len(project_deps)} packages")
-
+    _rich_success(f"Updated {len(updated)} of {len(project_deps)} packages ({up_to_date} already up to date)")
+    return updated
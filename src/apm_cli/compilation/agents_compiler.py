@@ -10,7 +10,9 @@ from pathlib import Path
 from typing import List, Optional, Dict, Any
 from ..primitives.models import PrimitiveCollection
 from ..primitives.discovery import discover_primitives
+from ..utils.project_walker import ProjectWalker
 from ..version import get_version
+from .compile_cache import CompileCache
 from .template_builder import (
     build_conditional_sections,
     generate_agents_md_template,
@@ -38,6 +40,8 @@ class CompilationConfig:
     min_instructions_per_file: int = 1  # Minimum instructions per AGENTS.md file (Minimal Context Principle)
     source_attribution: bool = True  # Include source file comments
     clean_orphaned: bool = False  # Remove orphaned AGENTS.md files
+    use_cache: bool = True  # Reuse results of earlier compiles from .apm/cache/compile-state
+    jobs: Optional[int] = None  # Threads parsing primitive files (None = default pool size)
     
     def __post_init__(self):
         """Handle CLI flag precedence after initialization."""
@@ -94,6 +98,14 @@ class CompilationConfig:
                 if 'source_attribution' in compilation_config:
                     config.source_attribution = compilation_config['source_attribution']
                 
+                # Incremental compile cache
+                if 'cache' in compilation_config:
+                    config.use_cache = bool(compilation_config['cache'])
+                
+                # Parallel primitive parsing
+                if 'jobs' in compilation_config:
+                    config.jobs = int(compilation_config['jobs'])
+                
         except Exception:
             # If config loading fails, use defaults
             pass
@@ -133,6 +145,8 @@ class AgentsCompiler:
         self.base_dir = Path(base_dir)
         self.warnings: List[str] = []
         self.errors: List[str] = []
+        self._compile_cache: Optional[CompileCache] = None
+        self._walker: Optional[ProjectWalker] = None
     
     def compile(self, config: CompilationConfig, primitives: Optional[PrimitiveCollection] = None) -> CompilationResult:
         """Compile AGENTS.md with the given configuration.
@@ -146,24 +160,39 @@ class AgentsCompiler:
         """
         self.warnings.clear()
         self.errors.clear()
+        self._compile_cache = CompileCache.load(self.base_dir) if config.use_cache else None
+        # One project walk per compile, shared by discovery, placement and orphan detection
+        self._walker = ProjectWalker.for_project(self.base_dir)
         
         try:
             # Use provided primitives or discover them (with dependency support)
-            if primitives is None:
+            if primitives is None and self._compile_cache is not None:
+                # Reuses the previous discovery and parsed primitives where unchanged
+                primitives = self._compile_cache.discover_primitives(
+                    str(self.base_dir), config.local_only, walker=self._walker, jobs=config.jobs
+                )
+            elif primitives is None:
                 if config.local_only:
                     # Use basic discovery for local-only mode
-                    primitives = discover_primitives(str(self.base_dir))
+                    primitives = discover_primitives(str(self.base_dir), walker=self._walker, jobs=config.jobs)
                 else:
                     # Use enhanced discovery with dependencies (Task 4 integration)
                     from ..primitives.discovery import discover_primitives_with_dependencies
-                    primitives = discover_primitives_with_dependencies(str(self.base_dir))
+                    primitives = discover_primitives_with_dependencies(
+                        str(self.base_dir), walker=self._walker, jobs=config.jobs
+                    )
             
             # Handle distributed compilation (Task 7 - new default behavior)
             if config.strategy == "distributed" and not config.single_agents:
-                return self._compile_distributed(config, primitives)
+                result = self._compile_distributed(config, primitives)
             else:
                 # Traditional single-file compilation (backward compatibility)
-                return self._compile_single_file(config, primitives)
+                result = self._compile_single_file(config, primitives)
+            
+            # Preview runs leave the cache as it was, like every other file
+            if self._compile_cache is not None and result.success and not config.dry_run:
+                self._compile_cache.save()
+            return result
                 
         except Exception as e:
             self.errors.append(f"Compilation failed: {str(e)}")
@@ -189,7 +218,9 @@ class AgentsCompiler:
         from .distributed_compiler import DistributedAgentsCompiler
         
         # Create distributed compiler
-        distributed_compiler = DistributedAgentsCompiler(str(self.base_dir))
+        distributed_compiler = DistributedAgentsCompiler(
+            str(self.base_dir), compile_cache=self._compile_cache, walker=self._walker
+        )
         
         # Prepare configuration for distributed compilation
         distributed_config = {
@@ -204,9 +235,27 @@ class AgentsCompiler:
         # Compile distributed
         distributed_result = distributed_compiler.compile_distributed(primitives, distributed_config)
         
+        # Write files before displaying, so the summary can report what was written
+        emit_result = None
+        if distributed_result.success and not config.dry_run:
+            from .emitter import AgentsFileEmitter
+            emitter = AgentsFileEmitter(with_constitution=config.with_constitution)
+            emit_result = emitter.emit(distributed_result.content_map)
+            self.errors.extend(emit_result.errors)
+            
+            # Update stats with actual files written
+            if distributed_result.stats:
+                distributed_result.stats["agents_files_generated"] = emit_result.succeeded
+                distributed_result.stats["agents_files_written"] = len(emit_result.written)
+                distributed_result.stats["agents_files_unchanged"] = len(emit_result.unchanged)
+        
         # Display professional compilation output (always show, not just in debug)
         compilation_results = distributed_compiler.get_compilation_results_for_display(config.dry_run)
         if compilation_results:
+            if emit_result is not None:
+                compilation_results.files_written = len(emit_result.written)
+                compilation_results.files_unchanged = len(emit_result.unchanged)
+            
             if config.debug or config.trace:
                 # Verbose mode with mathematical analysis
                 output = distributed_compiler.output_formatter.format_verbose(compilation_results)
@@ -254,21 +303,6 @@ class AgentsCompiler:
                 stats=distributed_result.stats
             )
         
-        # Write distributed AGENTS.md files
-        successful_writes = 0
-        total_content_entries = len(distributed_result.content_map)
-        
-        for agents_path, content in distributed_result.content_map.items():
-            try:
-                self._write_distributed_file(agents_path, content, config)
-                successful_writes += 1
-            except OSError as e:
-                self.errors.append(f"Failed to write {agents_path}: {str(e)}")
-        
-        # Update stats with actual files written
-        if distributed_result.stats:
-            distributed_result.stats["agents_files_generated"] = successful_writes
-        
         # Merge warnings and errors
         self.warnings.extend(distributed_result.warnings)
         self.errors.extend(distributed_result.errors)
@@ -448,42 +482,6 @@ class AgentsCompiler:
         }
 
 
-    def _write_distributed_file(self, agents_path: Path, content: str, config: CompilationConfig) -> None:
-        """Write a distributed AGENTS.md file with constitution injection support.
-        
-        Args:
-            agents_path (Path): Path to write the AGENTS.md file.
-            content (str): Content to write.
-            config (CompilationConfig): Compilation configuration.
-        """
-        try:
-            # Handle constitution injection for distributed files
-            final_content = content
-            
-            if config.with_constitution:
-                # Try to inject constitution if available
-                try:
-                    from .injector import ConstitutionInjector
-                    injector = ConstitutionInjector(str(agents_path.parent))
-                    final_content, c_status, c_hash = injector.inject(
-                        content, 
-                        with_constitution=True, 
-                        output_path=agents_path
-                    )
-                except Exception:
-                    # If constitution injection fails, use original content
-                    pass
-            
-            # Create directory if it doesn't exist
-            agents_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Write the file
-            with open(agents_path, 'w', encoding='utf-8') as f:
-                f.write(final_content)
-                
-        except OSError as e:
-            raise OSError(f"Failed to write distributed AGENTS.md file {agents_path}: {str(e)}")
-    
     def _display_placement_preview(self, distributed_result) -> None:
         """Display placement preview for --show-placement mode.
         
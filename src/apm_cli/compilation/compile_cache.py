@@ -0,0 +1,429 @@
+"""Persistent incremental compile cache for APM compilation.
+
+The cache lives in ``.apm/cache/compile-state/`` and carries results from one
+``apm compile`` to the next:
+
+- The mtimes of every directory and ignore file discovery depends on, which
+  prove that the set of primitive files is unchanged without walking the
+  project again. Parsed primitives themselves live in the primitive cache
+  (``.apm/cache/primitives.bin``), which this cache loads and saves.
+- The project file index with per-directory mtimes and per-pattern match
+  counts; only directories whose mtime changed are relisted and rematched.
+- Placement decisions keyed on (pattern, fingerprint of the directories the
+  decision depends on); placement never depends on instruction bodies.
+
+Stat-based entries are only trusted when the recorded mtime is older than the
+previous compile by more than the coarsest filesystem timestamp granularity,
+so a change made in the same timestamp tick as a compile is never mistaken for
+"unchanged". Any unreadable or outdated state is ignored and rebuilt.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from ..primitives.cache import CACHE_DIRECTORY, RACY_WINDOW_NS, PrimitiveCache, ensure_cache_directory
+from ..primitives.discovery import get_dependency_paths
+from ..primitives.models import Primitive, PrimitiveCollection
+from ..primitives.package_index import PACKAGE_PRIMITIVE_LOCATIONS, PRIMITIVE_TYPES
+from ..primitives.parser import ParseTask
+from ..utils.project_walker import ProjectWalker
+from ..version import get_version
+from .file_index import ProjectFileIndex
+
+
+COMPILE_STATE_DIRECTORY = CACHE_DIRECTORY / "compile-state"
+STATE_FILE_NAME = "state.json"
+STATE_FORMAT_VERSION = 2
+
+# Hidden directories whose primitive subdirectories discovery looks into explicitly
+PRIMITIVE_ROOTS = (".apm", ".github")
+PRIMITIVE_SUBDIRECTORIES = ("chatmodes", "instructions", "context", "memory")
+
+_MISSING = -1
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _mtime_ns(path: Path) -> int:
+    """Get the mtime of a path, or ``_MISSING`` if it cannot be stat'ed."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return _MISSING
+
+
+class CompileCache:
+    """Incremental compile state shared by discovery, placement and emission."""
+
+    def __init__(self, base_dir: Path):
+        """Create an empty cache for a project.
+
+        Args:
+            base_dir (Path): Project root; state is stored below it.
+        """
+        try:
+            self.base_dir = Path(base_dir).resolve()
+        except (OSError, FileNotFoundError):
+            self.base_dir = Path(base_dir).absolute()
+        self.state_dir = self.base_dir / COMPILE_STATE_DIRECTORY
+        self.started_ns = time.time_ns()
+        # Nothing is trusted until a previous state has been loaded
+        self.trusted_before_ns = _MISSING
+
+        # Parsed primitives, persisted separately so discovery outside compile shares them
+        self.primitive_cache = PrimitiveCache(self.base_dir)
+
+        # State loaded from the previous compile
+        self._discovery: Dict[str, Dict[str, Any]] = {}
+        self._file_index_snapshot: Optional[Dict[str, Any]] = None
+        self._previous_file_index: Optional[ProjectFileIndex] = None
+        self._placements: Dict[str, Dict[str, Any]] = {}
+
+        # State produced by this compile (only entries that were used are kept)
+        self._new_discovery: Dict[str, Dict[str, Any]] = {}
+        self._file_index: Optional[ProjectFileIndex] = None
+        self._used_placements: Dict[str, Dict[str, Any]] = {}
+
+        # Set whenever this compile learned something the saved state lacks
+        self._changed = False
+
+        self._parse_log: Optional[List[List[str]]] = None
+        self._parse_failed = False
+
+        self._stats: Dict[str, int] = {
+            "directories_relisted": 0,
+            "placements_solved": 0,
+            "placements_reused": 0,
+        }
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Counts of reused and recomputed results, including the primitive cache's."""
+        return {**self.primitive_cache.stats, **self._stats}
+
+    @property
+    def state_path(self) -> Path:
+        """Path of the state file."""
+        return self.state_dir / STATE_FILE_NAME
+
+    @classmethod
+    def load(cls, base_dir: Path) -> 'CompileCache':
+        """Load the cache of a project, starting empty if the state is missing or outdated.
+
+        Args:
+            base_dir (Path): Project root.
+
+        Returns:
+            CompileCache: Cache primed with the previous compile's state.
+        """
+        cache = cls(base_dir)
+        cache.primitive_cache = PrimitiveCache.load(cache.base_dir)
+        try:
+            with open(cache.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return cache
+
+        if (not isinstance(state, dict)
+                or state.get("format") != STATE_FORMAT_VERSION
+                or state.get("apm_version") != get_version()):
+            return cache
+
+        try:
+            cache.trusted_before_ns = int(state["started_ns"]) - RACY_WINDOW_NS
+            cache._discovery = dict(state.get("discovery", {}))
+            cache._file_index_snapshot = state.get("file_index")
+            cache._placements = dict(state.get("placements", {}))
+        except (KeyError, TypeError, ValueError):
+            fresh = cls(base_dir)
+            fresh.primitive_cache = cache.primitive_cache
+            return fresh
+        return cache
+
+    def save(self) -> None:
+        """Write this compile's state and the primitive cache atomically.
+
+        Skipped when every result was reused, since the saved state is then
+        still accurate. Failures are ignored: the cache only ever speeds
+        compilation up.
+        """
+        self.primitive_cache.save()
+        if not self._changed and not self._has_new_match_counts():
+            return
+
+        state = {
+            "format": STATE_FORMAT_VERSION,
+            "apm_version": get_version(),
+            "started_ns": self.started_ns,
+            # Snapshots for a discovery mode not used this time stay valid
+            "discovery": {**self._discovery, **self._new_discovery},
+        }
+        # Sections this compile did not touch (e.g. single-file mode without
+        # placement) are carried over unchanged
+        if self._file_index is not None:
+            state["file_index"] = self._file_index.to_snapshot()
+            state["placements"] = self._used_placements
+        else:
+            state["file_index"] = self._file_index_snapshot
+            state["placements"] = self._placements
+
+        try:
+            ensure_cache_directory(self.base_dir, self.state_dir)
+
+            fd, temp_path = tempfile.mkstemp(dir=self.state_dir, prefix=".state-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, separators=(",", ":"))
+                os.replace(temp_path, self.state_path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError:
+            pass
+
+    def _has_new_match_counts(self) -> bool:
+        """Check whether the file index matched patterns the saved state has no counts for."""
+        index = self._file_index
+        return index is not None and any(pattern not in index._previous_match_counts for pattern in index._match_cache)
+
+    def _is_trusted(self, mtime_ns: int) -> bool:
+        """Check whether an unchanged mtime proves the entry itself is unchanged."""
+        return mtime_ns <= self.trusted_before_ns
+
+    # Discovery
+
+    def discover_primitives(
+        self,
+        base_dir: str,
+        local_only: bool,
+        walker: Optional[ProjectWalker] = None,
+        jobs: Optional[int] = None
+    ) -> PrimitiveCollection:
+        """Discover primitives, replaying the previous discovery when nothing moved.
+
+        If every directory discovery looks into still has its recorded mtime,
+        the same files are found again in the same order, so the previous
+        file list is replayed and only files whose mtime or size changed are
+        parsed. Otherwise discovery runs normally, still reusing unchanged
+        parsed primitives.
+
+        Args:
+            base_dir (str): Base directory exactly as passed to discovery
+                (primitive paths are derived from it).
+            local_only (bool): Skip dependency primitives.
+            walker (Optional[ProjectWalker]): Shared walker of the project.
+            jobs (Optional[int]): Number of threads parsing primitive files.
+
+        Returns:
+            PrimitiveCollection: The discovered primitives.
+        """
+        from ..primitives import discovery
+
+        mode = "local" if local_only else "all"
+        snapshot = self._discovery.get(mode)
+        if (snapshot is not None and snapshot.get("base_dir") == base_dir
+                and self._paths_unchanged(snapshot.get("directories", {}))):
+            collection = self._replay_discovery(snapshot.get("files", []), jobs)
+            if collection is not None:
+                self._new_discovery[mode] = snapshot
+                return collection
+
+        if walker is None:
+            walker = ProjectWalker.for_project(Path(base_dir))
+        self._prime_walker(walker)
+        directories = self._snapshot_discovery_directories(base_dir, walker, local_only)
+        self._changed = True
+        self._parse_log = []
+        self._parse_failed = False
+        try:
+            if local_only:
+                collection = discovery.discover_primitives(base_dir, cache=self, walker=walker, jobs=jobs)
+            else:
+                collection = discovery.discover_primitives_with_dependencies(
+                    base_dir, cache=self, walker=walker, jobs=jobs
+                )
+            files = self._parse_log
+        finally:
+            self._parse_log = None
+
+        # Parse failures print warnings during discovery; do not replay past them
+        if not self._parse_failed:
+            self._new_discovery[mode] = {"base_dir": base_dir, "directories": directories, "files": files}
+        else:
+            self._new_discovery.pop(mode, None)
+            self._discovery.pop(mode, None)
+        return collection
+
+    def parse_primitive_files(
+        self,
+        tasks: Sequence[ParseTask],
+        jobs: Optional[int] = None
+    ) -> List[Union[Primitive, Exception]]:
+        """Parse primitive files through the primitive cache, logging them for discovery replay.
+
+        Called by discovery with its primitive files in discovery order.
+
+        Args:
+            tasks (Sequence[ParseTask]): Files to parse with their source identifiers.
+            jobs (Optional[int]): Number of worker threads.
+
+        Returns:
+            List[Union[Primitive, Exception]]: Per task, the primitive or the
+            exception raised while reading or parsing it.
+        """
+        if self._parse_log is not None:
+            self._parse_log.extend([str(file_path), source] for file_path, source in tasks)
+        results = self.primitive_cache.parse_primitive_files(tasks, jobs)
+        if any(isinstance(result, Exception) for result in results):
+            self._parse_failed = True
+        return results
+
+    def _replay_discovery(self, files: List[List[str]], jobs: Optional[int] = None) -> Optional[PrimitiveCollection]:
+        """Rebuild a collection from a recorded discovery, or None if any file fails."""
+        tasks = [(Path(path), source) for path, source in files]
+        collection = PrimitiveCollection()
+        for result in self.primitive_cache.parse_primitive_files(tasks, jobs):
+            if isinstance(result, Exception):
+                return None
+            collection.add_primitive(result)
+        return collection
+
+    def _snapshot_discovery_directories(
+        self,
+        base_dir: str,
+        walker: ProjectWalker,
+        local_only: bool
+    ) -> Dict[str, int]:
+        """Record the mtime of every path discovery depends on.
+
+        Discovery searches the directories of the project walk and looks into
+        ``.apm/<type>`` and ``.github/<type>`` below each of them; ignore
+        files and ``apm.yml`` decide what is walked and the dependency order.
+        Dependencies (outside the walk) contribute the primitive directories
+        their manifests list. Runs before discovery, so every directory is
+        stat'ed before it is listed.
+
+        Args:
+            base_dir (str): Base directory as passed to discovery.
+            walker (ProjectWalker): Walker discovery will use.
+            local_only (bool): Whether dependency primitives are skipped.
+
+        Returns:
+            Dict[str, int]: Relative path -> mtime (``-1`` for a missing path).
+        """
+        directories: Dict[str, int] = {"apm.yml": _mtime_ns(self.base_dir / "apm.yml")}
+        for walked in walker.walk():
+            directories[walked.relative_path] = walked.mtime_ns
+            for root in PRIMITIVE_ROOTS:
+                if root in walked.hidden_directories:
+                    # Track the primitive subdirectories only: the root
+                    # itself also changes for unrelated content (this cache)
+                    for name in PRIMITIVE_SUBDIRECTORIES:
+                        directories[walked.relative_file_path(f"{root}/{name}")] = _mtime_ns(walked.path / root / name)
+        for relative_path in walker.ignore_files:
+            directories[relative_path] = _mtime_ns(self.base_dir / relative_path)
+        if not local_only:
+            for _, dependency_path in get_dependency_paths(base_dir):
+                relative_dependency = dependency_path.relative_to(base_dir).as_posix()
+                for primitive_type, directory, _ in PACKAGE_PRIMITIVE_LOCATIONS:
+                    if primitive_type in PRIMITIVE_TYPES:
+                        directories[f"{relative_dependency}/{directory}"] = _mtime_ns(dependency_path / directory)
+        return directories
+
+    def _paths_unchanged(self, mtimes: Dict[str, int]) -> bool:
+        """Check that every recorded path still has its (trusted) recorded mtime."""
+        if not mtimes:
+            return False
+        for relative_path, recorded in mtimes.items():
+            path = self.base_dir / relative_path if relative_path else self.base_dir
+            current = _mtime_ns(path)
+            if current != recorded or (current != _MISSING and not self._is_trusted(current)):
+                return False
+        return True
+
+    # File index
+
+    def build_file_index(self, base_dir: Path, walker: Optional[ProjectWalker] = None) -> ProjectFileIndex:
+        """Build the project file index, relisting only directories whose mtime changed.
+
+        Args:
+            base_dir (Path): Resolved project root.
+            walker (Optional[ProjectWalker]): Shared walker of the project.
+
+        Returns:
+            ProjectFileIndex: The current index (saved with the cache).
+        """
+        previous = self._load_previous_file_index(base_dir)
+        if walker is not None:
+            self._prime_walker(walker)
+
+        if previous is not None:
+            index = ProjectFileIndex.rebuild(previous, self.trusted_before_ns, walker)
+            self._stats["directories_relisted"] += len(index.relisted)
+            if index.relisted:
+                self._changed = True
+        else:
+            index = ProjectFileIndex.build(base_dir, walker)
+            self._stats["directories_relisted"] += len(index)
+            self._changed = True
+
+        self._file_index = index
+        return index
+
+    def _load_previous_file_index(self, base_dir: Path) -> Optional[ProjectFileIndex]:
+        """Restore the file index saved by the previous compile, if any."""
+        if self._previous_file_index is None and self._file_index_snapshot is not None:
+            self._previous_file_index = ProjectFileIndex.from_snapshot(base_dir, self._file_index_snapshot)
+        return self._previous_file_index
+
+    def _prime_walker(self, walker: ProjectWalker) -> None:
+        """Let the project walk reuse the previous index's listings of unchanged directories.
+
+        Whichever of discovery and the file index walks first, the walk lists
+        only directories whose mtime changed since the previous compile.
+        """
+        if walker.walked or walker.reuse is not None:
+            return
+        previous = self._load_previous_file_index(walker.base_dir)
+        if previous is not None:
+            walker.reuse = previous.listing_reuse(self.trusted_before_ns)
+
+    # Placement decisions
+
+    @staticmethod
+    def placement_key(pattern: str, fingerprint: str) -> str:
+        """Build the memo key of an instruction's placement decision.
+
+        Placement depends only on the applyTo pattern and the directories it
+        matches, never on the instruction's body, so building the key does not
+        load the body and instructions sharing a pattern share the decision.
+
+        Args:
+            pattern (str): The instruction's applyTo pattern.
+            fingerprint (str): Fingerprint of the directories the decision depends on.
+
+        Returns:
+            str: Memo key.
+        """
+        return _sha256(f"{pattern}\0{fingerprint}")
+
+    def get_placement(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a memoized placement decision (relative placement paths and decision fields)."""
+        entry = self._placements.get(key)
+        if entry is not None:
+            self._used_placements[key] = entry
+            self._stats["placements_reused"] += 1
+        return entry
+
+    def store_placement(self, key: str, entry: Dict[str, Any]) -> None:
+        """Memoize a placement decision."""
+        self._used_placements[key] = entry
+        self._stats["placements_solved"] += 1
+        self._changed = True
@@ -5,22 +5,26 @@ irrelevant context loaded by agents working in specific directories,
 following the Minimal Context Principle.
 """
 
-import fnmatch
-import os
+import hashlib
 import time
 from collections import defaultdict
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
-from functools import lru_cache
-import glob
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
 
 from ..primitives.models import Instruction
+from ..utils.project_walker import ProjectWalker
+from .directory_tree import DirectoryTree
+from .file_index import ProjectFileIndex
+from .match_matrix import DirectoryMatchMatrix, iter_bits, popcount
 from ..output.models import (
     CompilationResults, ProjectAnalysis, OptimizationDecision, OptimizationStats,
     PlacementStrategy, PlacementSummary
 )
 
+if TYPE_CHECKING:
+    from .compile_cache import CompileCache
+
 
 @dataclass
 class DirectoryAnalysis:
@@ -88,11 +92,20 @@ class ContextOptimizer:
     LOW_DISTRIBUTION_THRESHOLD = 0.3
     HIGH_DISTRIBUTION_THRESHOLD = 0.7
     
-    def __init__(self, base_dir: str = "."):
+    def __init__(
+        self,
+        base_dir: str = ".",
+        compile_cache: Optional["CompileCache"] = None,
+        walker: Optional[ProjectWalker] = None
+    ):
         """Initialize the context optimizer.
         
         Args:
             base_dir (str): Base directory for optimization analysis.
+            compile_cache (Optional[CompileCache]): Persistent cache for the file
+                index and placement decisions of earlier compiles.
+            walker (Optional[ProjectWalker]): Project walk shared with discovery;
+                a walker honoring the project's ignore rules is created when omitted.
         """
         try:
             self.base_dir = Path(base_dir).resolve()
@@ -103,8 +116,12 @@ class ContextOptimizer:
         self._pattern_cache: Dict[str, Set[Path]] = {}
         
         # Performance optimization caches
-        self._glob_cache: Dict[str, List[str]] = {}
-        self._file_list_cache: Optional[List[Path]] = None
+        self._file_index: Optional[ProjectFileIndex] = None
+        self._directory_tree: Optional[DirectoryTree] = None
+        self._match_matrix: Optional[DirectoryMatchMatrix] = None
+        self._compile_cache = compile_cache
+        self._walker = walker if walker is not None else ProjectWalker.for_project(self.base_dir)
+        self._fingerprint_parts: Dict[int, str] = {}  # directory ID -> structural part of placement fingerprints
         self._timing_enabled = False
         self._phase_timings: Dict[str, float] = {}
         
@@ -134,28 +151,43 @@ class ContextOptimizer:
             print(f"⏱️  {phase_name}: {duration*1000:.1f}ms")
         return result
     
-    def _cached_glob(self, pattern: str) -> List[str]:
-        """Cache glob results to avoid repeated filesystem scans."""
-        if pattern not in self._glob_cache:
-            old_cwd = os.getcwd()
-            try:
-                os.chdir(str(self.base_dir))  # Convert Path to string for os.chdir
-                self._glob_cache[pattern] = glob.glob(pattern, recursive=True)
-            finally:
-                os.chdir(old_cwd)
-        return self._glob_cache[pattern]
+    def _get_file_index(self) -> ProjectFileIndex:
+        """Get the project file index, building it on first use."""
+        if self._file_index is None:
+            self._file_index = self._build_file_index()
+        return self._file_index
+    
+    def _build_file_index(self) -> ProjectFileIndex:
+        """Build the project file index, incrementally when a compile cache is available."""
+        if self._compile_cache is not None:
+            return self._compile_cache.build_file_index(self.base_dir, self._walker)
+        return ProjectFileIndex.build(self.base_dir, self._walker)
+    
+    def _get_match_matrix(self) -> DirectoryMatchMatrix:
+        """Get the pattern x directory match matrix, building it on first use."""
+        if self._match_matrix is None:
+            file_index = self._get_file_index()
+            if self._directory_tree is None:
+                self._directory_tree = DirectoryTree(file_index)
+            self._match_matrix = DirectoryMatchMatrix(file_index, self._directory_tree)
+            self._fingerprint_parts.clear()
+        return self._match_matrix
+    
+    def _tree_ids(self, *directories: Path) -> Optional[Tuple[int, ...]]:
+        """Get directory tree IDs for analysed directories.
+        
+        Returns None if the project has not been analysed yet or any of the
+        directories is not indexed, so callers can fall back to path logic.
+        """
+        tree = self._directory_tree
+        if tree is None:
+            return None
+        directory_ids = tuple(tree.ids.get(directory) for directory in directories)
+        return None if None in directory_ids else directory_ids
     
     def _get_all_files(self) -> List[Path]:
-        """Get cached list of all files in project."""
-        if self._file_list_cache is None:
-            self._file_list_cache = []
-            for root, dirs, files in os.walk(self.base_dir):
-                # Skip hidden directories for performance
-                dirs[:] = [d for d in dirs if not d.startswith('.')]
-                for file in files:
-                    if not file.startswith('.'):
-                        self._file_list_cache.append(Path(root) / file)
-        return self._file_list_cache
+        """Get list of all indexed files in project."""
+        return list(self._get_file_index().iter_files())
     
     def optimize_instruction_placement(
         self, 
@@ -274,13 +306,18 @@ class ContextOptimizer:
             )
         
         # Calculate average context efficiency across all directories with files
-        all_directories = set(self._directory_cache.keys())
         efficiency_scores = []
         
-        for directory in all_directories:
-            if self._directory_cache[directory].total_files > 0:
-                inheritance = self.analyze_context_inheritance(directory, placement_map)
-                efficiency_scores.append(inheritance.get_efficiency_ratio())
+        if self._directory_tree is not None:
+            context_loads = self._calculate_context_loads(placement_map)
+            for directory, (total_context, relevant_context) in context_loads.items():
+                if self._directory_cache[directory].total_files > 0:
+                    efficiency_scores.append(relevant_context / total_context if total_context > 0 else 1.0)
+        else:
+            for directory in self._directory_cache:
+                if self._directory_cache[directory].total_files > 0:
+                    inheritance = self.analyze_context_inheritance(directory, placement_map)
+                    efficiency_scores.append(inheritance.get_efficiency_ratio())
         
         average_efficiency = sum(efficiency_scores) / len(efficiency_scores) if efficiency_scores else 0.0
         
@@ -290,6 +327,59 @@ class ContextOptimizer:
             directories_analyzed=len(self._directory_cache)
         )
 
+    def _calculate_context_loads(
+        self,
+        placement_map: Dict[Path, List[Instruction]]
+    ) -> Dict[Path, Tuple[int, int]]:
+        """Calculate total and relevant context load for every analysed directory.
+        
+        Equivalent to calling analyze_context_inheritance for each directory,
+        but done in one top-down pass over the directory tree: each directory
+        inherits its parent's accumulated instruction load (total count, global
+        count and per-pattern counts) and adds the instructions placed in it.
+        
+        Args:
+            placement_map (Dict[Path, List[Instruction]]): Current placement mapping.
+        
+        Returns:
+            Dict[Path, Tuple[int, int]]: Directory -> (total_context_load, relevant_context_load).
+        """
+        tree = self._directory_tree
+        file_index = self._get_file_index()
+        context_loads: Dict[Path, Tuple[int, int]] = {}
+        
+        # Per-directory load state, shared with the parent unless instructions are placed here
+        inherited_loads: List[Tuple[int, int, Dict[str, int]]] = []
+        empty_load: Tuple[int, int, Dict[str, int]] = (0, 0, {})
+        
+        # Pre-order IDs guarantee parents are visited before their children
+        for directory_id, directory in enumerate(tree.paths):
+            parent_id = tree.parents[directory_id]
+            total_context, global_context, pattern_counts = (
+                inherited_loads[parent_id] if parent_id >= 0 else empty_load
+            )
+            
+            instructions = placement_map.get(directory)
+            if instructions:
+                total_context += len(instructions)
+                pattern_counts = dict(pattern_counts)
+                for instruction in instructions:
+                    if instruction.apply_to:
+                        pattern_counts[instruction.apply_to] = pattern_counts.get(instruction.apply_to, 0) + 1
+                    else:
+                        global_context += 1  # Global instructions are always relevant
+            
+            inherited_loads.append((total_context, global_context, pattern_counts))
+            
+            if directory in self._directory_cache:
+                relevant_context = global_context + sum(
+                    count for pattern, count in pattern_counts.items()
+                    if file_index.match_counts(pattern).get(directory, 0) > 0
+                )
+                context_loads[directory] = (total_context, relevant_context)
+        
+        return context_loads
+    
     def get_compilation_results(
         self,
         placement_map: Dict[Path, List[Instruction]],
@@ -372,6 +462,8 @@ class ContextOptimizer:
         # Get optimization statistics
         optimization_stats = self.get_optimization_stats(placement_map)
         optimization_stats.generation_time_ms = generation_time_ms
+        if self._file_index is not None:
+            optimization_stats.index_build_time_ms = self._file_index.build_time * 1000
         
         return CompilationResults(
             project_analysis=project_analysis,
@@ -384,55 +476,34 @@ class ContextOptimizer:
         )
     
     def _analyze_project_structure(self) -> None:
-        """Analyze the project structure and cache results."""
+        """Analyze the project structure and cache results.
+        
+        Builds the project file index with a single directory walk; all later
+        pattern matching is answered from the index.
+        """
         self._directory_cache.clear()
         self._pattern_cache.clear()  # Also clear pattern cache for deterministic behavior
         
-        # Track visited directories to prevent infinite loops
-        visited_dirs = set()
+        self._file_index = self._time_phase("🗂️  File Index", self._build_file_index)
+        self._directory_tree = DirectoryTree(self._file_index)
+        self._match_matrix = DirectoryMatchMatrix(self._file_index, self._directory_tree)
+        self._fingerprint_parts.clear()
         
-        for root, dirs, files in os.walk(self.base_dir):
-            current_path = Path(root)
-            
-            # Safety check for infinite loops
-            if current_path in visited_dirs:
-                continue
-            visited_dirs.add(current_path)
-            
-            # Calculate depth for analysis
-            try:
-                relative_path = current_path.relative_to(self.base_dir)
-                depth = len(relative_path.parts)
-            except ValueError:
-                depth = 0
-
-            # Skip hidden directories and common ignore patterns
-            if any(part.startswith('.') for part in current_path.parts[len(self.base_dir.parts):]):
-                continue
-            
-            if any(ignore in str(current_path) for ignore in ['node_modules', '__pycache__', '.git', 'dist', 'build']):
-                continue
-            
-            # Analyze files in this directory
-            total_files = len([f for f in files if not f.startswith('.')])
-            if total_files == 0:
+        for node in self._file_index.iter_directories():
+            if not node.files:
                 continue
             
             analysis = DirectoryAnalysis(
-                directory=current_path,
-                depth=depth,
-                total_files=total_files
+                directory=node.path,
+                depth=node.depth,
+                total_files=len(node.files)
             )
             
             # Analyze file types
-            for file in files:
-                if file.startswith('.'):
-                    continue
-                    
-                file_path = current_path / file
-                analysis.file_types.add(file_path.suffix)
+            for file_name in node.files:
+                analysis.file_types.add(Path(file_name).suffix)
             
-            self._directory_cache[current_path] = analysis
+            self._directory_cache[node.path] = analysis
     
     def _find_optimal_placements(
         self,
@@ -511,6 +582,16 @@ class ContextOptimizer:
             
             return [placement]
         
+        # Reuse the decision of an earlier compile if nothing it depends on changed
+        memo_key = None
+        if self._compile_cache is not None:
+            memo_key = self._compile_cache.placement_key(
+                pattern, self._placement_fingerprint(pattern, matching_directories)
+            )
+            memoized = self._compile_cache.get_placement(memo_key)
+            if memoized is not None:
+                return self._replay_placement_decision(instruction, matching_directories, memoized)
+        
         # Calculate distribution score with diversity factor
         distribution_score = self._calculate_distribution_score(matching_directories)
         
@@ -552,6 +633,81 @@ class ContextOptimizer:
         )
         self._optimization_decisions.append(decision)
         
+        if memo_key is not None:
+            self._memoize_placement_decision(memo_key, decision)
+        
+        return placements
+    
+    def _placement_fingerprint(self, pattern: str, matching_directories: Set[Path]) -> str:
+        """Fingerprint everything a placement decision for ``pattern`` depends on.
+        
+        Scoring only looks at the matching directories, their ancestors (the
+        candidates), the direct children with files of those directories
+        (pollution) and the number of directories with files (distribution),
+        so a change anywhere else in the tree keeps the fingerprint stable.
+        
+        Args:
+            pattern (str): Instruction pattern.
+            matching_directories (Set[Path]): Directories with matching files.
+        
+        Returns:
+            str: Hex digest of the decision inputs.
+        """
+        matrix = self._get_match_matrix()
+        file_index = self._get_file_index()
+        counts = file_index.match_counts(pattern)
+        parts = [str(popcount(matrix.files_mask))]
+        
+        for directory_id in iter_bits(matrix.ancestor_closure(matrix.bits_of(matching_directories))):
+            directory = matrix.paths[directory_id]
+            structure = self._fingerprint_parts.get(directory_id)
+            if structure is None:
+                # Relative path, file count and children with files
+                children = ",".join(child.name for child in matrix.paths_of(matrix.children_mask(directory_id)))
+                structure = f"{file_index.get(directory).relative_path}\0{matrix.file_counts[directory_id]}\0{children}"
+                self._fingerprint_parts[directory_id] = structure
+            parts.append(f"{structure}\0{counts.get(directory, 0)}")
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+    
+    def _memoize_placement_decision(self, memo_key: str, decision: OptimizationDecision) -> None:
+        """Store a placement decision in the compile cache (placements relative to the base directory)."""
+        try:
+            placements = [
+                directory.relative_to(self.base_dir).as_posix() for directory in decision.placement_directories
+            ]
+        except ValueError:
+            return
+        
+        self._compile_cache.store_placement(memo_key, {
+            "placements": ["" if placement == "." else placement for placement in placements],
+            "strategy": decision.strategy.value,
+            "distribution_score": decision.distribution_score,
+            "reasoning": decision.reasoning,
+            "relevance_score": decision.relevance_score,
+        })
+    
+    def _replay_placement_decision(
+        self,
+        instruction: Instruction,
+        matching_directories: Set[Path],
+        memoized: Dict[str, Any]
+    ) -> List[Path]:
+        """Record a memoized placement decision for this compile and return its placements."""
+        placements = [
+            self.base_dir / placement if placement else self.base_dir
+            for placement in memoized["placements"]
+        ]
+        self._optimization_decisions.append(OptimizationDecision(
+            instruction=instruction,
+            pattern=instruction.apply_to,
+            matching_directories=len(matching_directories),
+            total_directories=len(self._directory_cache),
+            distribution_score=memoized["distribution_score"],
+            strategy=PlacementStrategy(memoized["strategy"]),
+            placement_directories=placements,
+            reasoning=memoized["reasoning"],
+            relevance_score=memoized["relevance_score"]
+        ))
         return placements
     
     def _extract_intended_directory_from_pattern(self, pattern: str) -> Optional[Path]:
@@ -579,28 +735,8 @@ class ContextOptimizer:
         
         return None
     
-    def _expand_glob_pattern(self, pattern: str) -> List[str]:
-        """Expand glob pattern with brace expansion.
-        
-        Args:
-            pattern (str): Pattern like '**/*.{css,scss}'
-        
-        Returns:
-            List[str]: Expanded patterns like ['**/*.css', '**/*.scss']
-        """
-        import re
-        
-        # Handle brace expansion like {css,scss}
-        brace_match = re.search(r'\{([^}]+)\}', pattern)
-        if brace_match:
-            extensions = brace_match.group(1).split(',')
-            base_pattern = pattern[:brace_match.start()] + '{}' + pattern[brace_match.end():]
-            return [base_pattern.format(ext) for ext in extensions]
-        
-        return [pattern]
-    
     def _file_matches_pattern(self, file_path: Path, pattern: str) -> bool:
-        """Check if a file matches a given pattern with optimized performance.
+        """Check if a file matches a given pattern using the project file index.
         
         Args:
             file_path (Path): File path to check
@@ -609,43 +745,16 @@ class ContextOptimizer:
         Returns:
             bool: True if file matches pattern
         """
-        # Expand any brace patterns
-        expanded_patterns = self._expand_glob_pattern(pattern)
-        
-        for expanded_pattern in expanded_patterns:
-            # For patterns with **, use cached glob results
-            if '**' in expanded_pattern:
-                try:
-                    # Resolve both paths to handle symlinks and path inconsistencies
-                    resolved_file = file_path.resolve()
-                    rel_path = resolved_file.relative_to(self.base_dir)
-                    
-                    # Use cached glob results instead of repeated glob calls
-                    matches = self._cached_glob(expanded_pattern)
-                    # Convert to Path objects for comparison
-                    match_paths = {Path(match) for match in matches}
-                    if rel_path in match_paths:
-                        return True
-                except (ValueError, OSError):
-                    pass
-            else:
-                # For non-recursive patterns, use fnmatch as before
-                try:
-                    # Resolve both paths to handle symlinks and path inconsistencies
-                    resolved_file = file_path.resolve()
-                    rel_path = resolved_file.relative_to(self.base_dir)
-                    if fnmatch.fnmatch(str(rel_path), expanded_pattern):
-                        return True
-                except ValueError:
-                    pass
-                
-                # Only use filename match for patterns without directory structure
-                # This prevents "docs/**/*.md" from matching any "*.md" file anywhere
-                if '/' not in expanded_pattern:
-                    if fnmatch.fnmatch(file_path.name, expanded_pattern):
-                        return True
+        try:
+            rel_path = file_path.relative_to(self.base_dir)
+        except ValueError:
+            try:
+                # Resolve to handle symlinks and path inconsistencies
+                rel_path = file_path.resolve().relative_to(self.base_dir)
+            except (ValueError, OSError):
+                return False
         
-        return False
+        return self._get_file_index().matches(rel_path.as_posix(), pattern)
     
     def _find_matching_directories(self, pattern: str) -> Set[Path]:
         """Find directories that contain files matching the pattern.
@@ -662,21 +771,12 @@ class ContextOptimizer:
         
         matching_dirs: Set[Path] = set()
         
-        # Use the reliable approach for all patterns
-        for directory, analysis in sorted(self._directory_cache.items()):
-            try:
-                files = [f for f in directory.iterdir() if f.is_file() and not f.name.startswith('.')]
-                
-                match_count = 0
-                for file_path in files:
-                    if self._file_matches_pattern(file_path, pattern):
-                        match_count += 1
-                        matching_dirs.add(directory)
-                
-                if match_count > 0:
-                    analysis.pattern_matches[pattern] = match_count
-            except (OSError, PermissionError):
+        for directory, match_count in self._get_file_index().match_counts(pattern).items():
+            analysis = self._directory_cache.get(directory)
+            if analysis is None:
                 continue
+            analysis.pattern_matches[pattern] = match_count
+            matching_dirs.add(directory)
         
         self._pattern_cache[pattern] = matching_dirs
         return matching_dirs
@@ -691,31 +791,14 @@ class ContextOptimizer:
         Returns:
             float: Pollution score (higher = more pollution).
         """
-        pollution_score = 0.0
+        # Only direct children with files are checked: children without matches
+        # add a strong penalty, weakly relevant children a weak one
+        matrix = self._get_match_matrix()
+        directory_id = matrix.id_of(directory)
+        if directory_id is None:
+            return 0.0
         
-        # Optimization: Only check direct children instead of all directories
-        # This prevents O(n²) complexity with unlimited depth analysis
-        try:
-            direct_children = [
-                child for child in directory.iterdir() 
-                if child.is_dir() and child in self._directory_cache
-            ]
-            
-            # Check only direct child directories for pollution
-            for child_dir in direct_children:
-                analysis = self._directory_cache[child_dir]
-                
-                # If child has no matching files, this creates pollution
-                child_relevance = analysis.get_relevance_score(pattern)
-                if child_relevance == 0.0:
-                    pollution_score += 0.5  # Strong pollution penalty
-                elif child_relevance < 0.1:  # Weak relevance threshold
-                    pollution_score += 0.2  # Weak pollution penalty
-        except (OSError, PermissionError):
-            # Skip directories we can't read
-            pass
-        
-        return pollution_score
+        return matrix.inheritance_pollution(directory_id, pattern)
     
     def _calculate_distribution_score(self, matching_directories: Set[Path]) -> float:
         """Calculate distribution score with diversity factor.
@@ -726,18 +809,24 @@ class ContextOptimizer:
         Returns:
             float: Distribution score accounting for spread and depth diversity.
         """
-        total_dirs_with_files = len([d for d in self._directory_cache.values() if d.total_files > 0])
+        matrix = self._get_match_matrix()
+        total_dirs_with_files = popcount(matrix.files_mask)
         if total_dirs_with_files == 0:
             return 0.0
         
-        base_ratio = len(matching_directories) / total_dirs_with_files
+        matching_bits = matrix.bits_of(matching_directories)
+        matching_count = popcount(matching_bits)
+        base_ratio = matching_count / total_dirs_with_files
         
         # Calculate diversity factor based on depth distribution
-        depths = [self._directory_cache[d].depth for d in matching_directories]
-        if not depths:
+        if not matching_count:
             return base_ratio
         
-        depth_variance = sum((d - sum(depths)/len(depths))**2 for d in depths) / len(depths)
+        depth_counts = matrix.depth_counts(matching_bits)
+        mean_depth = sum(depth * count for depth, count in depth_counts.items()) / matching_count
+        depth_variance = sum(
+            count * (depth - mean_depth)**2 for depth, count in depth_counts.items()
+        ) / matching_count
         diversity_factor = 1.0 + (depth_variance * self.DIVERSITY_FACTOR_BASE)
         
         return base_ratio * diversity_factor
@@ -759,13 +848,13 @@ class ContextOptimizer:
             return [self.base_dir]
         
         # CRITICAL: Mandatory coverage constraint - filter candidates that provide complete coverage
-        coverage_candidates = []
-        for candidate in candidates:
-            # Verify this placement can provide hierarchical coverage for ALL matching directories
-            covered_directories = self._calculate_hierarchical_coverage([candidate.directory], matching_directories)
-            if covered_directories == matching_directories:
-                # This candidate satisfies the mandatory coverage constraint
-                coverage_candidates.append(candidate)
+        # (every matching directory lies in the candidate's subtree)
+        matrix = self._get_match_matrix()
+        matching_bits = matrix.bits_of(matching_directories)
+        coverage_candidates = [
+            candidate for candidate in candidates
+            if matrix.covers(matrix.ids[candidate.directory], matching_bits)
+        ]
         
         # If no single candidate provides complete coverage, find minimal coverage placement
         if not coverage_candidates:
@@ -855,32 +944,18 @@ class ContextOptimizer:
         """
         candidates = []
         pattern = instruction.apply_to
+        matrix = self._get_match_matrix()
         
         # Collect all potential placement directories:
         # 1. The matching directories themselves
-        # 2. Their common ancestors (for coverage guarantee)
-        potential_directories = set(matching_directories)
-        
-        # Add common ancestor directories to ensure coverage options exist
+        # 2. Their ancestors, which include the common ancestor (for coverage guarantee)
+        potential_bits = matrix.bits_of(matching_directories)
         if len(matching_directories) > 1:
-            # Find common ancestors that could provide coverage
-            common_ancestor = self._find_minimal_coverage_placement(matching_directories)
-            if common_ancestor:
-                potential_directories.add(common_ancestor)
-            
-            # Also add any intermediate directories in the inheritance chains
-            for directory in matching_directories:
-                chain = self._get_inheritance_chain(directory)
-                # Add intermediate directories that could provide coverage
-                for intermediate in chain:
-                    if intermediate != directory and intermediate in self._directory_cache:
-                        potential_directories.add(intermediate)
-        
-        # Generate candidates for all potential directories
-        for directory in sorted(potential_directories):
-            if directory not in self._directory_cache:
-                continue
-                
+            potential_bits = matrix.ancestor_closure(potential_bits)
+        
+        # Only analysed directories (with files) are candidates; ascending ID
+        # order is sorted path order
+        for directory in matrix.paths_of(potential_bits & matrix.files_mask):
             analysis = self._directory_cache[directory]
             
             # Calculate the three optimization objectives
@@ -931,6 +1006,13 @@ class ContextOptimizer:
         """
         if not matching_directories:
             return None
+        
+        if len(matching_directories) > 1:
+            # Lowest common ancestor from the directory tree
+            directory_ids = self._tree_ids(*matching_directories)
+            if directory_ids is not None:
+                tree = self._directory_tree
+                return tree.paths[tree.lca_of(directory_ids)]
             
         # Convert to relative paths for easier analysis
         relative_dirs = [d.relative_to(self.base_dir) for d in matching_directories]
@@ -970,13 +1052,26 @@ class ContextOptimizer:
         Returns:
             Set of target directories that are covered by the placements
         """
-        covered = set()
+        matrix = self._get_match_matrix()
+        
+        # Union of the placements' subtrees; unindexed placements fall back to path checks
+        covered_bits = 0
+        unindexed_placements = []
+        for placement in placements:
+            placement_id = matrix.id_of(placement)
+            if placement_id is None:
+                unindexed_placements.append(placement)
+            else:
+                covered_bits |= matrix.subtree_mask(placement_id)
+        
+        covered = set(matrix.paths_of(matrix.bits_of(target_directories) & covered_bits))
         
         for target in target_directories:
-            for placement in placements:
-                if self._is_hierarchically_covered(target, placement):
-                    covered.add(target)
-                    break
+            if target in covered:
+                continue
+            fallback_placements = unindexed_placements if target in matrix.ids else placements
+            if any(self._is_hierarchically_covered(target, placement) for placement in fallback_placements):
+                covered.add(target)
         
         return covered
     
@@ -985,6 +1080,10 @@ class ContextOptimizer:
         
         This is true if placement_dir is target_dir itself or any parent of target_dir.
         """
+        directory_ids = self._tree_ids(placement_dir, target_dir)
+        if directory_ids is not None:
+            return self._directory_tree.is_ancestor(*directory_ids)
+        
         try:
             # Check if target is the same as placement or is a subdirectory of placement
             target_dir.relative_to(placement_dir)
@@ -1062,13 +1161,21 @@ class ContextOptimizer:
         Returns:
             List[Path]: Inheritance chain (most specific to root).
         """
+        # Indexed directories are already canonical; walk the parent array
+        directory_ids = self._tree_ids(working_directory)
+        if directory_ids is None:
+            # Resolve the starting directory to ensure consistent path comparison
+            try:
+                current = working_directory.resolve()
+            except (OSError, ValueError):
+                current = working_directory.absolute()
+            directory_ids = self._tree_ids(current)
+        
+        if directory_ids is not None:
+            tree = self._directory_tree
+            return [tree.paths[ancestor_id] for ancestor_id in tree.ancestors(directory_ids[0])]
+        
         chain = []
-        # Resolve the starting directory to ensure consistent path comparison
-        try:
-            current = working_directory.resolve()
-        except (OSError, ValueError):
-            current = working_directory.absolute()
-            
         seen_paths = set()  # Track visited paths to prevent infinite loops
         
         # Build chain from working directory up to (and including) base_dir
@@ -1101,6 +1208,11 @@ class ContextOptimizer:
         Returns:
             bool: True if child is subdirectory of parent.
         """
+        directory_ids = self._tree_ids(parent, child)
+        if directory_ids is not None:
+            parent_id, child_id = directory_ids
+            return parent_id != child_id and self._directory_tree.is_ancestor(parent_id, child_id)
+        
         try:
             child.relative_to(parent)
             return child != parent
@@ -1122,11 +1234,14 @@ class ContextOptimizer:
         
         pattern = instruction.apply_to
         
-        # Resolve working directory to handle path inconsistencies
-        try:
-            resolved_working_dir = working_directory.resolve()
-        except (OSError, ValueError):
-            resolved_working_dir = working_directory.absolute()
+        # Resolve working directory to handle path inconsistencies (only when
+        # the path is not already a key of the directory cache)
+        resolved_working_dir = working_directory
+        if resolved_working_dir not in self._directory_cache:
+            try:
+                resolved_working_dir = working_directory.resolve()
+            except (OSError, ValueError):
+                resolved_working_dir = working_directory.absolute()
         
         # Check if working directory has files matching the pattern
         analysis = self._directory_cache.get(resolved_working_dir)
@@ -1137,22 +1252,9 @@ class ContextOptimizer:
         if pattern in analysis.pattern_matches:
             return analysis.pattern_matches[pattern] > 0
         
-        # Otherwise, analyze this specific directory for the pattern
-        # Only check direct files in this directory (not subdirectories for simplicity)
-        matching_files = 0
-        
-        try:
-            for file in os.listdir(resolved_working_dir):
-                if file.startswith('.'):
-                    continue
-                    
-                file_path = resolved_working_dir / file
-                if file_path.is_file():
-                    if self._file_matches_pattern(file_path, pattern):
-                        matching_files += 1
-        except (OSError, PermissionError):
-            # Handle case where directory doesn't exist or can't be read
-            pass
+        # Otherwise, count direct files in this directory from the file index
+        # (not subdirectories for simplicity)
+        matching_files = self._get_file_index().count_matches(resolved_working_dir, pattern)
         
         # Cache the result
         analysis.pattern_matches[pattern] = matching_files
@@ -0,0 +1,126 @@
+"""Directory tree index for APM distributed compilation.
+
+Numbers the directories of a ``ProjectFileIndex`` in pre-order (the index walk
+order, children sorted by name) and keeps parent pointers and depths as flat
+arrays. Pre-order IDs double as Euler-tour entry times: the subtree of a
+directory is the interval ``[id, subtree_end[id])``, so ancestor checks are
+two integer comparisons. Lowest common ancestors use binary lifting over the
+parent array, built on first use.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .file_index import ProjectFileIndex
+
+
+class DirectoryTree:
+    """Parent/depth arrays and Euler-tour intervals for indexed directories."""
+
+    def __init__(self, file_index: ProjectFileIndex):
+        """Number the directories of a file index.
+
+        Args:
+            file_index (ProjectFileIndex): Index whose directories form the tree.
+        """
+        self.paths: List[Path] = []
+        self.ids: Dict[Path, int] = {}
+        self.parents: List[int] = []  # -1 for the root
+        self.depths: List[int] = []
+
+        for node in file_index.iter_directories():
+            self.ids[node.path] = len(self.paths)
+            self.paths.append(node.path)
+            self.parents.append(self.ids.get(node.parent, -1))
+            self.depths.append(node.depth)
+
+        # Children always have larger IDs than their parent, so one reverse
+        # pass closes every interval
+        self.subtree_end: List[int] = [i + 1 for i in range(len(self.paths))]
+        for directory_id in range(len(self.paths) - 1, 0, -1):
+            parent_id = self.parents[directory_id]
+            if parent_id >= 0 and self.subtree_end[directory_id] > self.subtree_end[parent_id]:
+                self.subtree_end[parent_id] = self.subtree_end[directory_id]
+
+        self._jumps: Optional[List[List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __contains__(self, directory: Path) -> bool:
+        return directory in self.ids
+
+    def id_of(self, directory: Path) -> Optional[int]:
+        """Get the ID of an indexed directory."""
+        return self.ids.get(directory)
+
+    def is_ancestor(self, ancestor_id: int, directory_id: int) -> bool:
+        """Check whether ``ancestor_id`` is ``directory_id`` or one of its ancestors."""
+        return ancestor_id <= directory_id < self.subtree_end[ancestor_id]
+
+    def ancestors(self, directory_id: int) -> Iterator[int]:
+        """Iterate from a directory up to the root (the directory itself first)."""
+        while directory_id >= 0:
+            yield directory_id
+            directory_id = self.parents[directory_id]
+
+    def ancestor_closure(self, directory_ids: Iterable[int]) -> List[int]:
+        """Get the given directories plus all of their ancestors (unordered)."""
+        seen = set(directory_ids)
+        for directory_id in list(seen):
+            parent_id = self.parents[directory_id]
+            while parent_id >= 0 and parent_id not in seen:
+                seen.add(parent_id)
+                parent_id = self.parents[parent_id]
+        return list(seen)
+
+    def lca(self, first_id: int, second_id: int) -> int:
+        """Get the lowest common ancestor of two directories.
+
+        Args:
+            first_id (int): First directory ID.
+            second_id (int): Second directory ID.
+
+        Returns:
+            int: ID of the deepest directory containing both.
+        """
+        if self.is_ancestor(first_id, second_id):
+            return first_id
+        if self.is_ancestor(second_id, first_id):
+            return second_id
+
+        jumps = self._get_jumps()
+        directory_id = first_id
+        for level in range(len(jumps) - 1, -1, -1):
+            candidate = jumps[level][directory_id]
+            if not self.is_ancestor(candidate, second_id):
+                directory_id = candidate
+        return jumps[0][directory_id]
+
+    def lca_of(self, directory_ids: Iterable[int]) -> Optional[int]:
+        """Get the lowest common ancestor of a set of directories.
+
+        In pre-order the LCA of a set equals the LCA of its smallest and
+        largest IDs, so only one pairwise query is needed.
+
+        Args:
+            directory_ids (Iterable[int]): Directory IDs.
+
+        Returns:
+            Optional[int]: ID of the deepest directory containing all of them, or None if empty.
+        """
+        directory_ids = list(directory_ids)
+        if not directory_ids:
+            return None
+        return self.lca(min(directory_ids), max(directory_ids))
+
+    def _get_jumps(self) -> List[List[int]]:
+        """Build binary lifting tables (``jumps[k][v]`` is the 2^k-th ancestor, clamped at the root)."""
+        if self._jumps is None:
+            level = [parent_id if parent_id >= 0 else 0 for parent_id in self.parents]
+            jumps = [level]
+            for _ in range(max(self.depths, default=0).bit_length()):
+                level = [level[ancestor_id] for ancestor_id in level]
+                jumps.append(level)
+            self._jumps = jumps
+        return self._jumps
@@ -8,17 +8,22 @@ for nested agent context files.
 import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 from collections import defaultdict
 
 from ..primitives.models import Instruction, PrimitiveCollection
+from ..utils.project_walker import ProjectWalker
 from ..version import get_version
 from .template_builder import TemplateData, find_chatmode_by_name
 from .constants import BUILD_ID_PLACEHOLDER
 from .context_optimizer import ContextOptimizer
+from .glob_matcher import MAX_BRACE_EXPANSION, expand_braces, literal_directory, pattern_key
 from ..output.formatters import CompilationFormatter
 from ..output.models import CompilationResults
 
+if TYPE_CHECKING:
+    from .compile_cache import CompileCache
+
 
 @dataclass
 class DirectoryMap:
@@ -56,11 +61,18 @@ class CompilationResult:
 class DistributedAgentsCompiler:
     """Main compiler for generating distributed AGENTS.md files."""
     
-    def __init__(self, base_dir: str = "."):
+    def __init__(
+        self,
+        base_dir: str = ".",
+        compile_cache: Optional["CompileCache"] = None,
+        walker: Optional[ProjectWalker] = None
+    ):
         """Initialize the distributed AGENTS.md compiler.
         
         Args:
             base_dir (str): Base directory for compilation.
+            compile_cache (Optional[CompileCache]): Persistent cache reused by the context optimizer.
+            walker (Optional[ProjectWalker]): Project walk shared with discovery.
         """
         try:
             self.base_dir = Path(base_dir).resolve()
@@ -70,7 +82,8 @@ class DistributedAgentsCompiler:
         self.warnings: List[str] = []
         self.errors: List[str] = []
         self.total_files_written = 0
-        self.context_optimizer = ContextOptimizer(str(self.base_dir))
+        self.walker = walker if walker is not None else ProjectWalker.for_project(self.base_dir)
+        self.context_optimizer = ContextOptimizer(str(self.base_dir), compile_cache=compile_cache, walker=self.walker)
         self.output_formatter = CompilationFormatter()
         self._placement_map = None
     
@@ -382,26 +395,18 @@ class DistributedAgentsCompiler:
         """
         directories = []
         
-        # Remove filename part and wildcards to get directory structure
-        # Examples:
-        # "src/**/*.py" -> ["src"] 
+        # Each brace alternative contributes its first literal directory:
+        # "src/**/*.py" -> ["src"]
         # "docs/*.md" -> ["docs"]
-        # "**/*.py" -> ["."] (current directory)
-        # "*.py" -> ["."] (current directory)
-        
-        if pattern.startswith("**/"):
-            # Global pattern - applies to all directories
-            directories.append(Path("."))
-        elif "/" in pattern:
-            # Extract directory part
-            dir_part = pattern.split("/")[0]
-            if not dir_part.startswith("*"):
-                directories.append(Path(dir_part))
-            else:
-                directories.append(Path("."))
-        else:
-            # No directory part - applies to current directory
-            directories.append(Path("."))
+        # "{src,lib}/**/*.ts" -> ["src", "lib"]
+        # "**/*.py" / "*.py" -> ["."] (current directory)
+        alternatives = expand_braces(pattern, limit=MAX_BRACE_EXPANSION) or [pattern]
+        
+        for alternative in alternatives:
+            literal_dir = literal_directory(alternative)
+            dir_path = Path(literal_dir.split("/")[0]) if literal_dir else Path(".")
+            if dir_path not in directories:
+                directories.append(dir_path)
         
         return directories
     
@@ -475,14 +480,19 @@ class DistributedAgentsCompiler:
         
         sections.append("")
         
-        # Group instructions by pattern
+        # Group instructions by pattern (equivalent spellings share a section)
         pattern_groups: Dict[str, List[Instruction]] = defaultdict(list)
+        pattern_labels: Dict[str, str] = {}
         for instruction in placement.instructions:
             if instruction.apply_to:
-                pattern_groups[instruction.apply_to].append(instruction)
+                key = pattern_key(instruction.apply_to)
+                pattern_labels.setdefault(key, instruction.apply_to)
+                pattern_groups[key].append(instruction)
         
         # Generate sections for each pattern
-        for pattern, pattern_instructions in sorted(pattern_groups.items()):
+        for pattern, pattern_instructions in sorted(
+            (pattern_labels[key], group) for key, group in pattern_groups.items()
+        ):
             sections.append(f"## Files matching `{pattern}`")
             sections.append("")
             
@@ -550,24 +560,22 @@ class DistributedAgentsCompiler:
         orphaned_files = []
         generated_set = set(generated_paths)
         
-        # Find all existing AGENTS.md files in the project
-        for agents_file in self.base_dir.rglob("AGENTS.md"):
-            # Skip files that are outside our project or in special directories
-            try:
-                relative_path = agents_file.relative_to(self.base_dir)
-                
-                # Skip files in certain directories that shouldn't be cleaned
-                skip_dirs = {".git", ".apm", "node_modules", "__pycache__", ".pytest_cache", "apm_modules"}
-                if any(part in skip_dirs for part in relative_path.parts):
-                    continue
-                    
-                # If this existing file wasn't generated in current run, it's orphaned
-                if agents_file not in generated_set:
-                    orphaned_files.append(agents_file)
-                    
-            except ValueError:
-                # File is outside base_dir, skip it
+        # Skip files in certain directories that shouldn't be cleaned, even
+        # when an ignore file re-includes them
+        skip_dirs = {"node_modules", "__pycache__", "apm_modules"}
+        
+        # Find all existing AGENTS.md files in the project walk (hidden,
+        # excluded and ignored directories are never walked)
+        for walked in self.walker.walk():
+            if "AGENTS.md" not in walked.files:
                 continue
+            if any(part in skip_dirs for part in walked.relative_path.split("/")):
+                continue
+            
+            # If this existing file wasn't generated in current run, it's orphaned
+            agents_file = walked.path / "AGENTS.md"
+            if agents_file not in generated_set:
+                orphaned_files.append(agents_file)
         
         return orphaned_files
 
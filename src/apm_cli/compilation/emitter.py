@@ -0,0 +1,166 @@
+"""Batched write-if-changed emission of distributed AGENTS.md files.
+
+Every file of a compile is rendered (constitution injection included) and its
+content hash compared with the file on disk; only files whose content changed
+are written, each through a temporary file renamed over the target so readers
+never see a partial file. Rendering, comparing and writing run on a bounded
+thread pool. Leaving unchanged files untouched keeps their mtimes stable, so
+editors and file watchers do not reload them.
+"""
+
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .injector import ConstitutionInjector
+
+
+# File emission is I/O bound; more threads than this only add contention
+DEFAULT_MAX_WORKERS = 8
+
+# Mode of newly created files (temporary files are created 0600)
+_NEW_FILE_MODE = 0o644
+
+
+@dataclass
+class EmitResult:
+    """Outcome of emitting a set of AGENTS.md files."""
+    written: List[Path] = field(default_factory=list)
+    unchanged: List[Path] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> int:
+        """Number of files that are up to date on disk."""
+        return len(self.written) + len(self.unchanged)
+
+
+def _sha256(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def atomic_write_text(path: Path, content: str) -> None:
+    """Write text to a file through a temporary file in the same directory.
+
+    The existing file's permissions are kept.
+
+    Args:
+        path (Path): File to write.
+        content (str): Text content.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except OSError:
+        mode = _NEW_FILE_MODE
+
+    fd, temp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class AgentsFileEmitter:
+    """Render and write distributed AGENTS.md files, skipping unchanged ones."""
+
+    def __init__(self, with_constitution: bool = True, max_workers: Optional[int] = None):
+        """Initialize the emitter.
+
+        Args:
+            with_constitution (bool): Inject the constitution into each file.
+            max_workers (Optional[int]): Thread pool bound (default ``DEFAULT_MAX_WORKERS``).
+        """
+        self.with_constitution = with_constitution
+        self.max_workers = max(1, max_workers or DEFAULT_MAX_WORKERS)
+        # One injector for the whole batch; constitutions are read once per directory
+        self._injector = ConstitutionInjector(".")
+
+    def render(self, agents_path: Path, content: str) -> str:
+        """Get the final content of an AGENTS.md file.
+
+        Args:
+            agents_path (Path): AGENTS.md path.
+            content (str): Compiled content.
+
+        Returns:
+            str: Content to write, with the constitution block if enabled.
+        """
+        if not self.with_constitution:
+            return content
+        try:
+            final_content, _, _ = self._injector.inject(
+                content,
+                with_constitution=True,
+                output_path=agents_path,
+                constitution_dir=agents_path.parent,
+            )
+            return final_content
+        except Exception:
+            # If constitution injection fails, use original content
+            return content
+
+    def emit(self, content_map: Dict[Path, str]) -> EmitResult:
+        """Write every file whose content changed.
+
+        Args:
+            content_map (Dict[Path, str]): AGENTS.md path -> compiled content.
+
+        Returns:
+            EmitResult: Written and unchanged paths (in ``content_map`` order) and errors.
+        """
+        items = list(content_map.items())
+        if not items:
+            return EmitResult()
+
+        workers = min(self.max_workers, len(items))
+        if workers == 1:
+            outcomes = [self._emit_one(path, content) for path, content in items]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                outcomes = list(executor.map(lambda item: self._emit_one(*item), items))
+
+        result = EmitResult()
+        for (agents_path, _), outcome in zip(items, outcomes):
+            if outcome == "written":
+                result.written.append(agents_path)
+            elif outcome == "unchanged":
+                result.unchanged.append(agents_path)
+            else:
+                result.errors.append(outcome)
+        return result
+
+    def _emit_one(self, agents_path: Path, content: str) -> str:
+        """Render, compare and (if changed) write one file.
+
+        Returns:
+            str: ``"written"``, ``"unchanged"`` or an error message.
+        """
+        final_content = self.render(agents_path, content)
+        try:
+            # Text mode, so platform line endings written earlier compare equal
+            on_disk = _sha256(agents_path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError):
+            on_disk = None
+        if on_disk == _sha256(final_content):
+            return "unchanged"
+
+        try:
+            agents_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(agents_path, final_content)
+        except OSError as e:
+            return f"Failed to write distributed AGENTS.md file {agents_path}: {str(e)}"
+        return "written"
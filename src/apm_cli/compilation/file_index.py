@@ -0,0 +1,340 @@
+"""Project file index for APM distributed compilation.
+
+The index is built from the project walker's single walk per compile and
+answers every file/pattern question the Context Optimizer asks without
+touching the filesystem again: per-directory file lists, suffix buckets and a directory
+tree with parent/child links. Directory mtimes and raw listings are recorded so
+an index saved by the compile cache can be rebuilt by relisting only changed
+directories.
+"""
+
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from ..utils.project_walker import DirectoryListing, ListingReuse, ProjectWalker
+from .glob_matcher import CompiledPattern, compile_pattern, path_suffix
+
+
+@dataclass
+class IndexedDirectory:
+    """A directory node in the project file index."""
+    path: Path
+    relative_path: str  # POSIX-style path relative to the index root ('' for root)
+    depth: int
+    parent: Optional[Path] = None
+    children: List[Path] = field(default_factory=list)
+    files: List[str] = field(default_factory=list)  # Non-hidden file names
+    suffix_buckets: Dict[str, List[str]] = field(default_factory=dict)  # suffix -> file names
+    mtime_ns: int = 0  # Directory mtime observed before it was listed
+
+    def relative_file_path(self, file_name: str) -> str:
+        """Get the POSIX-style path of a file relative to the index root."""
+        return f"{self.relative_path}/{file_name}" if self.relative_path else file_name
+
+
+class ProjectFileIndex:
+    """In-memory index of a project's directories and files.
+
+    Built from the project walker's single top-down walk, so hidden,
+    excluded and ignored directories are pruned at descent time.
+    """
+
+    def __init__(self, base_dir: Path):
+        """Initialize an empty index.
+
+        Args:
+            base_dir (Path): Root directory of the index.
+        """
+        self.base_dir = base_dir
+        self.directories: Dict[Path, IndexedDirectory] = {}
+        self.build_time: float = 0.0
+        self._match_cache: Dict[str, Dict[Path, int]] = {}
+        # Raw directory listings, reused by rebuild() for unchanged directories
+        self._listings: Dict[Path, DirectoryListing] = {}
+        # Set by rebuild(): directories that changed and the previous index's counts
+        self.relisted: Set[Path] = set()
+        self._previous_match_counts: Dict[str, Dict[Path, int]] = {}
+
+    @classmethod
+    def build(cls, base_dir: Path, walker: Optional[ProjectWalker] = None) -> 'ProjectFileIndex':
+        """Build the index from a single walk of ``base_dir``.
+
+        Args:
+            base_dir (Path): Project root to index.
+            walker (Optional[ProjectWalker]): Shared walker of the project; a
+                default one is created when omitted.
+
+        Returns:
+            ProjectFileIndex: The populated index.
+        """
+        return cls._walk(base_dir, walker)
+
+    @classmethod
+    def rebuild(
+        cls,
+        previous: 'ProjectFileIndex',
+        trusted_before_ns: int,
+        walker: Optional[ProjectWalker] = None
+    ) -> 'ProjectFileIndex':
+        """Rebuild an index, relisting only directories whose mtime changed.
+
+        A directory's mtime changes whenever an entry is added, removed or
+        renamed in it, so the raw listing of a directory with an unchanged
+        mtime is reused from ``previous`` (ignore rules are still applied
+        afresh). Match counts of ``previous`` are carried over for directories
+        whose indexed files are unchanged.
+
+        Args:
+            previous (ProjectFileIndex): Index from an earlier walk of the same root.
+            trusted_before_ns (int): Only mtimes at or before this time are trusted
+                (newer ones may hide a change made in the same timestamp tick).
+            walker (Optional[ProjectWalker]): Shared walker of the project; listings
+                are only reused if it has not walked yet.
+
+        Returns:
+            ProjectFileIndex: The populated index.
+        """
+        return cls._walk(previous.base_dir, walker, previous, trusted_before_ns)
+
+    @classmethod
+    def _walk(
+        cls,
+        base_dir: Path,
+        walker: Optional[ProjectWalker],
+        previous: Optional['ProjectFileIndex'] = None,
+        trusted_before_ns: int = 0
+    ) -> 'ProjectFileIndex':
+        """Populate an index from the walker's top-down walk."""
+        index = cls(base_dir)
+        start_time = time.perf_counter()
+        if walker is None:
+            walker = ProjectWalker(base_dir)
+
+        reuse = None
+        if previous is not None:
+            index._previous_match_counts = previous._match_cache
+            reuse = previous.listing_reuse(trusted_before_ns)
+
+        for walked in walker.walk(reuse):
+            node = IndexedDirectory(
+                path=walked.path,
+                relative_path=walked.relative_path,
+                depth=walked.depth,
+                parent=walked.path.parent if walked.depth else None,
+                children=[walked.path / name for name in walked.directories],
+                files=list(walked.files),
+                mtime_ns=walked.mtime_ns
+            )
+            for file_name in node.files:
+                node.suffix_buckets.setdefault(path_suffix(file_name), []).append(file_name)
+
+            index.directories[walked.path] = node
+            index._listings[walked.path] = walked.listing
+
+            if previous is not None:
+                previous_node = previous.directories.get(walked.path)
+                if (previous_node is None or previous_node.files != node.files
+                        or not previous._is_unchanged(walked.path, walked.mtime_ns, trusted_before_ns)):
+                    index.relisted.add(walked.path)
+
+        index.build_time = time.perf_counter() - start_time
+        return index
+
+    def listing_reuse(self, trusted_before_ns: int) -> ListingReuse:
+        """Get a walker callback that reuses this index's listings of unchanged directories.
+
+        Args:
+            trusted_before_ns (int): Only mtimes at or before this time are trusted.
+
+        Returns:
+            ListingReuse: Callback for ``ProjectWalker.walk``.
+        """
+        def reuse(path: Path, mtime_ns: int) -> Optional[DirectoryListing]:
+            if not self._is_unchanged(path, mtime_ns, trusted_before_ns):
+                return None
+            return self._listings.get(path)
+        return reuse
+
+    def _is_unchanged(self, path: Path, mtime_ns: int, trusted_before_ns: int) -> bool:
+        """Check whether a directory still has its indexed, trusted mtime."""
+        node = self.directories.get(path)
+        return node is not None and node.mtime_ns == mtime_ns and mtime_ns <= trusted_before_ns
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        """Serialize the index and its computed match counts to JSON-compatible data.
+
+        Returns:
+            Dict[str, Any]: Snapshot accepted by ``from_snapshot``.
+        """
+        positions = {path: position for position, path in enumerate(self.directories)}
+        match_counts = {}
+        for pattern, counts in self._match_cache.items():
+            flat = []
+            for directory, count in counts.items():
+                flat.extend((positions[directory], count))
+            match_counts[pattern] = flat
+
+        return {
+            'base_dir': str(self.base_dir),
+            'directories': [
+                [node.relative_path, node.mtime_ns, node.files, [child.name for child in node.children],
+                 self._listing_to_snapshot(node.path)]
+                for node in self.directories.values()
+            ],
+            'match_counts': match_counts,
+        }
+
+    @classmethod
+    def from_snapshot(cls, base_dir: Path, snapshot: Dict[str, Any]) -> Optional['ProjectFileIndex']:
+        """Restore an index saved with ``to_snapshot``.
+
+        Args:
+            base_dir (Path): Root the snapshot must have been taken of.
+            snapshot (Dict[str, Any]): Data produced by ``to_snapshot``.
+
+        Returns:
+            Optional[ProjectFileIndex]: The restored index, or None if the
+            snapshot belongs to another root or is malformed.
+        """
+        if snapshot.get('base_dir') != str(base_dir):
+            return None
+
+        index = cls(base_dir)
+        try:
+            paths = []
+            for relative_path, mtime_ns, files, children, listing in snapshot['directories']:
+                path = base_dir / relative_path if relative_path else base_dir
+                node = IndexedDirectory(
+                    path=path,
+                    relative_path=relative_path,
+                    depth=relative_path.count('/') + 1 if relative_path else 0,
+                    parent=path.parent if relative_path else None,
+                    children=[path / name for name in children],
+                    files=list(files),
+                    mtime_ns=mtime_ns
+                )
+                for file_name in node.files:
+                    node.suffix_buckets.setdefault(path_suffix(file_name), []).append(file_name)
+                index.directories[path] = node
+                if listing is not None:
+                    listing_files, listing_directories, symlinks = listing
+                    index._listings[path] = DirectoryListing(
+                        files=list(listing_files),
+                        directories=list(listing_directories),
+                        symlinks=list(symlinks)
+                    )
+                paths.append(path)
+
+            for pattern, flat in snapshot['match_counts'].items():
+                index._match_cache[pattern] = {
+                    paths[flat[i]]: flat[i + 1] for i in range(0, len(flat), 2)
+                }
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+        return index
+
+    def _listing_to_snapshot(self, directory: Path) -> Optional[List[List[str]]]:
+        """Serialize the raw listing of a directory (None if the index has none)."""
+        listing = self._listings.get(directory)
+        if listing is None:
+            return None
+        return [listing.files, listing.directories, listing.symlinks]
+
+    def __contains__(self, directory: Path) -> bool:
+        return directory in self.directories
+
+    def __len__(self) -> int:
+        return len(self.directories)
+
+    def get(self, directory: Path) -> Optional[IndexedDirectory]:
+        """Get the index node for a directory, if indexed."""
+        return self.directories.get(directory)
+
+    def iter_directories(self) -> Iterator[IndexedDirectory]:
+        """Iterate over indexed directories in walk (top-down) order."""
+        return iter(self.directories.values())
+
+    def iter_files(self) -> Iterator[Path]:
+        """Iterate over every indexed file as an absolute path."""
+        for node in self.directories.values():
+            for file_name in node.files:
+                yield node.path / file_name
+
+    def total_files(self) -> int:
+        """Get the number of indexed files."""
+        return sum(len(node.files) for node in self.directories.values())
+
+    def match_counts(self, pattern: str) -> Dict[Path, int]:
+        """Count matching files per directory for an applyTo pattern.
+
+        Args:
+            pattern (str): applyTo glob pattern.
+
+        Returns:
+            Dict[Path, int]: Directory -> number of matching files (only non-zero entries).
+        """
+        if pattern in self._match_cache:
+            return self._match_cache[pattern]
+
+        compiled = compile_pattern(pattern)
+        previous_counts = self._previous_match_counts.get(pattern)
+        if previous_counts is not None:
+            # Directories that were not relisted have the same files as before;
+            # only relisted ones are matched again
+            counts = {
+                directory: count for directory, count in previous_counts.items()
+                if directory not in self.relisted and directory in self.directories
+            }
+            nodes = [node for node in self.directories.values() if node.path in self.relisted] if self.relisted else []
+        else:
+            counts = {}
+            nodes = self.directories.values()
+
+        for node in nodes:
+            if not node.files:
+                continue
+            count = self._count_in_directory(compiled, node)
+            if count > 0:
+                counts[node.path] = count
+
+        self._match_cache[pattern] = counts
+        return counts
+
+    @staticmethod
+    def _count_in_directory(compiled: CompiledPattern, node: IndexedDirectory) -> int:
+        """Count files directly inside an indexed directory that match a compiled pattern."""
+        if not compiled.may_match_under(node.relative_path):
+            return 0
+
+        if compiled.suffixes is not None:
+            candidates = [
+                name for suffix in compiled.suffixes
+                for name in node.suffix_buckets.get(suffix, ())
+            ]
+        else:
+            candidates = node.files
+
+        return sum(
+            1 for file_name in candidates
+            if compiled.match_in_directory(node.relative_path, file_name)
+        )
+
+    def count_matches(self, directory: Path, pattern: str) -> int:
+        """Count files directly inside ``directory`` that match ``pattern``."""
+        if directory not in self.directories:
+            return 0
+        return self.match_counts(pattern).get(directory, 0)
+
+    def matches(self, relative_path: str, pattern: str) -> bool:
+        """Check whether a root-relative POSIX file path matches ``pattern``.
+
+        Args:
+            relative_path (str): File path relative to the index root.
+            pattern (str): applyTo glob pattern.
+
+        Returns:
+            bool: True if the path matches.
+        """
+        return compile_pattern(pattern).match(relative_path)
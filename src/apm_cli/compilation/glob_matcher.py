@@ -0,0 +1,583 @@
+"""Compiled glob matcher for instruction ``applyTo`` patterns.
+
+Each pattern is compiled once into an anchored regular expression plus a few
+cheap prefilters (literal directory prefixes and file suffixes). Matching works
+on POSIX-style paths relative to the project root and never touches the
+filesystem or the current working directory, so compiled patterns are safe to
+share between threads.
+
+Supported syntax:
+    *        any run of characters within a path segment
+    ?        a single character within a path segment
+    [abc]    character classes, including ranges and ``[!...]`` / ``[^...]`` negation
+    **       zero or more directories when used as a whole segment
+    {a,b}    alternatives, which may be nested and may contain ``/``
+
+Patterns without a ``/`` (e.g. ``*.py``) match against the file name and
+therefore apply at any depth.
+"""
+
+import os
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+# Maximum number of brace alternatives to enumerate when deriving prefilters.
+# Patterns that expand beyond this are still matched exactly via the regex.
+MAX_BRACE_EXPANSION = 256
+
+_MAGIC_CHARS = frozenset('*?[\\')
+
+# Follow the platform's path case rules, like fnmatch does
+_CASE_INSENSITIVE = os.path.normcase('A') == 'a'
+
+
+def _fold(value: str) -> str:
+    """Normalize case for comparisons on case-insensitive platforms."""
+    return value.lower() if _CASE_INSENSITIVE else value
+
+
+def path_suffix(file_name: str) -> str:
+    """Get the suffix of a file name as used by the suffix prefilter.
+
+    Unlike ``os.path.splitext`` a leading dot counts, so ``.md`` has suffix
+    ``.md``; this keeps the prefilter consistent with the compiled regex.
+
+    Args:
+        file_name (str): Bare file name.
+
+    Returns:
+        str: The text from the last ``.`` onwards, or '' when there is none.
+    """
+    dot = file_name.rfind('.')
+    return _fold(file_name[dot:]) if dot != -1 else ''
+
+
+class CompiledPattern:
+    """A single ``applyTo`` pattern compiled for fast repeated matching."""
+
+    __slots__ = (
+        'pattern', 'regex', 'line_regex', 'basename_only', 'prefixes', 'suffixes', 'suffix_only', 'key'
+    )
+
+    def __init__(self, pattern: str):
+        """Compile a pattern.
+
+        Args:
+            pattern (str): The raw ``applyTo`` glob pattern.
+        """
+        self.pattern = pattern
+        normalized = _normalize(pattern)
+        self.basename_only = '/' not in normalized
+
+        case_flag = re.IGNORECASE if _CASE_INSENSITIVE else 0
+        self.regex = re.compile(_translate(normalized), re.DOTALL | case_flag)
+
+        # Newline-delimited variant used to scan joined path lists in bulk; the
+        # literal leading '\n' lets the regex engine skip quickly between lines
+        line_body = _translate(normalized, separator='/\n')
+        if self.basename_only:
+            line_body = '(?:[^\n]*/)?' + line_body
+        self.line_regex = re.compile(f'\n({line_body})(?=\n)', case_flag)
+
+        alternatives = expand_braces(normalized, limit=MAX_BRACE_EXPANSION)
+
+        # Literal directory prefixes every match must start with ('' = unconstrained)
+        self.prefixes: Tuple[str, ...] = ('',)
+        # File suffixes every match must end with (None = unconstrained)
+        self.suffixes: Optional[FrozenSet[str]] = None
+        # True when matching reduces to a suffix check (e.g. '**/*.py')
+        self.suffix_only = False
+
+        if alternatives is not None:
+            if not self.basename_only:
+                prefixes = sorted({_literal_prefix(alt) for alt in alternatives})
+                if '' not in prefixes:
+                    self.prefixes = tuple(prefixes)
+
+            suffixes = [_literal_suffix(alt) for alt in alternatives]
+            if all(suffix is not None for suffix in suffixes):
+                self.suffixes = frozenset(suffixes)
+                self.suffix_only = all(
+                    _is_suffix_only(alt, suffix, self.basename_only)
+                    for alt, suffix in zip(alternatives, suffixes)
+                )
+
+        # Canonical grouping key: equivalent brace spellings share a key
+        if alternatives is not None:
+            self.key = '{' + ','.join(sorted(set(alternatives))) + '}'
+        else:
+            self.key = normalized
+
+    def __repr__(self) -> str:
+        return f"CompiledPattern({self.pattern!r})"
+
+    def match(self, relative_path: str) -> bool:
+        """Check whether a root-relative POSIX path matches the pattern.
+
+        Args:
+            relative_path (str): File path relative to the project root.
+
+        Returns:
+            bool: True if the path matches.
+        """
+        if self.basename_only:
+            target = relative_path[relative_path.rfind('/') + 1:]
+        else:
+            if self.prefixes[0] and not _fold(relative_path).startswith(self.prefixes):
+                return False
+            target = relative_path
+
+        if self.suffixes is not None:
+            name = target[target.rfind('/') + 1:]
+            if path_suffix(name) not in self.suffixes:
+                return False
+            if self.suffix_only:
+                return True
+
+        return self.regex.fullmatch(target) is not None
+
+    def match_in_directory(self, directory: str, file_name: str) -> bool:
+        """Match a file given its root-relative directory and file name.
+
+        Args:
+            directory (str): Root-relative POSIX directory ('' for the root).
+            file_name (str): Bare file name.
+
+        Returns:
+            bool: True if the file matches.
+        """
+        if self.basename_only:
+            if self.suffix_only:
+                return path_suffix(file_name) in self.suffixes
+            return self.regex.fullmatch(file_name) is not None
+        return self.match(f"{directory}/{file_name}" if directory else file_name)
+
+    def may_match_under(self, directory: str) -> bool:
+        """Check whether files directly inside ``directory`` could match.
+
+        A cheap test on the literal directory prefixes, used to skip whole
+        directories without evaluating the regex.
+
+        Args:
+            directory (str): Root-relative POSIX directory ('' for the root).
+
+        Returns:
+            bool: False only if no file in the directory can match.
+        """
+        if self.basename_only or not self.prefixes[0]:
+            return True
+        dir_prefix = _fold(f"{directory}/") if directory else ''
+        return dir_prefix.startswith(self.prefixes)
+
+
+@lru_cache(maxsize=4096)
+def compile_pattern(pattern: str) -> CompiledPattern:
+    """Compile an ``applyTo`` pattern, reusing previously compiled patterns.
+
+    Args:
+        pattern (str): The raw glob pattern.
+
+    Returns:
+        CompiledPattern: The compiled pattern.
+    """
+    return CompiledPattern(pattern)
+
+
+def match_path(relative_path: str, pattern: str) -> bool:
+    """Check whether a root-relative POSIX path matches an ``applyTo`` pattern."""
+    return compile_pattern(pattern).match(relative_path)
+
+
+def pattern_key(pattern: str) -> str:
+    """Get a canonical key so equivalent pattern spellings group together.
+
+    For example ``**/*.{ts,tsx}`` and ``**/*.{tsx,ts}`` share a key.
+    """
+    return compile_pattern(pattern).key
+
+
+class GlobMatcher:
+    """Match many paths against many compiled patterns at once.
+
+    Patterns are bucketed by required file suffix and first literal directory,
+    so each path is only tested against patterns that could possibly match it.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """Compile and bucket a set of patterns.
+
+        Args:
+            patterns (Iterable[str]): ``applyTo`` patterns (duplicates are ignored).
+        """
+        self.patterns: List[CompiledPattern] = [compile_pattern(p) for p in dict.fromkeys(patterns)]
+
+        # (suffix or None, first directory or None) -> patterns
+        self._buckets: Dict[Tuple[Optional[str], Optional[str]], List[CompiledPattern]] = defaultdict(list)
+        for compiled in self.patterns:
+            suffixes = compiled.suffixes if compiled.suffixes is not None else (None,)
+            if compiled.prefixes[0]:
+                heads = {prefix.split('/', 1)[0] for prefix in compiled.prefixes}
+            else:
+                heads = {None}
+            for suffix in suffixes:
+                for head in heads:
+                    self._buckets[(suffix, head)].append(compiled)
+
+        self._candidate_cache: Dict[Tuple[str, Optional[str]], Tuple[List[CompiledPattern], List[CompiledPattern]]] = {}
+
+    def _candidates(self, suffix: str, head: Optional[str]) -> Tuple[List[CompiledPattern], List[CompiledPattern]]:
+        """Get (suffix-only, regex) candidate patterns for a suffix/first-directory pair."""
+        cache_key = (suffix, head)
+        cached = self._candidate_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        seen = set()
+        suffix_only: List[CompiledPattern] = []
+        needs_regex: List[CompiledPattern] = []
+        for bucket_key in ((suffix, head), (suffix, None), (None, head), (None, None)):
+            for compiled in self._buckets.get(bucket_key, ()):
+                if id(compiled) in seen:
+                    continue
+                seen.add(id(compiled))
+                if compiled.suffix_only:
+                    suffix_only.append(compiled)
+                else:
+                    needs_regex.append(compiled)
+
+        self._candidate_cache[cache_key] = (suffix_only, needs_regex)
+        return suffix_only, needs_regex
+
+    def match(self, relative_path: str) -> List[str]:
+        """Get the patterns that match a root-relative POSIX path.
+
+        Args:
+            relative_path (str): File path relative to the project root.
+
+        Returns:
+            List[str]: Matching patterns, in the order they were given.
+        """
+        slash = relative_path.find('/')
+        head = _fold(relative_path[:slash]) if slash != -1 else None
+        suffix = path_suffix(relative_path[relative_path.rfind('/') + 1:])
+
+        suffix_only, needs_regex = self._candidates(suffix, head)
+        matched = {id(c) for c in suffix_only}
+        matched.update(id(c) for c in needs_regex if c.match(relative_path))
+        return [c.pattern for c in self.patterns if id(c) in matched]
+
+    def match_paths(self, relative_paths: Iterable[str]) -> Dict[str, List[str]]:
+        """Match many paths at once.
+
+        Paths are bucketed by suffix and first directory, then each pattern
+        scans only the buckets it could match with one regex pass per bucket.
+
+        Args:
+            relative_paths (Iterable[str]): File paths relative to the project root.
+
+        Returns:
+            Dict[str, List[str]]: Pattern -> matching paths (every pattern is
+            present; paths are grouped by bucket rather than input order).
+        """
+        # suffix -> first directory (None for root files) -> paths
+        buckets: Dict[str, Dict[Optional[str], List[str]]] = defaultdict(lambda: defaultdict(list))
+        unusual: List[str] = []
+        for relative_path in relative_paths:
+            if '\n' in relative_path:
+                unusual.append(relative_path)
+                continue
+            slash = relative_path.find('/')
+            head = _fold(relative_path[:slash]) if slash != -1 else None
+            buckets[path_suffix(relative_path[relative_path.rfind('/') + 1:])][head].append(relative_path)
+
+        joined: Dict[Tuple[str, Optional[str]], str] = {}
+        results: Dict[str, List[str]] = {}
+
+        for compiled in self.patterns:
+            matches: List[str] = []
+            suffixes = compiled.suffixes if compiled.suffixes is not None else buckets.keys()
+            heads = (
+                {prefix.split('/', 1)[0] for prefix in compiled.prefixes}
+                if compiled.prefixes[0] else None
+            )
+
+            for suffix in suffixes:
+                by_head = buckets.get(suffix)
+                if not by_head:
+                    continue
+                for head in (heads if heads is not None else by_head.keys()):
+                    paths = by_head.get(head)
+                    if not paths:
+                        continue
+                    if compiled.suffix_only:
+                        matches.extend(paths)
+                        continue
+                    text = joined.get((suffix, head))
+                    if text is None:
+                        text = joined[(suffix, head)] = '\n' + '\n'.join(paths) + '\n'
+                    matches.extend(compiled.line_regex.findall(text))
+
+            matches.extend(path for path in unusual if compiled.match(path))
+            results[compiled.pattern] = matches
+
+        return results
+
+
+def expand_braces(pattern: str, limit: Optional[int] = None) -> Optional[List[str]]:
+    """Expand every (possibly nested) ``{a,b}`` group of a pattern.
+
+    Args:
+        pattern (str): Pattern like 'src/{app,lib/{core,util}}/**/*.{ts,tsx}'
+        limit (Optional[int]): Maximum number of alternatives to produce.
+
+    Returns:
+        Optional[List[str]]: Brace-free alternatives, or None if ``limit`` was exceeded.
+    """
+    results: List[str] = []
+    pending = [pattern]
+    while pending:
+        current = pending.pop()
+        group = _find_brace_group(current)
+        if group is None:
+            results.append(current)
+            if limit is not None and len(results) > limit:
+                return None
+            continue
+
+        start, end, options = group
+        # Push in reverse so alternatives come out in source order
+        for option in reversed(options):
+            pending.append(current[:start] + option + current[end + 1:])
+        if limit is not None and len(pending) + len(results) > limit:
+            return None
+
+    return results
+
+
+def literal_directory(pattern: str) -> Optional[str]:
+    """Get the literal leading directory path of a brace-free pattern.
+
+    Args:
+        pattern (str): Brace-free glob pattern such as 'src/app/**/*.py'.
+
+    Returns:
+        Optional[str]: The directory part before the first wildcard ('src/app'),
+        or None when the pattern has no literal directory component.
+    """
+    prefix = _literal_prefix(_normalize(pattern))
+    return prefix.rstrip('/') or None
+
+
+def _normalize(pattern: str) -> str:
+    """Normalize a raw pattern (whitespace and leading './')."""
+    pattern = pattern.strip()
+    while pattern.startswith('./'):
+        pattern = pattern[2:]
+    return pattern
+
+
+def _find_brace_group(pattern: str) -> Optional[Tuple[int, int, List[str]]]:
+    """Find the first balanced top-level brace group.
+
+    Returns:
+        Optional[Tuple[int, int, List[str]]]: (start, end, options) or None.
+    """
+    i = 0
+    n = len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '[':
+            class_end = _find_class_end(pattern, i)
+            if class_end is not None:
+                i = class_end + 1
+                continue
+        if char == '{':
+            depth = 0
+            options: List[str] = []
+            option_start = i + 1
+            j = i
+            while j < n:
+                c = pattern[j]
+                if c == '\\':
+                    j += 2
+                    continue
+                if c == '[':
+                    class_end = _find_class_end(pattern, j)
+                    if class_end is not None:
+                        j = class_end + 1
+                        continue
+                if c == '{':
+                    depth += 1
+                elif c == '}':
+                    depth -= 1
+                    if depth == 0:
+                        options.append(pattern[option_start:j])
+                        return i, j, options
+                elif c == ',' and depth == 1:
+                    options.append(pattern[option_start:j])
+                    option_start = j + 1
+                j += 1
+            # Unbalanced brace: treat it literally
+            return None
+        i += 1
+    return None
+
+
+def _find_class_end(pattern: str, start: int) -> Optional[int]:
+    """Find the closing ``]`` of a character class starting at ``start``."""
+    j = start + 1
+    if j < len(pattern) and pattern[j] in '!^':
+        j += 1
+    if j < len(pattern) and pattern[j] == ']':
+        j += 1
+    end = pattern.find(']', j)
+    return end if end != -1 else None
+
+
+def _brace_pairs(pattern: str) -> Dict[int, int]:
+    """Map the index of each balanced ``{`` to its matching ``}``."""
+    pairs: Dict[int, int] = {}
+    stack: List[int] = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '[':
+            class_end = _find_class_end(pattern, i)
+            if class_end is not None:
+                i = class_end + 1
+                continue
+        if char == '{':
+            stack.append(i)
+        elif char == '}' and stack:
+            pairs[stack.pop()] = i
+        i += 1
+    return pairs
+
+
+def _translate(pattern: str, separator: str = '/') -> str:
+    """Translate a glob pattern into a regular expression body.
+
+    Args:
+        pattern (str): Normalized glob pattern.
+        separator (str): Characters wildcards may not cross ('/' for single
+            paths, '/\\n' when scanning newline-joined path lists).
+
+    Returns:
+        str: Regular expression body (anchoring is left to the caller).
+    """
+    not_sep = f'[^{separator}]'
+    any_run = '.*' if separator == '/' else '[^\\n]*'
+    pairs = _brace_pairs(pattern)
+    closers = set(pairs.values())
+    open_groups: List[int] = []
+    output: List[str] = []
+    i = 0
+    n = len(pattern)
+
+    def at_segment_start(index: int) -> bool:
+        return index == 0 or pattern[index - 1] == '/' or (
+            open_groups and pattern[index - 1] in '{,'
+        )
+
+    def at_segment_end(index: int) -> bool:
+        return index == n or pattern[index] == '/' or (
+            open_groups and pattern[index] in '},'
+        )
+
+    while i < n:
+        char = pattern[i]
+        if char == '\\' and i + 1 < n:
+            output.append(re.escape(pattern[i + 1]))
+            i += 2
+        elif char == '*':
+            j = i
+            while j < n and pattern[j] == '*':
+                j += 1
+            if j - i >= 2 and at_segment_start(i) and at_segment_end(j):
+                if j < n and pattern[j] == '/':
+                    output.append(f'(?:{not_sep}+/)*')  # zero or more directories
+                    j += 1
+                else:
+                    output.append(any_run)  # trailing '**': everything below
+            else:
+                output.append(f'{not_sep}*')
+            i = j
+        elif char == '?':
+            output.append(not_sep)
+            i += 1
+        elif char == '[':
+            class_end = _find_class_end(pattern, i)
+            if class_end is None:
+                output.append(re.escape(char))
+                i += 1
+                continue
+            body = pattern[i + 1:class_end]
+            negate = body[:1] in ('!', '^')
+            if negate:
+                body = body[1:]
+            escaped = ''.join(
+                c if c == '-' else re.escape(c)
+                for c in body
+            )
+            if negate:
+                output.append(f'[^{separator}{escaped}]')
+            else:
+                output.append(f'(?:(?![{separator}])[{escaped}])')
+            i = class_end + 1
+        elif char == '{' and i in pairs:
+            open_groups.append(i)
+            output.append('(?:')
+            i += 1
+        elif char == ',' and open_groups:
+            output.append('|')
+            i += 1
+        elif char == '}' and open_groups and i in closers:
+            open_groups.pop()
+            output.append(')')
+            i += 1
+        else:
+            output.append(re.escape(char))
+            i += 1
+
+    return ''.join(output)
+
+
+def _literal_prefix(alternative: str) -> str:
+    """Get the literal directory prefix (with trailing '/') of a brace-free pattern."""
+    segments = alternative.split('/')
+    literal: List[str] = []
+    for segment in segments[:-1]:
+        if not segment or any(char in _MAGIC_CHARS for char in segment):
+            break
+        literal.append(segment)
+    return _fold('/'.join(literal) + '/') if literal else ''
+
+
+def _literal_suffix(alternative: str) -> Optional[str]:
+    """Get the file suffix a brace-free pattern requires, or None if unconstrained."""
+    last_segment = alternative.rsplit('/', 1)[-1]
+    if last_segment == '**':
+        return None
+    magic_positions = [i for i, char in enumerate(last_segment) if char in _MAGIC_CHARS]
+    tail = last_segment[magic_positions[-1] + 1:] if magic_positions else last_segment
+    dot = tail.rfind('.')
+    if dot == -1 or ']' in tail or (magic_positions and last_segment[magic_positions[-1]] == '\\'):
+        return None
+    return _fold(tail[dot:])
+
+
+def _is_suffix_only(alternative: str, suffix: str, basename_only: bool) -> bool:
+    """Check whether a brace-free pattern matches exactly the files ending in ``suffix``."""
+    tail = '*' + suffix
+    if basename_only:
+        return _fold(alternative) == tail
+    return _fold(alternative) == '**/' + tail
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional, Literal
+from typing import Dict, Optional, Literal
 
 from .constitution import read_constitution
 from .constitution_block import render_block, find_existing_block
@@ -16,14 +16,23 @@ class ConstitutionInjector:
 
     def __init__(self, base_dir: str):
         self.base_dir = Path(base_dir)
-
-    def inject(self, compiled_content: str, with_constitution: bool, output_path: Path) -> tuple[str, InjectionStatus, Optional[str]]:
+        # Constitution text per directory, so one injector can serve many files
+        self._constitutions: Dict[Path, Optional[str]] = {}
+
+    def inject(
+        self,
+        compiled_content: str,
+        with_constitution: bool,
+        output_path: Path,
+        constitution_dir: Optional[Path] = None,
+    ) -> tuple[str, InjectionStatus, Optional[str]]:
         """Return final AGENTS.md content after optional injection.
 
         Args:
             compiled_content: Newly compiled content (without constitution block).
             with_constitution: Whether to perform injection (True) or preserve existing block (False).
             output_path: Existing AGENTS.md path (may not exist) for preservation logic.
+            constitution_dir: Directory to read the constitution from (default: base_dir).
         Returns:
             (final_content, status, hash_or_none)
         """
@@ -54,7 +63,7 @@ class ConstitutionInjector:
                 return final, "SKIPPED", None
             return compiled_content, "SKIPPED", None
 
-        constitution_text = read_constitution(self.base_dir)
+        constitution_text = self._read_constitution(constitution_dir or self.base_dir)
         if constitution_text is None:
             existing_block = find_existing_block(existing_content)
             if existing_block:
@@ -89,3 +98,9 @@ class ConstitutionInjector:
         if not final_content.endswith("\n"):
             final_content += "\n"
         return final_content, status, hash_value
+
+    def _read_constitution(self, directory: Path) -> Optional[str]:
+        """Read the constitution of a directory once per injector."""
+        if directory not in self._constitutions:
+            self._constitutions[directory] = read_constitution(directory)
+        return self._constitutions[directory]
@@ -0,0 +1,191 @@
+"""Bitset pattern x directory match matrix for APM distributed compilation.
+
+Directories are identified by their dense pre-order IDs from the
+``DirectoryTree`` (children sorted by name). With pre-order IDs the subtree
+of a directory is the contiguous ID range ``[id, subtree_end[id])``, so
+coverage, pollution and distribution questions become bitwise operations and
+popcounts over Python ints instead of nested loops over ``Path`` objects.
+
+Because pre-order with sorted children is lexicographic order of path parts,
+ascending ID order is also ``sorted()`` order of the directory paths.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .directory_tree import DirectoryTree
+from .file_index import ProjectFileIndex
+
+
+# Relevance below this ratio counts as weak pollution in a child directory
+WEAK_RELEVANCE_THRESHOLD = 0.1
+
+
+if hasattr(int, "bit_count"):
+    def popcount(bits: int) -> int:
+        """Count set bits in a bitset."""
+        return bits.bit_count()
+else:  # Python < 3.10
+    def popcount(bits: int) -> int:
+        """Count set bits in a bitset."""
+        return bin(bits).count("1")
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Iterate over the set bit positions of a bitset in ascending order."""
+    digits = bin(bits)[:1:-1]  # Least significant bit first
+    position = digits.find("1")
+    while position != -1:
+        yield position
+        position = digits.find("1", position + 1)
+
+
+@dataclass
+class PatternRow:
+    """Per-pattern row of the match matrix."""
+    matches: int  # Directories with at least one matching file
+    weak: int  # Directories whose relevance is above 0 but below WEAK_RELEVANCE_THRESHOLD
+
+
+class DirectoryMatchMatrix:
+    """Dense directory IDs plus per-pattern match bitsets.
+
+    Built from a ``ProjectFileIndex`` and its ``DirectoryTree``; pattern rows
+    are computed on first use from the index's per-directory match counts.
+    """
+
+    def __init__(self, file_index: ProjectFileIndex, tree: Optional[DirectoryTree] = None):
+        """Precompute per-directory bitmasks.
+
+        Args:
+            file_index (ProjectFileIndex): Index providing files and match counts.
+            tree (Optional[DirectoryTree]): Tree over the same index (built if omitted).
+        """
+        self._file_index = file_index
+        self.tree = tree if tree is not None else DirectoryTree(file_index)
+        self.paths = self.tree.paths
+        self.ids = self.tree.ids
+        self.file_counts: List[int] = [len(file_index.get(path).files) for path in self.paths]
+
+        # Directories that contain files (the optimizer's analysed directories)
+        self.files_mask = self.bits_from_ids(i for i, count in enumerate(self.file_counts) if count)
+
+        depth_ids: Dict[int, List[int]] = {}
+        for directory_id, depth in enumerate(self.tree.depths):
+            depth_ids.setdefault(depth, []).append(directory_id)
+        self.depth_masks: Dict[int, int] = {
+            depth: self.bits_from_ids(ids) for depth, ids in sorted(depth_ids.items())
+        }
+
+        self._children_masks: Dict[int, int] = {}
+        self._rows: Dict[str, PatternRow] = {}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def bits_from_ids(self, ids: Iterable[int]) -> int:
+        """Build a bitset from directory IDs."""
+        buffer = bytearray((len(self.paths) + 7) // 8)
+        for directory_id in ids:
+            buffer[directory_id >> 3] |= 1 << (directory_id & 7)
+        return int.from_bytes(buffer, "little")
+
+    def bits_of(self, directories: Iterable[Path]) -> int:
+        """Build a bitset from directory paths, ignoring unindexed paths."""
+        ids = self.ids
+        return self.bits_from_ids(ids[d] for d in directories if d in ids)
+
+    def paths_of(self, bits: int) -> List[Path]:
+        """Get the directory paths of a bitset in sorted path order."""
+        return [self.paths[directory_id] for directory_id in iter_bits(bits)]
+
+    def subtree_mask(self, directory_id: int) -> int:
+        """Get the bitset of a directory and all of its descendants."""
+        return ((1 << (self.tree.subtree_end[directory_id] - directory_id)) - 1) << directory_id
+
+    def children_mask(self, directory_id: int) -> int:
+        """Get the bitset of a directory's direct children that contain files."""
+        mask = self._children_masks.get(directory_id)
+        if mask is None:
+            node = self._file_index.get(self.paths[directory_id])
+            mask = self.bits_of(node.children) & self.files_mask
+            self._children_masks[directory_id] = mask
+        return mask
+
+    def covers(self, directory_id: int, bits: int) -> bool:
+        """Check whether every directory in ``bits`` is inside the subtree of ``directory_id``."""
+        if not bits:
+            return True
+        lowest = (bits & -bits).bit_length() - 1
+        highest = bits.bit_length() - 1
+        return self.tree.is_ancestor(directory_id, lowest) and self.tree.is_ancestor(directory_id, highest)
+
+    def ancestor_closure(self, bits: int) -> int:
+        """Get the bitset of all directories in ``bits`` plus every ancestor of them."""
+        return self.bits_from_ids(self.tree.ancestor_closure(iter_bits(bits)))
+
+    def depth_counts(self, bits: int) -> Dict[int, int]:
+        """Count directories of a bitset per depth (only non-zero depths)."""
+        counts = {}
+        for depth, mask in self.depth_masks.items():
+            count = popcount(bits & mask)
+            if count:
+                counts[depth] = count
+        return counts
+
+    def row(self, pattern: str) -> PatternRow:
+        """Get the match row for a pattern, computing it from the file index on first use.
+
+        Args:
+            pattern (str): applyTo glob pattern.
+
+        Returns:
+            PatternRow: Match and weak-relevance bitsets for the pattern.
+        """
+        row = self._rows.get(pattern)
+        if row is None:
+            match_ids = []
+            weak_ids = []
+            for directory, count in self._file_index.match_counts(pattern).items():
+                directory_id = self.ids[directory]
+                match_ids.append(directory_id)
+                if count / self.file_counts[directory_id] < WEAK_RELEVANCE_THRESHOLD:
+                    weak_ids.append(directory_id)
+            row = PatternRow(matches=self.bits_from_ids(match_ids), weak=self.bits_from_ids(weak_ids))
+            self._rows[pattern] = row
+        return row
+
+    def inheritance_pollution(self, directory_id: int, pattern: str) -> float:
+        """Score pollution from placing a pattern at a directory.
+
+        Children without matches add 0.5 and weakly relevant children add 0.2.
+        Penalties are accumulated in child order so the float result matches
+        a sequential scan exactly.
+
+        Args:
+            directory_id (int): Candidate placement directory ID.
+            pattern (str): Instruction pattern.
+
+        Returns:
+            float: Pollution score (higher = more pollution).
+        """
+        row = self.row(pattern)
+        children = self.children_mask(directory_id)
+        unmatched = children & ~row.matches
+        polluting = unmatched | (children & row.weak)
+        if not polluting:
+            return 0.0
+
+        unmatched_digits = bin(unmatched)[:1:-1]
+        pollution_score = 0.0
+        for child_id in iter_bits(polluting):
+            if child_id < len(unmatched_digits) and unmatched_digits[child_id] == "1":
+                pollution_score += 0.5
+            else:
+                pollution_score += 0.2
+        return pollution_score
+
+    def id_of(self, directory: Path) -> Optional[int]:
+        """Get the ID of an indexed directory."""
+        return self.ids.get(directory)
@@ -5,6 +5,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from ..primitives.models import Instruction, Chatmode
+from .glob_matcher import pattern_key
 
 
 @dataclass
@@ -83,15 +84,18 @@ def _group_instructions_by_pattern(instructions: List[Instruction]) -> Dict[str,
         instructions (List[Instruction]): List of instructions to group.
     
     Returns:
-        Dict[str, List[Instruction]]: Grouped instructions with raw patterns as keys.
+        Dict[str, List[Instruction]]: Grouped instructions keyed by the first raw
+        pattern seen; equivalent spellings (e.g. brace order) share a group.
     """
     pattern_groups: Dict[str, List[Instruction]] = {}
+    group_labels: Dict[str, str] = {}
     
     for instruction in instructions:
         if not instruction.apply_to:
             continue
         
-        pattern = instruction.apply_to
+        key = pattern_key(instruction.apply_to)
+        pattern = group_labels.setdefault(key, instruction.apply_to)
         
         if pattern not in pattern_groups:
             pattern_groups[pattern] = []
@@ -1,19 +1,29 @@
 """MCP server conflict detection and resolution."""
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from ..adapters.client.base import MCPClientAdapter
+from ..registry.session import ServerResolutionSession
 
 
 class MCPConflictDetector:
     """Handles detection and resolution of MCP server configuration conflicts."""
     
-    def __init__(self, runtime_adapter: MCPClientAdapter):
+    def __init__(self, runtime_adapter: MCPClientAdapter, session: Optional[ServerResolutionSession] = None):
         """Initialize the conflict detector.
         
         Args:
             runtime_adapter: The MCP client adapter for the target runtime.
+            session: Resolves server references once for the whole install
+                (default: look them up with the adapter's registry client).
         """
         self.adapter = runtime_adapter
+        self.session = session
+    
+    def _find_server(self, server_reference: str) -> Optional[Dict[str, Any]]:
+        """Look a server up in the registry, through the session if there is one."""
+        if self.session is not None:
+            return self.session.resolve(server_reference)
+        return self.adapter.registry_client.find_server_by_reference(server_reference)
     
     def check_server_exists(self, server_reference: str) -> bool:
         """Check if a server already exists in the configuration.
@@ -28,7 +38,7 @@ class MCPConflictDetector:
         
         # Try to get server info from registry for UUID comparison
         try:
-            server_info = self.adapter.registry_client.find_server_by_reference(server_reference)
+            server_info = self._find_server(server_reference)
             if server_info and "id" in server_info:
                 server_uuid = server_info["id"]
                 
@@ -68,7 +78,7 @@ class MCPConflictDetector:
         """
         try:
             # Use existing registry client that's already initialized in adapters
-            server_info = self.adapter.registry_client.find_server_by_reference(server_ref)
+            server_info = self._find_server(server_ref)
             
             if server_info:
                 # Use the server name from x-github.name field, or fallback to server.name
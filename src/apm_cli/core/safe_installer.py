@@ -1,9 +1,10 @@
 """Safe MCP server installation with conflict detection."""
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from ..factory import ClientFactory
 from .conflict_detector import MCPConflictDetector
+from ..registry.session import ServerResolutionSession
 from ..utils.console import _rich_warning, _rich_success, _rich_error, _rich_info
 
 
@@ -49,15 +50,16 @@ class InstallationSummary:
 class SafeMCPInstaller:
     """Safe MCP server installation with conflict detection."""
     
-    def __init__(self, runtime: str):
+    def __init__(self, runtime: str, session: Optional[ServerResolutionSession] = None):
         """Initialize the safe installer.
         
         Args:
             runtime: Target runtime (copilot, codex, vscode).
+            session: Resolves server references once across runtimes.
         """
         self.runtime = runtime
         self.adapter = ClientFactory.create_client(runtime)
-        self.conflict_detector = MCPConflictDetector(self.adapter)
+        self.conflict_detector = MCPConflictDetector(self.adapter, session)
     
     def install_servers(self, server_references: List[str], env_overrides: Dict[str, str] = None, server_info_cache: Dict[str, Any] = None, runtime_vars: Dict[str, str] = None) -> InstallationSummary:
         """Install MCP servers with conflict detection.
@@ -9,6 +9,7 @@ from pathlib import Path
 from typing import Dict, Optional
 
 from .token_manager import setup_runtime_environment
+from ..primitives.package_index import PACKAGE_INDEX_FILE, PACKAGE_PRIMITIVE_LOCATIONS, load_package_index
 from ..output.script_formatters import ScriptExecutionFormatter
 
 
@@ -466,16 +467,9 @@ class PromptCompiler:
                     # Iterate through repos within the org
                     for repo_dir in org_dir.iterdir():
                         if repo_dir.is_dir() and not repo_dir.name.startswith('.'):
-                            # Check in the root of the repository
-                            dep_prompt_path = repo_dir / prompt_file
-                            if dep_prompt_path.exists():
+                            dep_prompt_path = self._resolve_dependency_prompt_file(repo_dir, prompt_file)
+                            if dep_prompt_path is not None:
                                 return dep_prompt_path
-                            
-                            # Also check in common subdirectories
-                            for subdir in ['prompts', '.', 'workflows']:
-                                sub_prompt_path = repo_dir / subdir / prompt_file
-                                if sub_prompt_path.exists():
-                                    return sub_prompt_path
         
         # If still not found, raise an error with helpful message
         searched_locations = [
@@ -498,6 +492,40 @@ class PromptCompiler:
             f"\n\nTip: Run 'apm install' to ensure dependencies are installed."
         )
     
+    def _resolve_dependency_prompt_file(self, repo_dir: Path, prompt_file: str) -> Optional[Path]:
+        """Find a prompt file in an installed dependency package.
+        
+        Paths the package's primitive manifest covers are looked up in it;
+        other paths (and packages without a manifest) are checked on disk.
+        
+        Args:
+            repo_dir: Root of the installed package
+            prompt_file: Relative path to the .prompt.md file
+            
+        Returns:
+            Optional[Path]: Path to the prompt file, or None if the package does not have it
+        """
+        indexed_prompts = None
+        indexed_directories = ()
+        if (repo_dir / PACKAGE_INDEX_FILE).is_file():
+            index = load_package_index(repo_dir)
+            indexed_prompts = {entry.path for entry in index.files("prompt")}
+            indexed_directories = {directory for primitive_type, directory, _ in PACKAGE_PRIMITIVE_LOCATIONS
+                                   if primitive_type == "prompt"}
+        
+        # Root of the repository first, then common subdirectories
+        for subdir in ['.', 'prompts', 'workflows']:
+            candidate = (Path(subdir) / prompt_file).as_posix()
+            directory = Path(candidate).parent.as_posix()
+            if indexed_prompts is not None and candidate.endswith(".prompt.md") \
+                    and ("" if directory == "." else directory) in indexed_directories:
+                if candidate in indexed_prompts:
+                    return repo_dir / candidate
+                continue
+            if (repo_dir / candidate).exists():
+                return repo_dir / candidate
+        return None
+    
     def _substitute_parameters(self, content: str, params: Dict[str, str]) -> str:
         """Substitute parameters in content.
         
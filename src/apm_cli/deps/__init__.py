@@ -1,6 +1,7 @@
 """Dependencies management package for APM-CLI."""
 
 from .apm_resolver import APMDependencyResolver
+from .archive_downloader import ArchiveDownloader
 from .dependency_graph import (
     DependencyGraph, DependencyTree, DependencyNode, FlatDependencyMap,
     CircularRef, ConflictInfo
@@ -8,6 +9,12 @@ from .dependency_graph import (
 from .aggregator import sync_workflow_dependencies, scan_workflows_for_dependencies
 from .verifier import verify_dependencies, install_missing_dependencies, load_apm_config
 from .github_downloader import GitHubPackageDownloader
+from .install_timings import InstallTimings
+from .installer import InstallTask, InstallResult, install_packages
+from .integrity import IntegrityManifest
+from .lockfile import Lockfile, LockedDependency
+from .mirror_cache import MirrorCache
+from .package_store import PackageStore
 from .package_validator import PackageValidator
 
 __all__ = [
@@ -16,7 +23,17 @@ __all__ = [
     'verify_dependencies',
     'install_missing_dependencies',
     'load_apm_config',
+    'ArchiveDownloader',
     'GitHubPackageDownloader',
+    'InstallTimings',
+    'InstallTask',
+    'InstallResult',
+    'install_packages',
+    'IntegrityManifest',
+    'Lockfile',
+    'LockedDependency',
+    'MirrorCache',
+    'PackageStore',
     'PackageValidator',
     'DependencyGraph',
     'DependencyTree', 
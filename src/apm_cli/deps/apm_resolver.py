@@ -1,23 +1,53 @@
 """APM dependency resolution engine with recursive resolution and conflict detection."""
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Dict, List, Set, Optional, Tuple
-from collections import deque
 
-from ..models.apm_package import APMPackage, DependencyReference
+from ..models.apm_package import APMPackage, DependencyReference, ResolvedReference
 from .dependency_graph import (
     DependencyGraph, DependencyTree, DependencyNode, FlatDependencyMap,
     CircularRef, ConflictInfo
 )
+from .install_timings import InstallTimings
+from .installer import DEFAULT_INSTALL_JOBS, get_install_path
+from .integrity import IntegrityManifest
+from .lockfile import Lockfile
 
 
 class APMDependencyResolver:
     """Handles recursive APM dependency resolution similar to NPM."""
     
-    def __init__(self, max_depth: int = 50):
-        """Initialize the resolver with maximum recursion depth."""
+    def __init__(self, max_depth: int = 50, downloader=None, lockfile: Optional[Lockfile] = None,
+                 use_installed: bool = True, jobs: Optional[int] = None,
+                 timings: Optional[InstallTimings] = None):
+        """Initialize the resolver.
+        
+        Args:
+            max_depth: Maximum recursion depth
+            downloader: Fetches the apm.yml of dependencies that are not installed
+                (``GitHubPackageDownloader``); without it their sub-dependencies
+                are not resolved
+            lockfile: Locked commits to read apm.yml at, instead of resolving references
+            use_installed: Read the apm.yml of packages installed in ``apm_modules/``
+                (when installed at the commit to install) instead of fetching it
+            jobs: Number of apm.yml fetched concurrently (default: DEFAULT_INSTALL_JOBS)
+            timings: Records how long building the dependency tree takes
+        """
         self.max_depth = max_depth
+        self.downloader = downloader
+        self.lockfile = lockfile
+        self.use_installed = use_installed
+        self.jobs = jobs
+        self.timings = timings
         self._resolution_path = []  # For test compatibility
+        self._apm_modules_dir: Optional[Path] = None
+        # Fetched manifests by (repo, commit), and what each (repo, reference) resolved to
+        self._manifests: Dict[Tuple[str, str], Optional[APMPackage]] = {}
+        self._resolved_references: Dict[Tuple[str, Optional[str]], ResolvedReference] = {}
+        self._memo_lock = threading.Lock()
     
     def resolve_dependencies(self, project_root: Path) -> DependencyGraph:
         """
@@ -58,7 +88,8 @@ class APMDependencyResolver:
             return graph
         
         # Build the complete dependency tree
-        dependency_tree = self.build_dependency_tree(apm_yml_path)
+        with self.timings.stage("resolution") if self.timings is not None else nullcontext():
+            dependency_tree = self.build_dependency_tree(apm_yml_path)
         
         # Detect circular dependencies
         circular_deps = self.detect_circular_dependencies(dependency_tree)
@@ -82,6 +113,8 @@ class APMDependencyResolver:
         
         Uses breadth-first traversal to build the dependency tree level by level.
         This allows for early conflict detection and clearer error reporting.
+        The apm.yml files of each level are loaded concurrently, so resolving
+        takes about as many round-trips as the tree is deep.
         
         Args:
             root_apm_yml: Path to the root apm.yml file
@@ -100,88 +133,82 @@ class APMDependencyResolver:
         
         # Initialize the tree
         tree = DependencyTree(root_package=root_package)
+        self._apm_modules_dir = root_apm_yml.parent / "apm_modules"
         
-        # Queue for breadth-first traversal: (dependency_ref, depth, parent_node)
-        processing_queue: deque[Tuple[DependencyReference, int, Optional[DependencyNode]]] = deque()
-        
-        # Set to track queued repo URLs for O(1) lookup instead of O(n) list comprehension
-        queued_repo_urls: Set[str] = set()
-        
-        # Add root dependencies to queue
-        root_deps = root_package.get_apm_dependencies()
-        for dep_ref in root_deps:
-            processing_queue.append((dep_ref, 1, None))
-            queued_repo_urls.add(dep_ref.repo_url)
-        
-        # Process dependencies breadth-first
-        while processing_queue:
-            dep_ref, depth, parent_node = processing_queue.popleft()
-            
-            # Remove from queued set since we're now processing this dependency
-            queued_repo_urls.discard(dep_ref.repo_url)
-            
-            # Check maximum depth to prevent infinite recursion
-            if depth > self.max_depth:
-                continue
-            
-            # Check if we already processed this dependency at this level or higher
-            existing_node = tree.get_node(dep_ref.repo_url)
-            if existing_node and existing_node.depth <= depth:
-                # We've already processed this dependency at a shallower or equal depth
-                # Create parent-child relationship if parent exists
-                if parent_node and existing_node not in parent_node.children:
-                    parent_node.children.append(existing_node)
-                continue
-            
-            # Create a new node for this dependency
-            # Note: In a real implementation, we would load the actual package here
-            # For now, create a placeholder package
-            placeholder_package = APMPackage(
-                name=dep_ref.get_display_name(),
-                version="unknown",
-                source=dep_ref.repo_url
-            )
-            
-            node = DependencyNode(
-                package=placeholder_package,
-                dependency_ref=dep_ref,
-                depth=depth,
-                parent=parent_node
-            )
-            
-            # Add to tree
-            tree.add_node(node)
+        # Dependencies of the current level: (dependency_ref, parent_node)
+        level: List[Tuple[DependencyReference, Optional[DependencyNode]]] = [
+            (dep_ref, None) for dep_ref in root_package.get_apm_dependencies()
+        ]
+        depth = 1
+        
+        # Process dependencies breadth-first, one level at a time
+        while level and depth <= self.max_depth:
+            new_nodes: List[DependencyNode] = []
+            for dep_ref, parent_node in level:
+                # Check if we already processed this dependency at this level or higher
+                existing_node = tree.get_node(dep_ref.repo_url)
+                if existing_node and existing_node.depth <= depth:
+                    # Create parent-child relationship if parent exists
+                    if parent_node and existing_node not in parent_node.children:
+                        parent_node.children.append(existing_node)
+                    continue
+                
+                # Placeholder until the package's apm.yml is loaded
+                placeholder_package = APMPackage(
+                    name=dep_ref.get_display_name(),
+                    version="unknown",
+                    source=dep_ref.repo_url
+                )
+                node = DependencyNode(
+                    package=placeholder_package,
+                    dependency_ref=dep_ref,
+                    depth=depth,
+                    parent=parent_node
+                )
+                tree.add_node(node)
+                if parent_node:
+                    parent_node.children.append(node)
+                new_nodes.append(node)
             
-            # Create parent-child relationship
-            if parent_node:
-                parent_node.children.append(node)
+            # Load the new packages' apm.yml and queue their dependencies for the next level
+            next_level: List[Tuple[DependencyReference, Optional[DependencyNode]]] = []
+            queued_repo_urls: Set[str] = set()
+            for node, loaded_package in zip(new_nodes, self._load_packages(new_nodes)):
+                if not loaded_package:
+                    continue
+                node.package = loaded_package
+                for sub_dep in loaded_package.get_apm_dependencies():
+                    if sub_dep.repo_url not in queued_repo_urls:
+                        next_level.append((sub_dep, node))
+                        queued_repo_urls.add(sub_dep.repo_url)
             
-            # Try to load the dependency package and its dependencies
-            # For Task 3, this focuses on the resolution algorithm structure
-            # Package loading integration will be completed in Tasks 2 & 4
-            try:
-                # Attempt to load package - currently returns None (placeholder implementation)
-                # This will integrate with Task 2 (GitHub downloader) and Task 4 (apm_modules scanning)
-                loaded_package = self._try_load_dependency_package(dep_ref)
-                if loaded_package:
-                    # Update the node with the actual loaded package
-                    node.package = loaded_package
-                    
-                    # Get sub-dependencies and add them to the processing queue
-                    sub_dependencies = loaded_package.get_apm_dependencies()
-                    for sub_dep in sub_dependencies:
-                        # Avoid infinite recursion by checking if we're already processing this dep
-                        # Use O(1) set lookup instead of O(n) list comprehension
-                        if sub_dep.repo_url not in queued_repo_urls:
-                            processing_queue.append((sub_dep, depth + 1, node))
-                            queued_repo_urls.add(sub_dep.repo_url)
-            except (ValueError, FileNotFoundError) as e:
-                # Could not load dependency package - this is expected for remote dependencies
-                # The node already has a placeholder package, so continue with that
-                pass
+            level = next_level
+            depth += 1
         
         return tree
     
+    def _load_packages(self, nodes: List[DependencyNode]) -> List[Optional[APMPackage]]:
+        """Load the packages of a level of the tree, concurrently when they are fetched.
+        
+        Args:
+            nodes: Nodes whose package to load
+            
+        Returns:
+            List[Optional[APMPackage]]: Loaded package of each node, None if unavailable
+        """
+        def load(node: DependencyNode) -> Optional[APMPackage]:
+            try:
+                return self._try_load_dependency_package(node.dependency_ref)
+            except (ValueError, FileNotFoundError, RuntimeError):
+                # Not loadable (e.g. unreachable): keep the placeholder; installing it reports the error
+                return None
+        
+        workers = min(self.jobs or DEFAULT_INSTALL_JOBS, len(nodes))
+        if self.downloader is None or workers <= 1:
+            return [load(node) for node in nodes]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(load, nodes))
+    
     def detect_circular_dependencies(self, tree: DependencyTree) -> List[CircularRef]:
         """
         Detect and report circular dependency chains.
@@ -301,11 +328,14 @@ class APMDependencyResolver:
     
     def _try_load_dependency_package(self, dep_ref: DependencyReference) -> Optional[APMPackage]:
         """
-        Try to load a dependency package from local paths.
+        Load a dependency's apm.yml.
         
-        This is a placeholder implementation for Task 3 (dependency resolution algorithm).
-        The actual package loading from apm_modules/ will be implemented in Task 4 
-        (Enhanced Primitive Discovery System) and Task 2 (GitHub Package Downloader).
+        Read from ``apm_modules/`` when the package is installed there at its
+        locked commit, or without a lockfile at the commit its reference
+        resolves to (resolving it with the downloader, if there is one);
+        otherwise fetched with the downloader, at the locked commit when
+        there is one. Fetched manifests are memoized by (repository, commit).
+        Called concurrently for the packages of a level.
         
         Args:
             dep_ref: Reference to the dependency to load
@@ -316,19 +346,86 @@ class APMDependencyResolver:
         Raises:
             ValueError: If package exists but has invalid format
             FileNotFoundError: If package cannot be found
+            RuntimeError: If the package's repository cannot be reached
+        """
+        locked = self.lockfile.get(dep_ref) if self.lockfile is not None else None
+        
+        if self.use_installed and self._apm_modules_dir is not None and (self.lockfile is None or locked):
+            install_path = get_install_path(self._apm_modules_dir, dep_ref)
+            installed_apm_yml = install_path / "apm.yml"
+            if installed_apm_yml.is_file():
+                if locked:
+                    # It may be installed at an older commit (e.g. after pulling a new apm.lock)
+                    expected = locked.resolved_commit
+                elif self.downloader is not None:
+                    # Without apm.lock it is current only at the commit its reference
+                    # resolves to now, which also tells the installer whether to keep it
+                    resolved = self._resolve_reference(dep_ref)
+                    expected = resolved.resolved_commit if resolved else None
+                else:
+                    expected = None
+                if expected is None or self._installed_commit(install_path) == expected:
+                    return APMPackage.from_apm_yml(installed_apm_yml)
+        
+        if self.downloader is None:
+            return None
+        
+        with self._memo_lock:
+            resolved = self._resolved_references.get((dep_ref.repo_url, dep_ref.reference))
+            commit = locked.resolved_commit if locked else resolved and resolved.resolved_commit
+            if commit and (dep_ref.repo_url, commit) in self._manifests:
+                return self._manifests[(dep_ref.repo_url, commit)]
+        
+        resolved_ref, text = self.downloader.fetch_manifest(str(dep_ref), commit)
+        package = None
+        if text is not None:
+            package = APMPackage.from_apm_yml_text(text, source=f"{dep_ref.repo_url}/apm.yml")
+            package.source = dep_ref.to_github_url()
+            package.resolved_commit = resolved_ref.resolved_commit
+        
+        with self._memo_lock:
+            if not commit:
+                self._resolved_references[(dep_ref.repo_url, dep_ref.reference)] = resolved_ref
+            self._manifests[(dep_ref.repo_url, resolved_ref.resolved_commit)] = package
+        return package
+    
+    def _resolve_reference(self, dep_ref: DependencyReference) -> Optional[ResolvedReference]:
+        """Resolve a dependency's reference once, without fetching its apm.yml.
+        
+        Returns:
+            Optional[ResolvedReference]: The resolution, or None if the repository cannot be reached
+        """
+        key = (dep_ref.repo_url, dep_ref.reference)
+        with self._memo_lock:
+            resolved = self._resolved_references.get(key)
+        if resolved is None:
+            try:
+                resolved = self.downloader.resolve_git_reference(str(dep_ref))
+            except RuntimeError:
+                return None
+            with self._memo_lock:
+                resolved = self._resolved_references.setdefault(key, resolved)
+        return resolved
+    
+    @staticmethod
+    def _installed_commit(install_path: Path) -> Optional[str]:
+        """Commit an installed package came from, per its integrity manifest (None if unknown)."""
+        manifest = IntegrityManifest.load(install_path)
+        return manifest.commit if manifest is not None else None
+    
+    def get_resolved_reference(self, dep_ref: DependencyReference) -> Optional[ResolvedReference]:
+        """Get what a dependency's reference resolved to while its apm.yml was fetched.
+        
+        Installing the dependency at this commit needs no second resolution.
+        
+        Args:
+            dep_ref: Dependency to look up
+            
+        Returns:
+            Optional[ResolvedReference]: The resolution, or None if the reference was not resolved
         """
-        # For Task 3 (dependency resolution), we focus on the algorithm logic
-        # without implementing specific file system scanning which belongs to Task 4
-        # 
-        # In the final implementation:
-        # - Task 2 will handle downloading packages from GitHub repositories  
-        # - Task 4 will handle scanning apm_modules/ directory structure
-        # - This method will integrate with both systems
-        
-        # For now, return None to indicate package not found locally
-        # This allows the resolution algorithm to create placeholder nodes
-        # and continue with dependency graph construction
-        return None
+        with self._memo_lock:
+            return self._resolved_references.get((dep_ref.repo_url, dep_ref.reference))
     
     def _create_resolution_summary(self, graph: DependencyGraph) -> str:
         """
@@ -0,0 +1,152 @@
+"""Download packages as tarballs over HTTPS instead of with git.
+
+GitHub serves the files of any commit as a ``tar.gz`` archive (codeload).
+Streaming it through one pooled HTTPS connection costs a single request,
+against starting several git processes, so ``GitHubPackageDownloader``
+tries it first. Only the package files (``PACKAGE_SPARSE_PATTERNS``) are
+extracted, straight from the response stream; the archive's pax header
+names the commit it was made from, which must be the resolved commit.
+Any failure is raised as ``ArchiveError`` and the downloader falls back to git.
+
+The backend is chosen with ``$APM_DOWNLOAD_BACKEND``:
+
+- ``auto`` (default): archive first, git if it fails
+- ``archive``: archive only
+- ``git``: git only
+"""
+
+import fnmatch
+import os
+import stat
+import tarfile
+from pathlib import Path
+from typing import Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DOWNLOAD_BACKENDS = ("auto", "archive", "git")
+DEFAULT_DOWNLOAD_BACKEND = "auto"
+
+# Public repositories; with a token, the REST API redirects to a signed codeload URL
+ARCHIVE_URL = "https://codeload.github.com/{repo}/tar.gz/{commit}"
+AUTHENTICATED_ARCHIVE_URL = "https://api.github.com/repos/{repo}/tarball/{commit}"
+
+ARCHIVE_TIMEOUT = 30  # Seconds to connect, and between received chunks
+_POOL_SIZE = 16  # Matches the install job limit
+
+
+class ArchiveError(Exception):
+    """The archive could not be downloaded, or does not hold the expected commit."""
+
+
+def get_download_backend() -> str:
+    """Get the configured download backend (``$APM_DOWNLOAD_BACKEND``)."""
+    backend = os.environ.get("APM_DOWNLOAD_BACKEND", DEFAULT_DOWNLOAD_BACKEND).strip().lower()
+    return backend if backend in DOWNLOAD_BACKENDS else DEFAULT_DOWNLOAD_BACKEND
+
+
+class ArchiveDownloader:
+    """Streams commit archives from GitHub over pooled HTTPS connections."""
+
+    def __init__(self, token: Optional[str] = None, archive_url: Optional[str] = None):
+        """Initialize the archive downloader.
+
+        Args:
+            token (Optional[str]): GitHub token, sent to the REST API for private repositories.
+            archive_url (Optional[str]): URL template with ``{repo}`` and ``{commit}``
+                (default: codeload, or the REST API with a token).
+        """
+        self.token = token
+        if archive_url is not None:
+            self.archive_url = archive_url
+        else:
+            self.archive_url = AUTHENTICATED_ARCHIVE_URL if token else ARCHIVE_URL
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=_POOL_SIZE, pool_maxsize=_POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def download(self, repo: str, commit: str, target_path: Path, patterns: Sequence[str]) -> int:
+        """Extract the files of a commit matching sparse-checkout patterns.
+
+        Args:
+            repo (str): ``owner/repo``.
+            commit (str): Full commit SHA.
+            target_path (Path): Empty directory to extract into.
+            patterns (Sequence[str]): Anchored sparse-checkout patterns (``/apm.yml``, ``/.apm/``, ...).
+
+        Returns:
+            int: Bytes received (compressed).
+
+        Raises:
+            ArchiveError: If the archive cannot be fetched or read, or was not made from ``commit``;
+                ``target_path`` may then hold some of the files.
+        """
+        headers = {"Authorization": f"token {self.token}"} if self.token else {}
+        url = self.archive_url.format(repo=repo, commit=commit)
+        try:
+            with self.session.get(url, headers=headers, stream=True, timeout=ARCHIVE_TIMEOUT) as response:
+                if response.status_code != 200:
+                    raise ArchiveError(f"GET {repo} archive: HTTP {response.status_code}")
+                self._extract(response.raw, commit, target_path, patterns)
+                return response.raw.tell()
+        except (requests.RequestException, tarfile.TarError, EOFError, OSError) as e:
+            raise ArchiveError(f"Failed to download the archive of {repo}: {e}")
+
+    @staticmethod
+    def _extract(stream, commit: str, target_path: Path, patterns: Sequence[str]) -> None:
+        """Extract matching regular files from a ``tar.gz`` stream, checking its commit."""
+        with tarfile.open(fileobj=stream, mode="r|gz") as archive:
+            checked = False
+            for member in archive:
+                if not checked:
+                    # git archive records the commit in the global pax header
+                    if archive.pax_headers.get("comment") != commit:
+                        raise ArchiveError(f"archive was not made from commit {commit[:8]}")
+                    checked = True
+                # Paths are prefixed with a single <owner>-<repo>-<sha>/ directory
+                _, _, relative_path = member.name.partition("/")
+                if not relative_path or not _is_selected(relative_path, patterns):
+                    continue
+                if member.isdir():
+                    continue
+                if not member.isfile():
+                    raise ArchiveError(f"{relative_path} is not a regular file")
+                parts = relative_path.split("/")
+                if ".." in parts:
+                    raise ArchiveError(f"unsafe path {relative_path}")
+                path = target_path.joinpath(*parts)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                source = archive.extractfile(member)
+                with open(path, "wb") as f:
+                    while True:
+                        chunk = source.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                executable = member.mode & stat.S_IXUSR
+                os.chmod(path, 0o755 if executable else 0o644)
+            if not checked:
+                raise ArchiveError("empty archive")
+
+
+def _is_selected(relative_path: str, patterns: Sequence[str]) -> bool:
+    """Match a file path against anchored sparse-checkout patterns.
+
+    ``/name`` selects a root file, ``/dir/`` everything under a root
+    directory; each component may use glob characters.
+    """
+    parts = relative_path.split("/")
+    for pattern in patterns:
+        directory = pattern.endswith("/")
+        pattern_parts = pattern.strip("/").split("/")
+        if directory:
+            if len(parts) <= len(pattern_parts):
+                continue
+        elif len(parts) != len(pattern_parts):
+            continue
+        if all(fnmatch.fnmatchcase(part, pattern_part) for part, pattern_part in zip(parts, pattern_parts)):
+            return True
+    return False
@@ -63,7 +63,11 @@ class DependencyTree:
     
     def get_node(self, repo_url: str) -> Optional[DependencyNode]:
         """Get a node by its repository URL."""
-        return self.nodes.get(repo_url)
+        node = self.nodes.get(repo_url)
+        if node is None:
+            # Nodes of dependencies with a reference are keyed by "repo#ref"
+            node = next((node for node in self.nodes.values() if node.dependency_ref.repo_url == repo_url), None)
+        return node
     
     def get_nodes_at_depth(self, depth: int) -> List[DependencyNode]:
         """Get all nodes at a specific depth level."""
@@ -2,16 +2,24 @@
 
 import os
 import shutil
+import tempfile
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, List, Tuple, TypeVar
 import re
 
 import git
 from git import Repo
-from git.exc import GitCommandError, InvalidGitRepositoryError
+from git.exc import BadName, GitCommandError, InvalidGitRepositoryError
 
 from ..core.token_manager import GitHubTokenManager
+from ..primitives.package_index import write_package_index
+from .archive_downloader import ArchiveDownloader, ArchiveError, get_download_backend
+from .install_timings import InstallTimings
+from .integrity import IntegrityManifest, check_installed_package
+from .mirror_cache import MirrorCache
+from .package_store import PackageStore, StoreCorruptedError, hash_tree
 from ..models.apm_package import (
     DependencyReference, 
     PackageInfo, 
@@ -21,14 +29,74 @@ from ..models.apm_package import (
     APMPackage
 )
 
+T = TypeVar('T')
+
+# Fetch errors of servers that only serve advertised refs (uploadpack.allowReachableSHA1InWant off)
+_UNADVERTISED_OBJECT_ERRORS = (
+    "not our ref",
+    "does not allow request for unadvertised object",
+    "couldn't find remote ref",
+)
+
+
+# Files of a package that APM reads (validation, primitive discovery, prompt
+# resolution), as sparse-checkout patterns; packages add more with `include:`
+PACKAGE_SPARSE_PATTERNS = (
+    "/apm.yml",
+    "/.apm/",
+    "/*.prompt.md",
+    "/prompts/",
+    "/workflows/",
+)
+
+
+def _is_unadvertised_object_error(message: str) -> bool:
+    """Check whether a fetch failed because the server refuses to serve a SHA directly."""
+    message = message.lower()
+    return any(error in message for error in _UNADVERTISED_OBJECT_ERRORS)
+
+
+def _package_includes(apm_yml_path: Path) -> List[str]:
+    """Read the extra paths a package asks to be downloaded (``include:`` in apm.yml).
+    
+    Returns:
+        List[str]: Sparse-checkout (gitignore-style) patterns, relative to the package root
+    """
+    try:
+        package = APMPackage.from_apm_yml(apm_yml_path)
+    except (OSError, ValueError):
+        return []  # Validation reports a missing or broken apm.yml
+    return [pattern[1:] if pattern.startswith("./") else pattern for pattern in package.include or []]
+
 
 class GitHubPackageDownloader:
     """Downloads and validates APM packages from GitHub repositories."""
     
-    def __init__(self):
-        """Initialize the GitHub package downloader."""
+    def __init__(self, store: Optional[PackageStore] = None, mirrors: Optional[MirrorCache] = None,
+                 backend: Optional[str] = None, archive: Optional[ArchiveDownloader] = None,
+                 timings: Optional[InstallTimings] = None):
+        """Initialize the GitHub package downloader.
+        
+        Args:
+            store: Package store to download through (default: the machine-wide store)
+            mirrors: Repository mirrors that updates fetch into (default: the machine-wide mirrors)
+            backend: "auto", "archive" or "git" (default: ``$APM_DOWNLOAD_BACKEND``, else "auto")
+            archive: Archive downloader for the "auto" and "archive" backends
+            timings: Records per-package phase timings, bytes received and sources
+        """
+        self.store = store if store is not None else PackageStore()
+        self.mirrors = mirrors if mirrors is not None else MirrorCache()
         self.token_manager = GitHubTokenManager()
         self.git_env = self._setup_git_environment()
+        self.backend = backend or get_download_backend()
+        self.archive = archive if archive is not None else ArchiveDownloader(self.github_token)
+        self.timings = timings
+        # Repository -> URL whose authentication method worked
+        self._working_urls: Dict[str, str] = {}
+    
+    def _timed(self, repo_url_base: str, phase: str):
+        """Time a phase of a package's install, when recording timings."""
+        return self.timings.phase(repo_url_base, phase) if self.timings is not None else nullcontext()
     
     def _setup_git_environment(self) -> Dict[str, Any]:
         """Set up Git environment with GitHub authentication using centralized token manager.
@@ -99,8 +167,8 @@ class GitHubPackageDownloader:
             # Use standard HTTPS URL for public repositories
             return f"https://github.com/{repo_ref}"
     
-    def _clone_with_fallback(self, repo_url_base: str, target_path: Path, **clone_kwargs) -> Repo:
-        """Attempt to clone a repository with fallback authentication methods.
+    def _remote_urls(self, repo_url_base: str) -> List[str]:
+        """Get the repository URLs to try, in authentication fallback order.
         
         Uses GitHub Enterprise authentication patterns:
         1. x-access-token format for private repos (GitHub Enterprise standard)
@@ -109,41 +177,47 @@ class GitHubPackageDownloader:
         
         Args:
             repo_url_base: Base repository reference (owner/repo)
-            target_path: Target path for cloning
-            **clone_kwargs: Additional arguments for Repo.clone_from
             
         Returns:
-            Repo: Successfully cloned repository
+            List[str]: Repository URLs; the one that worked last time comes alone
+        """
+        working_url = self._working_urls.get(repo_url_base)
+        if working_url:
+            return [working_url]
+        
+        urls = []
+        if self.github_token:
+            urls.append(self._build_repo_url(repo_url_base, use_ssh=False))
+        urls.append(self._build_repo_url(repo_url_base, use_ssh=True))
+        urls.append(f"https://github.com/{repo_url_base}")
+        return urls
+    
+    def _run_with_fallback(self, repo_url_base: str, operation: Callable[[str], T]) -> T:
+        """Run a git operation against a repository with fallback authentication methods.
+        
+        The URL that worked is remembered, so the next operations on the same
+        repository (resolving, then fetching) do not retry failing methods.
+        
+        Args:
+            repo_url_base: Base repository reference (owner/repo)
+            operation: Runs the git operation against a repository URL
+            
+        Returns:
+            The result of the first successful operation
             
         Raises:
             RuntimeError: If all authentication methods fail
         """
         last_error = None
-        
-        # Method 1: Try x-access-token format if token is available (GitHub Enterprise)
-        if self.github_token:
+        for url in self._remote_urls(repo_url_base):
             try:
-                auth_url = self._build_repo_url(repo_url_base, use_ssh=False)
-                return Repo.clone_from(auth_url, target_path, env=self.git_env, **clone_kwargs)
+                result = operation(url)
+                self._working_urls[repo_url_base] = url
+                return result
             except GitCommandError as e:
                 last_error = e
                 # Continue to next method
         
-        # Method 2: Try SSH if it might work (for SSH key-based authentication)
-        try:
-            ssh_url = self._build_repo_url(repo_url_base, use_ssh=True)
-            return Repo.clone_from(ssh_url, target_path, env=self.git_env, **clone_kwargs)
-        except GitCommandError as e:
-            last_error = e
-            # Continue to next method
-        
-        # Method 3: Try standard HTTPS as fallback for public repos
-        try:
-            public_url = f"https://github.com/{repo_url_base}"
-            return Repo.clone_from(public_url, target_path, env=self.git_env, **clone_kwargs)
-        except GitCommandError as e:
-            last_error = e
-        
         # All methods failed
         error_msg = f"Failed to clone repository {repo_url_base} using all available methods. "
         if not self.has_github_token:
@@ -158,6 +232,49 @@ class GitHubPackageDownloader:
         
         raise RuntimeError(error_msg)
     
+    def _clone_with_fallback(self, repo_url_base: str, target_path: Path, **clone_kwargs) -> Repo:
+        """Attempt to clone a repository with fallback authentication methods.
+        
+        Args:
+            repo_url_base: Base repository reference (owner/repo)
+            target_path: Target path for cloning
+            **clone_kwargs: Additional arguments for Repo.clone_from
+            
+        Returns:
+            Repo: Successfully cloned repository
+            
+        Raises:
+            RuntimeError: If all authentication methods fail
+        """
+        return self._run_with_fallback(
+            repo_url_base,
+            lambda url: Repo.clone_from(url, target_path, env=self.git_env, **clone_kwargs)
+        )
+    
+    def _list_remote_refs(self, repo_url_base: str, ref: str) -> Dict[str, str]:
+        """List the branch and tag named ``ref`` on the remote with ``git ls-remote``.
+        
+        Args:
+            repo_url_base: Base repository reference (owner/repo)
+            ref: Branch or tag name
+            
+        Returns:
+            Dict[str, str]: Full ref name (``refs/tags/<tag>^{}`` for the commit
+            an annotated tag points to) -> object SHA
+            
+        Raises:
+            RuntimeError: If the repository cannot be reached
+        """
+        def ls_remote(url: str) -> str:
+            return git.cmd.Git().ls_remote(url, f"refs/heads/{ref}", f"refs/tags/{ref}", env=self.git_env)
+        
+        refs = {}
+        for line in self._run_with_fallback(repo_url_base, ls_remote).splitlines():
+            sha, _, name = line.partition("\t")
+            if name:
+                refs[name.strip()] = sha.strip()
+        return refs
+    
     def resolve_git_reference(self, repo_ref: str) -> ResolvedReference:
         """Resolve a Git reference (branch/tag/commit) to a specific commit SHA.
         
@@ -180,99 +297,329 @@ class GitHubPackageDownloader:
         # Default to main branch if no reference specified
         ref = dep_ref.reference or "main"
         
-        # Pre-analyze the reference type to determine the best approach
-        is_likely_commit = re.match(r'^[a-f0-9]{7,40}$', ref.lower()) is not None
-        
-        # Create a temporary directory for Git operations
-        temp_dir = None
-        try:
-            import tempfile
-            temp_dir = Path(tempfile.mkdtemp())
-            
-            if is_likely_commit:
-                # For commit SHAs, clone full repository first, then checkout the commit
-                try:
-                    repo = self._clone_with_fallback(dep_ref.repo_url, temp_dir)
-                    commit = repo.commit(ref)
-                    ref_type = GitReferenceType.COMMIT
-                    resolved_commit = commit.hexsha
-                    ref_name = ref
-                except Exception as e:
-                    sanitized_error = self._sanitize_git_error(str(e))
-                    raise ValueError(f"Could not resolve commit '{ref}' in repository {dep_ref.repo_url}: {sanitized_error}")
+        with self._timed(dep_ref.repo_url, "resolve"):
+            # Branches and tags are resolved from the remote's ref advertisement, without cloning
+            refs = self._list_remote_refs(dep_ref.repo_url, ref)
+            if f"refs/heads/{ref}" in refs:
+                ref_type = GitReferenceType.BRANCH
+                resolved_commit = refs[f"refs/heads/{ref}"]
+            elif f"refs/tags/{ref}" in refs:
+                ref_type = GitReferenceType.TAG
+                # Annotated tags are advertised with the commit they point to
+                resolved_commit = refs.get(f"refs/tags/{ref}^{{}}", refs[f"refs/tags/{ref}"])
+            elif re.match(r'^[a-f0-9]{40}$', ref.lower()):
+                ref_type = GitReferenceType.COMMIT
+                resolved_commit = ref.lower()
+            elif re.match(r'^[a-f0-9]{7,39}$', ref.lower()):
+                # Abbreviated SHAs can only be expanded from the repository's history
+                ref_type = GitReferenceType.COMMIT
+                resolved_commit = self._expand_commit_sha(dep_ref.repo_url, ref)
             else:
-                # For branches and tags, try shallow clone first
-                try:
-                    # Try to clone with specific branch/tag first
-                    repo = self._clone_with_fallback(
-                        dep_ref.repo_url,
-                        temp_dir,
-                        depth=1,
-                        branch=ref
-                    )
-                    ref_type = GitReferenceType.BRANCH  # Could be branch or tag
-                    resolved_commit = repo.head.commit.hexsha
-                    ref_name = ref
-                    
-                except GitCommandError:
-                    # If branch/tag clone fails, try full clone and resolve reference
-                    try:
-                        repo = self._clone_with_fallback(dep_ref.repo_url, temp_dir)
-                        
-                        # Try to resolve the reference
-                        try:
-                            # Try as branch first
-                            try:
-                                branch = repo.refs[f"origin/{ref}"]
-                                ref_type = GitReferenceType.BRANCH
-                                resolved_commit = branch.commit.hexsha
-                                ref_name = ref
-                            except IndexError:
-                                # Try as tag
-                                try:
-                                    tag = repo.tags[ref]
-                                    ref_type = GitReferenceType.TAG
-                                    resolved_commit = tag.commit.hexsha
-                                    ref_name = ref
-                                except IndexError:
-                                    raise ValueError(f"Reference '{ref}' not found in repository {dep_ref.repo_url}")
-                        
-                        except Exception as e:
-                            sanitized_error = self._sanitize_git_error(str(e))
-                            raise ValueError(f"Could not resolve reference '{ref}' in repository {dep_ref.repo_url}: {sanitized_error}")
-                    
-                    except GitCommandError as e:
-                        # Check if this might be a private repository access issue
-                        if "Authentication failed" in str(e) or "remote: Repository not found" in str(e):
-                            error_msg = f"Failed to clone repository {dep_ref.repo_url}. "
-                            if not self.has_github_token:
-                                error_msg += "This might be a private repository that requires authentication. " \
-                                           "Please set GITHUB_APM_PAT or GITHUB_TOKEN environment variable."
-                            else:
-                                error_msg += "Authentication failed. Please check your GitHub token permissions."
-                            raise RuntimeError(error_msg)
-                        else:
-                            sanitized_error = self._sanitize_git_error(str(e))
-                            raise RuntimeError(f"Failed to clone repository {dep_ref.repo_url}: {sanitized_error}")
-                    
-        finally:
-            # Clean up temporary directory
-            if temp_dir and temp_dir.exists():
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                raise ValueError(f"Reference '{ref}' not found in repository {dep_ref.repo_url}")
         
         return ResolvedReference(
             original_ref=repo_ref,
             ref_type=ref_type,
             resolved_commit=resolved_commit,
-            ref_name=ref_name
+            ref_name=ref
         )
     
-    def download_package(self, repo_ref: str, target_path: Path) -> PackageInfo:
+    def _expand_commit_sha(self, repo_url_base: str, short_sha: str) -> str:
+        """Expand an abbreviated commit SHA by cloning the repository's history.
+        
+        Args:
+            repo_url_base: Base repository reference (owner/repo)
+            short_sha: Abbreviated commit SHA
+            
+        Returns:
+            str: Full commit SHA
+            
+        Raises:
+            ValueError: If no commit matches
+            RuntimeError: If the repository cannot be cloned
+        """
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            # Commits only: no file contents are needed to find the commit
+            repo = self._clone_with_fallback(repo_url_base, temp_dir, no_checkout=True, filter="blob:none")
+            return repo.commit(short_sha).hexsha
+        except (GitCommandError, ValueError, BadName) as e:
+            sanitized_error = self._sanitize_git_error(str(e))
+            raise ValueError(f"Could not resolve commit '{short_sha}' in repository {repo_url_base}: {sanitized_error}")
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def _fetch_commit(self, repo_url_base: str, resolved_ref: ResolvedReference, target_path: Path) -> None:
+        """Check out the files APM reads from exactly one commit into an empty directory.
+        
+        Runs ``git init`` and ``git fetch --depth 1 --filter=blob:none <sha>``
+        (see ``_fetch_resolved``), then a sparse checkout of
+        ``PACKAGE_SPARSE_PATTERNS`` plus the package's ``include:`` list, so
+        only the contents of those files are downloaded. Servers that cannot
+        send files on their own (protocol v0) get a plain fetch of the commit.
+        
+        Args:
+            repo_url_base: Base repository reference (owner/repo)
+            resolved_ref: Reference resolved by ``resolve_git_reference``
+            target_path: Empty directory to check the commit out into
+            
+        Raises:
+            GitCommandError: If the commit cannot be fetched or checked out
+            RuntimeError: If the repository cannot be reached
+        """
+        repo = Repo.init(target_path)
+        try:
+            with self._timed(repo_url_base, "fetch"):
+                commit = self._fetch_resolved(repo, repo_url_base, resolved_ref, "--filter=blob:none")
+            with self._timed(repo_url_base, "checkout"):
+                self._sparse_checkout(repo, target_path, commit)
+        except GitCommandError as e:
+            if not _is_unadvertised_object_error(str(e)):
+                raise
+            shutil.rmtree(target_path / ".git", ignore_errors=True)
+            repo = Repo.init(target_path)
+            with self._timed(repo_url_base, "fetch"):
+                commit = self._fetch_resolved(repo, repo_url_base, resolved_ref)
+            with self._timed(repo_url_base, "checkout"):
+                self._sparse_checkout(repo, target_path, commit)
+        # The branch or tag may have moved since it was resolved
+        resolved_ref.resolved_commit = repo.head.commit.hexsha
+    
+    def _sparse_checkout(self, repo: Repo, target_path: Path, commit: str, git_dir: Optional[Path] = None) -> None:
+        """Check out the package files of a fetched commit.
+        
+        In a partial clone, checking out fetches the contents of the selected
+        files (in one request); the package's apm.yml can then widen the selection.
+        
+        Args:
+            repo: Repository the commit was fetched into
+            target_path: Working directory of the repository
+            commit: Commit to check out
+            git_dir: Git directory of the working directory (default: ``target_path/.git``)
+            
+        Raises:
+            GitCommandError: If the files cannot be fetched or checked out
+        """
+        patterns = list(PACKAGE_SPARSE_PATTERNS)
+        sparse_file = (git_dir or target_path / ".git") / "info" / "sparse-checkout"
+        sparse_file.parent.mkdir(parents=True, exist_ok=True)
+        sparse_file.write_text("\n".join(patterns) + "\n", encoding="utf-8")
+        repo.git.config("core.sparseCheckout", "true")
+        repo.git.checkout("--quiet", "--detach", commit, env=self.git_env)
+        
+        includes = _package_includes(target_path / "apm.yml")
+        if includes:
+            sparse_file.write_text("\n".join(patterns + includes) + "\n", encoding="utf-8")
+            # Update the working tree to the widened selection
+            repo.git.read_tree("-mu", "HEAD", env=self.git_env)
+    
+    def _download_archive(self, dep_ref: DependencyReference, resolved_ref: ResolvedReference, target_path: Path) -> bool:
+        """Extract the package files of the resolved commit from its tarball.
+        
+        Packages that widen their files with ``include:`` are left to git, whose
+        sparse checkout applies the patterns the package's apm.yml declares.
+        
+        Args:
+            dep_ref: Parsed repository reference
+            resolved_ref: Reference resolved by ``resolve_git_reference``
+            target_path: Empty directory to fill
+            
+        Returns:
+            bool: True if the package is in ``target_path``; False to download it with git
+            
+        Raises:
+            RuntimeError: If the archive fails and the backend is "archive"
+        """
+        if self.backend == "git":
+            return False
+        try:
+            with self._timed(dep_ref.repo_url, "fetch"):
+                received = self.archive.download(dep_ref.repo_url, resolved_ref.resolved_commit, target_path,
+                                                 PACKAGE_SPARSE_PATTERNS)
+            if self.timings is not None:
+                self.timings.add_bytes(dep_ref.repo_url, received)
+            if not _package_includes(target_path / "apm.yml"):
+                return True
+            error = ArchiveError(f"{dep_ref.repo_url} includes files outside the package directories")
+        except ArchiveError as e:
+            error = e
+        if self.backend == "archive":
+            raise RuntimeError(str(error))
+        for child in target_path.iterdir():
+            if child.is_dir():
+                shutil.rmtree(child)
+            else:
+                child.unlink()
+        return False
+    
+    def _checkout_from_mirror(self, repo_url_base: str, resolved_ref: ResolvedReference, target_path: Path) -> None:
+        """Fetch a commit into the repository's mirror and check its package files out.
+        
+        The mirror already holds the commits and trees of earlier updates, so
+        the fetch only transfers what changed since. The files are checked out
+        through a temporary worktree of the mirror (sparse, as in ``_fetch_commit``).
+        
+        Args:
+            repo_url_base: Base repository reference (owner/repo)
+            resolved_ref: Reference resolved by ``resolve_git_reference``
+            target_path: Empty directory to check the commit out into
+            
+        Raises:
+            GitCommandError: If the commit cannot be fetched or checked out
+            RuntimeError: If the repository cannot be reached
+        """
+        mirror = self.mirrors.open(repo_url_base)
+        try:
+            with self._timed(repo_url_base, "fetch"):
+                commit = self._fetch_resolved(mirror, repo_url_base, resolved_ref, "--filter=blob:none")
+            commit = resolved_ref.resolved_commit = mirror.git.rev_parse(commit)
+            # Keep the commit, so later fetches only transfer what changed since
+            mirror.git.update_ref(MirrorCache.ref_name(resolved_ref.ref_type.value, resolved_ref.ref_name), commit)
+            
+            mirror.git.worktree("add", "--quiet", "--no-checkout", "--detach", str(target_path), commit)
+            try:
+                worktree = Repo(target_path)
+                with self._timed(repo_url_base, "checkout"):
+                    self._sparse_checkout(worktree, target_path, commit, git_dir=Path(worktree.git_dir))
+            finally:
+                (target_path / ".git").unlink(missing_ok=True)
+                mirror.git.worktree("prune")
+        except GitCommandError as e:
+            if not _is_unadvertised_object_error(str(e)):
+                raise
+            # The server cannot send files on their own (protocol v0): fetch the commit without the mirror
+            for child in target_path.iterdir():
+                if child.is_dir():
+                    shutil.rmtree(child)
+                else:
+                    child.unlink()
+            self._fetch_commit(repo_url_base, resolved_ref, target_path)
+        finally:
+            MirrorCache.forget_remotes(mirror)
+    
+    def _fetch_resolved(self, repo: Repo, repo_url_base: str, resolved_ref: ResolvedReference, *fetch_args: str) -> str:
+        """Fetch the commit of a resolved reference into a repository.
+        
+        Fetches the SHA itself at depth 1. Servers that do not allow fetching
+        unadvertised SHAs get the branch or tag itself (depth 1), or for plain
+        commits the repository's branches and tags.
+        
+        Args:
+            repo: Repository to fetch into
+            repo_url_base: Base repository reference (owner/repo)
+            resolved_ref: Reference resolved by ``resolve_git_reference``
+            *fetch_args: Extra ``git fetch`` options, e.g. ``--filter=blob:none``
+            
+        Returns:
+            str: What to check out: the SHA, or ``FETCH_HEAD``
+            
+        Raises:
+            RuntimeError: If the repository cannot be reached or the commit fetched
+        """
+        sha = resolved_ref.resolved_commit
+        
+        def fetch(*args: str) -> Callable[[str], None]:
+            return lambda url: repo.git.fetch("--quiet", "--no-tags", *fetch_args, url, *args, env=self.git_env)
+        
+        try:
+            self._run_with_fallback(repo_url_base, fetch("--depth", "1", sha))
+            return sha
+        except RuntimeError as e:
+            if not _is_unadvertised_object_error(str(e)):
+                raise
+        if resolved_ref.ref_type == GitReferenceType.BRANCH:
+            self._run_with_fallback(repo_url_base, fetch("--depth", "1", f"refs/heads/{resolved_ref.ref_name}"))
+            return "FETCH_HEAD"
+        if resolved_ref.ref_type == GitReferenceType.TAG:
+            self._run_with_fallback(repo_url_base, fetch("--depth", "1", f"refs/tags/{resolved_ref.ref_name}"))
+            return "FETCH_HEAD"
+        self._run_with_fallback(repo_url_base, fetch("refs/heads/*:refs/remotes/origin/*", "refs/tags/*:refs/tags/*"))
+        return sha
+    
+    def fetch_manifest(self, repo_ref: str, locked_commit: Optional[str] = None) -> Tuple[ResolvedReference, Optional[str]]:
+        """Get a package's apm.yml without downloading the package.
+        
+        Read from the package store when the commit is stored. Otherwise the
+        commit is fetched without file contents (``--filter=blob:none``) and
+        only apm.yml is then read, which fetches that one file. Servers without
+        partial clone support send the whole commit instead.
+        
+        Args:
+            repo_ref: Repository reference string (e.g., "user/repo#branch")
+            locked_commit: Commit recorded in apm.lock, used without resolving the reference
+            
+        Returns:
+            Tuple[ResolvedReference, Optional[str]]: The resolved reference and
+            the apm.yml text, or None if the package has no apm.yml
+            
+        Raises:
+            ValueError: If the repository reference is invalid
+            RuntimeError: If the repository cannot be reached
+        """
+        dep_ref = DependencyReference.parse(repo_ref)
+        if locked_commit:
+            resolved_ref = ResolvedReference(repo_ref, GitReferenceType.COMMIT, locked_commit, locked_commit)
+        else:
+            resolved_ref = self._resolve_reference(repo_ref, dep_ref)
+        
+        stored = self.store.lookup(resolved_ref.resolved_commit) if self.store is not None else None
+        if stored is not None:
+            try:
+                return resolved_ref, (stored / "apm.yml").read_text(encoding="utf-8")
+            except FileNotFoundError:
+                return resolved_ref, None
+            except OSError:
+                pass  # Fetch it instead
+        
+        try:
+            return resolved_ref, self._read_manifest(dep_ref, resolved_ref, partial=True)
+        except GitCommandError as e:
+            if not _is_unadvertised_object_error(str(e)):
+                raise RuntimeError(f"Failed to fetch apm.yml of {dep_ref.repo_url}: {self._sanitize_git_error(str(e))}")
+        # The server cannot send the file on its own (protocol v0): fetch the whole commit
+        try:
+            return resolved_ref, self._read_manifest(dep_ref, resolved_ref, partial=False)
+        except GitCommandError as e:
+            raise RuntimeError(f"Failed to fetch apm.yml of {dep_ref.repo_url}: {self._sanitize_git_error(str(e))}")
+    
+    def _read_manifest(self, dep_ref: DependencyReference, resolved_ref: ResolvedReference, partial: bool) -> Optional[str]:
+        """Fetch a commit into a temporary repository and read its apm.yml.
+        
+        Args:
+            dep_ref: Parsed repository reference
+            resolved_ref: Resolved reference; its commit is updated to the one fetched
+            partial: Fetch the commit without file contents; reading apm.yml
+                then fetches that file alone
+            
+        Returns:
+            Optional[str]: The apm.yml text, or None if the commit has none
+            
+        Raises:
+            GitCommandError: If the commit or the file cannot be fetched
+            RuntimeError: If the repository cannot be reached
+        """
+        with self._timed(dep_ref.repo_url, "apm.yml"), tempfile.TemporaryDirectory() as temp_dir:
+            repo = Repo.init(temp_dir, bare=True)
+            fetch_args = ("--filter=blob:none",) if partial else ()
+            commit = self._fetch_resolved(repo, dep_ref.repo_url, resolved_ref, *fetch_args)
+            if commit == "FETCH_HEAD":
+                commit = resolved_ref.resolved_commit = repo.git.rev_parse(commit)
+            try:
+                # With a partial fetch, reading the file fetches its contents
+                return repo.git.show(f"{commit}:apm.yml", env=self.git_env)
+            except GitCommandError as e:
+                if "does not exist in" in str(e):
+                    return None
+                raise
+    
+    def download_package(self, repo_ref: str, target_path: Path, locked_commit: Optional[str] = None) -> PackageInfo:
         """Download a GitHub repository and validate it as an APM package.
         
         Args:
             repo_ref: Repository reference string (e.g., "user/repo#branch")
             target_path: Local path where package should be downloaded
+            locked_commit: Commit recorded for this reference in apm.lock; it is
+                installed as is, without resolving the reference
             
         Returns:
             PackageInfo: Information about the downloaded package
@@ -288,7 +635,12 @@ class GitHubPackageDownloader:
             raise ValueError(f"Invalid repository reference '{repo_ref}': {e}")
         
         # Resolve the Git reference to get specific commit
-        resolved_ref = self.resolve_git_reference(repo_ref)
+        if locked_commit:
+            if not re.match(r'^[a-f0-9]{40}$', locked_commit):
+                raise ValueError(f"Invalid locked commit '{locked_commit}' for {dep_ref.repo_url}")
+            resolved_ref = ResolvedReference(repo_ref, GitReferenceType.COMMIT, locked_commit, locked_commit)
+        else:
+            resolved_ref = self._resolve_reference(repo_ref, dep_ref)
         
         # Create target directory if it doesn't exist
         target_path.mkdir(parents=True, exist_ok=True)
@@ -298,46 +650,99 @@ class GitHubPackageDownloader:
             shutil.rmtree(target_path)
             target_path.mkdir(parents=True, exist_ok=True)
         
-        try:
-            # Clone the repository using fallback authentication methods
-            # Use shallow clone for performance if we have a specific commit
-            if resolved_ref.ref_type == GitReferenceType.COMMIT:
-                # For commits, we need to clone and checkout the specific commit
-                repo = self._clone_with_fallback(dep_ref.repo_url, target_path)
-                repo.git.checkout(resolved_ref.resolved_commit)
-            else:
-                # For branches and tags, we can use shallow clone
-                repo = self._clone_with_fallback(
-                    dep_ref.repo_url,
-                    target_path,
-                    depth=1,
-                    branch=resolved_ref.ref_name
-                )
+        # Packages already in the machine-wide store are linked in without network access
+        if self._materialize_from_store(resolved_ref.resolved_commit, target_path):
+            if self.timings is not None:
+                self.timings.set_source(dep_ref.repo_url, "store")
+        else:
+            self._download_into_store(dep_ref, resolved_ref, target_path)
+        
+        return self._load_package(dep_ref, resolved_ref, target_path)
+    
+    def update_package(self, repo_ref: str, target_path: Path, installed_commit: Optional[str] = None) -> Optional[PackageInfo]:
+        """Update an installed package to the commit its reference now resolves to.
+        
+        Resolving the reference is a single ``git ls-remote``; nothing else
+        happens if the package is installed at that commit already. Otherwise
+        the commit is fetched incrementally into the repository's mirror (see
+        ``MirrorCache``), or taken from the package store, and checked out into
+        a fresh directory that then replaces the installed one.
+        
+        Args:
+            repo_ref: Repository reference string (e.g., "user/repo#branch")
+            target_path: Directory the package is installed in
+            installed_commit: Commit the package is installed at (from apm.lock);
+                without it, the installed files are compared with the stored package
             
-            # Remove .git directory to save space and prevent treating as a Git repository
-            git_dir = target_path / ".git"
-            if git_dir.exists():
-                shutil.rmtree(git_dir, ignore_errors=True)
-                
-        except GitCommandError as e:
-            # Check if this might be a private repository access issue
-            if "Authentication failed" in str(e) or "remote: Repository not found" in str(e):
-                error_msg = f"Failed to clone repository {dep_ref.repo_url}. "
-                if not self.has_github_token:
-                    error_msg += "This might be a private repository that requires authentication. " \
-                               "Please set GITHUB_APM_PAT or GITHUB_TOKEN environment variable."
-                else:
-                    error_msg += "Authentication failed. Please check your GitHub token permissions."
-                raise RuntimeError(error_msg)
-            else:
-                sanitized_error = self._sanitize_git_error(str(e))
-                raise RuntimeError(f"Failed to clone repository {dep_ref.repo_url}: {sanitized_error}")
-        except RuntimeError:
-            # Re-raise RuntimeError from _clone_with_fallback
+        Returns:
+            Optional[PackageInfo]: The updated package, or None if it was up to date
+            
+        Raises:
+            ValueError: If the repository reference is invalid
+            RuntimeError: If the update or its validation fails; the installed package is left as is
+        """
+        try:
+            dep_ref = DependencyReference.parse(repo_ref)
+        except ValueError as e:
+            raise ValueError(f"Invalid repository reference '{repo_ref}': {e}")
+        
+        resolved_ref = self.resolve_git_reference(repo_ref)
+        commit = resolved_ref.resolved_commit
+        if self._is_installed(commit, target_path, installed_commit):
+            return None
+        
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        fresh_path = Path(tempfile.mkdtemp(dir=target_path.parent, prefix=f".{target_path.name}-update-"))
+        try:
+            if not self._materialize_from_store(commit, fresh_path):
+                self._download_into_store(dep_ref, resolved_ref, fresh_path, from_mirror=True)
+            package_info = self._load_package(dep_ref, resolved_ref, fresh_path)
+        except BaseException:
+            shutil.rmtree(fresh_path, ignore_errors=True)
             raise
         
+        # Swap the new directory in with two renames, so the package is never half updated
+        old_path = target_path.with_name(f".{target_path.name}-old-{os.getpid()}")
+        shutil.rmtree(old_path, ignore_errors=True)
+        if target_path.exists():
+            os.rename(target_path, old_path)
+        os.rename(fresh_path, target_path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        
+        package_info.install_path = target_path
+        package_info.package.package_path = target_path
+        return package_info
+    
+    def _is_installed(self, commit: str, target_path: Path, installed_commit: Optional[str]) -> bool:
+        """Check whether a package is installed, intact, at a commit, without network access."""
+        manifest, problem = check_installed_package(target_path, commit)
+        if manifest is not None:
+            return problem is None
+        # Installed before integrity manifests
+        if not (target_path / "apm.yml").is_file():
+            return False
+        if installed_commit is not None:
+            return installed_commit == commit
+        stored = self.store.lookup(commit) if self.store is not None else None
+        return stored is not None and hash_tree(target_path)[0] == stored.name
+    
+    def _load_package(self, dep_ref: DependencyReference, resolved_ref: ResolvedReference, target_path: Path) -> PackageInfo:
+        """Validate a downloaded package and describe it.
+        
+        Args:
+            dep_ref: Parsed repository reference
+            resolved_ref: Reference the package was downloaded at
+            target_path: Directory holding the package files
+            
+        Returns:
+            PackageInfo: Information about the downloaded package
+            
+        Raises:
+            RuntimeError: If the package is not a valid APM package; its directory is removed
+        """
         # Validate the downloaded package
-        validation_result = validate_apm_package(target_path)
+        with self._timed(dep_ref.repo_url, "validate"):
+            validation_result = validate_apm_package(target_path)
         if not validation_result.is_valid:
             # Clean up on validation failure
             if target_path.exists():
@@ -355,15 +760,174 @@ class GitHubPackageDownloader:
         package = validation_result.package
         package.source = dep_ref.to_github_url()
         package.resolved_commit = resolved_ref.resolved_commit
+        if self.store is not None and resolved_ref.ref_type != GitReferenceType.COMMIT:
+            self.store.remember_ref(dep_ref.repo_url, resolved_ref.ref_name,
+                                    resolved_ref.ref_type.value, resolved_ref.resolved_commit)
+        
+        with self._timed(dep_ref.repo_url, "manifest"):
+            # Record the installed files, so later installs can check them without downloading
+            manifest = IntegrityManifest.build(target_path, resolved_ref.resolved_commit)
+            try:
+                manifest.save(target_path)
+            except OSError:
+                pass  # The package is downloaded again next time
+            
+            # List the package's primitives once, so compile and deps commands need not scan it
+            try:
+                write_package_index(target_path)
+            except OSError:
+                pass  # Readers fall back to scanning the package
         
         # Create and return PackageInfo
         return PackageInfo(
             package=package,
             install_path=target_path,
             resolved_reference=resolved_ref,
-            installed_at=datetime.now().isoformat()
+            installed_at=datetime.now().isoformat(),
+            tree_hash=manifest.tree
         )
     
+    def _resolve_reference(self, repo_ref: str, dep_ref: DependencyReference) -> ResolvedReference:
+        """Resolve a reference, answering from the package store when possible.
+        
+        Full commit SHAs already in the store need no network access. When the
+        remote cannot be reached, a branch or tag falls back to the commit it
+        last resolved to, provided that commit's package is stored.
+        
+        Args:
+            repo_ref: Repository reference string (e.g., "user/repo#branch")
+            dep_ref: Parsed repository reference
+            
+        Returns:
+            ResolvedReference: Resolved reference with commit SHA
+        """
+        ref = dep_ref.reference or "main"
+        if self.store is not None and re.match(r'^[a-f0-9]{40}$', ref.lower()) \
+                and self.store.lookup(ref.lower()) is not None:
+            return ResolvedReference(repo_ref, GitReferenceType.COMMIT, ref.lower(), ref)
+        
+        try:
+            return self.resolve_git_reference(repo_ref)
+        except RuntimeError:
+            recalled = self.store.recall_ref(dep_ref.repo_url, ref) if self.store is not None else None
+            if recalled is None or self.store.lookup(recalled[1]) is None:
+                raise
+            ref_type, commit = recalled
+            return ResolvedReference(repo_ref, GitReferenceType(ref_type), commit, ref)
+    
+    def _materialize_from_store(self, commit: str, target_path: Path) -> bool:
+        """Link a stored package into an empty target directory.
+        
+        Args:
+            commit: Resolved commit SHA
+            target_path: Empty directory to fill
+            
+        Returns:
+            bool: True if the package was stored and is now in ``target_path``
+        """
+        if self.store is None:
+            return False
+        package_dir = self.store.lookup(commit)
+        if package_dir is None:
+            return False
+        try:
+            self.store.materialize(package_dir, target_path)
+            return True
+        except (StoreCorruptedError, OSError):
+            # Drop the damaged entry and download the package again
+            self.store.remove(package_dir.name)
+            shutil.rmtree(target_path, ignore_errors=True)
+            target_path.mkdir(parents=True, exist_ok=True)
+            return False
+    
+    def _download_into_store(self, dep_ref: DependencyReference, resolved_ref: ResolvedReference, target_path: Path,
+                             from_mirror: bool = False) -> None:
+        """Fetch the resolved commit, add it to the package store and link it into the target.
+        
+        Without a usable store the commit is fetched into the target directly.
+        
+        Args:
+            dep_ref: Parsed repository reference
+            resolved_ref: Reference resolved by ``resolve_git_reference``
+            target_path: Empty directory to fill
+            from_mirror: Fetch into the repository's mirror and check out from there
+            
+        Raises:
+            RuntimeError: If the commit cannot be fetched
+        """
+        download_path = target_path
+        if self.store is not None:
+            try:
+                download_path = self.store.create_staging_dir()
+            except OSError:
+                pass  # Store not writable: install without it
+        
+        fetched = False
+        try:
+            # Fetch only the resolved commit
+            if from_mirror:
+                source = "mirror"
+                self._checkout_from_mirror(dep_ref.repo_url, resolved_ref, download_path)
+            elif self._download_archive(dep_ref, resolved_ref, download_path):
+                source = "archive"
+            else:
+                source = "git"
+                self._fetch_commit(dep_ref.repo_url, resolved_ref, download_path)
+            
+            # Remove .git directory to save space and prevent treating as a Git repository
+            git_dir = download_path / ".git"
+            if self.timings is not None:
+                self.timings.set_source(dep_ref.repo_url, source)
+                if git_dir.is_dir():
+                    # The packs received, less compact than on the wire but close
+                    self.timings.add_bytes(dep_ref.repo_url, sum(
+                        path.stat().st_size for path in (git_dir / "objects").rglob("*") if path.is_file()))
+            if git_dir.exists():
+                shutil.rmtree(git_dir, ignore_errors=True)
+            fetched = True
+                
+        except GitCommandError as e:
+            # Check if this might be a private repository access issue
+            if "Authentication failed" in str(e) or "remote: Repository not found" in str(e):
+                error_msg = f"Failed to clone repository {dep_ref.repo_url}. "
+                if not self.has_github_token:
+                    error_msg += "This might be a private repository that requires authentication. " \
+                               "Please set GITHUB_APM_PAT or GITHUB_TOKEN environment variable."
+                else:
+                    error_msg += "Authentication failed. Please check your GitHub token permissions."
+                raise RuntimeError(error_msg)
+            else:
+                sanitized_error = self._sanitize_git_error(str(e))
+                raise RuntimeError(f"Failed to clone repository {dep_ref.repo_url}: {sanitized_error}")
+        except RuntimeError:
+            # Re-raise RuntimeError from _clone_with_fallback
+            raise
+        finally:
+            if not fetched and download_path != target_path:
+                shutil.rmtree(download_path, ignore_errors=True)
+        
+        if download_path == target_path:
+            return
+        try:
+            package_dir = self.store.add(download_path, resolved_ref.resolved_commit, dep_ref.repo_url)
+        except (StoreCorruptedError, OSError) as e:
+            # Store full or unwritable: move the download itself into place
+            if not download_path.exists():
+                raise RuntimeError(f"Failed to store {dep_ref.repo_url}: {e}")
+            shutil.rmtree(target_path, ignore_errors=True)
+            shutil.move(str(download_path), str(target_path))
+            return
+        try:
+            self.store.materialize(package_dir, target_path)
+        except (StoreCorruptedError, OSError):
+            # Linking stopped partway (e.g. disk full): never keep a partial package
+            shutil.rmtree(target_path, ignore_errors=True)
+            try:
+                shutil.copytree(package_dir, target_path)
+            except OSError as e:
+                shutil.rmtree(target_path, ignore_errors=True)
+                raise RuntimeError(f"Failed to install {dep_ref.repo_url}: {e}")
+    
     def _get_clone_progress_callback(self):
         """Get a progress callback for Git clone operations.
         
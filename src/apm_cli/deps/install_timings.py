@@ -0,0 +1,176 @@
+"""Per-package timings of `apm install`, for `--timings` and `--timings-json`.
+
+``GitHubPackageDownloader`` and ``APMDependencyResolver`` record into an
+``InstallTimings`` when given one (they record nothing otherwise). Each
+package collects the seconds spent in each phase, summed over every call
+that worked on it:
+
+- ``resolve``: resolving its branch or tag (``git ls-remote``)
+- ``apm.yml``: fetching its apm.yml to resolve sub-dependencies
+- ``fetch``: fetching the commit (git) or streaming the archive
+- ``checkout``: checking the package files out of the fetched commit
+- ``validate``: validating the package
+- ``manifest``: writing its integrity manifest and primitive index
+
+together with the bytes received and where the package came from
+(``source``): the project (``installed``), the package store (``store``),
+or the network (``archive``, ``git``, ``mirror``).
+
+Whole-run stages (dependency resolution, downloads) are recorded apart.
+``write_ndjson`` writes one JSON object per package, then a summary object,
+so CI can keep the file of every build and trend install latency.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+
+PHASES = ("resolve", "apm.yml", "fetch", "checkout", "validate", "manifest")
+
+# Sources that needed no download
+CACHED_SOURCES = ("installed", "store")
+
+
+@dataclass
+class PackageTimings:
+    """What installing one package cost."""
+    repo: str
+    phases: Dict[str, float] = field(default_factory=dict)  # Phase -> seconds
+    bytes_received: int = 0
+    source: Optional[str] = None
+    elapsed: Optional[float] = None  # Wall time of its install task, if it was downloaded
+    error: Optional[str] = None
+
+    @property
+    def cache(self) -> str:
+        """``hit`` if the package needed no download, else ``miss``."""
+        return "hit" if self.source in CACHED_SOURCES else "miss"
+
+    def to_dict(self) -> Dict:
+        """Serialize for ``write_ndjson`` (durations in milliseconds)."""
+        return {
+            "type": "package",
+            "package": self.repo,
+            "source": self.source,
+            "cache": self.cache,
+            "phases_ms": {phase: round(self.phases[phase] * 1000, 3) for phase in PHASES if phase in self.phases},
+            "elapsed_ms": round(self.elapsed * 1000, 3) if self.elapsed is not None else None,
+            "bytes_received": self.bytes_received,
+            "error": self.error,
+        }
+
+
+class InstallTimings:
+    """Thread-safe recorder of package and stage timings."""
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self.packages: Dict[str, PackageTimings] = {}  # By repository (owner/repo)
+        self.stages: Dict[str, float] = {}  # Whole-run stage -> seconds
+        self._lock = threading.Lock()
+
+    def package(self, repo: str) -> PackageTimings:
+        """Get the timings of a package (``owner/repo``), creating them if needed."""
+        with self._lock:
+            timings = self.packages.get(repo)
+            if timings is None:
+                timings = self.packages[repo] = PackageTimings(repo)
+            return timings
+
+    @contextmanager
+    def phase(self, repo: str, name: str) -> Iterator[None]:
+        """Add the duration of the enclosed block to a phase of a package."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            timings = self.package(repo)
+            with self._lock:
+                timings.phases[name] = timings.phases.get(name, 0.0) + elapsed
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the duration of the enclosed block to a whole-run stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def add_bytes(self, repo: str, count: int) -> None:
+        """Count bytes received for a package."""
+        timings = self.package(repo)
+        with self._lock:
+            timings.bytes_received += count
+
+    def set_source(self, repo: str, source: str) -> None:
+        """Record where a package's files came from."""
+        self.package(repo).source = source
+
+    def _sorted(self) -> List[PackageTimings]:
+        # Packages are recorded concurrently: report them by name
+        return sorted(self.packages.values(), key=lambda timings: timings.repo)
+
+    def summary(self) -> Dict:
+        """Totals of the run, as written last by ``write_ndjson``."""
+        packages = list(self.packages.values())
+        return {
+            "type": "summary",
+            "started_at": self.started_at.isoformat(),
+            "packages": len(packages),
+            "cache_hits": sum(1 for timings in packages if timings.cache == "hit"),
+            "failed": sum(1 for timings in packages if timings.error is not None),
+            "bytes_received": sum(timings.bytes_received for timings in packages),
+            "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+        }
+
+    def write_ndjson(self, path: Path) -> None:
+        """Write one JSON object per package, then the summary, one per line.
+
+        Raises:
+            OSError: If the file cannot be written.
+        """
+        lines = [json.dumps(timings.to_dict()) for timings in self._sorted()]
+        lines.append(json.dumps(self.summary()))
+        Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def rows(self) -> List[List[str]]:
+        """Table rows for ``--timings``: package, source, phases, total and bytes."""
+        rows = []
+        for timings in self._sorted():
+            phases = [format_duration(timings.phases.get(phase)) for phase in PHASES]
+            total = timings.elapsed
+            if total is None and timings.phases:
+                total = sum(timings.phases.values())
+            source = timings.source or ("failed" if timings.error else "-")
+            rows.append([timings.repo, source, *phases, format_duration(total), format_bytes(timings.bytes_received)])
+        return rows
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Format seconds for the timings table ("-" if not recorded)."""
+    if seconds is None:
+        return "-"
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    return f"{seconds:.2f}s"
+
+
+def format_bytes(count: int) -> str:
+    """Format a byte count for the timings table ("-" if none)."""
+    if not count:
+        return "-"
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{count:.0f}{unit}" if unit == "B" else f"{count:.1f}{unit}"
+        count /= 1024
+    return f"{count:.1f}GB"
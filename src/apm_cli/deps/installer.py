@@ -0,0 +1,156 @@
+"""Concurrent installation of APM dependency packages.
+
+Installing a package is mostly waiting on git network round-trips, so
+packages are downloaded on a bounded thread pool. Results are reported per
+package as they finish and returned in installation order, so everything
+decided from them (summary, failures) does not depend on timing.
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from ..models.apm_package import DependencyReference, PackageInfo
+
+
+# Downloads wait on the network rather than the CPU, so use a few per core
+DEFAULT_INSTALL_JOBS = min(16, 4 * (os.cpu_count() or 1))
+
+
+@dataclass
+class InstallTask:
+    """A dependency package to download into its install path."""
+    dep_ref: DependencyReference
+    install_path: Path
+    locked_commit: Optional[str] = None  # Commit from apm.lock, installed without resolving the reference
+
+
+@dataclass
+class InstallResult:
+    """Outcome of installing one dependency package."""
+    task: InstallTask
+    package_info: Optional[PackageInfo] = None
+    error: Optional[Exception] = None
+    skipped: bool = False  # Not started: fail-fast stopped the install first
+    duplicate: bool = False  # Not attempted: an earlier task has the same install path
+    elapsed: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        """Whether the package was downloaded and validated."""
+        return self.package_info is not None
+
+
+def get_install_path(apm_modules_dir: Path, dep_ref: DependencyReference) -> Path:
+    """Get the directory a dependency is installed into.
+
+    Args:
+        apm_modules_dir (Path): The project's ``apm_modules`` directory.
+        dep_ref (DependencyReference): Dependency to install.
+
+    Returns:
+        Path: ``apm_modules/<alias>`` or ``apm_modules/<org>/<repo>``.
+    """
+    if dep_ref.alias:
+        # If alias is provided, use it directly (assume user handles namespacing)
+        return apm_modules_dir / dep_ref.alias
+
+    # Use org/repo structure to prevent collisions
+    # e.g., danielmeppiel/design-guidelines -> apm_modules/danielmeppiel/design-guidelines/
+    repo_parts = dep_ref.repo_url.split('/')
+    if len(repo_parts) >= 2:
+        return apm_modules_dir / repo_parts[0] / repo_parts[1]
+    # Fallback for invalid repo URLs
+    return apm_modules_dir / dep_ref.repo_url
+
+
+def install_packages(
+    tasks: Sequence[InstallTask],
+    download: Callable[..., PackageInfo],
+    jobs: Optional[int] = None,
+    fail_fast: bool = False,
+    on_result: Optional[Callable[[InstallResult], None]] = None
+) -> List[InstallResult]:
+    """Download dependency packages on a bounded thread pool.
+
+    Parent directories (``apm_modules/<org>/``) are created on the calling
+    thread before any download starts, so workers never race to create them.
+    Tasks that share an install path are downloaded once, by the first of them;
+    the others are reported as duplicates.
+
+    Args:
+        tasks (Sequence[InstallTask]): Packages in installation order.
+        download (Callable[..., PackageInfo]): Downloads one package
+            given its reference string and target path (and ``locked_commit``
+            for locked tasks), e.g. ``GitHubPackageDownloader.download_package``.
+            Must be thread-safe.
+        jobs (Optional[int]): Number of concurrent downloads (default
+            ``DEFAULT_INSTALL_JOBS``); 1 downloads on the calling thread.
+        fail_fast (bool): Stop starting new downloads after the first failure;
+            packages not started are reported as skipped.
+        on_result (Optional[Callable[[InstallResult], None]]): Called on the
+            calling thread as each package finishes, in completion order.
+
+    Returns:
+        List[InstallResult]: One result per task, in task order.
+    """
+    results: Dict[int, InstallResult] = {}
+    pending: List[int] = []
+    claimed_paths = set()
+    for position, task in enumerate(tasks):
+        if task.install_path in claimed_paths:
+            results[position] = InstallResult(task, duplicate=True)
+            continue
+        claimed_paths.add(task.install_path)
+        task.install_path.parent.mkdir(parents=True, exist_ok=True)
+        pending.append(position)
+
+    def run(position: int) -> InstallResult:
+        task = tasks[position]
+        start = time.perf_counter()
+        try:
+            if task.locked_commit:
+                package_info = download(str(task.dep_ref), task.install_path, locked_commit=task.locked_commit)
+            else:
+                package_info = download(str(task.dep_ref), task.install_path)
+            return InstallResult(task, package_info=package_info, elapsed=time.perf_counter() - start)
+        except Exception as e:
+            return InstallResult(task, error=e, elapsed=time.perf_counter() - start)
+
+    def finish(position: int, result: InstallResult) -> None:
+        results[position] = result
+        if on_result is not None:
+            on_result(result)
+
+    workers = min(max(1, jobs or DEFAULT_INSTALL_JOBS), max(1, len(pending)))
+    failed = False
+    if workers <= 1:
+        for position in pending:
+            if failed and fail_fast:
+                results[position] = InstallResult(tasks[position], skipped=True)
+                continue
+            finish(position, run(position))
+            failed = failed or results[position].error is not None
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            queue = list(reversed(pending))
+            running: Dict[Future, int] = {}
+            while queue or running:
+                # Keep at most `workers` downloads in flight, so fail-fast stops promptly
+                while queue and len(running) < workers and not (failed and fail_fast):
+                    position = queue.pop()
+                    running[executor.submit(run, position)] = position
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    position = running.pop(future)
+                    finish(position, future.result())
+                    failed = failed or results[position].error is not None
+            for position in queue:
+                results[position] = InstallResult(tasks[position], skipped=True)
+
+    return [results[position] for position in range(len(tasks))]
@@ -0,0 +1,201 @@
+"""Per-package integrity manifests of installed APM dependencies.
+
+When a package is installed into ``apm_modules/<org>/<repo>/``, every file
+is listed in ``.apm-integrity.json`` with its size, mtime and sha256,
+together with the commit it was installed from and the package tree hash
+(see ``package_store.hash_tree``). ``apm install`` then checks installed
+packages against their manifest instead of trusting any existing directory:
+
+- by default it only stats the listed files, so checking many packages takes
+  milliseconds;
+- with ``--verify`` it hashes their contents as well.
+
+Packages without a manifest, at another commit, with missing, modified or
+added files are downloaded again.
+"""
+
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..primitives.package_index import PACKAGE_INDEX_FILE
+
+
+INTEGRITY_MANIFEST_FILE = ".apm-integrity.json"
+INTEGRITY_FORMAT_VERSION = 1
+
+# Generated next to the package files; not part of the package
+GENERATED_FILES = (PACKAGE_INDEX_FILE, INTEGRITY_MANIFEST_FILE)
+
+
+@dataclass
+class FileRecord:
+    """An installed file as it was written."""
+    size: int
+    mtime_ns: int
+    sha256: str
+    executable: bool
+
+
+@dataclass
+class IntegrityManifest:
+    """Files of an installed package, with the commit and tree they came from."""
+    commit: str
+    tree: str
+    files: Dict[str, FileRecord] = field(default_factory=dict)  # POSIX relative path -> record
+
+    @classmethod
+    def build(cls, package_path: Path, commit: str) -> "IntegrityManifest":
+        """Hash every file of an installed package.
+
+        Args:
+            package_path (Path): Root of the installed package.
+            commit (str): Commit the package was installed from.
+
+        Returns:
+            IntegrityManifest: Manifest of the package as it is on disk.
+        """
+        files = {}
+        for relative_path in list_package_files(package_path):
+            path = package_path / relative_path
+            file_stat = os.stat(path)
+            files[relative_path] = FileRecord(
+                size=file_stat.st_size,
+                mtime_ns=file_stat.st_mtime_ns,
+                sha256=hash_file(path),
+                executable=bool(file_stat.st_mode & stat.S_IXUSR),
+            )
+        tree = tree_hash((relative_path, record.executable, record.sha256)
+                         for relative_path, record in files.items())
+        return cls(commit=commit, tree=tree, files=files)
+
+    @classmethod
+    def load(cls, package_path: Path) -> Optional["IntegrityManifest"]:
+        """Read the manifest of an installed package.
+
+        Returns:
+            Optional[IntegrityManifest]: The manifest, or None if it is missing or unreadable.
+        """
+        try:
+            with open(package_path / INTEGRITY_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != INTEGRITY_FORMAT_VERSION:
+                return None
+            files = {relative_path: FileRecord(int(size), int(mtime_ns), str(sha256), bool(executable))
+                     for relative_path, (size, mtime_ns, sha256, executable) in data["files"].items()}
+            return cls(commit=str(data["commit"]), tree=str(data["tree"]), files=files)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def save(self, package_path: Path) -> None:
+        """Write the manifest into the package directory (atomically)."""
+        data = {
+            "version": INTEGRITY_FORMAT_VERSION,
+            "commit": self.commit,
+            "tree": self.tree,
+            "files": {relative_path: [record.size, record.mtime_ns, record.sha256, record.executable]
+                      for relative_path, record in self.files.items()},
+        }
+        fd, temp_path = tempfile.mkstemp(dir=package_path, prefix=f"{INTEGRITY_MANIFEST_FILE}-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, package_path / INTEGRITY_MANIFEST_FILE)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def check(self, package_path: Path, deep: bool = False) -> Optional[str]:
+        """Check that the package's files are still exactly those installed.
+
+        Listed files must be unchanged, and no other file may have been added
+        (listing the package costs one directory read per directory).
+
+        Args:
+            package_path (Path): Root of the installed package.
+            deep (bool): Hash file contents instead of comparing sizes and mtimes.
+
+        Returns:
+            Optional[str]: Why the package is not intact, or None if it is.
+        """
+        for relative_path, record in self.files.items():
+            path = package_path / relative_path
+            try:
+                file_stat = os.stat(path)
+            except OSError:
+                return f"{relative_path} is missing"
+            if file_stat.st_size != record.size:
+                return f"{relative_path} was modified"
+            if deep:
+                try:
+                    if hash_file(path) != record.sha256:
+                        return f"{relative_path} was modified"
+                except OSError:
+                    return f"{relative_path} cannot be read"
+            elif file_stat.st_mtime_ns != record.mtime_ns:
+                return f"{relative_path} was modified"
+        for relative_path in list_package_files(package_path):
+            if relative_path not in self.files:
+                return f"{relative_path} was added"
+        return None
+
+
+def check_installed_package(package_path: Path, commit: str, deep: bool = False) -> Tuple[Optional[IntegrityManifest], Optional[str]]:
+    """Check whether a package is installed, intact, at a commit.
+
+    Args:
+        package_path (Path): Directory the package is installed in.
+        commit (str): Commit it should be installed at.
+        deep (bool): Hash file contents instead of comparing sizes and mtimes.
+
+    Returns:
+        Tuple[Optional[IntegrityManifest], Optional[str]]: The manifest and
+        None if the package is intact; otherwise the manifest (if any) and why
+        the package needs to be installed again.
+    """
+    manifest = IntegrityManifest.load(package_path)
+    if manifest is None:
+        if not package_path.exists():
+            return None, "not installed"
+        return None, "no integrity manifest"
+    if manifest.commit != commit:
+        return manifest, f"installed at {manifest.commit[:8]}, expected {commit[:8]}"
+    return manifest, manifest.check(package_path, deep=deep)
+
+
+def list_package_files(directory: Path) -> List[str]:
+    """List the files of a package, sorted, as POSIX paths relative to it.
+
+    Skips ``.git`` and the files APM generates next to the package files.
+    """
+    files = []
+    for current, dirnames, filenames in os.walk(directory):
+        dirnames[:] = [name for name in dirnames if name != ".git"]
+        for name in filenames:
+            relative_path = os.path.relpath(os.path.join(current, name), directory).replace(os.sep, "/")
+            if relative_path not in GENERATED_FILES:
+                files.append(relative_path)
+    files.sort()
+    return files
+
+
+def hash_file(path: Path) -> str:
+    """Get the sha256 of a file's contents."""
+    content = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            content.update(chunk)
+    return content.hexdigest()
+
+
+def tree_hash(entries) -> str:
+    """Hash (relative path, executable, sha256) entries, sorted by path, into a tree hash."""
+    tree = hashlib.sha256()
+    for relative_path, executable, sha256 in entries:
+        tree.update(f"{relative_path}\0{'x' if executable else '-'}\0{sha256}\n".encode("utf-8"))
+    return tree.hexdigest()
@@ -0,0 +1,192 @@
+"""The ``apm.lock`` lockfile: resolved commits of installed APM dependencies.
+
+``apm install`` records, for every installed package, the reference asked for
+in ``apm.yml``, the commit it resolved to and the hash of the package files.
+Later installs fetch the locked commits directly (or link them from the
+package store) without resolving any branch or tag, so every machine
+installs the same files until ``apm install --update`` re-resolves them::
+
+    lockfile_version: 1
+    dependencies:
+      danielmeppiel/design-guidelines:
+        reference: main
+        ref_type: branch
+        resolved_commit: 2c5e1f0...
+        tree: 9f86d08...
+      danielmeppiel/compliance-rules:
+        reference: v1.0.0
+        ref_type: tag
+        resolved_commit: 7a1b3c4...
+        tree: 60303ae...
+        parent: danielmeppiel/design-guidelines
+"""
+
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+
+from ..models.apm_package import DependencyReference, PackageInfo, ResolvedReference
+
+
+LOCKFILE_NAME = "apm.lock"
+LOCKFILE_VERSION = 1
+
+_COMMIT_PATTERN = re.compile(r'^[a-f0-9]{40}$')
+
+
+class LockfileError(Exception):
+    """The lockfile cannot be read, or does not match apm.yml."""
+
+
+@dataclass
+class LockedDependency:
+    """The resolution of one installed dependency."""
+    repo_url: str
+    reference: Optional[str]  # As written in apm.yml; None means the default branch
+    ref_type: str  # "branch", "tag" or "commit"
+    resolved_commit: str
+    tree: Optional[str] = None  # Package store hash of the package files
+    parent: Optional[str] = None  # Repository that depends on it; None for apm.yml dependencies
+
+    def matches(self, dep_ref: DependencyReference) -> bool:
+        """Check whether this entry locks the given apm.yml dependency."""
+        return self.repo_url == dep_ref.repo_url and self.reference == dep_ref.reference
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        """Convert to the lockfile representation (without the repository key)."""
+        data = {
+            "reference": self.reference,
+            "ref_type": self.ref_type,
+            "resolved_commit": self.resolved_commit,
+            "tree": self.tree,
+        }
+        if self.parent:
+            data["parent"] = self.parent
+        return data
+
+
+@dataclass
+class Lockfile:
+    """Locked dependencies of a project, keyed by repository."""
+    dependencies: Dict[str, LockedDependency] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["Lockfile"]:
+        """Read a lockfile.
+
+        Args:
+            path (Path): Path to ``apm.lock``.
+
+        Returns:
+            Optional[Lockfile]: The lockfile, or None if it does not exist.
+
+        Raises:
+            LockfileError: If the file is not a valid lockfile.
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = yaml.safe_load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, yaml.YAMLError) as e:
+            raise LockfileError(f"Cannot read {path.name}: {e}")
+
+        if not isinstance(data, dict) or data.get("lockfile_version") != LOCKFILE_VERSION:
+            raise LockfileError(f"{path.name} is not a version {LOCKFILE_VERSION} lockfile")
+
+        lockfile = cls()
+        for repo_url, entry in (data.get("dependencies") or {}).items():
+            if not isinstance(entry, dict):
+                raise LockfileError(f"Invalid entry for {repo_url} in {path.name}")
+            commit = str(entry.get("resolved_commit", "")).lower()
+            if not _COMMIT_PATTERN.match(commit):
+                raise LockfileError(f"Invalid resolved commit for {repo_url} in {path.name}")
+            reference = entry.get("reference")
+            lockfile.dependencies[repo_url] = LockedDependency(
+                repo_url=repo_url,
+                reference=str(reference) if reference is not None else None,
+                ref_type=str(entry.get("ref_type", "commit")),
+                resolved_commit=commit,
+                tree=entry.get("tree"),
+                parent=entry.get("parent"),
+            )
+        return lockfile
+
+    def save(self, path: Path) -> None:
+        """Write the lockfile atomically, with entries sorted by repository."""
+        data = {
+            "lockfile_version": LOCKFILE_VERSION,
+            "dependencies": {repo_url: self.dependencies[repo_url].to_dict()
+                             for repo_url in sorted(self.dependencies)},
+        }
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write("# This file is generated by `apm install`. Do not edit it by hand.\n")
+                yaml.safe_dump(data, f, default_flow_style=False, sort_keys=False)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def get(self, dep_ref: DependencyReference) -> Optional[LockedDependency]:
+        """Get the entry locking a dependency, if it is locked at the same reference."""
+        locked = self.dependencies.get(dep_ref.repo_url)
+        if locked is not None and locked.matches(dep_ref):
+            return locked
+        return None
+
+    def record(self, dep_ref: DependencyReference, package_info: PackageInfo, parent: Optional[str] = None,
+               resolved_reference: Optional[ResolvedReference] = None) -> LockedDependency:
+        """Lock a dependency at the commit it was just resolved to and installed from.
+
+        Args:
+            dep_ref (DependencyReference): Dependency as declared.
+            package_info (PackageInfo): Result of downloading it.
+            parent (Optional[str]): Repository that declared it, for transitive dependencies.
+            resolved_reference (Optional[ResolvedReference]): How the reference was
+                resolved, when it was resolved before the download (default: by the download).
+
+        Returns:
+            LockedDependency: The new entry.
+        """
+        resolved = resolved_reference or package_info.resolved_reference
+        locked = LockedDependency(
+            repo_url=dep_ref.repo_url,
+            reference=dep_ref.reference,
+            ref_type=resolved.ref_type.value,
+            resolved_commit=resolved.resolved_commit,
+            tree=package_info.tree_hash,
+            parent=parent,
+        )
+        self.dependencies[dep_ref.repo_url] = locked
+        return locked
+
+    def find_outdated(self, dep_refs: List[DependencyReference]) -> List[str]:
+        """Explain how the lockfile differs from the dependencies to install.
+
+        Args:
+            dep_refs (List[DependencyReference]): All dependencies to install,
+                including transitive ones.
+
+        Returns:
+            List[str]: One message per difference; empty if the lockfile is up to date.
+        """
+        problems = []
+        for dep_ref in dep_refs:
+            locked = self.dependencies.get(dep_ref.repo_url)
+            if locked is None:
+                problems.append(f"{dep_ref.repo_url} is not locked")
+            elif not locked.matches(dep_ref):
+                problems.append(f"{dep_ref.repo_url} is locked at '{locked.reference or 'main'}' "
+                                f"but apm.yml asks for '{dep_ref.reference or 'main'}'")
+        required = {dep_ref.repo_url for dep_ref in dep_refs}
+        for repo_url in sorted(self.dependencies):
+            if repo_url not in required:
+                problems.append(f"{repo_url} is locked but no longer a dependency")
+        return problems
@@ -0,0 +1,83 @@
+"""Persistent bare mirrors of dependency repositories, used by ``apm deps update``.
+
+Each repository is mirrored once per machine in ``~/.apm/mirrors`` (or
+``$APM_MIRROR_DIR``) as ``<owner>/<repo>.git``: a shallow, blob-filtered
+bare repository that keeps the last commit of every reference it was updated
+to. Fetching a newer commit into it only transfers the commits and trees that
+changed since, and packages are checked out of it into fresh directories
+through temporary worktrees.
+
+Mirrors never keep remote URLs (which may carry tokens) in their configuration
+between operations; see ``GitHubPackageDownloader.update_package``.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+from git import Repo
+from git.exc import GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+
+
+def get_mirror_dir() -> Path:
+    """Get the mirrors location: ``$APM_MIRROR_DIR`` or ``~/.apm/mirrors``."""
+    override = os.environ.get("APM_MIRROR_DIR")
+    if override:
+        return Path(override).expanduser()
+    return Path.home() / ".apm" / "mirrors"
+
+
+class MirrorCache:
+    """Machine-wide bare mirrors of repositories, keyed by ``owner/repo``."""
+
+    def __init__(self, root: Optional[Path] = None):
+        """Initialize the mirror cache.
+
+        Args:
+            root (Optional[Path]): Cache directory (default: ``get_mirror_dir()``).
+        """
+        self.root = Path(root) if root is not None else get_mirror_dir()
+
+    def path(self, repo_url: str) -> Path:
+        """Get the mirror directory of a repository (``owner/repo``)."""
+        return self.root / f"{repo_url}.git"
+
+    def open(self, repo_url: str) -> Repo:
+        """Open the mirror of a repository, creating an empty one if needed.
+
+        Raises:
+            OSError: If the mirror cannot be created.
+        """
+        path = self.path(repo_url)
+        try:
+            return Repo(path)
+        except (InvalidGitRepositoryError, NoSuchPathError):
+            path.mkdir(parents=True, exist_ok=True)
+            return Repo.init(path, bare=True)
+
+    @staticmethod
+    def ref_name(ref_type: str, ref_name: str) -> str:
+        """Get the mirror ref that keeps the commit a reference was last updated to.
+
+        Args:
+            ref_type (str): ``"branch"``, ``"tag"`` or ``"commit"``.
+            ref_name (str): Branch, tag or commit SHA.
+        """
+        prefix = {"branch": "refs/heads", "tag": "refs/tags"}.get(ref_type, "refs/commits")
+        return f"{prefix}/{ref_name}"
+
+    @staticmethod
+    def forget_remotes(repo: Repo) -> None:
+        """Remove the remotes git recorded while fetching by URL (they may contain tokens)."""
+        try:
+            output = repo.git.config("--get-regexp", r"^remote\..*\.promisor$")
+        except GitCommandError:
+            return  # No remotes
+        for line in output.splitlines():
+            match = re.match(r"^remote\.(.*)\.promisor\s", line)
+            if match:
+                try:
+                    repo.git.config("--remove-section", f"remote.{match.group(1)}")
+                except GitCommandError:
+                    pass
@@ -0,0 +1,361 @@
+"""Global content-addressed store of downloaded APM packages.
+
+Packages are downloaded once per machine into ``~/.apm/store`` (or
+``$APM_STORE_DIR``) and materialized into each project's ``apm_modules/``
+with hardlinks, reflinks where hardlinks are not possible, or copies::
+
+    packages/<tree>/          package files; <tree> is a sha256 over paths, modes and contents
+    packages/<tree>.json      entry metadata; its mtime is the entry's last use
+    commits/<commit>          tree of the package at a resolved commit
+    refs/<owner>/<repo>.json  last resolution of each branch and tag, used offline
+
+Identical trees (forks, re-tagged commits) are stored once. Entries record
+the size and mtime of each file, so a file edited through a hardlink in some
+project is detected and the entry downloaded again instead of served.
+"""
+
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .integrity import hash_file, list_package_files, tree_hash
+
+
+STORE_FORMAT_VERSION = 1
+DEFAULT_STORE_MAX_SIZE = 2 * 1024 ** 3
+
+# Staging directories older than this are left over from interrupted downloads
+_STALE_STAGING_SECONDS = 24 * 3600
+
+# Linux FICLONE ioctl: copy-on-write clone of a whole file (btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+
+def get_store_dir() -> Path:
+    """Get the store location: ``$APM_STORE_DIR`` or ``~/.apm/store``."""
+    override = os.environ.get("APM_STORE_DIR")
+    if override:
+        return Path(override).expanduser()
+    return Path.home() / ".apm" / "store"
+
+
+class StoreCorruptedError(Exception):
+    """A stored package no longer matches the files it was stored with."""
+
+
+@dataclass
+class StoreEntry:
+    """A package tree in the store."""
+    tree: str
+    size: int  # Total bytes of the package files
+    files: int
+    source: str  # Repository the tree was first downloaded from
+    commit: str
+    last_used: float  # POSIX timestamp
+
+
+class PackageStore:
+    """Machine-wide store of package trees keyed by resolved commit."""
+
+    def __init__(self, root: Optional[Path] = None):
+        """Open a store.
+
+        Args:
+            root (Optional[Path]): Store directory (default ``get_store_dir()``).
+        """
+        self.root = Path(root) if root is not None else get_store_dir()
+        self.packages_dir = self.root / "packages"
+        self.commits_dir = self.root / "commits"
+        self.refs_dir = self.root / "refs"
+        self.staging_root = self.root / "tmp"
+
+    def lookup(self, commit: str) -> Optional[Path]:
+        """Find the stored tree of a commit, marking it as used.
+
+        Args:
+            commit (str): Full commit SHA.
+
+        Returns:
+            Optional[Path]: Directory holding the package files, or None.
+        """
+        try:
+            tree = (self.commits_dir / commit).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        package_dir = self.packages_dir / tree
+        metadata_path = self._metadata_path(tree)
+        if not package_dir.is_dir() or not metadata_path.is_file():
+            return None
+        try:
+            os.utime(metadata_path)
+        except OSError:
+            pass
+        return package_dir
+
+    def create_staging_dir(self) -> Path:
+        """Create an empty directory to download a package into before adding it.
+
+        It lives inside the store so ``add`` can move it in with a rename.
+        """
+        self.staging_root.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(dir=self.staging_root, prefix="download-"))
+
+    def add(self, staging_dir: Path, commit: str, source: str) -> Path:
+        """Move a downloaded package into the store.
+
+        Safe to call concurrently for the same package from several threads
+        or processes: the first rename wins and later copies are discarded.
+
+        Args:
+            staging_dir (Path): Directory from ``create_staging_dir`` holding
+                the package files (without ``.git``).
+            commit (str): Resolved commit SHA of the package.
+            source (str): Repository the package was downloaded from.
+
+        Returns:
+            Path: Directory holding the stored package files.
+        """
+        tree, files = hash_tree(staging_dir)
+        package_dir = self.packages_dir / tree
+        self.packages_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            os.rename(staging_dir, package_dir)
+        except OSError:
+            # Already stored, possibly by a concurrent download
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            if not package_dir.is_dir():
+                raise
+
+        if not self._metadata_path(tree).is_file():
+            metadata = {
+                "version": STORE_FORMAT_VERSION,
+                "source": source,
+                "commit": commit,
+                "files": _file_records(package_dir, files),
+            }
+            _atomic_write(self._metadata_path(tree), json.dumps(metadata))
+        _atomic_write(self.commits_dir / commit, tree)
+        return package_dir
+
+    def materialize(self, package_dir: Path, target_path: Path) -> None:
+        """Recreate a stored package in an empty directory.
+
+        Files are hardlinked, reflinked where hardlinks fail, or copied.
+
+        Args:
+            package_dir (Path): Directory returned by ``lookup`` or ``add``.
+            target_path (Path): Empty or missing directory to fill.
+
+        Raises:
+            StoreCorruptedError: If a stored file was changed since it was stored.
+            OSError: If the target cannot be written.
+        """
+        metadata = self._read_metadata(package_dir.name)
+        if metadata is None:
+            raise StoreCorruptedError(f"Missing metadata for stored package {package_dir.name}")
+
+        target_path.mkdir(parents=True, exist_ok=True)
+        for relative_path, (size, mtime_ns) in metadata["files"].items():
+            source = package_dir / relative_path
+            try:
+                source_stat = os.stat(source)
+            except OSError:
+                raise StoreCorruptedError(f"Stored file {relative_path} is missing")
+            if (source_stat.st_size, source_stat.st_mtime_ns) != (size, mtime_ns):
+                raise StoreCorruptedError(f"Stored file {relative_path} was modified")
+            target = target_path / relative_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            _link_file(source, target)
+
+    def remove(self, tree: str) -> None:
+        """Delete a stored package tree and its metadata."""
+        self._metadata_path(tree).unlink(missing_ok=True)
+        shutil.rmtree(self.packages_dir / tree, ignore_errors=True)
+
+    def remember_ref(self, repo: str, ref: str, ref_type: str, commit: str) -> None:
+        """Record what a branch or tag resolved to, for installs without network."""
+        path = self._refs_path(repo)
+        refs = self._read_json(path) or {}
+        if refs.get(ref) == [ref_type, commit]:
+            return
+        refs[ref] = [ref_type, commit]
+        try:
+            _atomic_write(path, json.dumps(refs))
+        except OSError:
+            pass
+
+    def recall_ref(self, repo: str, ref: str) -> Optional[Tuple[str, str]]:
+        """Get the last recorded (ref type, commit) of a branch or tag."""
+        entry = (self._read_json(self._refs_path(repo)) or {}).get(ref)
+        if isinstance(entry, list) and len(entry) == 2:
+            return entry[0], entry[1]
+        return None
+
+    def entries(self) -> List[StoreEntry]:
+        """List the stored packages, least recently used first."""
+        entries = []
+        try:
+            names = os.listdir(self.packages_dir)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            tree = name[:-len(".json")]
+            metadata = self._read_metadata(tree)
+            if metadata is None:
+                continue
+            try:
+                last_used = os.stat(self._metadata_path(tree)).st_mtime
+            except OSError:
+                continue
+            entries.append(StoreEntry(
+                tree=tree,
+                size=sum(size for size, _ in metadata["files"].values()),
+                files=len(metadata["files"]),
+                source=metadata.get("source", ""),
+                commit=metadata.get("commit", ""),
+                last_used=last_used,
+            ))
+        entries.sort(key=lambda entry: entry.last_used)
+        return entries
+
+    def prune(self, max_size: int = DEFAULT_STORE_MAX_SIZE, dry_run: bool = False) -> List[StoreEntry]:
+        """Evict least recently used packages until the store fits in ``max_size``.
+
+        Also removes commit records of evicted trees and staging directories
+        left over by interrupted downloads.
+
+        Args:
+            max_size (int): Size cap in bytes.
+            dry_run (bool): Only report what would be evicted.
+
+        Returns:
+            List[StoreEntry]: Evicted entries, least recently used first.
+        """
+        entries = self.entries()
+        total = sum(entry.size for entry in entries)
+        evicted = []
+        for entry in entries:
+            if total <= max_size:
+                break
+            evicted.append(entry)
+            total -= entry.size
+        if dry_run:
+            return evicted
+
+        for entry in evicted:
+            self.remove(entry.tree)
+        evicted_trees = {entry.tree for entry in evicted}
+        try:
+            for commit_file in self.commits_dir.iterdir():
+                try:
+                    if commit_file.read_text(encoding="utf-8").strip() in evicted_trees:
+                        commit_file.unlink()
+                except OSError:
+                    continue
+        except OSError:
+            pass
+        self._remove_stale_staging_dirs()
+        return evicted
+
+    def _remove_stale_staging_dirs(self) -> None:
+        cutoff = time.time() - _STALE_STAGING_SECONDS
+        try:
+            for staging_dir in self.staging_root.iterdir():
+                try:
+                    if staging_dir.stat().st_mtime < cutoff:
+                        shutil.rmtree(staging_dir, ignore_errors=True)
+                except OSError:
+                    continue
+        except OSError:
+            pass
+
+    def _metadata_path(self, tree: str) -> Path:
+        return self.packages_dir / f"{tree}.json"
+
+    def _refs_path(self, repo: str) -> Path:
+        return self.refs_dir / f"{repo}.json"
+
+    def _read_metadata(self, tree: str) -> Optional[Dict]:
+        metadata = self._read_json(self._metadata_path(tree))
+        if not metadata or metadata.get("version") != STORE_FORMAT_VERSION or not isinstance(metadata.get("files"), dict):
+            return None
+        return metadata
+
+    @staticmethod
+    def _read_json(path: Path) -> Optional[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return data if isinstance(data, dict) else None
+
+
+def hash_tree(directory: Path) -> Tuple[str, List[str]]:
+    """Hash a package tree: relative paths, executable bits and file contents.
+
+    Returns:
+        Tuple[str, List[str]]: The tree hash and the sorted relative file paths.
+    """
+    files = list_package_files(directory)
+    entries = []
+    for relative_path in files:
+        path = directory / relative_path
+        entries.append((relative_path, bool(os.stat(path).st_mode & stat.S_IXUSR), hash_file(path)))
+    return tree_hash(entries), files
+
+
+def _file_records(directory: Path, files: List[str]) -> Dict[str, List[int]]:
+    """Record the size and mtime of each stored file."""
+    records = {}
+    for relative_path in files:
+        file_stat = os.stat(directory / relative_path)
+        records[relative_path] = [file_stat.st_size, file_stat.st_mtime_ns]
+    return records
+
+
+def _link_file(source: Path, target: Path) -> None:
+    """Hardlink a file, or reflink it, or copy it."""
+    try:
+        os.link(source, target)
+        return
+    except OSError:
+        pass
+    if not _reflink(source, target):
+        shutil.copy2(source, target)
+
+
+def _reflink(source: Path, target: Path) -> bool:
+    """Clone a file copy-on-write where the platform and filesystem support it."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        shutil.copystat(source, target)
+        return True
+    except OSError:
+        return False
+
+
+def _atomic_write(path: Path, data: str) -> None:
+    """Write a small file atomically (write a temporary file, then rename it)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
@@ -235,6 +235,7 @@ class APMPackage:
     dependencies: Optional[Dict[str, List[Union[DependencyReference, str]]]] = None  # Mixed types for APM/MCP
     scripts: Optional[Dict[str, str]] = None
     package_path: Optional[Path] = None  # Local path to package
+    include: Optional[List[str]] = None  # Extra paths installed with the package (sparse-checkout patterns)
     
     @classmethod
     def from_apm_yml(cls, apm_yml_path: Path) -> "APMPackage":
@@ -253,11 +254,29 @@ class APMPackage:
         if not apm_yml_path.exists():
             raise FileNotFoundError(f"apm.yml not found: {apm_yml_path}")
         
+        with open(apm_yml_path, 'r', encoding='utf-8') as f:
+            return cls.from_apm_yml_text(f.read(), package_path=apm_yml_path.parent, source=str(apm_yml_path))
+    
+    @classmethod
+    def from_apm_yml_text(cls, text: str, package_path: Optional[Path] = None,
+                          source: str = "apm.yml") -> "APMPackage":
+        """Load APM package from the contents of an apm.yml file.
+        
+        Args:
+            text: The apm.yml contents
+            package_path: Local path to the package, if it is on disk
+            source: Where the contents come from, for error messages
+            
+        Returns:
+            APMPackage: Loaded package instance
+            
+        Raises:
+            ValueError: If the contents are invalid or miss required fields
+        """
         try:
-            with open(apm_yml_path, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
+            data = yaml.safe_load(text)
         except yaml.YAMLError as e:
-            raise ValueError(f"Invalid YAML format in {apm_yml_path}: {e}")
+            raise ValueError(f"Invalid YAML format in {source}: {e}")
         
         if not isinstance(data, dict):
             raise ValueError(f"apm.yml must contain a YAML object, got {type(data)}")
@@ -288,6 +307,11 @@ class APMPackage:
                         # Other dependencies (like MCP) remain as strings
                         dependencies[dep_type] = [str(dep) for dep in dep_list if isinstance(dep, str)]
         
+        include = data.get('include')
+        if include is not None and (not isinstance(include, list)
+                                    or not all(isinstance(pattern, str) for pattern in include)):
+            raise ValueError("Field 'include' in apm.yml must be a list of paths")
+        
         return cls(
             name=data['name'],
             version=data['version'],
@@ -296,7 +320,8 @@ class APMPackage:
             license=data.get('license'),
             dependencies=dependencies,
             scripts=data.get('scripts'),
-            package_path=apm_yml_path.parent
+            package_path=package_path,
+            include=include
         )
     
     def get_apm_dependencies(self) -> List[DependencyReference]:
@@ -363,6 +388,7 @@ class PackageInfo:
     install_path: Path
     resolved_reference: Optional[ResolvedReference] = None
     installed_at: Optional[str] = None  # ISO timestamp
+    tree_hash: Optional[str] = None  # Package store hash of the package files
     
     def get_primitives_path(self) -> Path:
         """Get path to the .apm directory for this package."""
@@ -111,6 +111,8 @@ class CompilationFormatter:
         
         if results.is_dry_run:
             summary_line = f"[DRY RUN] Would generate {file_count} AGENTS.md file{'s' if file_count != 1 else ''}"
+        elif results.files_written is not None:
+            summary_line += f" ({results.files_written} written, {results.files_unchanged or 0} unchanged)"
         
         if self.use_color:
             color = "yellow" if results.is_dry_run else "green"
@@ -140,6 +142,9 @@ class CompilationFormatter:
             accuracy_pct = f"{stats.placement_accuracy * 100:.1f}%"
             metrics_lines.append(f"├─ Placement accuracy:    {accuracy_pct} (mathematical optimum)")
         
+        if stats.index_build_time_ms is not None:
+            metrics_lines.append(f"├─ File index build:      {stats.index_build_time_ms:.1f}ms")
+        
         if stats.generation_time_ms is not None:
             metrics_lines.append(f"└─ Generation time:       {stats.generation_time_ms}ms")
         else:
@@ -346,6 +351,8 @@ class CompilationFormatter:
         
         if results.is_dry_run:
             summary_line = f"[DRY RUN] Would generate {file_count} AGENTS.md file{'s' if file_count != 1 else ''}"
+        elif results.files_written is not None:
+            summary_line += f" ({results.files_written} written, {results.files_unchanged or 0} unchanged)"
         
         if self.use_color:
             color = "yellow" if results.is_dry_run else "green"
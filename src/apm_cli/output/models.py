@@ -83,6 +83,7 @@ class OptimizationStats:
     baseline_efficiency: Optional[float] = None  
     placement_accuracy: Optional[float] = None
     generation_time_ms: Optional[int] = None
+    index_build_time_ms: Optional[float] = None
     total_agents_files: int = 0
     directories_analyzed: int = 0
     
@@ -110,6 +111,8 @@ class CompilationResults:
     warnings: List[str] = field(default_factory=list)
     errors: List[str] = field(default_factory=list)
     is_dry_run: bool = False
+    files_written: Optional[int] = None  # AGENTS.md files whose content changed
+    files_unchanged: Optional[int] = None  # AGENTS.md files left untouched
     
     @property
     def total_instructions(self) -> int:
@@ -0,0 +1,234 @@
+"""Persistent cache of parsed primitives.
+
+Parsed ``Chatmode`` / ``Instruction`` / ``Context`` records are stored in
+``.apm/cache/primitives.bin`` keyed by file path and validated per file
+against (mtime_ns, size, inode), so only new or changed primitive files are
+read and run through the frontmatter parser. The file is a ``marshal`` dump
+of plain tuples: compact, fast to load and unable to run code; it is tied to
+the Python and APM versions that wrote it and is rebuilt otherwise. Bodies
+are not stored: primitives from the cache, like freshly parsed ones, read
+their body back from disk when it is used (see ``content.py``).
+
+Entries are only trusted when the recorded mtime is older than the previous
+save by more than the coarsest filesystem timestamp granularity, so a change
+made in the same timestamp tick as a save is never mistaken for "unchanged".
+"""
+
+import marshal
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from ..version import get_version
+from .models import Chatmode, Context, Instruction, Primitive, content_in_memory
+from .parser import ParseTask, parse_primitive_files, parse_primitive_text, read_primitive_text
+
+
+CACHE_DIRECTORY = Path(".apm") / "cache"
+PRIMITIVE_CACHE_FILE = CACHE_DIRECTORY / "primitives.bin"
+PRIMITIVE_CACHE_MAGIC = "apm-primitives"
+PRIMITIVE_CACHE_FORMAT_VERSION = 2
+
+# Timestamps can be as coarse as two seconds (FAT); entries modified this
+# close to the previous save are re-checked instead of trusted
+RACY_WINDOW_NS = 2_000_000_000
+
+_PRIMITIVE_TYPES: Tuple[type, ...] = (Chatmode, Instruction, Context)
+_MISSING = -1
+
+# Record layout: (mtime_ns, size, inode, type index, source, name,
+#                 description, apply_to, content, author, version); content is
+#                 None for primitives whose body is loaded on demand
+Record = Tuple[Any, ...]
+
+
+def ensure_cache_directory(base_dir: Path, directory: Path) -> None:
+    """Create a directory below ``.apm/cache``, git-ignoring the whole cache.
+
+    Args:
+        base_dir (Path): Project root.
+        directory (Path): Directory to create.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    gitignore = base_dir / CACHE_DIRECTORY / ".gitignore"
+    if not gitignore.exists():
+        gitignore.write_text("# Created by apm compile\n*\n", encoding="utf-8")
+
+
+class PrimitiveCache:
+    """Parsed primitives of earlier runs, reused while their files are unchanged."""
+
+    def __init__(self, base_dir: Union[str, Path]):
+        """Create an empty cache for a project.
+
+        Args:
+            base_dir (Union[str, Path]): Project root; the cache is stored below it.
+        """
+        try:
+            self.base_dir = Path(base_dir).resolve()
+        except (OSError, FileNotFoundError):
+            self.base_dir = Path(base_dir).absolute()
+        self.started_ns = time.time_ns()
+        # Nothing is trusted until a previous cache has been loaded
+        self.trusted_before_ns = _MISSING
+
+        self._records: Dict[str, Record] = {}
+        self._changed = False
+        # Files are parsed on worker threads; guards records and stats
+        self._lock = threading.Lock()
+
+        self.stats: Dict[str, int] = {
+            "primitives_parsed": 0,
+            "primitives_reused": 0,
+        }
+
+    @property
+    def cache_path(self) -> Path:
+        """Path of the cache file."""
+        return self.base_dir / PRIMITIVE_CACHE_FILE
+
+    @classmethod
+    def load(cls, base_dir: Union[str, Path]) -> 'PrimitiveCache':
+        """Load the cache of a project, starting empty if it is missing or outdated.
+
+        Args:
+            base_dir (Union[str, Path]): Project root.
+
+        Returns:
+            PrimitiveCache: Cache primed with the records of earlier runs.
+        """
+        cache = cls(base_dir)
+        try:
+            with open(cache.cache_path, 'rb') as f:
+                data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return cache
+
+        if (not isinstance(data, tuple) or len(data) != 5
+                or data[:3] != (PRIMITIVE_CACHE_MAGIC, PRIMITIVE_CACHE_FORMAT_VERSION, _writer_version())
+                or not isinstance(data[3], int) or not isinstance(data[4], dict)):
+            return cache
+
+        cache.trusted_before_ns = data[3] - RACY_WINDOW_NS
+        cache._records = data[4]
+        return cache
+
+    def save(self) -> None:
+        """Write the cache atomically if any record changed.
+
+        Records of files that no longer exist are dropped. Failures are
+        ignored: the cache only ever speeds discovery up.
+        """
+        if not self._changed:
+            return
+
+        records = {path: record for path, record in self._records.items() if os.path.exists(path)}
+        data = (PRIMITIVE_CACHE_MAGIC, PRIMITIVE_CACHE_FORMAT_VERSION, _writer_version(), self.started_ns, records)
+        try:
+            ensure_cache_directory(self.base_dir, self.cache_path.parent)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_path.parent, prefix=".primitives-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    marshal.dump(data, f)
+                os.replace(temp_path, self.cache_path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except (OSError, ValueError):
+            pass
+        self._changed = False
+
+    def parse_primitive_file(self, file_path: Union[str, Path], source: str) -> Primitive:
+        """Parse a primitive file, reusing the cached record when the file is unchanged.
+
+        Args:
+            file_path (Union[str, Path]): Path to the primitive file.
+            source (str): Source identifier for the primitive.
+
+        Returns:
+            Primitive: Parsed primitive, loading its body on demand.
+
+        Raises:
+            OSError: If the file cannot be stat'ed or read.
+            UnicodeDecodeError: If the file is not UTF-8 text.
+            ValueError: If the file cannot be parsed.
+        """
+        path = str(file_path)
+        stat = os.stat(path)
+        fingerprint = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+        record = self._records.get(path)
+        if (record is not None and tuple(record[:3]) == fingerprint and record[4] == source
+                and fingerprint[0] <= self.trusted_before_ns):
+            primitive = _primitive_from_record(path, record)
+            if primitive is not None:
+                with self._lock:
+                    self.stats["primitives_reused"] += 1
+                return primitive
+
+        primitive = parse_primitive_text(Path(path), read_primitive_text(path), source, lazy=True)
+        record = _primitive_to_record(primitive, fingerprint)
+        with self._lock:
+            self.stats["primitives_parsed"] += 1
+            if record is not None:
+                self._records[path] = record
+            else:
+                self._records.pop(path, None)
+            self._changed = True
+        return primitive
+
+    def parse_primitive_files(
+        self,
+        tasks: Sequence[ParseTask],
+        jobs: Optional[int] = None
+    ) -> List[Union[Primitive, Exception]]:
+        """Parse many primitive files on a thread pool, reusing unchanged ones.
+
+        Args:
+            tasks (Sequence[ParseTask]): Files to parse with their source identifiers.
+            jobs (Optional[int]): Number of worker threads.
+
+        Returns:
+            List[Union[Primitive, Exception]]: Per task (in task order), the
+            primitive or the exception raised by ``parse_primitive_file``.
+        """
+        return parse_primitive_files(tasks, jobs, parse=self.parse_primitive_file)
+
+
+def _writer_version() -> str:
+    """Identify the writer: marshal data is specific to the Python version."""
+    return f"{get_version()}/{sys.version_info[0]}.{sys.version_info[1]}"
+
+
+def _primitive_to_record(primitive: Primitive, fingerprint: Tuple[int, int, int]) -> Optional[Record]:
+    """Serialize a primitive, or return None if a field is not a plain scalar."""
+    try:
+        type_index = _PRIMITIVE_TYPES.index(type(primitive))
+    except ValueError:
+        return None
+
+    fields = (
+        primitive.source, primitive.name, primitive.description,
+        getattr(primitive, "apply_to", None), content_in_memory(primitive), primitive.author, primitive.version,
+    )
+    if not all(value is None or isinstance(value, (str, int, float, bool)) for value in fields):
+        return None
+    return fingerprint + (type_index,) + fields
+
+
+def _primitive_from_record(path: str, record: Record) -> Optional[Primitive]:
+    """Rebuild a primitive from its record, or None if the record is malformed."""
+    try:
+        _, _, _, type_index, source, name, description, apply_to, content, author, version = record
+        primitive_class = _PRIMITIVE_TYPES[type_index]
+    except (TypeError, ValueError, IndexError):
+        return None
+
+    fields = dict(name=name, description=description, content=content, author=author, version=version)
+    if primitive_class is not Context:
+        fields["apply_to"] = apply_to
+    return primitive_class(file_path=Path(path), source=source, **fields)
@@ -0,0 +1,96 @@
+"""On-demand loading of primitive bodies.
+
+Discovery keeps primitives as lightweight handles: name, path, source and
+frontmatter fields. Their markdown bodies are read back from disk only when
+something asks for ``primitive.content`` (rendering, validation, placement
+keys), and the most recently used bodies are kept in a small LRU bounded by
+total size, so memory stays flat however many or however large the
+instruction files of a dependency graph are.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Tuple, Union
+
+import frontmatter
+
+
+# Total length (in characters) of the bodies kept in memory between uses
+BODY_CACHE_SIZE = 8 * 1024 * 1024
+
+# Entry key: (path, mtime_ns, size) so an edited file is never served stale
+_BodyKey = Tuple[str, int, int]
+
+_bodies: "OrderedDict[_BodyKey, str]" = OrderedDict()
+_cached_size = 0
+_lock = threading.Lock()
+
+
+def read_primitive_text(file_path: Union[str, Path]) -> str:
+    """Read the text of a primitive file.
+
+    Args:
+        file_path (Union[str, Path]): Path to the primitive file.
+
+    Returns:
+        str: File content.
+
+    Raises:
+        OSError: If the file cannot be read.
+        UnicodeDecodeError: If the file is not UTF-8 text.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def load_primitive_body(file_path: Union[str, Path]) -> str:
+    """Get the markdown body of a primitive file (the text after its frontmatter).
+
+    Args:
+        file_path (Union[str, Path]): Path to the primitive file.
+
+    Returns:
+        str: Body exactly as parsing the file would produce it.
+
+    Raises:
+        OSError: If the file cannot be read.
+        UnicodeDecodeError: If the file is not UTF-8 text.
+    """
+    path = str(file_path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        body = _bodies.get(key)
+        if body is not None:
+            _bodies.move_to_end(key)
+            return body
+
+    body = frontmatter.loads(read_primitive_text(path)).content
+    _remember(key, body)
+    return body
+
+
+def clear_body_cache() -> None:
+    """Drop every cached body."""
+    global _cached_size
+    with _lock:
+        _bodies.clear()
+        _cached_size = 0
+
+
+def _remember(key: _BodyKey, body: str) -> None:
+    """Add a body to the LRU, evicting the least recently used ones over budget."""
+    global _cached_size
+    size = len(body)
+    if size > BODY_CACHE_SIZE:
+        return
+    with _lock:
+        if key in _bodies:
+            return
+        _bodies[key] = body
+        _cached_size += size
+        while _cached_size > BODY_CACHE_SIZE:
+            _, evicted = _bodies.popitem(last=False)
+            _cached_size -= len(evicted)
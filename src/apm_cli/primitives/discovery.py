@@ -2,12 +2,23 @@
 
 import os
 import glob
+import fnmatch
+from collections import defaultdict
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional, Tuple, Union, TYPE_CHECKING
 
+from .cache import PrimitiveCache
 from .models import PrimitiveCollection
-from .parser import parse_primitive_file
+from .package_index import PRIMITIVE_TYPES, load_package_index
+from .parser import ParseTask, parse_primitive_files
 from ..models.apm_package import APMPackage
+from ..utils.project_walker import ProjectWalker
+
+if TYPE_CHECKING:
+    from ..compilation.compile_cache import CompileCache
+
+# Anything that parses primitive files through a cache of earlier results
+ParseCache = Union[PrimitiveCache, "CompileCache"]
 
 
 # Common primitive patterns for local discovery (with recursive search)
@@ -32,18 +43,19 @@ LOCAL_PRIMITIVE_PATTERNS: Dict[str, List[str]] = {
     ]
 }
 
-# Dependency primitive patterns (for .apm directory within dependencies)
-DEPENDENCY_PRIMITIVE_PATTERNS: Dict[str, List[str]] = {
-    'chatmode': ["chatmodes/*.chatmode.md"],
-    'instruction': ["instructions/*.instructions.md"],
-    'context': [
-        "context/*.context.md",
-        "memory/*.memory.md"
-    ]
-}
+# Directories whose primitives belong to dependencies, not the local project
+DEPENDENCY_DIRECTORY = "apm_modules"
+
+# Dependency primitives are listed by each package's install-time manifest
+# (see package_index.PACKAGE_PRIMITIVE_LOCATIONS)
 
 
-def discover_primitives(base_dir: str = ".") -> PrimitiveCollection:
+def discover_primitives(
+    base_dir: str = ".",
+    cache: Optional[ParseCache] = None,
+    walker: Optional[ProjectWalker] = None,
+    jobs: Optional[int] = None
+) -> PrimitiveCollection:
     """Find all APM primitive files in the project.
     
     Searches for .chatmode.md, .instructions.md, .context.md, and .memory.md files
@@ -51,27 +63,29 @@ def discover_primitives(base_dir: str = ".") -> PrimitiveCollection:
     
     Args:
         base_dir (str): Base directory to search in. Defaults to current directory.
+        cache (Optional[ParseCache]): Primitive cache (or the compile cache) that reuses unchanged parsed primitives.
+        walker (Optional[ProjectWalker]): Shared walker of the project; one is
+            created for ``base_dir`` when omitted.
+        jobs (Optional[int]): Number of threads parsing primitive files.
     
     Returns:
         PrimitiveCollection: Collection of discovered and parsed primitives.
     """
     collection = PrimitiveCollection()
     
-    # Find and parse files for each primitive type
-    for primitive_type, patterns in LOCAL_PRIMITIVE_PATTERNS.items():
-        files = find_primitive_files(base_dir, patterns)
-        
-        for file_path in files:
-            try:
-                primitive = parse_primitive_file(file_path, source="local")
-                collection.add_primitive(primitive)
-            except Exception as e:
-                print(f"Warning: Failed to parse {file_path}: {e}")
+    # Find the files of each primitive type, then parse them all at once
+    tasks = _local_parse_tasks(base_dir, walker)
+    _add_parsed_primitives(collection, tasks, cache, jobs, "Failed to parse")
     
     return collection
 
 
-def discover_primitives_with_dependencies(base_dir: str = ".") -> PrimitiveCollection:
+def discover_primitives_with_dependencies(
+    base_dir: str = ".",
+    cache: Optional[ParseCache] = None,
+    walker: Optional[ProjectWalker] = None,
+    jobs: Optional[int] = None
+) -> PrimitiveCollection:
     """Enhanced primitive discovery including dependency sources.
     
     Priority Order:
@@ -80,6 +94,9 @@ def discover_primitives_with_dependencies(base_dir: str = ".") -> PrimitiveColle
     
     Args:
         base_dir (str): Base directory to search in. Defaults to current directory.
+        cache (Optional[ParseCache]): Primitive cache (or the compile cache) that reuses unchanged parsed primitives.
+        walker (Optional[ProjectWalker]): Shared walker of the project.
+        jobs (Optional[int]): Number of threads parsing primitive files.
     
     Returns:
         PrimitiveCollection: Collection of discovered and parsed primitives with source tracking.
@@ -87,86 +104,85 @@ def discover_primitives_with_dependencies(base_dir: str = ".") -> PrimitiveColle
     collection = PrimitiveCollection()
     
     # Phase 1: Local primitives (highest priority)
-    scan_local_primitives(base_dir, collection)
+    scan_local_primitives(base_dir, collection, cache=cache, walker=walker, jobs=jobs)
     
     # Phase 2: Dependency primitives (lower priority, with conflict detection)
-    scan_dependency_primitives(base_dir, collection)
+    scan_dependency_primitives(base_dir, collection, cache=cache, jobs=jobs)
     
     return collection
 
 
-def scan_local_primitives(base_dir: str, collection: PrimitiveCollection) -> None:
+def scan_local_primitives(
+    base_dir: str,
+    collection: PrimitiveCollection,
+    cache: Optional[ParseCache] = None,
+    walker: Optional[ProjectWalker] = None,
+    jobs: Optional[int] = None
+) -> None:
     """Scan local .apm/ directory for primitives.
     
     Args:
         base_dir (str): Base directory to search in.
         collection (PrimitiveCollection): Collection to add primitives to.
+        cache (Optional[ParseCache]): Primitive cache (or the compile cache) that reuses unchanged parsed primitives.
+        walker (Optional[ProjectWalker]): Shared walker of the project.
+        jobs (Optional[int]): Number of threads parsing primitive files.
     """
-    # Find and parse files for each primitive type
-    for primitive_type, patterns in LOCAL_PRIMITIVE_PATTERNS.items():
-        files = find_primitive_files(base_dir, patterns)
-        
-        # Filter out files from apm_modules to avoid conflicts with dependency scanning
-        local_files = []
-        base_path = Path(base_dir)
-        apm_modules_path = base_path / "apm_modules"
-        
-        for file_path in files:
-            # Only include files that are NOT in apm_modules directory
-            if not _is_under_directory(file_path, apm_modules_path):
-                local_files.append(file_path)
-        
-        for file_path in local_files:
-            try:
-                primitive = parse_primitive_file(file_path, source="local")
-                collection.add_primitive(primitive)
-            except Exception as e:
-                print(f"Warning: Failed to parse local primitive {file_path}: {e}")
+    # Find and parse files for each primitive type (apm_modules is left to dependency scanning)
+    tasks = _local_parse_tasks(base_dir, walker)
+    _add_parsed_primitives(collection, tasks, cache, jobs, "Failed to parse local primitive")
 
 
-def _is_under_directory(file_path: Path, directory: Path) -> bool:
-    """Check if a file path is under a specific directory.
+def scan_dependency_primitives(
+    base_dir: str,
+    collection: PrimitiveCollection,
+    cache: Optional[ParseCache] = None,
+    jobs: Optional[int] = None
+) -> None:
+    """Scan all dependencies in apm_modules/ with priority handling.
     
-    Args:
-        file_path (Path): Path to check.
-        directory (Path): Directory to check against.
+    The files of every dependency are parsed in one batch and added in
+    declaration order, so the first declared dependency still wins conflicts.
     
-    Returns:
-        bool: True if file_path is under directory, False otherwise.
+    Args:
+        base_dir (str): Base directory to search in.
+        collection (PrimitiveCollection): Collection to add primitives to.
+        cache (Optional[ParseCache]): Primitive cache (or the compile cache) that reuses unchanged parsed primitives.
+        jobs (Optional[int]): Number of threads parsing primitive files.
     """
-    try:
-        file_path.resolve().relative_to(directory.resolve())
-        return True
-    except ValueError:
-        return False
+    # Collect dependencies in declaration order
+    tasks: List[ParseTask] = []
+    for dep_name, dep_path in get_dependency_paths(base_dir):
+        if dep_path.is_dir():
+            tasks.extend(_dependency_parse_tasks(dep_path, source=f"dependency:{dep_name}"))
+    
+    _add_parsed_primitives(collection, tasks, cache, jobs, "Failed to parse dependency primitive")
 
 
-def scan_dependency_primitives(base_dir: str, collection: PrimitiveCollection) -> None:
-    """Scan all dependencies in apm_modules/ with priority handling.
+def get_dependency_paths(base_dir: str) -> List[Tuple[str, Path]]:
+    """Get the install paths of the declared APM dependencies, in declaration order.
     
     Args:
-        base_dir (str): Base directory to search in.
-        collection (PrimitiveCollection): Collection to add primitives to.
+        base_dir (str): Base directory containing apm.yml and apm_modules/.
+    
+    Returns:
+        List[Tuple[str, Path]]: (dependency name, install path) pairs; empty
+        if nothing is installed. Paths may not exist.
     """
-    apm_modules_path = Path(base_dir) / "apm_modules"
+    apm_modules_path = Path(base_dir) / DEPENDENCY_DIRECTORY
     if not apm_modules_path.exists():
-        return
-    
-    # Get dependency declaration order from apm.yml
-    dependency_order = get_dependency_declaration_order(base_dir)
+        return []
     
-    # Process dependencies in declaration order
-    for dep_name in dependency_order:
+    paths = []
+    for dep_name in get_dependency_declaration_order(base_dir):
         # Handle org-namespaced structure (e.g., "danielmeppiel/design-guidelines")
         if "/" in dep_name:
             org_name, repo_name = dep_name.split("/", 1)
-            dep_path = apm_modules_path / org_name / repo_name
+            paths.append((dep_name, apm_modules_path / org_name / repo_name))
         else:
             # Fallback for non-namespaced dependencies
-            dep_path = apm_modules_path / dep_name
-            
-        if dep_path.exists() and dep_path.is_dir():
-            scan_directory_with_source(dep_path, collection, source=f"dependency:{dep_name}")
+            paths.append((dep_name, apm_modules_path / dep_name))
+    return paths
 
 
 def get_dependency_declaration_order(base_dir: str) -> List[str]:
@@ -204,72 +220,255 @@ def get_dependency_declaration_order(base_dir: str) -> List[str]:
         return []
 
 
-def scan_directory_with_source(directory: Path, collection: PrimitiveCollection, source: str) -> None:
+def scan_directory_with_source(
+    directory: Path,
+    collection: PrimitiveCollection,
+    source: str,
+    cache: Optional[ParseCache] = None,
+    jobs: Optional[int] = None
+) -> None:
     """Scan a directory for primitives with a specific source tag.
     
     Args:
         directory (Path): Directory to scan (e.g., apm_modules/package_name).
         collection (PrimitiveCollection): Collection to add primitives to.
         source (str): Source identifier for discovered primitives.
+        cache (Optional[ParseCache]): Primitive cache (or the compile cache) that reuses unchanged parsed primitives.
+        jobs (Optional[int]): Number of threads parsing primitive files.
     """
-    # Look for .apm directory within the dependency
-    apm_dir = directory / ".apm"
-    if not apm_dir.exists():
-        return
+    tasks = _dependency_parse_tasks(directory, source)
+    _add_parsed_primitives(collection, tasks, cache, jobs, "Failed to parse dependency primitive")
+
+
+def _local_parse_tasks(base_dir: str, walker: Optional[ProjectWalker]) -> List[ParseTask]:
+    """List the local primitive files to parse, in discovery order."""
+    return [
+        (file_path, "local")
+        for files in find_local_primitive_files(base_dir, walker).values()
+        for file_path in files
+    ]
+
+
+def _dependency_parse_tasks(directory: Path, source: str) -> List[ParseTask]:
+    """List the primitive files of a dependency's .apm directory, in discovery order.
     
-    # Find and parse files for each primitive type
-    for primitive_type, patterns in DEPENDENCY_PRIMITIVE_PATTERNS.items():
-        for pattern in patterns:
-            full_pattern = str(apm_dir / pattern)
-            matching_files = glob.glob(full_pattern, recursive=True)
-            
-            for file_path_str in matching_files:
-                file_path = Path(file_path_str)
-                if file_path.is_file() and _is_readable(file_path):
-                    try:
-                        primitive = parse_primitive_file(file_path, source=source)
-                        collection.add_primitive(primitive)
-                    except Exception as e:
-                        print(f"Warning: Failed to parse dependency primitive {file_path}: {e}")
+    Read from the package's install-time manifest; the package is only
+    scanned when the manifest is missing or stale.
+    """
+    index = load_package_index(directory)
+    return [(directory / entry.path, source) for entry in index.files(*PRIMITIVE_TYPES)]
+
+
+def _add_parsed_primitives(
+    collection: PrimitiveCollection,
+    tasks: List[ParseTask],
+    cache: Optional[ParseCache],
+    jobs: Optional[int],
+    failure_message: str
+) -> None:
+    """Parse primitive files in parallel and add them to a collection in task order.
+    
+    Files are read and parsed on a thread pool (through the cache when one is
+    given), but added sequentially in the order of ``tasks``, so conflict
+    resolution sees exactly the order of a sequential scan. Unreadable files
+    (no permission, not UTF-8 text) are skipped; parse failures are reported
+    as warnings.
+    
+    Args:
+        collection (PrimitiveCollection): Collection to add primitives to.
+        tasks (List[ParseTask]): Files to parse, in priority order.
+        cache (Optional[ParseCache]): Parse cache, or None to always parse.
+        jobs (Optional[int]): Number of threads parsing primitive files.
+        failure_message (str): Start of the warning printed for a failed file.
+    """
+    if cache is not None:
+        results = cache.parse_primitive_files(tasks, jobs)
+    else:
+        results = parse_primitive_files(tasks, jobs)
+    
+    for (file_path, _), result in zip(tasks, results):
+        if isinstance(result, (OSError, UnicodeDecodeError)):
+            continue
+        if isinstance(result, Exception):
+            print(f"Warning: {failure_message} {file_path}: {result}")
+            continue
+        collection.add_primitive(result)
 
 
-def find_primitive_files(base_dir: str, patterns: List[str]) -> List[Path]:
+def find_primitive_files(
+    base_dir: str,
+    patterns: List[str],
+    walker: Optional[ProjectWalker] = None
+) -> List[Path]:
     """Find primitive files matching the given patterns.
     
+    Patterns of the form ``[**/]<subdirectory>/<file glob>`` are answered from
+    the project walk, so excluded and ignored directories are never searched;
+    other patterns fall back to ``glob``.
+    
     Args:
         base_dir (str): Base directory to search in.
         patterns (List[str]): List of glob patterns to match.
+        walker (Optional[ProjectWalker]): Shared walker of the project; one is
+            created for ``base_dir`` when omitted.
     
     Returns:
         List[Path]: List of unique file paths found.
     """
     if not os.path.isdir(base_dir):
         return []
+    if walker is None:
+        walker = ProjectWalker.for_project(Path(base_dir))
     
-    all_files = []
+    root = os.path.abspath(base_dir)
+    seen = set()
+    valid_files = []
     
     for pattern in patterns:
-        # Use glob to find files matching the pattern
-        matching_files = glob.glob(os.path.join(base_dir, pattern), recursive=True)
-        all_files.extend(matching_files)
+        for file_path, is_file in _match_walked_files(walker, root, pattern):
+            # Remove duplicates while preserving order
+            if file_path in seen:
+                continue
+            seen.add(file_path)
+            
+            # Filter out directories and ensure files are readable
+            if is_file and _is_readable(file_path):
+                valid_files.append(file_path)
     
-    # Remove duplicates while preserving order and convert to Path objects
-    seen = set()
-    unique_files = []
+    return valid_files
+
+
+def find_local_primitive_files(
+    base_dir: str,
+    walker: Optional[ProjectWalker] = None
+) -> Dict[str, List[Path]]:
+    """Find the files of every local primitive type in one pass over the project walk.
+    
+    Each walked directory is visited once: its files are classified by
+    suffix and its ``.apm`` / ``.github`` primitive subdirectories are
+    listed. ``apm_modules`` is never searched. Files are returned per type in
+    the order of ``LOCAL_PRIMITIVE_PATTERNS`` (all matches of the first
+    pattern, then the second, ...), exactly like ``find_primitive_files``.
     
-    for file_path in all_files:
-        abs_path = os.path.abspath(file_path)
-        if abs_path not in seen:
-            seen.add(abs_path)
-            unique_files.append(Path(abs_path))
+    Args:
+        base_dir (str): Base directory to search in.
+        walker (Optional[ProjectWalker]): Shared walker of the project; one is
+            created for ``base_dir`` when omitted.
     
-    # Filter out directories and ensure files are readable
-    valid_files = []
-    for file_path in unique_files:
-        if file_path.is_file() and _is_readable(file_path):
-            valid_files.append(file_path)
+    Returns:
+        Dict[str, List[Path]]: Primitive type -> unique file paths.
+    """
+    if not os.path.isdir(base_dir):
+        return {primitive_type: [] for primitive_type in LOCAL_PRIMITIVE_PATTERNS}
+    if walker is None:
+        walker = ProjectWalker.for_project(Path(base_dir))
+    
+    root = os.path.abspath(base_dir)
+    subdirectory_targets, suffix_targets = _local_pattern_targets()
+    # (primitive type, pattern position) -> (path, is regular file)
+    buckets: Dict[Tuple[str, int], List[Tuple[Path, bool]]] = defaultdict(list)
+    
+    for walked in walker.walk():
+        if walked.relative_path.split("/", 1)[0] == DEPENDENCY_DIRECTORY:
+            continue
+        
+        for subdirectory, targets in subdirectory_targets.items():
+            if subdirectory.split("/", 1)[0] not in walked.hidden_directories:
+                continue
+            directory = Path(root, walked.relative_path, subdirectory)
+            for name, entry in walker.list_files(walked, subdirectory):
+                for primitive_type, position, suffix in targets:
+                    if name.endswith(suffix):
+                        buckets[(primitive_type, position)].append((directory / name, entry.is_file()))
+        
+        directory = Path(root, walked.relative_path)
+        for name in walked.files:
+            target = suffix_targets.get(_primitive_suffix(name))
+            if target is not None:
+                buckets[target].append((directory / name, walked.is_file(name)))
     
-    return valid_files
+    found: Dict[str, List[Path]] = {}
+    for primitive_type, patterns in LOCAL_PRIMITIVE_PATTERNS.items():
+        seen = set()
+        valid_files = []
+        for position in range(len(patterns)):
+            for file_path, is_file in buckets.get((primitive_type, position), ()):
+                if file_path in seen:
+                    continue
+                seen.add(file_path)
+                # Readability is checked when the file is parsed
+                if is_file:
+                    valid_files.append(file_path)
+        found[primitive_type] = valid_files
+    return found
+
+
+def _local_pattern_targets() -> Tuple[Dict[str, List[Tuple[str, int, str]]], Dict[str, Tuple[str, int]]]:
+    """Split ``LOCAL_PRIMITIVE_PATTERNS`` into lookups for the one-pass scan.
+    
+    Every local pattern has the form ``**/<subdirectory>/*<suffix>`` or
+    ``**/*<suffix>``.
+    
+    Returns:
+        Tuple: Subdirectory -> [(type, position, suffix)] for patterns with a
+        subdirectory, and suffix -> (type, position) for generic patterns.
+    """
+    subdirectory_targets: Dict[str, List[Tuple[str, int, str]]] = defaultdict(list)
+    suffix_targets: Dict[str, Tuple[str, int]] = {}
+    for primitive_type, patterns in LOCAL_PRIMITIVE_PATTERNS.items():
+        for position, pattern in enumerate(patterns):
+            subdirectory, _, name_pattern = pattern[len("**/"):].rpartition("/")
+            suffix = name_pattern[1:]
+            if subdirectory:
+                subdirectory_targets[subdirectory].append((primitive_type, position, suffix))
+            else:
+                suffix_targets.setdefault(suffix, (primitive_type, position))
+    return subdirectory_targets, suffix_targets
+
+
+def _primitive_suffix(file_name: str) -> str:
+    """Get the two-part suffix of a file name (``.instructions.md`` for ``a.instructions.md``)."""
+    parts = file_name.rsplit(".", 2)
+    return f".{parts[1]}.{parts[2]}" if len(parts) == 3 else ""
+
+
+def _match_walked_files(walker: ProjectWalker, root: str, pattern: str) -> Iterator[Tuple[Path, bool]]:
+    """Match a discovery pattern against the project walk.
+    
+    Args:
+        walker (ProjectWalker): Walker of the project.
+        root (str): Absolute base directory the returned paths are built from.
+        pattern (str): Glob pattern relative to ``root``.
+    
+    Yields:
+        Tuple[Path, bool]: Matching path and whether it is a regular file.
+    """
+    recursive = pattern.startswith("**/")
+    subdirectory, _, name_pattern = (pattern[3:] if recursive else pattern).rpartition("/")
+    
+    if glob.has_magic(subdirectory) or "**" in name_pattern:
+        for file_path in glob.glob(os.path.join(root, pattern), recursive=True):
+            yield Path(os.path.abspath(file_path)), os.path.isfile(file_path)
+        return
+    
+    for walked in walker.walk():
+        if subdirectory:
+            first = subdirectory.split("/", 1)[0]
+            if first not in walked.directories and first not in walked.hidden_directories:
+                continue
+            candidates = walker.list_files(walked, subdirectory)
+            directory = Path(root, walked.relative_path, subdirectory)
+            for name, entry in candidates:
+                if fnmatch.fnmatch(name, name_pattern):
+                    yield directory / name, entry.is_file()
+        else:
+            directory = Path(root, walked.relative_path)
+            for name in walked.files:
+                if fnmatch.fnmatch(name, name_pattern):
+                    yield directory / name, walked.is_file(name)
+        
+        if not recursive:
+            break
 
 
 def _is_readable(file_path: Path) -> bool:
@@ -288,29 +487,3 @@ def _is_readable(file_path: Path) -> bool:
         return True
     except (PermissionError, UnicodeDecodeError, OSError):
         return False
-
-
-def _should_skip_directory(dir_path: str) -> bool:
-    """Check if a directory should be skipped during scanning.
-    
-    Args:
-        dir_path (str): Directory path to check.
-    
-    Returns:
-        bool: True if directory should be skipped, False otherwise.
-    """
-    skip_patterns = {
-        '.git',
-        'node_modules',
-        '__pycache__',
-        '.pytest_cache',
-        '.venv',
-        'venv',
-        '.tox',
-        'build',
-        'dist',
-        '.mypy_cache'
-    }
-    
-    dir_name = os.path.basename(dir_path)
-    return dir_name in skip_patterns
\ No newline at end of file
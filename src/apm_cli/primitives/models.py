@@ -1,10 +1,64 @@
 """Data models for APM context."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from itertools import chain
 from pathlib import Path
-from typing import Optional, List, Union, Dict
+from typing import Optional, List, Union, Dict, Iterator, Tuple
 
+from .content import load_primitive_body
 
+
+# Slot holding the body of a primitive, or None when it is loaded on demand
+_CONTENT_SLOT = '_content'
+
+
+def _content_property() -> property:
+    """Build the ``content`` property of primitives with on-demand bodies."""
+    def get_content(self) -> str:
+        content = self._content
+        if content is None:
+            return load_primitive_body(self.file_path)
+        return content
+    
+    def set_content(self, content: Optional[str]) -> None:
+        self._content = content
+    
+    return property(get_content, set_content, doc="Markdown body, read from ``file_path`` when not held in memory.")
+
+
+def _with_slots(cls):
+    """Give a dataclass ``__slots__`` instead of a per-instance ``__dict__``.
+    
+    Equivalent to ``@dataclass(slots=True)``, which needs Python 3.10. Large
+    dependency graphs hold thousands of primitives, and slotted instances are
+    about a third smaller. The ``content`` field becomes a property, so a
+    primitive created with ``content=None`` loads its body only when used.
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    cls_dict['__slots__'] = tuple(_CONTENT_SLOT if name == 'content' else name for name in field_names)
+    for name in field_names:
+        # Defaults are already baked into the generated __init__
+        cls_dict.pop(name, None)
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+    cls_dict['content'] = _content_property()
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+def content_in_memory(primitive: 'Primitive') -> Optional[str]:
+    """Get the body a primitive holds in memory, without loading it.
+    
+    Args:
+        primitive (Primitive): Primitive to inspect.
+    
+    Returns:
+        Optional[str]: The body, or None if it is loaded on demand.
+    """
+    return primitive._content
+
+
+@_with_slots
 @dataclass
 class Chatmode:
     """Represents a chatmode primitive."""
@@ -12,7 +66,7 @@ class Chatmode:
     file_path: Path
     description: str
     apply_to: Optional[str]  # Glob pattern for file targeting (optional for chatmodes)
-    content: str
+    content: Optional[str]  # None until loaded from file_path on first use
     author: Optional[str] = None
     version: Optional[str] = None
     source: Optional[str] = None  # Source of primitive: "local" or "dependency:{package_name}"
@@ -31,6 +85,7 @@ class Chatmode:
         return errors
 
 
+@_with_slots
 @dataclass
 class Instruction:
     """Represents an instruction primitive."""
@@ -38,7 +93,7 @@ class Instruction:
     file_path: Path
     description: str
     apply_to: str  # Glob pattern for file targeting (required for instructions)
-    content: str
+    content: Optional[str]  # None until loaded from file_path on first use
     author: Optional[str] = None
     version: Optional[str] = None
     source: Optional[str] = None  # Source of primitive: "local" or "dependency:{package_name}"
@@ -59,12 +114,13 @@ class Instruction:
         return errors
 
 
+@_with_slots
 @dataclass
 class Context:
     """Represents a context primitive."""
     name: str
     file_path: Path
-    content: str
+    content: Optional[str]  # None until loaded from file_path on first use
     description: Optional[str] = None
     author: Optional[str] = None
     version: Optional[str] = None
@@ -103,7 +159,13 @@ class PrimitiveConflict:
 
 @dataclass
 class PrimitiveCollection:
-    """Collection of discovered primitives."""
+    """Collection of discovered primitives.
+    
+    Primitives are kept in per-type lists in insertion order, with per-type
+    indexes from name to list position and from source to list positions, so
+    adding a primitive and looking one up by name or source take constant
+    time however large the dependency graph is.
+    """
     chatmodes: List[Chatmode]
     instructions: List[Instruction]  
     contexts: List[Context]
@@ -114,6 +176,9 @@ class PrimitiveCollection:
         self.instructions = []
         self.contexts = []
         self.conflicts = []
+        # Per primitive type: name -> list position, source -> list positions
+        self._names: Dict[str, Dict[str, int]] = {"chatmode": {}, "instruction": {}, "context": {}}
+        self._sources: Dict[str, Dict[str, Dict[int, None]]] = {"chatmode": {}, "instruction": {}, "context": {}}
     
     def add_primitive(self, primitive: Primitive) -> None:
         """Add a primitive to the appropriate collection.
@@ -133,15 +198,16 @@ class PrimitiveCollection:
     
     def _add_with_conflict_detection(self, new_primitive: Primitive, collection: List[Primitive], primitive_type: str) -> None:
         """Add primitive with conflict detection."""
+        names = self._names[primitive_type]
+        sources = self._sources[primitive_type]
+        
         # Find existing primitive with same name
-        existing_index = None
-        for i, existing in enumerate(collection):
-            if existing.name == new_primitive.name:
-                existing_index = i
-                break
+        existing_index = names.get(new_primitive.name)
         
         if existing_index is None:
             # No conflict, just add the primitive
+            names[new_primitive.name] = len(collection)
+            sources.setdefault(new_primitive.source, {})[len(collection)] = None
             collection.append(new_primitive)
         else:
             # Conflict detected - apply priority rules
@@ -163,6 +229,8 @@ class PrimitiveCollection:
                 )
                 self.conflicts.append(conflict)
                 collection[existing_index] = new_primitive
+                del sources[existing.source][existing_index]
+                sources.setdefault(new_primitive.source, {})[existing_index] = None
             else:
                 # Keep existing and record that new primitive was ignored
                 conflict = PrimitiveConflict(
@@ -190,9 +258,17 @@ class PrimitiveCollection:
         # since dependencies should be processed in order, but handle gracefully
         return False  # Keep first dependency (existing)
     
+    def _typed_lists(self) -> Tuple[Tuple[str, List[Primitive]], ...]:
+        """Get the per-type lists in ``all_primitives`` order."""
+        return (("chatmode", self.chatmodes), ("instruction", self.instructions), ("context", self.contexts))
+    
+    def iter_primitives(self) -> Iterator[Primitive]:
+        """Iterate over all primitives without building a combined list."""
+        return chain(self.chatmodes, self.instructions, self.contexts)
+    
     def all_primitives(self) -> List[Primitive]:
         """Get all primitives as a single list."""
-        return self.chatmodes + self.instructions + self.contexts
+        return list(self.iter_primitives())
     
     def count(self) -> int:
         """Get total count of all primitives."""
@@ -206,7 +282,27 @@ class PrimitiveCollection:
         """Get conflicts for a specific primitive type."""
         return [c for c in self.conflicts if c.primitive_type == primitive_type]
     
+    def get_primitive(self, primitive_type: str, name: str) -> Optional[Primitive]:
+        """Get the winning primitive of a type by name.
+        
+        Args:
+            primitive_type (str): 'chatmode', 'instruction' or 'context'.
+            name (str): Primitive name.
+        
+        Returns:
+            Optional[Primitive]: The primitive, or None if there is none by that name.
+        """
+        for typed, primitives in self._typed_lists():
+            if typed == primitive_type:
+                position = self._names[typed].get(name)
+                return primitives[position] if position is not None else None
+        return None
+    
     def get_primitives_by_source(self, source: str) -> List[Primitive]:
         """Get all primitives from a specific source."""
-        all_primitives = self.all_primitives()
-        return [p for p in all_primitives if p.source == source]
\ No newline at end of file
+        result = []
+        for primitive_type, primitives in self._typed_lists():
+            positions = self._sources[primitive_type].get(source)
+            if positions:
+                result.extend(primitives[position] for position in sorted(positions))
+        return result
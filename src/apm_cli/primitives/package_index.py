@@ -0,0 +1,251 @@
+"""Install-time primitive manifest of a dependency package.
+
+When a package is installed into ``apm_modules/<org>/<repo>/``, the primitives
+and prompts it ships are listed once in ``.apm-index.json`` with their type,
+name, applyTo pattern, content hash and byte size. Discovery, ``apm deps
+list`` / ``info`` and prompt resolution read that manifest instead of
+globbing the package on every run.
+
+The manifest records the mtime of every directory it lists. It is trusted
+only while none of them changed (and none changed within the racy window of
+the write), otherwise the package is scanned again and the manifest rewritten.
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .cache import RACY_WINDOW_NS
+from .parser import parse_primitive_text
+
+
+PACKAGE_INDEX_FILE = ".apm-index.json"
+PACKAGE_INDEX_FORMAT_VERSION = 1
+
+# (type, directory relative to the package, file suffix), in discovery order
+PACKAGE_PRIMITIVE_LOCATIONS: Tuple[Tuple[str, str, str], ...] = (
+    ("chatmode", ".apm/chatmodes", ".chatmode.md"),
+    ("instruction", ".apm/instructions", ".instructions.md"),
+    ("context", ".apm/context", ".context.md"),
+    ("context", ".apm/memory", ".memory.md"),
+    ("prompt", ".apm/prompts", ".prompt.md"),
+    ("prompt", "", ".prompt.md"),
+    ("prompt", "prompts", ".prompt.md"),
+    ("prompt", "workflows", ".prompt.md"),
+)
+
+# Types parsed into primitives by discovery (prompts are workflows)
+PRIMITIVE_TYPES = ("chatmode", "instruction", "context")
+
+_MISSING = -1
+
+
+@dataclass
+class IndexedPrimitive:
+    """A primitive or prompt file shipped by a package."""
+    path: str  # POSIX-style path relative to the package
+    type: str  # 'chatmode', 'instruction', 'context' or 'prompt'
+    name: str
+    apply_to: Optional[str]
+    sha256: str
+    size: int
+
+
+@dataclass
+class PackageIndex:
+    """Primitive manifest of an installed package."""
+    primitives: List[IndexedPrimitive] = field(default_factory=list)
+    directories: Dict[str, int] = field(default_factory=dict)  # listed directory -> mtime_ns
+    indexed_at_ns: int = 0
+
+    @classmethod
+    def build(cls, package_path: Path) -> 'PackageIndex':
+        """Scan a package for primitive and prompt files.
+
+        Args:
+            package_path (Path): Root of the installed package.
+
+        Returns:
+            PackageIndex: Manifest of the package as it is on disk.
+        """
+        index = cls(indexed_at_ns=time.time_ns())
+        seen = set()
+        for primitive_type, directory, suffix in PACKAGE_PRIMITIVE_LOCATIONS:
+            path = package_path / directory if directory else package_path
+            # Record the mtime before listing, so a change during the scan makes the index stale
+            index.directories[directory] = _mtime_ns(path)
+            try:
+                names = sorted(entry.name for entry in os.scandir(path)
+                               if entry.name.endswith(suffix) and entry.is_file())
+            except OSError:
+                continue
+            for name in names:
+                relative_path = f"{directory}/{name}" if directory else name
+                if relative_path in seen:
+                    continue
+                seen.add(relative_path)
+                entry = _index_file(package_path, relative_path, primitive_type, suffix)
+                if entry is not None:
+                    index.primitives.append(entry)
+        return index
+
+    @classmethod
+    def load(cls, package_path: Path) -> Optional['PackageIndex']:
+        """Read the manifest of a package.
+
+        Args:
+            package_path (Path): Root of the installed package.
+
+        Returns:
+            Optional[PackageIndex]: The manifest, or None if it is missing,
+            unreadable or written by another format version.
+        """
+        try:
+            with open(package_path / PACKAGE_INDEX_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != PACKAGE_INDEX_FORMAT_VERSION:
+                return None
+            return cls(
+                primitives=[IndexedPrimitive(**entry) for entry in data["primitives"]],
+                directories={str(path): int(mtime) for path, mtime in data["directories"].items()},
+                indexed_at_ns=int(data["indexed_at_ns"]),
+            )
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def write(self, package_path: Path) -> None:
+        """Write the manifest into the package.
+
+        The file is rewritten in place: creating or renaming a file would
+        change the mtime of the package root the manifest itself records (see
+        ``_create_manifest_file``). A torn write only makes ``load`` fail.
+
+        Args:
+            package_path (Path): Root of the installed package.
+
+        Raises:
+            OSError: If the manifest cannot be written.
+        """
+        data = {
+            "version": PACKAGE_INDEX_FORMAT_VERSION,
+            "indexed_at_ns": self.indexed_at_ns,
+            "directories": self.directories,
+            "primitives": [asdict(entry) for entry in self.primitives],
+        }
+        with open(package_path / PACKAGE_INDEX_FILE, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+
+    def is_current(self, package_path: Path) -> bool:
+        """Check that no listed directory changed since the manifest was built.
+
+        Args:
+            package_path (Path): Root of the installed package.
+
+        Returns:
+            bool: True if the manifest still lists exactly the package's files.
+        """
+        trusted_before_ns = self.indexed_at_ns - RACY_WINDOW_NS
+        for directory, mtime_ns in self.directories.items():
+            current = _mtime_ns(package_path / directory if directory else package_path)
+            if current != mtime_ns or current > trusted_before_ns:
+                return False
+        return True
+
+    def files(self, *types: str) -> List[IndexedPrimitive]:
+        """Get the indexed files of the given types, in discovery order."""
+        return [entry for entry in self.primitives if entry.type in types]
+
+    def count(self, primitive_type: str) -> int:
+        """Count the indexed files of a type."""
+        return sum(1 for entry in self.primitives if entry.type == primitive_type)
+
+
+def write_package_index(package_path: Path) -> PackageIndex:
+    """Build and write the manifest of a freshly installed package.
+
+    Args:
+        package_path (Path): Root of the installed package.
+
+    Returns:
+        PackageIndex: The written manifest.
+
+    Raises:
+        OSError: If the manifest cannot be written.
+    """
+    _create_manifest_file(package_path)
+    index = PackageIndex.build(package_path)
+    index.write(package_path)
+    return index
+
+
+def load_package_index(package_path: Path) -> PackageIndex:
+    """Get the manifest of an installed package, rescanning it if missing or stale.
+
+    A rescanned manifest is written back when the package is writable.
+
+    Args:
+        package_path (Path): Root of the installed package.
+
+    Returns:
+        PackageIndex: Manifest matching the package on disk.
+    """
+    index = PackageIndex.load(package_path)
+    if index is not None and index.is_current(package_path):
+        return index
+
+    try:
+        _create_manifest_file(package_path)
+        index = PackageIndex.build(package_path)
+        index.write(package_path)
+    except OSError:
+        index = PackageIndex.build(package_path)
+    return index
+
+
+def _create_manifest_file(package_path: Path) -> None:
+    """Create the manifest file before the package is scanned.
+
+    Adding the file changes the package root's mtime; doing it first means
+    the scan records the mtime the root keeps once the manifest is written.
+    """
+    (package_path / PACKAGE_INDEX_FILE).touch(exist_ok=True)
+
+
+def _index_file(package_path: Path, relative_path: str, primitive_type: str, suffix: str) -> Optional[IndexedPrimitive]:
+    """Hash a package file and read its name and applyTo, or None if it is unreadable."""
+    file_path = package_path / relative_path
+    try:
+        data = file_path.read_bytes()
+    except OSError:
+        return None
+
+    name = file_path.name[:-len(suffix)]
+    apply_to = None
+    if primitive_type != "prompt":
+        try:
+            primitive = parse_primitive_text(file_path, data.decode("utf-8"), lazy=True)
+            name = primitive.name
+            apply_to = getattr(primitive, "apply_to", None)
+        except (UnicodeDecodeError, ValueError):
+            # Listed anyway: discovery reports the parse failure
+            pass
+
+    return IndexedPrimitive(
+        path=relative_path,
+        type=primitive_type,
+        name=name,
+        apply_to=apply_to if isinstance(apply_to, str) else None,
+        sha256=hashlib.sha256(data).hexdigest(),
+        size=len(data),
+    )
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return _MISSING
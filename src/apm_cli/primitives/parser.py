@@ -1,13 +1,22 @@
 """Parser for primitive definition files."""
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Union, List
+from typing import Callable, Optional, Sequence, Tuple, Union, List
 import frontmatter
 
+from .content import read_primitive_text
 from .models import Chatmode, Instruction, Context, Primitive
 
 
+# Reading and parsing primitives is mostly file I/O; more threads only add contention
+DEFAULT_PARSE_JOBS = min(8, os.cpu_count() or 1)
+
+# A primitive file to parse: (path, source identifier)
+ParseTask = Tuple[Path, str]
+
+
 def parse_primitive_file(file_path: Union[str, Path], source: str = None) -> Primitive:
     """Parse a primitive file.
     
@@ -26,13 +35,35 @@ def parse_primitive_file(file_path: Union[str, Path], source: str = None) -> Pri
     file_path = Path(file_path)
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            post = frontmatter.load(f)
+        text = read_primitive_text(file_path)
+    except Exception as e:
+        raise ValueError(f"Failed to parse primitive file {file_path}: {e}")
+    return parse_primitive_text(file_path, text, source)
+
+
+def parse_primitive_text(file_path: Path, text: str, source: str = None, lazy: bool = False) -> Primitive:
+    """Parse the already read text of a primitive file.
+    
+    Args:
+        file_path (Path): Path the text was read from (decides name and type).
+        text (str): File content.
+        source (str, optional): Source identifier for the primitive.
+        lazy (bool): Drop the body and let the primitive read it back from
+            ``file_path`` when its ``content`` is used.
+    
+    Returns:
+        Primitive: Parsed primitive (Chatmode, Instruction, or Context).
+    
+    Raises:
+        ValueError: If the text cannot be parsed or has invalid format.
+    """
+    try:
+        post = frontmatter.loads(text)
         
         # Extract name based on file structure
         name = _extract_primitive_name(file_path)
         metadata = post.metadata
-        content = post.content
+        content = None if lazy else post.content
         
         # Determine primitive type based on file extension
         if file_path.name.endswith('.chatmode.md'):
@@ -48,14 +79,57 @@ def parse_primitive_file(file_path: Union[str, Path], source: str = None) -> Pri
         raise ValueError(f"Failed to parse primitive file {file_path}: {e}")
 
 
-def _parse_chatmode(name: str, file_path: Path, metadata: dict, content: str, source: str = None) -> Chatmode:
+def parse_primitive_files(
+    tasks: Sequence[ParseTask],
+    jobs: Optional[int] = None,
+    parse: Optional[Callable[[Path, str], Primitive]] = None
+) -> List[Union[Primitive, Exception]]:
+    """Read and parse many primitive files on a thread pool.
+    
+    Results are returned in task order whatever order the workers finish in,
+    so callers can merge them exactly as a sequential parse would. Files read
+    by default keep no body in memory (see ``parse_primitive_text(lazy=True)``).
+    
+    Args:
+        tasks (Sequence[ParseTask]): Files to parse with their source identifiers.
+        jobs (Optional[int]): Number of worker threads (default ``DEFAULT_PARSE_JOBS``);
+            1 parses on the calling thread.
+        parse (Optional[Callable[[Path, str], Primitive]]): Parses one file;
+            reads and parses it from disk when omitted.
+    
+    Returns:
+        List[Union[Primitive, Exception]]: Per task, the primitive or the
+        exception raised while reading or parsing it.
+    """
+    if parse is None:
+        parse = _read_and_parse
+    
+    def run(task: ParseTask) -> Union[Primitive, Exception]:
+        try:
+            return parse(*task)
+        except Exception as e:
+            return e
+    
+    workers = min(max(1, jobs or DEFAULT_PARSE_JOBS), len(tasks))
+    if workers <= 1:
+        return [run(task) for task in tasks]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run, tasks))
+
+
+def _read_and_parse(file_path: Path, source: str) -> Primitive:
+    """Read and parse a primitive file lazily, letting read errors through unwrapped."""
+    return parse_primitive_text(Path(file_path), read_primitive_text(file_path), source, lazy=True)
+
+
+def _parse_chatmode(name: str, file_path: Path, metadata: dict, content: Optional[str], source: str = None) -> Chatmode:
     """Parse a chatmode primitive.
     
     Args:
         name (str): Name of the chatmode.
         file_path (Path): Path to the file.
         metadata (dict): Metadata from frontmatter.
-        content (str): Content of the file.
+        content (Optional[str]): Content of the file, or None to load it on demand.
         source (str, optional): Source identifier for the primitive.
     
     Returns:
@@ -73,14 +147,14 @@ def _parse_chatmode(name: str, file_path: Path, metadata: dict, content: str, so
     )
 
 
-def _parse_instruction(name: str, file_path: Path, metadata: dict, content: str, source: str = None) -> Instruction:
+def _parse_instruction(name: str, file_path: Path, metadata: dict, content: Optional[str], source: str = None) -> Instruction:
     """Parse an instruction primitive.
     
     Args:
         name (str): Name of the instruction.
         file_path (Path): Path to the file.
         metadata (dict): Metadata from frontmatter.
-        content (str): Content of the file.
+        content (Optional[str]): Content of the file, or None to load it on demand.
         source (str, optional): Source identifier for the primitive.
     
     Returns:
@@ -98,14 +172,14 @@ def _parse_instruction(name: str, file_path: Path, metadata: dict, content: str,
     )
 
 
-def _parse_context(name: str, file_path: Path, metadata: dict, content: str, source: str = None) -> Context:
+def _parse_context(name: str, file_path: Path, metadata: dict, content: Optional[str], source: str = None) -> Context:
     """Parse a context primitive.
     
     Args:
         name (str): Name of the context.
         file_path (Path): Path to the file.
         metadata (dict): Metadata from frontmatter.
-        content (str): Content of the file.
+        content (Optional[str]): Content of the file, or None to load it on demand.
         source (str, optional): Source identifier for the primitive.
     
     Returns:
@@ -3,5 +3,6 @@
 from .client import SimpleRegistryClient
 from .integration import RegistryIntegration
 from .operations import MCPServerOperations
+from .session import ServerResolutionSession
 
-__all__ = ["SimpleRegistryClient", "RegistryIntegration", "MCPServerOperations"]
+__all__ = ["SimpleRegistryClient", "RegistryIntegration", "MCPServerOperations", "ServerResolutionSession"]
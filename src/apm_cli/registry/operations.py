@@ -5,6 +5,7 @@ from typing import List, Dict, Set, Optional, Tuple
 from pathlib import Path
 
 from .client import SimpleRegistryClient
+from .session import ServerResolutionSession
 
 
 class MCPServerOperations:
@@ -17,6 +18,8 @@ class MCPServerOperations:
             registry_url: Optional registry URL override
         """
         self.registry_client = SimpleRegistryClient(registry_url)
+        # Shared by validation, installation checks, conflict detection and adapters
+        self.session = ServerResolutionSession(self.registry_client)
     
     def check_servers_needing_installation(self, target_runtimes: List[str], server_references: List[str]) -> List[str]:
         """Check which MCP servers actually need installation across target runtimes.
@@ -33,11 +36,14 @@ class MCPServerOperations:
         """
         servers_needing_installation = set()
         
+        # Read each runtime's configuration once, not once per server
+        installed_ids_by_runtime = {runtime: self._get_installed_server_ids([runtime]) for runtime in target_runtimes}
+        
         # Check each server reference
         for server_ref in server_references:
             try:
                 # Get server info from registry to find the canonical ID
-                server_info = self.registry_client.find_server_by_reference(server_ref)
+                server_info = self.session.resolve(server_ref)
                 
                 if not server_info:
                     # Server not found in registry, might be a local/custom server
@@ -54,8 +60,7 @@ class MCPServerOperations:
                 # Check if this server needs installation in ANY of the target runtimes
                 needs_installation = False
                 for runtime in target_runtimes:
-                    runtime_installed_ids = self._get_installed_server_ids([runtime])
-                    if server_id not in runtime_installed_ids:
+                    if server_id not in installed_ids_by_runtime[runtime]:
                         needs_installation = True
                         break
                 
@@ -143,14 +148,12 @@ class MCPServerOperations:
         valid_servers = []
         invalid_servers = []
         
+        # Look all servers up at once; failed lookups count as missing
+        server_info_cache = self.session.resolve_many(server_references)
         for server_ref in server_references:
-            try:
-                server_info = self.registry_client.find_server_by_reference(server_ref)
-                if server_info:
-                    valid_servers.append(server_ref)
-                else:
-                    invalid_servers.append(server_ref)
-            except Exception:
+            if server_info_cache[server_ref]:
+                valid_servers.append(server_ref)
+            else:
                 invalid_servers.append(server_ref)
                 
         return valid_servers, invalid_servers
@@ -158,22 +161,16 @@ class MCPServerOperations:
     def batch_fetch_server_info(self, server_references: List[str]) -> Dict[str, Optional[Dict]]:
         """Batch fetch server info for all servers to avoid duplicate registry calls.
         
+        Servers already resolved by this instance (e.g. by ``validate_servers_exist``)
+        are not looked up again.
+        
         Args:
             server_references: List of MCP server references
             
         Returns:
             Dictionary mapping server reference to server info (or None if not found)
         """
-        server_info_cache = {}
-        
-        for server_ref in server_references:
-            try:
-                server_info = self.registry_client.find_server_by_reference(server_ref)
-                server_info_cache[server_ref] = server_info
-            except Exception:
-                server_info_cache[server_ref] = None
-                
-        return server_info_cache
+        return self.session.resolve_many(server_references)
     
     def collect_runtime_variables(self, server_references: List[str], server_info_cache: Dict[str, Optional[Dict]] = None) -> Dict[str, str]:
         """Collect runtime variables from runtime_arguments.variables fields.
@@ -0,0 +1,91 @@
+"""Memoized MCP server resolution for one install run."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .client import SimpleRegistryClient
+
+
+# Registry lookups wait on the network: resolve a few references at a time
+MAX_CONCURRENT_LOOKUPS = 8
+
+
+class ServerResolutionSession:
+    """Resolves each MCP server reference against the registry at most once.
+
+    ``SimpleRegistryClient.find_server_by_reference`` costs a search and a
+    detail request. An install needs each server's details for validation,
+    for checking which runtimes already have it, for conflict detection in
+    every runtime and for configuring it, so all of these share one session.
+    Failed lookups are remembered too and raise the same error again, so
+    every step of the run sees the same answer.
+    """
+
+    def __init__(self, registry_client: SimpleRegistryClient):
+        """Initialize the session.
+
+        Args:
+            registry_client (SimpleRegistryClient): Client that resolves references.
+        """
+        self.registry_client = registry_client
+        self.hits = 0  # Lookups answered from the session
+        self.misses = 0  # Lookups sent to the registry
+        self._results: Dict[str, Tuple[Optional[Dict[str, Any]], Optional[Exception]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, reference: str) -> Optional[Dict[str, Any]]:
+        """Get a server's details, looking the reference up on first use only.
+
+        Args:
+            reference (str): Server reference (ID or name).
+
+        Returns:
+            Optional[Dict[str, Any]]: Server metadata, or None if the registry does not have it.
+
+        Raises:
+            Exception: The error the registry lookup of this reference failed with.
+        """
+        with self._lock:
+            result = self._results.get(reference)
+            if result is not None:
+                self.hits += 1
+        if result is None:
+            result = self._lookup(reference)
+        server_info, error = result
+        if error is not None:
+            raise error
+        return server_info
+
+    def resolve_many(self, references: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Resolve references concurrently, each unresolved one once.
+
+        Args:
+            references (Iterable[str]): Server references.
+
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: Server metadata by reference; None
+            if the registry does not have it or the lookup failed.
+        """
+        references = list(dict.fromkeys(references))
+        with self._lock:
+            pending = [reference for reference in references if reference not in self._results]
+            self.hits += len(references) - len(pending)
+        if len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_LOOKUPS, len(pending))) as executor:
+                list(executor.map(self._lookup, pending))
+        elif pending:
+            self._lookup(pending[0])
+        with self._lock:
+            return {reference: self._results[reference][0] for reference in references}
+
+    def _lookup(self, reference: str) -> Tuple[Optional[Dict[str, Any]], Optional[Exception]]:
+        """Look a reference up in the registry and remember the outcome."""
+        try:
+            result = (self.registry_client.find_server_by_reference(reference), None)
+        except Exception as e:
+            result = (None, e)
+        with self._lock:
+            self.misses += 1
+            # A concurrent lookup of the same reference keeps the first answer
+            return self._results.setdefault(reference, result)
@@ -0,0 +1,418 @@
+"""Gitignore-aware project walker shared by compilation and primitive discovery.
+
+One ``ProjectWalker`` is created per command invocation. Its first walk lists
+every directory once with ``os.scandir`` and is memoized, so primitive
+discovery, the context optimizer's file index and the orphaned AGENTS.md
+search all read the same listings.
+
+Directories are pruned before they are descended into when they are hidden,
+are virtualenvs, or are ignored by the exclude rules. Exclude rules use
+gitignore syntax and are read, in increasing order of precedence, from the
+default excludes, ``compilation.exclude`` in apm.yml, and the ``.gitignore``
+and ``.apmignore`` files found during the walk. Like git, rules in deeper
+ignore files and later lines take precedence, and ``!pattern`` re-includes.
+"""
+
+import fnmatch
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Directories skipped by default (gitignore-style, so ``!build/`` in an
+# ignore file re-includes one)
+DEFAULT_EXCLUDED_NAMES: Tuple[str, ...] = (
+    'node_modules', '__pycache__', '.git', 'dist', 'build', 'apm_modules'
+)
+
+# Ignore files honored in every walked directory, lowest precedence first
+IGNORE_FILE_NAMES: Tuple[str, ...] = ('.gitignore', '.apmignore')
+
+# A directory containing this file is a Python virtualenv
+VIRTUALENV_MARKER = 'pyvenv.cfg'
+
+
+@dataclass
+class DirectoryListing:
+    """Raw, unfiltered listing of one directory."""
+    files: List[str]
+    directories: List[str]  # Includes symlinked directories
+    symlinks: List[str] = field(default_factory=list)  # Symlinked directories (never descended into)
+
+
+@dataclass
+class IgnoreRule:
+    """A single compiled gitignore-style rule."""
+    regex: 're.Pattern[str]'
+    negated: bool = False
+    directory_only: bool = False
+    anchored: bool = False  # Matches the path relative to the rule's base, not just the name
+
+
+# Rules of one ignore source: (base directory relative to the walk root, rules)
+RuleGroup = Tuple[str, List[IgnoreRule]]
+
+# Callback returning a previously recorded listing for (directory, mtime_ns), if still valid
+ListingReuse = Callable[[Path, int], Optional[DirectoryListing]]
+
+
+@dataclass
+class WalkedDirectory:
+    """A directory visited by the walker, with its filtered contents."""
+    path: Path
+    relative_path: str  # POSIX-style path relative to the walk root ('' for root)
+    depth: int
+    mtime_ns: int  # Directory mtime observed before it was listed
+    listing: DirectoryListing
+    files: List[str] = field(default_factory=list)  # Sorted non-hidden, non-ignored file names
+    directories: List[str] = field(default_factory=list)  # Sorted non-hidden, non-ignored subdirectories
+    hidden_directories: List[str] = field(default_factory=list)  # Sorted hidden subdirectories (not walked)
+    entries: Dict[str, os.DirEntry] = field(default_factory=dict)  # File name -> entry (fresh listings only)
+    reused: bool = False  # True if the listing came from the reuse callback
+    rules: Tuple[RuleGroup, ...] = ()
+
+    def relative_file_path(self, name: str) -> str:
+        """Get the POSIX-style path of an entry relative to the walk root."""
+        return f"{self.relative_path}/{name}" if self.relative_path else name
+
+    def is_file(self, name: str) -> bool:
+        """Check whether an entry is a regular file, using the cached scandir type when available."""
+        entry = self.entries.get(name)
+        try:
+            return entry.is_file() if entry is not None else os.path.isfile(self.path / name)
+        except OSError:
+            return False
+
+
+class ProjectWalker:
+    """Memoized, pruned walk of a project tree."""
+
+    def __init__(
+        self,
+        base_dir: Path,
+        exclude: Iterable[str] = (),
+        excluded_names: Tuple[str, ...] = DEFAULT_EXCLUDED_NAMES
+    ):
+        """Create a walker; nothing is read until the first walk.
+
+        Args:
+            base_dir (Path): Root directory to walk.
+            exclude (Iterable[str]): Additional gitignore-style patterns relative to the root.
+            excluded_names (Tuple[str, ...]): Directory names skipped by default.
+        """
+        try:
+            self.base_dir = Path(base_dir).resolve()
+        except (OSError, FileNotFoundError):
+            self.base_dir = Path(base_dir).absolute()
+
+        self._root_rules: Tuple[RuleGroup, ...] = (
+            ('', [rule for name in excluded_names for rule in parse_ignore_lines([f"{name}/"])]),
+            ('', parse_ignore_lines(exclude)),
+        )
+        # Default reuse callback for the first walk (set by the compile cache)
+        self.reuse: Optional[ListingReuse] = None
+        self._directories: Optional[List[WalkedDirectory]] = None
+        self._file_listings: Dict[Path, List[os.DirEntry]] = {}
+        # Ignore files read during the walk, relative to the root
+        self.ignore_files: List[str] = []
+
+    @classmethod
+    def for_project(cls, base_dir: Path) -> 'ProjectWalker':
+        """Create a walker honoring ``compilation.exclude`` from the project's apm.yml.
+
+        Args:
+            base_dir (Path): Project root.
+
+        Returns:
+            ProjectWalker: Walker for the project.
+        """
+        return cls(base_dir, exclude=load_exclude_patterns(Path(base_dir)))
+
+    @property
+    def walked(self) -> bool:
+        """True once the tree has been walked."""
+        return self._directories is not None
+
+    def walk(self, reuse: Optional[ListingReuse] = None) -> Iterator[WalkedDirectory]:
+        """Iterate over the walked directories top-down, children in sorted order.
+
+        The first call walks the tree; later calls replay the same result.
+
+        Args:
+            reuse (Optional[ListingReuse]): Only used by the first walk, instead of
+                ``self.reuse``; returns a recorded listing to use instead of
+                listing a directory again.
+
+        Returns:
+            Iterator[WalkedDirectory]: Directories in pre-order.
+        """
+        if self._directories is None:
+            self._directories = self._walk(reuse if reuse is not None else self.reuse)
+        return iter(self._directories)
+
+    def list_files(self, walked: WalkedDirectory, subdirectory: str) -> List[Tuple[str, os.DirEntry]]:
+        """List the non-hidden, non-ignored files of a directory below a walked one.
+
+        Used to look into hidden directories the walk does not descend into
+        (e.g. ``.apm/instructions``). Listings are memoized.
+
+        Args:
+            walked (WalkedDirectory): Walked ancestor, whose ignore rules apply.
+            subdirectory (str): POSIX-style path below ``walked``.
+
+        Returns:
+            List[Tuple[str, os.DirEntry]]: Sorted (name, entry) pairs of files.
+        """
+        path = walked.path / subdirectory
+        entries = self._file_listings.get(path)
+        if entries is None:
+            try:
+                with os.scandir(path) as iterator:
+                    entries = sorted(
+                        (entry for entry in iterator if not _is_directory(entry)),
+                        key=lambda entry: entry.name
+                    )
+            except OSError:
+                entries = []
+            self._file_listings[path] = entries
+
+        prefix = walked.relative_file_path(subdirectory)
+        return [
+            (entry.name, entry) for entry in entries
+            if not entry.name.startswith('.')
+            and not is_ignored(walked.rules, f"{prefix}/{entry.name}", False)
+        ]
+
+    def _walk(self, reuse: Optional[ListingReuse]) -> List[WalkedDirectory]:
+        """Walk the tree, pruning excluded directories at descent time.
+
+        Each directory is stat'ed before it is listed so a change made while
+        listing always shows up as a newer mtime on the next walk.
+        """
+        walked_directories: List[WalkedDirectory] = []
+        stack: List[Tuple[Path, Optional[WalkedDirectory]]] = [(self.base_dir, None)]
+        while stack:
+            path, parent = stack.pop()
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+
+            listing = reuse(path, mtime_ns) if reuse is not None else None
+            entries: Dict[str, os.DirEntry] = {}
+            reused = listing is not None
+            if listing is None:
+                listing = _list_directory(path, entries)
+                if listing is None:
+                    continue
+
+            if parent is not None and VIRTUALENV_MARKER in listing.files:
+                parent.directories.remove(path.name)
+                continue
+
+            if parent is None:
+                relative_path, depth, rules = '', 0, self._root_rules
+            else:
+                relative_path = parent.relative_file_path(path.name)
+                depth = parent.depth + 1
+                rules = parent.rules
+            rules = rules + self._read_ignore_files(path, relative_path, listing.files)
+
+            walked = WalkedDirectory(
+                path=path,
+                relative_path=relative_path,
+                depth=depth,
+                mtime_ns=mtime_ns,
+                listing=listing,
+                entries=entries,
+                reused=reused,
+                rules=rules
+            )
+            for name in sorted(listing.files):
+                if not name.startswith('.') and not is_ignored(rules, walked.relative_file_path(name), False):
+                    walked.files.append(name)
+            for name in sorted(listing.directories):
+                if name.startswith('.'):
+                    walked.hidden_directories.append(name)
+                elif not is_ignored(rules, walked.relative_file_path(name), True):
+                    walked.directories.append(name)
+            walked_directories.append(walked)
+
+            # Pre-order: push children in reverse so the first child is walked next
+            symlinks = set(listing.symlinks)
+            for name in reversed(walked.directories):
+                if name not in symlinks:
+                    stack.append((path / name, walked))
+
+        return walked_directories
+
+    def _read_ignore_files(self, path: Path, relative_path: str, file_names: List[str]) -> Tuple[RuleGroup, ...]:
+        """Read the ignore files of a directory into rule groups."""
+        groups = []
+        for name in IGNORE_FILE_NAMES:
+            if name not in file_names:
+                continue
+            try:
+                with open(path / name, 'r', encoding='utf-8', errors='replace') as f:
+                    rules = parse_ignore_lines(f.read().splitlines())
+            except OSError:
+                continue
+            self.ignore_files.append(f"{relative_path}/{name}" if relative_path else name)
+            if rules:
+                groups.append((relative_path, rules))
+        return tuple(groups)
+
+
+def _is_directory(entry: os.DirEntry) -> bool:
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _list_directory(path: Path, entries: Dict[str, os.DirEntry]) -> Optional[DirectoryListing]:
+    """List a directory, collecting file entries into ``entries``; None if it cannot be read."""
+    listing = DirectoryListing(files=[], directories=[])
+    try:
+        with os.scandir(path) as iterator:
+            for entry in iterator:
+                if not _is_directory(entry):
+                    listing.files.append(entry.name)
+                    entries[entry.name] = entry
+                    continue
+                listing.directories.append(entry.name)
+                # Like os.walk without followlinks: list symlinked
+                # directories but do not descend into them
+                if entry.is_symlink():
+                    listing.symlinks.append(entry.name)
+    except OSError:
+        return None
+    return listing
+
+
+def load_exclude_patterns(base_dir: Path) -> List[str]:
+    """Read ``compilation.exclude`` from a project's apm.yml.
+
+    Args:
+        base_dir (Path): Project root.
+
+    Returns:
+        List[str]: Exclude patterns (empty if apm.yml is missing or has none).
+    """
+    apm_yml = Path(base_dir) / 'apm.yml'
+    try:
+        import yaml
+        with open(apm_yml, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+        exclude = (config.get('compilation') or {}).get('exclude') or []
+    except Exception:
+        return []
+    if isinstance(exclude, str):
+        exclude = [exclude]
+    return [str(pattern) for pattern in exclude if isinstance(pattern, (str, int, float))]
+
+
+def parse_ignore_lines(lines: Iterable[str]) -> List[IgnoreRule]:
+    """Compile gitignore-style lines into rules.
+
+    Args:
+        lines (Iterable[str]): Lines of an ignore file or exclude patterns.
+
+    Returns:
+        List[IgnoreRule]: Compiled rules in file order.
+    """
+    rules = []
+    for line in lines:
+        pattern = line.rstrip('\n').rstrip()
+        if not pattern or pattern.startswith('#'):
+            continue
+
+        negated = pattern.startswith('!')
+        if negated:
+            pattern = pattern[1:]
+        elif pattern.startswith('\\'):
+            pattern = pattern[1:]  # '\#' and '\!' escape a leading literal
+
+        directory_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        anchored = '/' in pattern
+        pattern = pattern.lstrip('/')
+        if not pattern:
+            continue
+
+        rules.append(IgnoreRule(
+            regex=re.compile(_translate(pattern), re.DOTALL),
+            negated=negated,
+            directory_only=directory_only,
+            anchored=anchored
+        ))
+    return rules
+
+
+def is_ignored(groups: Tuple[RuleGroup, ...], relative_path: str, is_dir: bool) -> bool:
+    """Check a root-relative path against rule groups, last matching rule wins.
+
+    Args:
+        groups (Tuple[RuleGroup, ...]): Rule groups, lowest precedence first.
+        relative_path (str): POSIX-style path relative to the walk root.
+        is_dir (bool): Whether the path is a directory.
+
+    Returns:
+        bool: True if the path is excluded.
+    """
+    name = relative_path[relative_path.rfind('/') + 1:]
+    for base, rules in reversed(groups):
+        if base and not relative_path.startswith(f"{base}/"):
+            continue
+        target = relative_path[len(base) + 1:] if base else relative_path
+        for rule in reversed(rules):
+            if rule.directory_only and not is_dir:
+                continue
+            if rule.regex.fullmatch(target if rule.anchored else name):
+                return not rule.negated
+    return False
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression body."""
+    output = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == '*':
+            j = i
+            while j < n and pattern[j] == '*':
+                j += 1
+            whole_segment = (i == 0 or pattern[i - 1] == '/') and (j == n or pattern[j] == '/')
+            if j - i >= 2 and whole_segment:
+                if j == n:
+                    output.append('.*')  # trailing '**': everything below
+                else:
+                    output.append('(?:[^/]*/)*')  # zero or more directories
+                    j += 1
+            else:
+                output.append('[^/]*')
+            i = j
+        elif char == '?':
+            output.append('[^/]')
+            i += 1
+        elif char == '[':
+            start = i + 2 if pattern[i + 1:i + 2] in ('!', '^') else i + 1
+            end = pattern.find(']', start + 1)  # A leading ']' is part of the class
+            if end == -1:
+                output.append(re.escape(char))
+                i += 1
+                continue
+            # fnmatch handles '!' negation and escaping inside classes
+            output.append(fnmatch.translate(pattern[i:end + 1])[4:-3])
+            i = end + 1
+        elif char == '\\' and i + 1 < n:
+            output.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            output.append(re.escape(char))
+            i += 1
+    return ''.join(output)
@@ -0,0 +1,62 @@
+"""Benchmark for downloading packages as archives instead of with git.
+
+Publishes 20 packages and downloads each at its locked commit, once with git
+(``APM_DOWNLOAD_BACKEND=git``) and once as a tarball streamed from a local
+stand-in for codeload (``tests/utils/local_archive.py``). Both servers wait
+the same fixed delay per new connection, standing in for network
+round-trips: git opens a connection per fetch, while the archive downloader
+keeps one pooled connection for every package.
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from apm_cli.deps.archive_downloader import ArchiveDownloader
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+from apm_cli.deps.package_store import PackageStore
+
+from ..utils.local_archive import LocalArchiveServer
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+pytestmark = pytest.mark.benchmark
+
+PACKAGE_COUNT = 20
+LATENCY = 0.05
+
+
+def test_archive_download_is_faster_than_git():
+    """Downloading 20 locked packages as archives beats fetching them with git."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        host = LocalGitHost(root / "host")
+        repos = [f"org/pkg{index}" for index in range(PACKAGE_COUNT)]
+        for repo in repos:
+            host.add_package(repo, {f".apm/instructions/rule{n}.instructions.md": f"---\napplyTo: '**'\n---\nRule {n}.\n"
+                                    for n in range(10)})
+        commits = {repo: host.head(repo) for repo in repos}
+
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment(latency=LATENCY))
+        timings = {}
+        with patch.dict(os.environ, env, clear=True), LocalArchiveServer(host, latency=LATENCY) as server:
+            for backend in ("git", "archive"):
+                downloader = GitHubPackageDownloader(
+                    store=PackageStore(root / f"store-{backend}"), backend=backend,
+                    archive=ArchiveDownloader(archive_url=server.archive_url))
+                start = time.perf_counter()
+                for repo in repos:
+                    downloader.download_package(repo, root / backend / repo, locked_commit=commits[repo])
+                timings[backend] = time.perf_counter() - start
+
+        for repo in repos:
+            assert (root / "git" / repo / "apm.yml").read_bytes() == (root / "archive" / repo / "apm.yml").read_bytes()
+        assert server.requests == PACKAGE_COUNT
+        print(f"\n{PACKAGE_COUNT} packages: git {timings['git'] * 1000:.0f}ms, "
+              f"archive {timings['archive'] * 1000:.0f}ms ({timings['git'] / timings['archive']:.1f}x faster), "
+              f"{server.connections} HTTP connection(s)")
+        assert timings["archive"] < timings["git"] / 2
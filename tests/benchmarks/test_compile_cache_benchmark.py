@@ -0,0 +1,99 @@
+"""Benchmark for incremental compilation with the compile cache.
+
+Compiles a deep synthetic project cold (empty cache) and warm after editing a
+single instruction, and checks that the warm compile re-solves only that
+instruction, rewrites only the AGENTS.md files it affects, and produces the
+same output as a compile without the cache.
+"""
+
+import contextlib
+import io
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from apm_cli.compilation.agents_compiler import AgentsCompiler, CompilationConfig
+
+from .test_match_matrix_benchmark import _build_project, _instructions
+
+pytestmark = pytest.mark.benchmark
+
+# Fixed so that backdating again leaves already backdated entries unchanged
+_OLD = time.time() - 3600
+
+
+def _backdate(root: Path) -> None:
+    for directory, _, files in os.walk(root):
+        for name in files:
+            os.utime(os.path.join(directory, name), (_OLD, _OLD))
+        os.utime(directory, (_OLD, _OLD))
+
+
+def _compile(root: Path, use_cache: bool = True):
+    compiler = AgentsCompiler(str(root))
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = compiler.compile(CompilationConfig(local_only=True, use_cache=use_cache))
+    elapsed = time.perf_counter() - start
+    assert result.success, result.errors
+    return compiler._compile_cache, result, elapsed
+
+
+def _agents_files(root: Path):
+    return {
+        path.relative_to(root).as_posix(): path.read_text()
+        for path in sorted(root.rglob("AGENTS.md"))
+    }
+
+
+def test_warm_compile_after_single_edit():
+    """A warm compile reparses one edited instruction and rewrites only the files holding it."""
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve() / "project"
+        root.mkdir()
+        _build_project(root, package_count=40, package_size=60, rng=rng)
+        instructions = _instructions(root, package_count=40, rng=rng)
+        (root / "apm.yml").write_text("name: benchmark\nversion: 1.0.0\n")
+        instructions[0].file_path.parent.mkdir(parents=True)
+        for instruction in instructions:
+            instruction.file_path.write_text(
+                f"---\ndescription: {instruction.description}\napplyTo: \"{instruction.apply_to}\"\n---\n"
+                f"{instruction.content}\n"
+            )
+        _backdate(root)
+
+        cold_cache, _, cold_time = _compile(root)
+        before = _agents_files(root)
+        _backdate(root)
+
+        edited = instructions[5]  # Package-scoped pattern
+        edited.file_path.write_text(edited.file_path.read_text().replace("Follow", "Always follow"))
+        warm_cache, warm_result, warm_time = _compile(root)
+        after = _agents_files(root)
+
+        rewritten = sorted(path for path in after if after[path] != before.get(path))
+        print(f"\n{len(instructions)} instructions, {len(after)} AGENTS.md files: "
+              f"cold {cold_time * 1000:.0f}ms, warm after one edit {warm_time * 1000:.0f}ms, "
+              f"{len(rewritten)} rewritten")
+
+        assert cold_cache.stats["placements_solved"] == len(instructions)
+        assert warm_cache.stats["primitives_parsed"] == 1
+        assert warm_cache.stats["primitives_reused"] == len(instructions) - 1
+        # Editing the body leaves the instruction's placement as it was
+        assert warm_cache.stats["placements_solved"] == 0
+        assert warm_cache.stats["placements_reused"] == len(instructions)
+        assert warm_result.stats["agents_files_written"] == len(rewritten)
+        assert warm_result.stats["agents_files_unchanged"] == len(after) - len(rewritten)
+        assert rewritten and all("Always follow" in after[path] for path in rewritten)
+
+        # Identical to compiling the edited project without the cache
+        reference = Path(temp_dir).resolve() / "reference"
+        shutil.copytree(root, reference, ignore=shutil.ignore_patterns("cache", "AGENTS.md"))
+        _compile(reference, use_cache=False)
+        assert _agents_files(reference) == after
@@ -0,0 +1,64 @@
+"""Benchmark for `apm deps update` when nothing changed.
+
+Installs 30 packages from local bare repositories with a fixed delay per git
+connection (see ``tests/utils/local_git.py``), then updates them: every
+package is still at its locked commit, so the update should cost one
+``ls-remote`` per package instead of downloading each package again.
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from apm_cli.cli import cli
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+pytestmark = pytest.mark.benchmark
+
+PACKAGE_COUNT = 30
+LATENCY = 0.1
+
+
+def test_update_of_unchanged_packages_costs_one_ls_remote_each(monkeypatch):
+    """Updating 30 unchanged packages takes about as long as resolving their branches."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        host = LocalGitHost(root / "host")
+        repos = [f"org/pkg{index}" for index in range(PACKAGE_COUNT)]
+        for repo in repos:
+            host.add_package(repo, {f".apm/instructions/rule{n}.instructions.md": f"---\napplyTo: '**'\n---\nRule {n}.\n"
+                                    for n in range(10)})
+        project = root / "project"
+        project.mkdir()
+        (project / "apm.yml").write_text("name: app\nversion: 1.0.0\ndependencies:\n  apm:\n" +
+                                         "".join(f"    - {repo}#main\n" for repo in repos))
+        monkeypatch.chdir(project)
+
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment(latency=LATENCY))
+        with patch.dict(os.environ, env, clear=True):
+            result = CliRunner().invoke(cli, ["install", "--only", "apm"])
+            assert result.exit_code == 0, result.output
+
+            downloader = GitHubPackageDownloader()
+            start = time.perf_counter()
+            for repo in repos:
+                downloader.resolve_git_reference(f"{repo}#main")
+            ls_remote = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = CliRunner().invoke(cli, ["deps", "update"])
+            update = time.perf_counter() - start
+
+        assert result.exit_code == 0, result.output
+        assert f"{PACKAGE_COUNT} already up to date" in result.output
+        print(f"\n{PACKAGE_COUNT} unchanged packages: deps update {update * 1000:.0f}ms, "
+              f"{PACKAGE_COUNT} ls-remotes {ls_remote * 1000:.0f}ms ({update / ls_remote:.2f}x)")
+        assert update < 1.5 * ls_remote
@@ -0,0 +1,75 @@
+"""Benchmark for downloading one package: ls-remote + single-commit fetch.
+
+Downloads a package with a few megabytes of content from a local bare
+repository (see ``tests/utils/local_git.py``) and compares it with the two
+shallow clones the downloader used to make (one to resolve the branch, one to
+install it): the pack should be transferred once, roughly halving the time.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from git import Repo
+
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+from apm_cli.deps.package_store import PackageStore
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+pytestmark = pytest.mark.benchmark
+
+FILE_COUNT = 40
+FILE_SIZE = 100_000
+ROUNDS = 3
+
+
+def _content(rng: random.Random) -> str:
+    # Hex text compresses about 2:1, like real prose and code
+    return "".join(f"{rng.getrandbits(256):064x}\n" for _ in range(FILE_SIZE // 65))
+
+
+def test_download_transfers_the_package_once():
+    """A download is much cheaper than the previous resolve clone + install clone."""
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        host = LocalGitHost(root / "host")
+        host.add_package("acme/big", {f".apm/context/file{i}.context.md": _content(rng) for i in range(FILE_COUNT)})
+        for commit in range(3):
+            host.commit("acme/big", {f".apm/context/file{commit}.context.md": _content(rng)})
+
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment())
+        with patch.dict(os.environ, env, clear=True):
+            downloader = GitHubPackageDownloader()
+            url = "https://github.com/acme/big"
+
+            two_clones = float("inf")
+            download = float("inf")
+            for round_index in range(ROUNDS):
+                start = time.perf_counter()
+                for clone_index in range(2):
+                    target = root / f"clone-{round_index}-{clone_index}"
+                    Repo.clone_from(url, target, env=downloader.git_env, depth=1, branch="main")
+                    shutil.rmtree(target / ".git")
+                two_clones = min(two_clones, time.perf_counter() - start)
+
+                target = root / f"download-{round_index}"
+                # An empty store each round, so every round downloads
+                downloader.store = PackageStore(root / f"store-{round_index}")
+                start = time.perf_counter()
+                result = downloader.download_package("acme/big", target)
+                download = min(download, time.perf_counter() - start)
+
+        assert result.resolved_reference.resolved_commit == host.head("acme/big")
+        assert sorted(path.name for path in (target / ".apm" / "context").iterdir()) == \
+            sorted(path.name for path in (root / "clone-0-0" / ".apm" / "context").iterdir())
+        print(f"\ntwo shallow clones {two_clones * 1000:.0f}ms, ls-remote + fetch {download * 1000:.0f}ms "
+              f"({download / two_clones:.2f}x)")
+        assert download < 0.75 * two_clones
@@ -0,0 +1,70 @@
+"""Benchmark for bulk applyTo pattern matching.
+
+Matches 100k synthetic project paths against 500 applyTo patterns and checks
+the bulk results against the single-path matcher on a sample of patterns.
+"""
+
+import random
+import time
+
+import pytest
+
+from apm_cli.compilation.glob_matcher import GlobMatcher, compile_pattern
+
+pytestmark = pytest.mark.benchmark
+
+TOP_DIRS = [f"pkg{i}" for i in range(100)]
+SUB_DIRS = ["src", "lib", "tests", "docs", "components", "utils"]
+EXTENSIONS = ["py", "ts", "tsx", "js", "md", "css", "json", "go", "rs", "java", "yml", "txt"]
+
+
+def _generate_paths(count: int, rng: random.Random):
+    paths = []
+    for i in range(count):
+        depth = rng.randint(0, 4)
+        parts = [rng.choice(TOP_DIRS)] if depth else []
+        parts += [rng.choice(SUB_DIRS) for _ in range(max(0, depth - 1))]
+        parts.append(f"file{i}.{rng.choice(EXTENSIONS)}")
+        paths.append("/".join(parts))
+    return paths
+
+
+def _generate_patterns(count: int, rng: random.Random):
+    patterns = set()
+    while len(patterns) < count:
+        roll = rng.random()
+        ext, other = rng.choice(EXTENSIONS), rng.choice(EXTENSIONS)
+        exts = f"{{{ext},{other}}}" if ext != other else ext
+        if roll < 0.1:
+            patterns.add(f"**/*.{exts}")
+        elif roll < 0.7:
+            patterns.add(f"{rng.choice(TOP_DIRS)}/**/*.{ext}")
+        elif roll < 0.85:
+            patterns.add(f"{rng.choice(TOP_DIRS)}/{rng.choice(SUB_DIRS)}/**/*.{exts}")
+        elif roll < 0.95:
+            patterns.add(f"**/{rng.choice(SUB_DIRS)}/*.{ext}")
+        else:
+            patterns.add(f"**/file{rng.randint(0, 9)}*.{ext}")
+    return sorted(patterns)
+
+
+def test_bulk_matching_100k_paths_500_patterns():
+    """Bulk matching stays well under a second and agrees with single-path matching."""
+    rng = random.Random(0)
+    paths = _generate_paths(100_000, rng)
+    patterns = _generate_patterns(500, rng)
+
+    start = time.perf_counter()
+    results = GlobMatcher(patterns).match_paths(paths)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n100k paths x 500 patterns: {elapsed * 1000:.0f}ms "
+          f"({sum(len(v) for v in results.values())} matches)")
+
+    for pattern in patterns[::25]:
+        compiled = compile_pattern(pattern)
+        expected = [path for path in paths if compiled.match(path)]
+        assert sorted(results[pattern]) == sorted(expected), pattern
+
+    # Generous bound so the benchmark stays stable on slow CI machines
+    assert elapsed < 3.0
@@ -0,0 +1,73 @@
+"""Benchmark for checking installed packages against their integrity manifests.
+
+Installs 50 packages of 20 files each from local bare repositories, then
+times what a no-op ``apm install`` spends deciding nothing needs
+downloading: one manifest read and one stat per file with the default
+check, plus hashing every file with ``--verify``.
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from apm_cli.cli import cli
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+from apm_cli.deps.integrity import check_installed_package
+from apm_cli.deps.lockfile import LOCKFILE_NAME, Lockfile
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+pytestmark = pytest.mark.benchmark
+
+PACKAGE_COUNT = 50
+FILE_COUNT = 20
+
+
+def _check_all(project: Path, lockfile: Lockfile, deep: bool) -> float:
+    start = time.perf_counter()
+    for repo_url, locked in lockfile.dependencies.items():
+        _, problem = check_installed_package(project / "apm_modules" / repo_url, locked.resolved_commit, deep=deep)
+        assert problem is None, problem
+    return time.perf_counter() - start
+
+
+def test_verifying_installed_packages(monkeypatch):
+    """Checking 50 installed packages takes under 100 ms."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        host = LocalGitHost(root / "host")
+        repos = [f"org/pkg{index}" for index in range(PACKAGE_COUNT)]
+        for repo in repos:
+            host.add_package(repo, {f".apm/instructions/rule{n}.instructions.md": f"---\napplyTo: '**'\n---\n{'Rule. ' * 200}\n"
+                                    for n in range(FILE_COUNT)})
+        project = root / "project"
+        project.mkdir()
+        (project / "apm.yml").write_text("name: app\nversion: 1.0.0\ndependencies:\n  apm:\n" +
+                                         "".join(f"    - {repo}\n" for repo in repos))
+        monkeypatch.chdir(project)
+
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment())
+        with patch.dict(os.environ, env, clear=True):
+            result = CliRunner().invoke(cli, ["install", "--only", "apm"])
+            assert result.exit_code == 0, result.output
+
+            lockfile = Lockfile.load(project / LOCKFILE_NAME)
+            stat_check = min(_check_all(project, lockfile, deep=False) for _ in range(5))
+            deep_check = min(_check_all(project, lockfile, deep=True) for _ in range(5))
+
+            with patch.object(GitHubPackageDownloader, "download_package") as download:
+                start = time.perf_counter()
+                result = CliRunner().invoke(cli, ["install", "--only", "apm"])
+                no_op = time.perf_counter() - start
+                download.assert_not_called()
+            assert result.exit_code == 0, result.output
+
+        print(f"\n{PACKAGE_COUNT} packages x {FILE_COUNT + 1} files: stat check {stat_check * 1000:.1f}ms, "
+              f"--verify {deep_check * 1000:.1f}ms, no-op apm install {no_op * 1000:.0f}ms")
+        assert stat_check < 0.1
@@ -0,0 +1,52 @@
+"""Benchmark for on-demand loading of primitive bodies.
+
+Discovers and validates a project whose instruction files add up to far more
+than the body cache, and checks that peak memory stays bounded by the body
+cache instead of growing with the total size of the instructions.
+"""
+
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from apm_cli.compilation.agents_compiler import AgentsCompiler
+from apm_cli.primitives.content import BODY_CACHE_SIZE, clear_body_cache
+from apm_cli.primitives.discovery import discover_primitives
+
+pytestmark = pytest.mark.benchmark
+
+FILE_COUNT = 300
+BODY_SIZE = 256 * 1024
+
+
+def test_peak_memory_does_not_grow_with_instruction_size():
+    """Discovery plus validation of 75MB of instructions peaks well below their size."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        instructions = root / ".apm" / "instructions"
+        instructions.mkdir(parents=True)
+        line = "- Prefer explicit, well-named helpers over clever one-liners.\n"
+        body = line * (BODY_SIZE // len(line))
+        for i in range(FILE_COUNT):
+            (instructions / f"rules{i}.instructions.md").write_text(
+                f"---\ndescription: Rules {i}\napplyTo: \"src/pkg{i}/**\"\n---\n{body}"
+            )
+        clear_body_cache()
+
+        tracemalloc.start()
+        try:
+            primitives = discover_primitives(str(root))
+            errors = AgentsCompiler(str(root)).validate_primitives(primitives)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            clear_body_cache()
+
+        total = FILE_COUNT * BODY_SIZE
+        print(f"\n{total / 2**20:.0f}MB of instructions, peak {peak / 2**20:.1f}MB")
+        assert errors == []
+        assert len(primitives.instructions) == FILE_COUNT
+        # The body cache plus a few files being parsed at once
+        assert peak < BODY_CACHE_SIZE + 16 * BODY_SIZE * 4
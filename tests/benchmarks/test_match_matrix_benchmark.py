@@ -0,0 +1,205 @@
+"""Benchmark for bitset-based instruction placement.
+
+Builds a deep synthetic project, places a set of instructions with the
+bitset match matrix and with a reference optimizer that uses the previous
+nested-loop, path-based scoring, and checks that both produce identical
+placements and optimization decisions.
+"""
+
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Set
+
+import pytest
+
+from apm_cli.compilation.context_optimizer import ContextOptimizer, PlacementCandidate
+from apm_cli.primitives.models import Instruction
+
+pytestmark = pytest.mark.benchmark
+
+DIR_NAMES = ["src", "lib", "app", "core", "api", "components", "utils", "tests", "docs", "models"]
+EXTENSIONS = [".py", ".ts", ".tsx", ".md", ".css", ".json", ".go", ".yml"]
+
+
+class ReferenceContextOptimizer(ContextOptimizer):
+    """Optimizer with the path-based scoring used before the match matrix."""
+
+    def _calculate_inheritance_pollution(self, directory: Path, pattern: str) -> float:
+        pollution_score = 0.0
+        node = self._get_file_index().get(directory)
+        if node is None:
+            return pollution_score
+        for child_dir in [child for child in node.children if child in self._directory_cache]:
+            child_relevance = self._directory_cache[child_dir].get_relevance_score(pattern)
+            if child_relevance == 0.0:
+                pollution_score += 0.5
+            elif child_relevance < 0.1:
+                pollution_score += 0.2
+        return pollution_score
+
+    def _calculate_distribution_score(self, matching_directories: Set[Path]) -> float:
+        total_dirs_with_files = len([d for d in self._directory_cache.values() if d.total_files > 0])
+        if total_dirs_with_files == 0:
+            return 0.0
+        base_ratio = len(matching_directories) / total_dirs_with_files
+        depths = [self._directory_cache[d].depth for d in matching_directories]
+        if not depths:
+            return base_ratio
+        depth_variance = sum((d - sum(depths) / len(depths)) ** 2 for d in depths) / len(depths)
+        return base_ratio * (1.0 + (depth_variance * self.DIVERSITY_FACTOR_BASE))
+
+    def _calculate_hierarchical_coverage(self, placements: List[Path], target_directories: Set[Path]) -> Set[Path]:
+        covered = set()
+        for target in target_directories:
+            for placement in placements:
+                if self._is_hierarchically_covered(target, placement):
+                    covered.add(target)
+                    break
+        return covered
+
+    def _optimize_single_point_placement(self, matching_directories, instruction, verbose=False):
+        candidates = self._generate_all_candidates(matching_directories, instruction)
+        if not candidates:
+            return [self.base_dir]
+        coverage_candidates = [
+            candidate for candidate in candidates
+            if self._calculate_hierarchical_coverage([candidate.directory], matching_directories) == matching_directories
+        ]
+        if not coverage_candidates:
+            minimal_coverage = self._find_minimal_coverage_placement(matching_directories)
+            return [minimal_coverage] if minimal_coverage else [self.base_dir]
+        best_candidate = max(coverage_candidates, key=lambda c: c.coverage_efficiency - c.pollution_score)
+        return [best_candidate.directory]
+
+    def _generate_all_candidates(self, matching_directories, instruction) -> List[PlacementCandidate]:
+        candidates = []
+        pattern = instruction.apply_to
+        potential_directories = set(matching_directories)
+        if len(matching_directories) > 1:
+            common_ancestor = self._find_minimal_coverage_placement(matching_directories)
+            if common_ancestor:
+                potential_directories.add(common_ancestor)
+            for directory in matching_directories:
+                for intermediate in self._get_inheritance_chain(directory):
+                    if intermediate != directory and intermediate in self._directory_cache:
+                        potential_directories.add(intermediate)
+
+        for directory in sorted(potential_directories):
+            if directory not in self._directory_cache:
+                continue
+            analysis = self._directory_cache[directory]
+            coverage_efficiency = self._calculate_coverage_efficiency(directory, pattern)
+            pollution_score = self._calculate_pollution_minimization(directory, pattern)
+            maintenance_locality = self._calculate_maintenance_locality(directory, pattern)
+            depth_penalty = max(0, (analysis.depth - 3) * self.DEPTH_PENALTY_FACTOR)
+            candidate = PlacementCandidate(
+                instruction=instruction,
+                directory=directory,
+                direct_relevance=coverage_efficiency,
+                inheritance_pollution=pollution_score,
+                depth_specificity=analysis.depth * 0.1,
+                total_score=0.0
+            )
+            candidate.coverage_efficiency = coverage_efficiency
+            candidate.pollution_score = pollution_score
+            candidate.maintenance_locality = maintenance_locality
+            candidate.total_score = (
+                coverage_efficiency * self.COVERAGE_EFFICIENCY_WEIGHT +
+                (1.0 - pollution_score) * self.POLLUTION_MINIMIZATION_WEIGHT +
+                maintenance_locality * self.MAINTENANCE_LOCALITY_WEIGHT -
+                depth_penalty
+            )
+            candidates.append(candidate)
+        return candidates
+
+
+def _build_project(root: Path, package_count: int, package_size: int, rng: random.Random) -> None:
+    # Deep per-package subtrees with one dominant language each, so that
+    # package-scoped patterns exercise single-point and selective placement
+    for package_index in range(package_count):
+        package = root / f"pkg{package_index}"
+        package.mkdir()
+        directories = [package]
+        while len(directories) < package_size:
+            # Bias towards recent directories to produce deep chains
+            parent = directories[-rng.randint(1, min(len(directories), 8))]
+            directory = parent / rng.choice(DIR_NAMES)
+            if directory in directories:
+                continue
+            directory.mkdir()
+            directories.append(directory)
+
+        primary = EXTENSIONS[package_index % len(EXTENSIONS)]
+        for directory in directories:
+            for i in range(rng.randint(1, 4)):
+                extension = primary if rng.random() < 0.8 else rng.choice(EXTENSIONS)
+                (directory / f"file{i}{extension}").write_text("")
+
+    (root / "README.md").write_text("# Project")
+
+
+def _instructions(root: Path, package_count: int, rng: random.Random) -> List[Instruction]:
+    patterns = ["**/*.py", "**/*.{ts,tsx}", "*.md", "**/tests/**", "**/file0.*"]
+    for package_index in range(package_count):
+        extension = EXTENSIONS[package_index % len(EXTENSIONS)]
+        patterns.append(f"pkg{package_index}/**/*{extension}")
+        patterns.append(f"pkg{package_index}/**/{rng.choice(DIR_NAMES)}/**")
+    for _ in range(package_count // 2):
+        first, second = rng.sample(range(package_count), 2)
+        patterns.append(f"{{pkg{first},pkg{second}}}/**/*{rng.choice(EXTENSIONS)}")
+
+    return [
+        Instruction(
+            name=f"instruction-{i}",
+            file_path=root / ".apm" / "instructions" / f"instruction-{i}.instructions.md",
+            description=f"Instruction for {pattern}",
+            apply_to=pattern,
+            content="Follow the standards.",
+        )
+        for i, pattern in enumerate(patterns)
+    ]
+
+
+def _place(optimizer_class, root: Path, instructions: List[Instruction]):
+    optimizer = optimizer_class(str(root))
+    optimizer._analyze_project_structure()
+    start = time.perf_counter()
+    placement_map = optimizer.optimize_instruction_placement(instructions)
+    elapsed = time.perf_counter() - start
+    placements = {
+        directory: [instruction.name for instruction in placed]
+        for directory, placed in placement_map.items()
+    }
+    decisions = [
+        (d.pattern, d.strategy, d.matching_directories, tuple(d.placement_directories), d.distribution_score)
+        for d in optimizer._optimization_decisions
+    ]
+    return placements, decisions, elapsed
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_bitset_placements_identical_to_reference(seed):
+    """Bitset scoring produces the same placements as path-based scoring."""
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        _build_project(root, package_count=40, package_size=60, rng=rng)
+        instructions = _instructions(root, package_count=40, rng=rng)
+
+        expected_placements, expected_decisions, reference_time = _place(
+            ReferenceContextOptimizer, root, instructions
+        )
+        placements, decisions, bitset_time = _place(ContextOptimizer, root, instructions)
+
+        strategies = sorted({decision[1].value for decision in decisions})
+        print(f"\n{len(placements)} placements, {len(instructions)} instructions, "
+              f"strategies {strategies} (seed {seed}): "
+              f"reference {reference_time * 1000:.0f}ms, bitset {bitset_time * 1000:.0f}ms")
+
+        assert placements == expected_placements
+        assert len(decisions) == len(expected_decisions)
+        for actual, expected in zip(decisions, expected_decisions):
+            assert actual[:4] == expected[:4]
+            assert actual[4] == pytest.approx(expected[4])
@@ -0,0 +1,62 @@
+"""Benchmark for resolving MCP servers during `apm install`.
+
+Stands in a registry lookup (search plus detail request) with a fixed delay,
+then runs the registry steps of installing 15 servers into 3 runtimes:
+validation, the installation check, the batch fetch and conflict detection
+in every runtime. Before the resolution session each step looked every
+server up again, one at a time: 15 + 15 + 15 + 3 * 15 = 90 sequential
+lookups, replayed here as the baseline.
+"""
+
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from apm_cli.adapters.client.base import MCPClientAdapter
+from apm_cli.core.conflict_detector import MCPConflictDetector
+from apm_cli.registry.operations import MCPServerOperations
+
+pytestmark = pytest.mark.benchmark
+
+SERVER_COUNT = 15
+RUNTIMES = ("copilot", "codex", "vscode")
+LOOKUP_LATENCY = 0.02
+
+
+def _find_server(reference):
+    time.sleep(LOOKUP_LATENCY)
+    return {"id": f"{reference}-uuid", "name": f"io.github.acme/{reference}"}
+
+
+def test_session_resolves_each_server_once():
+    """The registry steps of an install cost one concurrent lookup per server."""
+    servers = [f"server{index}" for index in range(SERVER_COUNT)]
+
+    start = time.perf_counter()
+    for _ in range(3 + len(RUNTIMES)):
+        for server in servers:
+            _find_server(server)
+    before = time.perf_counter() - start
+
+    operations = MCPServerOperations()
+    operations.registry_client.find_server_by_reference = Mock(side_effect=_find_server)
+    start = time.perf_counter()
+    with patch.object(operations, "_get_installed_server_ids", return_value=set()):
+        valid, _ = operations.validate_servers_exist(servers)
+        to_install = operations.check_servers_needing_installation(list(RUNTIMES), valid)
+    operations.batch_fetch_server_info(to_install)
+    for _ in RUNTIMES:
+        adapter = Mock(spec=MCPClientAdapter)
+        adapter.get_current_config.return_value = {}
+        detector = MCPConflictDetector(adapter, operations.session)
+        for server in to_install:
+            detector.check_server_exists(server)
+    after = time.perf_counter() - start
+
+    session = operations.session
+    print(f"\n{SERVER_COUNT} servers x {len(RUNTIMES)} runtimes: {(3 + len(RUNTIMES)) * SERVER_COUNT} sequential "
+          f"lookups {before * 1000:.0f}ms, session {after * 1000:.0f}ms ({before / after:.0f}x faster, "
+          f"{session.misses} lookups, {session.hits} hits)")
+    assert session.misses == SERVER_COUNT
+    assert after < before / 10
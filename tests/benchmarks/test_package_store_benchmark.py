@@ -0,0 +1,69 @@
+"""Benchmark for installing from a warm package store.
+
+Installs packages pinned to commits from local bare repositories with a
+fixed delay per git connection (see ``tests/utils/local_git.py``), deletes
+the repositories, and installs the same packages into a second project: the
+warm install runs no git command and hardlinks every file from the store.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+from apm_cli.deps.installer import InstallTask, get_install_path, install_packages
+from apm_cli.models.apm_package import DependencyReference
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+pytestmark = pytest.mark.benchmark
+
+PACKAGE_COUNT = 10
+LATENCY = 0.1
+
+
+def _install(apm_modules: Path, repo_refs):
+    tasks = []
+    for repo_ref in repo_refs:
+        dep_ref = DependencyReference.parse(repo_ref)
+        tasks.append(InstallTask(dep_ref, get_install_path(apm_modules, dep_ref)))
+    downloader = GitHubPackageDownloader()
+    start = time.perf_counter()
+    results = install_packages(tasks, downloader.download_package, jobs=4)
+    elapsed = time.perf_counter() - start
+    assert all(result.success for result in results), [result.error for result in results]
+    return elapsed
+
+
+def test_warm_store_install():
+    """A second project installs from the store without network, in milliseconds."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        host = LocalGitHost(root / "host")
+        repo_refs = []
+        for index in range(PACKAGE_COUNT):
+            repo = f"org/pkg{index}"
+            host.add_package(repo, {f".apm/instructions/rule{n}.instructions.md": f"---\napplyTo: '**'\n---\nRule {n}.\n"
+                                    for n in range(20)})
+            repo_refs.append(f"{repo}#{host.head(repo)}")
+
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env["APM_STORE_DIR"] = str(root / "store")
+        env.update(host.environment(latency=LATENCY))
+        with patch.dict(os.environ, env, clear=True):
+            cold = _install(root / "cold" / "apm_modules", repo_refs)
+            shutil.rmtree(host.root)
+            with patch("apm_cli.deps.github_downloader.Repo") as mock_repo:
+                warm = _install(root / "warm" / "apm_modules", repo_refs)
+                mock_repo.init.assert_not_called()
+
+        installed = root / "warm" / "apm_modules" / "org" / "pkg0" / ".apm" / "instructions" / "rule0.instructions.md"
+        print(f"\n{PACKAGE_COUNT} packages: cold {cold * 1000:.0f}ms, warm store {warm * 1000:.0f}ms")
+        assert os.stat(installed).st_nlink >= 3  # store + both projects
+        assert warm < 0.5
+        assert warm < cold / 5
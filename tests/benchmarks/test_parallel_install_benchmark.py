@@ -0,0 +1,62 @@
+"""Benchmark for concurrent dependency installation.
+
+Installs packages from local bare repositories (see ``tests/utils/local_git.py``)
+with a fixed delay per git connection standing in for network round-trips,
+once sequentially and once with ``--jobs``, and checks the concurrent install
+is several times faster and installs the same packages.
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+from apm_cli.deps.installer import InstallTask, get_install_path, install_packages
+from apm_cli.models.apm_package import DependencyReference
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+pytestmark = pytest.mark.benchmark
+
+PACKAGE_COUNT = 10
+LATENCY = 0.25
+
+
+def _install(apm_modules: Path, repos, jobs: int):
+    tasks = []
+    for repo in repos:
+        dep_ref = DependencyReference.parse(repo)
+        tasks.append(InstallTask(dep_ref, get_install_path(apm_modules, dep_ref)))
+    downloader = GitHubPackageDownloader()
+    start = time.perf_counter()
+    results = install_packages(tasks, downloader.download_package, jobs=jobs)
+    elapsed = time.perf_counter() - start
+    assert all(result.success for result in results), [result.error for result in results]
+    return elapsed
+
+
+def test_concurrent_install_speedup():
+    """Concurrent downloads overlap their round-trips."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        host = LocalGitHost(root / "host")
+        repos = [f"org{i % 3}/pkg{i}" for i in range(PACKAGE_COUNT)]
+        for repo in repos:
+            host.add_package(repo, {".apm/instructions/a.instructions.md": "---\napplyTo: '**'\n---\nRule.\n"})
+
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment(latency=LATENCY))
+        with patch.dict(os.environ, env, clear=True):
+            sequential = _install(root / "sequential", repos, jobs=1)
+            concurrent = _install(root / "concurrent", repos, jobs=8)
+
+        installed = sorted(path.relative_to(root / "concurrent").as_posix()
+                           for path in (root / "concurrent").glob("*/*"))
+        print(f"\n{PACKAGE_COUNT} packages: sequential {sequential:.2f}s, --jobs 8 {concurrent:.2f}s "
+              f"({sequential / concurrent:.1f}x)")
+        assert installed == sorted(repos)
+        assert sequential / concurrent > 2.5
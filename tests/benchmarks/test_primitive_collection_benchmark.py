@@ -0,0 +1,86 @@
+"""Benchmark for PrimitiveCollection on a large dependency graph.
+
+Adds the primitives of a local project and 40 dependencies (with many name
+clashes) and checks that insertion time grows linearly with the number of
+primitives and that slotted primitive records stay small.
+"""
+
+import dataclasses
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from apm_cli.primitives.models import Instruction, PrimitiveCollection
+
+pytestmark = pytest.mark.benchmark
+
+DEPENDENCY_COUNT = 40
+
+
+def _primitives(count: int):
+    """Build instructions spread over local and dependency sources, a quarter of them clashing."""
+    primitives = []
+    for i in range(count):
+        source = "local" if i % (DEPENDENCY_COUNT + 1) == 0 else f"dependency:org/dep{i % DEPENDENCY_COUNT}"
+        name = f"rules{i % (count * 3 // 4)}"
+        primitives.append(Instruction(
+            name=name,
+            file_path=Path(f"apm_modules/dep/.apm/instructions/{name}.instructions.md"),
+            description="Rules",
+            apply_to="**/*.py",
+            content="",
+            source=source,
+        ))
+    return primitives
+
+
+def _insert(primitives) -> float:
+    collection = PrimitiveCollection()
+    start = time.perf_counter()
+    for primitive in primitives:
+        collection.add_primitive(primitive)
+    for i in range(DEPENDENCY_COUNT):
+        collection.get_primitives_by_source(f"dependency:org/dep{i}")
+    return time.perf_counter() - start
+
+
+def test_insertion_is_linear():
+    """Four times the primitives take about four times as long to add."""
+    small, large = _primitives(5_000), _primitives(20_000)
+    _insert(small)  # Warm up
+
+    small_time = min(_insert(small) for _ in range(3))
+    large_time = min(_insert(large) for _ in range(3))
+
+    print(f"\n5k primitives {small_time * 1000:.1f}ms, 20k primitives {large_time * 1000:.1f}ms")
+    # A linear scan per insertion would make this ratio about 16
+    assert large_time < small_time * 8
+
+
+def _allocated_per_record(record_class, count: int) -> float:
+    """Measure the memory of ``count`` records sharing the same field values."""
+    path = Path(".apm/instructions/rules.instructions.md")
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        records = [record_class("rules", path, "Rules", "**/*.py", "", source="local") for _ in range(count)]
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert len(records) == count
+    return allocated / count
+
+
+def test_primitive_records_are_compact():
+    """Slotted primitives are smaller than dict-backed records with the same fields."""
+    dict_backed = dataclasses.make_dataclass(
+        "DictInstruction", [(f.name, f.type, f) for f in dataclasses.fields(Instruction)]
+    )
+    slotted_size = _allocated_per_record(Instruction, 10_000)
+    dict_size = _allocated_per_record(dict_backed, 10_000)
+
+    print(f"\nslotted {slotted_size:.0f} bytes, dict-backed {dict_size:.0f} bytes per primitive")
+    assert not hasattr(Instruction("a", Path("a"), "", "", ""), "__dict__")
+    assert slotted_size < dict_size * 0.8
@@ -0,0 +1,81 @@
+"""Benchmark for resolving a large transitive dependency graph.
+
+Builds 200 packages in local bare repositories, four levels deep, served
+with a fixed delay per git connection (see ``tests/utils/local_git.py``).
+Every level's apm.yml files are fetched concurrently, so resolving the whole
+graph should cost about four times what resolving a single package does
+given enough cores; on small machines starting ~10 git processes per package
+dominates, so the test only requires a large speedup over fetching the 200
+manifests one after another.
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from apm_cli.deps.apm_resolver import APMDependencyResolver
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+pytestmark = pytest.mark.benchmark
+
+LEVEL_WIDTHS = (8, 24, 64, 104)  # 200 packages
+LATENCY = 0.2
+JOBS = 32
+
+
+def _manifest(name, dependencies):
+    lines = [f"name: {name}", "version: 1.0.0"]
+    if dependencies:
+        lines += ["dependencies:", "  apm:"] + [f"    - {dep}" for dep in dependencies]
+    return "\n".join(lines) + "\n"
+
+
+def _resolve(project: Path):
+    resolver = APMDependencyResolver(downloader=GitHubPackageDownloader(), jobs=JOBS)
+    start = time.perf_counter()
+    graph = resolver.resolve_dependencies(project)
+    elapsed = time.perf_counter() - start
+    assert graph.is_valid()
+    return elapsed, graph
+
+
+def test_resolution_time_follows_depth():
+    """Resolving 200 packages four levels deep fetches each level's manifests concurrently."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        host = LocalGitHost(root / "host")
+        levels = [[f"org/l{depth}p{index}" for index in range(width)] for depth, width in enumerate(LEVEL_WIDTHS)]
+        for depth, repos in enumerate(levels):
+            children = levels[depth + 1] if depth + 1 < len(levels) else []
+            for index, repo in enumerate(repos):
+                # Each package depends on a slice of the next level, overlapping its neighbour's
+                first = index * len(children) // len(repos)
+                deps = children[first:(index + 1) * len(children) // len(repos) + 1]
+                host.add_package(repo, {"apm.yml": _manifest(repo.split("/")[1], deps)})
+
+        single = root / "single"
+        single.mkdir()
+        (single / "apm.yml").write_text(_manifest("single", [levels[-1][0]]))
+        project = root / "project"
+        project.mkdir()
+        (project / "apm.yml").write_text(_manifest("project", levels[0]))
+
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env["APM_STORE_DIR"] = str(root / "store")
+        env.update(host.environment(latency=LATENCY))
+        with patch.dict(os.environ, env, clear=True):
+            one, _ = _resolve(single)
+            full, graph = _resolve(project)
+
+        total = graph.flattened_dependencies.total_dependencies()
+        print(f"\n1 package: {one * 1000:.0f}ms, {total} packages {len(LEVEL_WIDTHS)} levels deep: "
+              f"{full * 1000:.0f}ms ({full / one:.1f}x one package, sequential estimate {total * one * 1000:.0f}ms)")
+        assert total == sum(LEVEL_WIDTHS)
+        assert graph.dependency_tree.max_depth == len(LEVEL_WIDTHS)
+        assert full < total * one / 5
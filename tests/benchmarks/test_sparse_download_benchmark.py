@@ -0,0 +1,70 @@
+"""Benchmark for the bytes a package download transfers.
+
+Publishes a package whose repository also carries documentation and assets
+APM never reads, then downloads the same commit twice from a local bare
+repository: with a plain shallow fetch of the whole commit (as before sparse
+checkouts), and with ``_fetch_commit`` (``--filter=blob:none`` plus a sparse
+checkout of the package files). The size of the packs received, measured
+before the download removes ``.git``, stands in for the bytes on the wire.
+"""
+
+import base64
+import os
+import random
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from git import Repo
+
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+pytestmark = pytest.mark.benchmark
+
+ASSET_COUNT = 20
+ASSET_SIZE = 256 * 1024
+
+
+def _received_bytes(repository: Path) -> int:
+    objects = repository / ".git" / "objects"
+    return sum(path.stat().st_size for path in objects.rglob("*") if path.is_file())
+
+
+def test_sparse_download_transfers_package_files_only():
+    """Only apm.yml, .apm/ and prompts are transferred, not the rest of the repository."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        host = LocalGitHost(root / "host")
+        rng = random.Random(0)
+        files = {f".apm/instructions/rule{n}.instructions.md": f"---\napplyTo: '**'\n---\nRule {n}.\n"
+                 for n in range(10)}
+        files["prompts/review.prompt.md"] = "Review the change.\n"
+        for n in range(ASSET_COUNT):
+            # Incompressible, like images and other binaries checked in next to the package
+            files[f"docs/assets/image{n}.txt"] = base64.b64encode(rng.randbytes(ASSET_SIZE)).decode()
+        host.add_package("org/pkg", files)
+
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment())
+        with patch.dict(os.environ, env, clear=True):
+            downloader = GitHubPackageDownloader()
+            resolved_ref = downloader.resolve_git_reference("org/pkg")
+
+            full = root / "full"
+            repo = Repo.init(full)
+            commit = downloader._fetch_resolved(repo, "org/pkg", resolved_ref)
+            repo.git.checkout("--quiet", "--detach", commit)
+
+            sparse = root / "sparse"
+            downloader._fetch_commit("org/pkg", resolved_ref, sparse)
+
+        before, after = _received_bytes(full), _received_bytes(sparse)
+        print(f"\nbytes transferred: full commit {before:,}, sparse package files {after:,} "
+              f"({before / after:.0f}x less)")
+        assert (sparse / ".apm" / "instructions" / "rule0.instructions.md").is_file()
+        assert (sparse / "prompts" / "review.prompt.md").is_file()
+        assert not (sparse / "docs").exists()
+        assert after < before / 20
@@ -0,0 +1,12 @@
+"""Shared pytest configuration."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_package_store(tmp_path_factory, monkeypatch):
+    """Keep downloads made by tests out of the machine-wide package store and mirrors."""
+    monkeypatch.setenv("APM_STORE_DIR", str(tmp_path_factory.mktemp("apm-store")))
+    monkeypatch.setenv("APM_MIRROR_DIR", str(tmp_path_factory.mktemp("apm-mirrors")))
+    # Packages come from local git repositories; archive tests select the backend explicitly
+    monkeypatch.setenv("APM_DOWNLOAD_BACKEND", "git")
@@ -2,8 +2,10 @@
 
 import os
 import tempfile
+import time
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 # Test imports - using absolute imports since we may not have proper package setup
 import sys
@@ -324,6 +326,45 @@ description: Test {primitive_type} for {name}
         # Source should be the first dependency in declaration order
         self.assertTrue("first" in instruction.source)
 
+    def test_parallel_parsing_keeps_priority_order(self):
+        """Test that parsing on several threads resolves conflicts like a sequential scan."""
+        from apm_cli.primitives import parser
+        
+        dependencies = {"apm": ["first/dep", "second/dep"]}
+        self._create_apm_yml(dependencies)
+        self._create_primitive_file(
+            self.temp_dir_path / ".apm" / "instructions" / "style.instructions.md",
+            "instruction", "style", "Local content"
+        )
+        for dep in ["first", "second"]:
+            for name in ["style", "naming"]:
+                self._create_primitive_file(
+                    self.temp_dir_path / "apm_modules" / dep / "dep" / ".apm" / "instructions" / f"{name}.instructions.md",
+                    "instruction", name, f"{dep.title()} {name} content"
+                )
+        
+        # Make earlier files finish last
+        read_and_parse = parser._read_and_parse
+        def slow_for_first(file_path, source):
+            if source != "dependency:second/dep":
+                time.sleep(0.05)
+            return read_and_parse(file_path, source)
+        
+        with patch.object(parser, "_read_and_parse", side_effect=slow_for_first):
+            collection = discover_primitives_with_dependencies(str(self.temp_dir_path), jobs=4)
+        sequential = discover_primitives_with_dependencies(str(self.temp_dir_path), jobs=1)
+        
+        sources = {instruction.name: instruction.source for instruction in collection.instructions}
+        self.assertEqual(sources, {"style": "local", "naming": "dependency:first/dep"})
+        self.assertEqual(
+            [(i.name, i.source) for i in collection.instructions],
+            [(i.name, i.source) for i in sequential.instructions]
+        )
+        self.assertEqual(
+            [(c.primitive_name, c.winning_source, c.losing_sources) for c in collection.conflicts],
+            [(c.primitive_name, c.winning_source, c.losing_sources) for c in sequential.conflicts]
+        )
+
     def test_scan_directory_with_source(self):
         """Test scanning a specific directory with source tracking."""
         # Create dependency directory with primitives
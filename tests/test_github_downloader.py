@@ -8,6 +8,7 @@ from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 
 from apm_cli.deps.github_downloader import GitHubPackageDownloader
+from tests.utils.local_git import TOKEN_VARIABLES, LocalGitHost
 from apm_cli.models.apm_package import (
     DependencyReference, 
     ResolvedReference,
@@ -62,59 +63,76 @@ class TestGitHubPackageDownloader:
             assert 'GH_TOKEN' not in env or not env['GH_TOKEN']
     
     @patch('apm_cli.deps.github_downloader.Repo')
-    @patch('tempfile.mkdtemp')
-    def test_resolve_git_reference_branch(self, mock_mkdtemp, mock_repo_class):
-        """Test resolving a branch reference."""
-        # Setup mocks
-        mock_temp_dir = '/tmp/test'
-        mock_mkdtemp.return_value = mock_temp_dir
+    @patch('apm_cli.deps.github_downloader.git.cmd.Git')
+    def test_resolve_git_reference_branch(self, mock_git_class, mock_repo_class):
+        """Test resolving a branch reference with ls-remote, without cloning."""
+        mock_git_class.return_value.ls_remote.return_value = 'abc123def456\trefs/heads/main'
         
-        mock_repo = Mock()
-        mock_repo.head.commit.hexsha = 'abc123def456'
-        mock_repo_class.clone_from.return_value = mock_repo
+        result = self.downloader.resolve_git_reference('user/repo#main')
         
-        with patch('pathlib.Path.exists', return_value=True), \
-             patch('shutil.rmtree'):
-            
-            result = self.downloader.resolve_git_reference('user/repo#main')
-            
-            assert isinstance(result, ResolvedReference)
-            assert result.original_ref == 'user/repo#main'
-            assert result.ref_type == GitReferenceType.BRANCH
-            assert result.resolved_commit == 'abc123def456'
-            assert result.ref_name == 'main'
+        assert isinstance(result, ResolvedReference)
+        assert result.original_ref == 'user/repo#main'
+        assert result.ref_type == GitReferenceType.BRANCH
+        assert result.resolved_commit == 'abc123def456'
+        assert result.ref_name == 'main'
+        mock_repo_class.clone_from.assert_not_called()
+    
+    @patch('apm_cli.deps.github_downloader.git.cmd.Git')
+    def test_resolve_git_reference_annotated_tag(self, mock_git_class):
+        """Test that an annotated tag resolves to the commit it points to."""
+        mock_git_class.return_value.ls_remote.return_value = (
+            'aaaa\trefs/tags/v1.0.0\n'
+            'bbbb\trefs/tags/v1.0.0^{}'
+        )
+        
+        result = self.downloader.resolve_git_reference('user/repo#v1.0.0')
+        
+        assert result.ref_type == GitReferenceType.TAG
+        assert result.resolved_commit == 'bbbb'
     
     @patch('apm_cli.deps.github_downloader.Repo')
+    @patch('apm_cli.deps.github_downloader.git.cmd.Git')
     @patch('tempfile.mkdtemp')
-    def test_resolve_git_reference_commit(self, mock_mkdtemp, mock_repo_class):
-        """Test resolving a commit SHA reference."""
-        # Setup mocks for failed shallow clone, successful full clone
-        mock_temp_dir = '/tmp/test'
-        mock_mkdtemp.return_value = mock_temp_dir
-        
-        from git.exc import GitCommandError
+    def test_resolve_git_reference_commit(self, mock_mkdtemp, mock_git_class, mock_repo_class):
+        """Test resolving an abbreviated commit SHA reference."""
+        mock_mkdtemp.return_value = '/tmp/test'
+        mock_git_class.return_value.ls_remote.return_value = ''
         
-        # First call (shallow clone) fails, second call (full clone) succeeds
+        # Abbreviated SHAs are not advertised: they are expanded from a clone
         mock_repo = Mock()
         mock_commit = Mock()
         mock_commit.hexsha = 'abcdef123456'
         mock_repo.commit.return_value = mock_commit
+        mock_repo_class.clone_from.return_value = mock_repo
         
-        mock_repo_class.clone_from.side_effect = [
-            GitCommandError('shallow clone failed'),
-            mock_repo
-        ]
-        
-        with patch('pathlib.Path.exists', return_value=True), \
-             patch('shutil.rmtree'), \
-             patch('re.match', return_value=True):  # Make it look like a commit SHA
-            
+        with patch('shutil.rmtree'):
             result = self.downloader.resolve_git_reference('user/repo#abcdef1')
             
             assert result.ref_type == GitReferenceType.COMMIT
             assert result.resolved_commit == 'abcdef123456'
             assert result.ref_name == 'abcdef1'
     
+    @patch('apm_cli.deps.github_downloader.Repo')
+    @patch('apm_cli.deps.github_downloader.git.cmd.Git')
+    def test_resolve_git_reference_full_commit_without_clone(self, mock_git_class, mock_repo_class):
+        """Test that a full commit SHA needs no clone to resolve."""
+        mock_git_class.return_value.ls_remote.return_value = ''
+        sha = 'a' * 40
+        
+        result = self.downloader.resolve_git_reference(f'user/repo#{sha}')
+        
+        assert result.ref_type == GitReferenceType.COMMIT
+        assert result.resolved_commit == sha
+        mock_repo_class.clone_from.assert_not_called()
+    
+    @patch('apm_cli.deps.github_downloader.git.cmd.Git')
+    def test_resolve_git_reference_unknown_ref(self, mock_git_class):
+        """Test resolving a branch or tag that does not exist."""
+        mock_git_class.return_value.ls_remote.return_value = ''
+        
+        with pytest.raises(ValueError, match="Reference 'missing' not found"):
+            self.downloader.resolve_git_reference('user/repo#missing')
+    
     def test_resolve_git_reference_invalid_format(self):
         """Test resolving an invalid repository reference."""
         with pytest.raises(ValueError, match="Invalid repository reference"):
@@ -130,7 +148,8 @@ class TestGitHubPackageDownloader:
         
         # Setup mocks
         mock_repo = Mock()
-        mock_repo_class.clone_from.return_value = mock_repo
+        mock_repo.head.commit.hexsha = "abc123"
+        mock_repo_class.init.return_value = mock_repo
         
         # Mock successful validation
         mock_validation_result = ValidationResult()
@@ -166,7 +185,8 @@ class TestGitHubPackageDownloader:
         
         # Setup mocks
         mock_repo = Mock()
-        mock_repo_class.clone_from.return_value = mock_repo
+        mock_repo.head.commit.hexsha = "abc123"
+        mock_repo_class.init.return_value = mock_repo
         
         # Mock validation failure
         mock_validation_result = ValidationResult()
@@ -194,7 +214,7 @@ class TestGitHubPackageDownloader:
         
         # Setup mocks
         from git.exc import GitCommandError
-        mock_repo_class.clone_from.side_effect = GitCommandError("Clone failed")
+        mock_repo_class.init.return_value.git.fetch.side_effect = GitCommandError("Fetch failed")
         
         # Mock resolve_git_reference
         mock_resolved_ref = ResolvedReference(
@@ -226,7 +246,8 @@ class TestGitHubPackageDownloader:
         # Setup mocks
         mock_repo = Mock()
         mock_repo.git = Mock()
-        mock_repo_class.clone_from.return_value = mock_repo
+        mock_repo.head.commit.hexsha = "abc123def456"
+        mock_repo_class.init.return_value = mock_repo
         
         # Mock successful validation
         mock_validation_result = ValidationResult()
@@ -246,8 +267,12 @@ class TestGitHubPackageDownloader:
         with patch.object(self.downloader, 'resolve_git_reference', return_value=mock_resolved_ref):
             result = self.downloader.download_package('user/repo#abc123', target_path)
             
-            # Verify that git checkout was called for commit
-            mock_repo.git.checkout.assert_called_once_with("abc123def456")
+            # Verify that exactly the commit was fetched and checked out
+            fetch_args = mock_repo.git.fetch.call_args[0]
+            assert fetch_args[-3:] == ("--depth", "1", "abc123def456")
+            assert "--filter=blob:none" in fetch_args
+            assert mock_repo.git.checkout.call_args.args == ("--quiet", "--detach", "abc123def456")
+            mock_repo_class.clone_from.assert_not_called()
             assert result.package.name == "test-package"
     
     def test_get_clone_progress_callback(self):
@@ -265,6 +290,82 @@ class TestGitHubPackageDownloader:
             mock_print.assert_called_with("\r🚀 Cloning: Receiving objects (25)", end='', flush=True)
 
 
+class TestGitHubPackageDownloaderLocalHost:
+    """Download packages from local bare repositories standing in for GitHub."""
+    
+    def setup_method(self):
+        """Set up a local host with a package that has two commits."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.host = LocalGitHost(self.temp_dir / "host")
+        self.host.add_package("acme/rules", {".apm/NOTES.md": "first\n"})
+        self.first_commit = self.host.head("acme/rules")
+        self.host.commit("acme/rules", {".apm/NOTES.md": "second\n"})
+        self.host.tag("acme/rules", "v1.0.0")
+        self.target = self.temp_dir / "apm_modules" / "acme" / "rules"
+    
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _download(self, repo_ref, extra_config=()):
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(self.host.environment(extra_config=extra_config))
+        with patch.dict(os.environ, env, clear=True):
+            return GitHubPackageDownloader().download_package(repo_ref, self.target)
+    
+    def test_download_branch_without_clone(self):
+        """Test that a branch is resolved and fetched without cloning the repository."""
+        with patch('apm_cli.deps.github_downloader.Repo.clone_from') as mock_clone:
+            result = self._download("acme/rules")
+            mock_clone.assert_not_called()
+        
+        assert result.resolved_reference.resolved_commit == self.host.head("acme/rules")
+        assert (self.target / ".apm/NOTES.md").read_text() == "second\n"
+        assert not (self.target / ".git").exists()
+    
+    def test_download_tag(self):
+        """Test downloading a tag."""
+        result = self._download("acme/rules#v1.0.0")
+        
+        assert result.resolved_reference.ref_type == GitReferenceType.TAG
+        assert result.resolved_reference.resolved_commit == self.host.head("acme/rules")
+    
+    def test_download_commit(self):
+        """Test downloading an older commit by its full and abbreviated SHA."""
+        result = self._download(f"acme/rules#{self.first_commit}")
+        assert (self.target / ".apm/NOTES.md").read_text() == "first\n"
+        
+        result = self._download(f"acme/rules#{self.first_commit[:10]}")
+        assert result.resolved_reference.resolved_commit == self.first_commit
+        assert (self.target / ".apm/NOTES.md").read_text() == "first\n"
+    
+    def test_commit_fetch_falls_back_when_server_refuses_sha(self):
+        """Test that servers only serving advertised refs still deliver older commits."""
+        # Protocol v0 servers refuse wants for SHAs that are not branch or tag tips
+        result = self._download(f"acme/rules#{self.first_commit}", extra_config=[("protocol.version", "0")])
+        
+        assert result.resolved_reference.resolved_commit == self.first_commit
+        assert (self.target / ".apm/NOTES.md").read_text() == "first\n"
+    
+    def test_download_checks_out_package_files_only(self):
+        """Test that files APM does not read are left out unless the package includes them."""
+        self.host.commit("acme/rules", {
+            "docs/guide.md": "guide\n",
+            "assets/logo.svg": "<svg/>\n",
+            "prompts/review.prompt.md": "Review.\n",
+        })
+        self._download("acme/rules")
+        assert (self.target / "prompts" / "review.prompt.md").is_file()
+        assert not (self.target / "docs").exists()
+        assert not (self.target / "assets").exists()
+        
+        shutil.rmtree(self.target)
+        self.host.commit("acme/rules", {"apm.yml": "name: rules\nversion: 1.0.0\ninclude:\n  - docs/\n"})
+        self._download("acme/rules")
+        assert (self.target / "docs" / "guide.md").read_text() == "guide\n"
+        assert not (self.target / "assets").exists()
+
+
 class TestGitHubPackageDownloaderIntegration:
     """Integration tests that require actual Git operations (to be run with network access)."""
     
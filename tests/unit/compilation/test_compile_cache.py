@@ -0,0 +1,235 @@
+"""Unit tests for the incremental compile cache."""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from apm_cli.compilation.agents_compiler import AgentsCompiler, CompilationConfig
+from apm_cli.compilation.compile_cache import CompileCache, COMPILE_STATE_DIRECTORY, STATE_FILE_NAME
+from apm_cli.compilation.context_optimizer import ContextOptimizer
+from apm_cli.compilation.file_index import ProjectFileIndex
+from apm_cli.primitives.cache import PrimitiveCache
+from apm_cli.primitives.discovery import discover_primitives
+
+
+def _instruction(pattern: str, body: str) -> str:
+    return f"---\ndescription: Rules for {pattern}\napplyTo: \"{pattern}\"\n---\n{body}\n"
+
+
+# Fixed so that backdating again leaves already backdated entries unchanged
+_OLD = time.time() - 3600
+
+
+def _backdate(root: Path) -> None:
+    """Move every mtime well before the next compile's racy window."""
+    old = _OLD
+    for directory, _, files in os.walk(root):
+        for name in files:
+            os.utime(os.path.join(directory, name), (old, old))
+        os.utime(directory, (old, old))
+
+
+def _compile(root: Path, **overrides):
+    compiler = AgentsCompiler(str(root))
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = compiler.compile(CompilationConfig(local_only=True, **overrides))
+    assert result.success, result.errors
+    return compiler._compile_cache, result
+
+
+def _agents_files(root: Path):
+    return {
+        path.relative_to(root).as_posix(): path.read_text()
+        for path in sorted(root.rglob("AGENTS.md"))
+    }
+
+
+class TestCompileCache:
+    """Test cold and warm compiles against the cached state."""
+
+    @pytest.fixture
+    def project(self):
+        """Create a project with Python and TypeScript sources and two instructions."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir).resolve()
+            (root / "apm.yml").write_text("name: test-project\nversion: 1.0.0\n")
+            instructions = root / ".apm" / "instructions"
+            instructions.mkdir(parents=True)
+            (instructions / "python.instructions.md").write_text(_instruction("**/*.py", "Use type hints."))
+            (instructions / "react.instructions.md").write_text(_instruction("**/*.tsx", "Use hooks."))
+
+            for directory in ["backend/api", "backend/models", "frontend/components"]:
+                (root / directory).mkdir(parents=True)
+            (root / "backend" / "api" / "routes.py").write_text("")
+            (root / "backend" / "models" / "user.py").write_text("")
+            (root / "frontend" / "components" / "App.tsx").write_text("")
+            (root / "README.md").write_text("# Project")
+
+            _backdate(root)
+            yield root
+
+    def test_cold_compile_writes_state(self, project):
+        """Test that a cold compile parses everything and saves the state."""
+        cache, _ = _compile(project)
+
+        assert cache.stats["primitives_parsed"] == 2
+        assert cache.stats["primitives_reused"] == 0
+        assert cache.stats["placements_solved"] == 2
+        assert (project / COMPILE_STATE_DIRECTORY / STATE_FILE_NAME).exists()
+        primitives = PrimitiveCache.load(project)
+        assert set(primitives._records) == {
+            str(project / ".apm" / "instructions" / name)
+            for name in ["python.instructions.md", "react.instructions.md"]
+        }
+        assert (project / ".apm" / "cache" / ".gitignore").read_text().endswith("*\n")
+
+    def test_warm_compile_reuses_everything(self, project):
+        """Test that an unchanged project is compiled entirely from the cache."""
+        _compile(project)
+        expected = _agents_files(project)
+        _backdate(project)
+
+        cache, result = _compile(project)
+
+        assert cache.stats == {
+            "primitives_parsed": 0,
+            "primitives_reused": 2,
+            "directories_relisted": 0,
+            "placements_solved": 0,
+            "placements_reused": 2,
+        }
+        assert result.stats["agents_files_written"] == 0
+        assert result.stats["agents_files_unchanged"] == len(expected)
+        assert _agents_files(project) == expected
+
+    def test_touched_instruction_is_reparsed_and_replaced(self, project):
+        """Test that editing one instruction's body reparses it and keeps its placement."""
+        _compile(project)
+        _backdate(project)
+        react = project / ".apm" / "instructions" / "react.instructions.md"
+        react.write_text(_instruction("**/*.tsx", "Use function components."))
+
+        cache, result = _compile(project)
+
+        assert cache.stats["primitives_parsed"] == 1
+        assert cache.stats["primitives_reused"] == 1
+        assert cache.stats["placements_solved"] == 0
+        assert cache.stats["placements_reused"] == 2
+        # Only the AGENTS.md holding the React instruction changes
+        assert "Use function components." in (project / "frontend" / "components" / "AGENTS.md").read_text()
+        assert result.stats["agents_files_written"] == 1
+
+    def test_placement_does_not_load_bodies(self, project):
+        """Test that solving and reusing placements never reads instruction bodies."""
+        for _ in range(2):
+            cache = CompileCache.load(project)
+            instructions = discover_primitives(str(project)).instructions
+            optimizer = ContextOptimizer(str(project), compile_cache=cache)
+
+            with patch("apm_cli.primitives.models.load_primitive_body", side_effect=AssertionError("body read")):
+                optimizer.optimize_instruction_placement(instructions)
+
+            cache.save()
+            _backdate(project)
+        assert cache.stats["placements_reused"] == 2
+
+    def test_new_source_file_resolves_dependent_placement(self, project):
+        """Test that new matching files invalidate the dependent placement only."""
+        _compile(project)
+        _backdate(project)
+        (project / "backend" / "api" / "schemas.py").write_text("")
+
+        cache, _ = _compile(project)
+
+        assert cache.stats["primitives_parsed"] == 0
+        assert cache.stats["placements_solved"] == 1
+        assert cache.stats["placements_reused"] == 1
+        assert _agents_files(project) == _agents_files_without_cache(project)
+
+    def test_recent_changes_are_not_trusted(self, project):
+        """Test that entries modified inside the racy window are re-checked."""
+        for path in (project / ".apm" / "instructions").iterdir():
+            os.utime(path, None)
+        _compile(project)
+        # Same mtimes, but within the racy window of the last compile
+        cache, _ = _compile(project)
+
+        assert cache.stats["primitives_parsed"] == 2
+        assert cache.stats["primitives_reused"] == 0
+
+    def test_no_cache_leaves_no_state(self, project):
+        """Test that disabling the cache neither reads nor writes state."""
+        cache, _ = _compile(project, use_cache=False)
+
+        assert cache is None
+        assert not (project / ".apm" / "cache").exists()
+
+    def test_outdated_state_is_ignored(self, project):
+        """Test that unreadable or foreign state starts a cold compile."""
+        state_dir = project / COMPILE_STATE_DIRECTORY
+        state_dir.mkdir(parents=True)
+        (state_dir / STATE_FILE_NAME).write_text(json.dumps({"format": -1}))
+        assert CompileCache.load(project).trusted_before_ns < 0
+
+        (state_dir / STATE_FILE_NAME).write_text("not json")
+        cache, _ = _compile(project)
+        assert cache.stats["primitives_parsed"] == 2
+
+
+def _agents_files_without_cache(root: Path):
+    """Compile into a copy of the project without the cache and return its AGENTS.md files."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        copy = Path(temp_dir).resolve() / "copy"
+        shutil.copytree(root, copy, ignore=shutil.ignore_patterns("cache", "AGENTS.md"))
+        _compile(copy, use_cache=False)
+        return _agents_files(copy)
+
+
+class TestIncrementalFileIndex:
+    """Test relisting only changed directories."""
+
+    def test_rebuild_matches_fresh_build(self):
+        """Test that a rebuilt index equals a fresh build after changes."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir).resolve()
+            for directory in ["src/api", "src/ui", "docs"]:
+                (root / directory).mkdir(parents=True)
+            (root / "src" / "api" / "routes.py").write_text("")
+            (root / "src" / "ui" / "App.tsx").write_text("")
+            (root / "docs" / "guide.md").write_text("")
+            _backdate(root)
+
+            previous = ProjectFileIndex.build(root)
+            previous.match_counts("**/*.py")
+            snapshot = json.loads(json.dumps(previous.to_snapshot()))
+            trusted_before_ns = time.time_ns() - 60_000_000_000
+
+            (root / "src" / "api" / "models.py").write_text("")
+            (root / "docs" / "extra").mkdir()
+            (root / "docs" / "extra" / "notes.py").write_text("")
+
+            rebuilt = ProjectFileIndex.rebuild(
+                ProjectFileIndex.from_snapshot(root, snapshot), trusted_before_ns
+            )
+            fresh = ProjectFileIndex.build(root)
+
+            assert rebuilt.relisted == {root / "src" / "api", root / "docs", root / "docs" / "extra"}
+            assert [
+                (node.path, node.files, node.children) for node in rebuilt.iter_directories()
+            ] == [(node.path, node.files, node.children) for node in fresh.iter_directories()]
+            assert rebuilt.match_counts("**/*.py") == fresh.match_counts("**/*.py")
+
+    def test_from_snapshot_rejects_other_base_dir(self):
+        """Test that a snapshot of another project is not used."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir).resolve()
+            snapshot = ProjectFileIndex.build(root).to_snapshot()
+            assert ProjectFileIndex.from_snapshot(root / "other", snapshot) is None
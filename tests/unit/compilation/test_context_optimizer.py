@@ -352,7 +352,42 @@ class TestContextOptimizer:
         assert 0.0 <= stats.average_context_efficiency <= 1.0
         assert stats.total_agents_files >= 0
         assert stats.directories_analyzed >= 0
-    
+
+    def test_context_loads_match_inheritance_analysis(self, temp_project, sample_instructions):
+        """Test the single-pass context loads equal per-directory inheritance analysis."""
+        optimizer = ContextOptimizer(str(temp_project))
+        optimizer._analyze_project_structure()
+        root = temp_project.resolve()
+        global_instruction = Instruction(
+            name="global",
+            file_path=Path("global.instructions.md"),
+            description="Global standards",
+            apply_to="",
+            content="Global standards",
+            source="local"
+        )
+        placement_map = {
+            root: [sample_instructions[3], global_instruction],
+            root / "src": [sample_instructions[1]],
+            root / "src" / "components": [sample_instructions[1], sample_instructions[2]],
+            root / "server": [sample_instructions[0]],
+        }
+
+        context_loads = optimizer._calculate_context_loads(placement_map)
+
+        assert set(context_loads) == set(optimizer._directory_cache)
+        for directory, loads in context_loads.items():
+            inheritance = optimizer.analyze_context_inheritance(directory, placement_map)
+            assert loads == (inheritance.total_context_load, inheritance.relevant_context_load)
+
+        with patch.object(optimizer, 'analyze_context_inheritance', side_effect=AssertionError("per-directory analysis")):
+            stats = optimizer.get_optimization_stats(placement_map)
+        efficiencies = [
+            optimizer.analyze_context_inheritance(directory, placement_map).get_efficiency_ratio()
+            for directory in optimizer._directory_cache
+        ]
+        assert stats.average_context_efficiency == pytest.approx(sum(efficiencies) / len(efficiencies))
+
     def test_get_inheritance_chain(self, temp_project):
         """Test inheritance chain generation."""
         optimizer = ContextOptimizer(str(temp_project))
@@ -0,0 +1,116 @@
+"""Unit tests for the directory tree index."""
+
+import random
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from apm_cli.compilation.context_optimizer import ContextOptimizer
+from apm_cli.compilation.directory_tree import DirectoryTree
+from apm_cli.compilation.file_index import ProjectFileIndex
+
+
+@pytest.fixture
+def project():
+    """Create a random nested project tree."""
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base = Path(temp_dir).resolve()
+        directories = [base]
+        for _ in range(80):
+            directory = rng.choice(directories) / rng.choice(["src", "lib", "api", "ui", "docs"])
+            if directory not in directories:
+                directory.mkdir()
+                directories.append(directory)
+        for directory in directories:
+            (directory / "file.py").write_text("")
+        yield base
+
+
+def _common_ancestor(first: Path, second: Path) -> Path:
+    common = []
+    for a, b in zip(first.parts, second.parts):
+        if a != b:
+            break
+        common.append(a)
+    return Path(*common)
+
+
+class TestDirectoryTree:
+    """Test tree numbering, ancestor checks and LCA queries."""
+
+    def test_preorder_ids(self, project):
+        """Test IDs follow sorted path order with consistent parents and depths."""
+        tree = DirectoryTree(ProjectFileIndex.build(project))
+        assert tree.paths == sorted(tree.paths)
+        assert tree.paths[0] == project
+        assert tree.parents[0] == -1
+        for directory_id in range(1, len(tree)):
+            assert tree.paths[tree.parents[directory_id]] == tree.paths[directory_id].parent
+            assert tree.depths[directory_id] == tree.depths[tree.parents[directory_id]] + 1
+
+    def test_is_ancestor_matches_paths(self, project):
+        """Test interval ancestor checks agree with path containment."""
+        tree = DirectoryTree(ProjectFileIndex.build(project))
+        for first_id, first in enumerate(tree.paths):
+            for second_id, second in enumerate(tree.paths):
+                expected = second == first or first in second.parents
+                assert tree.is_ancestor(first_id, second_id) is expected
+
+    def test_ancestors(self, project):
+        """Test ancestor iteration runs from the directory to the root."""
+        tree = DirectoryTree(ProjectFileIndex.build(project))
+        deepest = max(range(len(tree)), key=lambda i: tree.depths[i])
+        chain = [tree.paths[i] for i in tree.ancestors(deepest)]
+        assert chain[0] == tree.paths[deepest]
+        assert chain[-1] == project
+        assert len(chain) == tree.depths[deepest] + 1
+
+    def test_lca_matches_common_prefix(self, project):
+        """Test LCA queries agree with the common path prefix."""
+        tree = DirectoryTree(ProjectFileIndex.build(project))
+        rng = random.Random(3)
+        for _ in range(300):
+            first_id, second_id = rng.randrange(len(tree)), rng.randrange(len(tree))
+            expected = _common_ancestor(tree.paths[first_id], tree.paths[second_id])
+            assert tree.paths[tree.lca(first_id, second_id)] == expected
+
+        sample = rng.sample(range(len(tree)), 5)
+        expected = tree.paths[sample[0]]
+        for directory_id in sample[1:]:
+            expected = _common_ancestor(expected, tree.paths[directory_id])
+        assert tree.paths[tree.lca_of(sample)] == expected
+        assert tree.lca_of([]) is None
+
+
+class TestContextOptimizerUsesTree:
+    """Test hierarchical queries are answered from the tree after analysis."""
+
+    def test_hierarchical_queries_do_not_resolve_paths(self, project):
+        """Test indexed directories never go through Path.resolve or relative_to."""
+        optimizer = ContextOptimizer(str(project))
+        optimizer._analyze_project_structure()
+        tree = optimizer._directory_tree
+        deepest = tree.paths[max(range(len(tree)), key=lambda i: tree.depths[i])]
+        siblings = {tree.paths[1], deepest}
+
+        with patch("pathlib.Path.resolve", side_effect=AssertionError("resolve")), \
+             patch("pathlib.PurePath.relative_to", side_effect=AssertionError("relative_to")):
+            chain = optimizer._get_inheritance_chain(deepest)
+            assert chain[0] == deepest and chain[-1] == project
+            assert optimizer._is_child_directory(deepest, project)
+            assert not optimizer._is_child_directory(project, project)
+            assert optimizer._is_hierarchically_covered(deepest, project)
+            assert optimizer._find_minimal_coverage_placement(siblings) == _common_ancestor(*siblings)
+
+    def test_unindexed_paths_fall_back(self, project):
+        """Test paths outside the index keep the path-based behaviour."""
+        optimizer = ContextOptimizer(str(project))
+        optimizer._analyze_project_structure()
+        outside = project / "missing" / "nested"
+
+        assert optimizer._get_inheritance_chain(outside) == [outside, project / "missing", project]
+        assert optimizer._is_child_directory(outside, project)
+        assert optimizer._is_hierarchically_covered(outside, project / "missing")
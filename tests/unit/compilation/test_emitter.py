@@ -0,0 +1,125 @@
+"""Unit tests for write-if-changed AGENTS.md emission."""
+
+import os
+import stat
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from apm_cli.compilation.constants import CONSTITUTION_MARKER_BEGIN, CONSTITUTION_RELATIVE_PATH
+from apm_cli.compilation.emitter import AgentsFileEmitter, atomic_write_text
+
+
+class TestAgentsFileEmitter:
+    """Test batched emission of distributed AGENTS.md files."""
+
+    @pytest.fixture
+    def project(self):
+        """Create an empty project directory."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield Path(temp_dir).resolve()
+
+    def _content_map(self, root: Path, count: int = 12):
+        return {
+            root / f"dir{i}" / "AGENTS.md": f"# AGENTS.md\n\nInstructions for dir{i}\n"
+            for i in range(count)
+        }
+
+    def test_writes_new_files_and_creates_directories(self, project):
+        """Test that missing files are written in content map order."""
+        content_map = self._content_map(project)
+
+        result = AgentsFileEmitter(with_constitution=False, max_workers=4).emit(content_map)
+
+        assert result.written == list(content_map)
+        assert result.unchanged == []
+        assert result.errors == []
+        for path, content in content_map.items():
+            assert path.read_text() == content
+
+    def test_unchanged_files_are_not_rewritten(self, project):
+        """Test that files with identical content keep their mtimes."""
+        content_map = self._content_map(project)
+        emitter = AgentsFileEmitter(with_constitution=False)
+        emitter.emit(content_map)
+        changed = project / "dir3" / "AGENTS.md"
+        old = 1_000_000_000
+        for path in content_map:
+            os.utime(path, (old, old))
+        content_map[changed] = "# AGENTS.md\n\nUpdated\n"
+
+        result = emitter.emit(content_map)
+
+        assert result.written == [changed]
+        assert len(result.unchanged) == len(content_map) - 1
+        assert changed.read_text() == "# AGENTS.md\n\nUpdated\n"
+        for path in result.unchanged:
+            assert path.stat().st_mtime == old
+
+    def test_hand_edited_file_is_restored(self, project):
+        """Test that on-disk content, not a previous run, decides what is written."""
+        content_map = self._content_map(project, count=2)
+        emitter = AgentsFileEmitter(with_constitution=False)
+        emitter.emit(content_map)
+        edited = next(iter(content_map))
+        edited.write_text("edited")
+
+        result = emitter.emit(content_map)
+
+        assert result.written == [edited]
+        assert edited.read_text() == content_map[edited]
+
+    def test_constitution_is_injected_per_directory(self, project):
+        """Test that the shared injector reads each file's own constitution."""
+        constitution = project / CONSTITUTION_RELATIVE_PATH
+        constitution.parent.mkdir(parents=True)
+        constitution.write_text("Be kind.\n")
+        root_agents = project / "AGENTS.md"
+        sub_agents = project / "src" / "AGENTS.md"
+        content_map = {
+            root_agents: "# AGENTS.md\n\nRoot\n",
+            sub_agents: "# AGENTS.md\n\nSource\n",
+        }
+        emitter = AgentsFileEmitter(with_constitution=True)
+
+        result = emitter.emit(content_map)
+
+        assert result.written == [root_agents, sub_agents]
+        assert CONSTITUTION_MARKER_BEGIN in root_agents.read_text()
+        assert CONSTITUTION_MARKER_BEGIN not in sub_agents.read_text()
+        # Re-emitting the same content leaves both files alone
+        assert emitter.emit(content_map).unchanged == [root_agents, sub_agents]
+
+    def test_write_errors_are_reported(self, project):
+        """Test that a failed write is reported without stopping the batch."""
+        content_map = self._content_map(project, count=3)
+        failing = project / "dir1" / "AGENTS.md"
+        real_write = atomic_write_text
+
+        def flaky_write(path, content):
+            if path == failing:
+                raise OSError("disk full")
+            real_write(path, content)
+
+        with patch("apm_cli.compilation.emitter.atomic_write_text", side_effect=flaky_write):
+            result = AgentsFileEmitter(with_constitution=False).emit(content_map)
+
+        assert len(result.written) == 2
+        assert len(result.errors) == 1
+        assert "disk full" in result.errors[0]
+
+
+def test_atomic_write_keeps_permissions_and_leaves_no_temp_files():
+    """Test that atomic writes replace the file in place."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "AGENTS.md"
+        path.write_text("old")
+        os.chmod(path, 0o640)
+
+        atomic_write_text(path, "new")
+
+        assert path.read_text() == "new"
+        assert stat.S_IMODE(path.stat().st_mode) == 0o640
+        assert os.listdir(temp_dir) == ["AGENTS.md"]
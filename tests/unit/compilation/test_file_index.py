@@ -0,0 +1,112 @@
+"""Unit tests for the project file index used by the Context Optimizer."""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from apm_cli.compilation.context_optimizer import ContextOptimizer
+from apm_cli.compilation.file_index import ProjectFileIndex
+
+
+class TestProjectFileIndex:
+    """Test ProjectFileIndex construction and matching."""
+
+    @pytest.fixture
+    def temp_project(self):
+        """Create a small project tree for indexing."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base = Path(temp_dir).resolve()
+            (base / "src" / "components").mkdir(parents=True)
+            (base / "docs").mkdir()
+            (base / "node_modules" / "pkg").mkdir(parents=True)
+            (base / ".hidden").mkdir()
+
+            (base / "README.md").write_text("# Project")
+            (base / "src" / "main.py").write_text("print()")
+            (base / "src" / "util.py").write_text("pass")
+            (base / "src" / "components" / "Button.tsx").write_text("export {}")
+            (base / "src" / "components" / "style.css").write_text("")
+            (base / "docs" / "guide.md").write_text("# Guide")
+            (base / "node_modules" / "pkg" / "index.py").write_text("")
+            (base / ".hidden" / "secret.py").write_text("")
+            (base / "src" / ".env").write_text("")
+
+            yield base
+
+    def test_build_prunes_hidden_and_excluded_directories(self, temp_project):
+        """Test that hidden and excluded directories are never indexed."""
+        index = ProjectFileIndex.build(temp_project)
+
+        assert temp_project in index
+        assert temp_project / "src" / "components" in index
+        assert temp_project / "node_modules" not in index
+        assert temp_project / ".hidden" not in index
+
+        src = index.get(temp_project / "src")
+        assert src.files == ["main.py", "util.py"]
+        assert src.depth == 1
+        assert src.relative_path == "src"
+        assert src.parent == temp_project
+        assert src.children == [temp_project / "src" / "components"]
+        assert src.suffix_buckets == {".py": ["main.py", "util.py"]}
+
+    def test_match_counts(self, temp_project):
+        """Test per-directory match counts for common patterns."""
+        index = ProjectFileIndex.build(temp_project)
+
+        assert index.match_counts("**/*.py") == {temp_project / "src": 2}
+        assert index.match_counts("**/*.{tsx,css}") == {temp_project / "src" / "components": 2}
+        assert index.match_counts("docs/**/*.md") == {temp_project / "docs": 1}
+        assert index.match_counts("*.md") == {temp_project: 1, temp_project / "docs": 1}
+        assert index.match_counts("src/**") == {
+            temp_project / "src": 2,
+            temp_project / "src" / "components": 2,
+        }
+
+    def test_matches_relative_paths(self, temp_project):
+        """Test single-path matching follows glob semantics for '**'."""
+        index = ProjectFileIndex.build(temp_project)
+
+        assert index.matches("main.py", "**/*.py")
+        assert index.matches("src/a/b/c.py", "src/**/*.py")
+        assert not index.matches("docs/a.py", "src/**/*.py")
+        assert index.matches("src/components/Button.tsx", "**/*.{ts,tsx}")
+        assert not index.matches("src/components/Button.tsx", "**/*.ts")
+
+
+class TestContextOptimizerUsesIndex:
+    """Test that the optimizer answers pattern queries from the index."""
+
+    def test_matching_does_not_touch_filesystem(self):
+        """Test pattern matching after analysis performs no directory listings."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base = Path(temp_dir).resolve()
+            (base / "server").mkdir()
+            (base / "server" / "api.py").write_text("")
+            (base / "styles").mkdir()
+            (base / "styles" / "main.css").write_text("")
+
+            optimizer = ContextOptimizer(str(base))
+            optimizer._analyze_project_structure()
+
+            with patch("pathlib.Path.iterdir", side_effect=AssertionError("filesystem access")), \
+                 patch("os.listdir", side_effect=AssertionError("filesystem access")), \
+                 patch("os.walk", side_effect=AssertionError("filesystem access")):
+                assert optimizer._find_matching_directories("**/*.py") == {base / "server"}
+                assert optimizer._calculate_inheritance_pollution(base, "**/*.py") == 0.5
+                assert optimizer._file_matches_pattern(base / "styles" / "main.css", "**/*.css")
+
+    def test_index_build_time_reported(self):
+        """Test that the index build time is exposed in optimization stats."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base = Path(temp_dir).resolve()
+            (base / "app.py").write_text("")
+
+            optimizer = ContextOptimizer(str(base))
+            placement_map = optimizer.optimize_instruction_placement([])
+            results = optimizer.get_compilation_results(placement_map)
+
+            assert results.optimization_stats.index_build_time_ms is not None
+            assert results.optimization_stats.index_build_time_ms >= 0.0
@@ -0,0 +1,159 @@
+"""Unit tests for the compiled applyTo glob matcher."""
+
+import threading
+
+import pytest
+
+from apm_cli.compilation.glob_matcher import (
+    GlobMatcher,
+    compile_pattern,
+    expand_braces,
+    literal_directory,
+    match_path,
+    pattern_key,
+)
+
+
+class TestPatternMatching:
+    """Test single-path matching semantics."""
+
+    @pytest.mark.parametrize("pattern,path,expected", [
+        # '**' spans zero or more directories
+        ("**/*.py", "main.py", True),
+        ("**/*.py", "src/app/main.py", True),
+        ("**/*.py", "src/main.pyc", False),
+        ("src/**/*.py", "src/main.py", True),
+        ("src/**/*.py", "src/a/b/main.py", True),
+        ("src/**/*.py", "lib/main.py", False),
+        ("**/docs/**/*.md", "docs/guide.md", True),
+        ("**/docs/**/*.md", "pkg/docs/api/ref.md", True),
+        ("auth/**", "auth/handlers/login.py", True),
+        ("auth/**", "authz/login.py", False),
+        # '*' and '?' stay within one path segment
+        ("src/*.py", "src/main.py", True),
+        ("src/*.py", "src/app/main.py", False),
+        ("a?c/*.md", "abc/readme.md", True),
+        ("a?c/*.md", "a/c/readme.md", False),
+        # Patterns without '/' match the file name at any depth
+        ("*.md", "README.md", True),
+        ("*.md", "docs/api/guide.md", True),
+        ("**/*test*", "src/mytest.js", True),
+        # Nested braces, including alternatives that contain '/'
+        ("**/*.{ts,tsx}", "src/Button.tsx", True),
+        ("**/*.{ts,tsx}", "src/Button.jsx", False),
+        ("{src,lib/{core,util}}/**/*.ts", "lib/util/a/b.ts", True),
+        ("{src,lib/{core,util}}/**/*.ts", "lib/other/b.ts", False),
+        # Character classes
+        ("**/test_[a-c]*.py", "tests/test_b1.py", True),
+        ("**/test_[!a-c]*.py", "tests/test_b1.py", False),
+        ("**/test_[!a-c]*.py", "tests/test_d.py", True),
+        ("**/*.[ch]", "src/lib.h", True),
+        ("**/*[.]md", "docs/guide.md", True),
+        # Normalization
+        ("./src/**/*.py", "src/main.py", True),
+        ("**/validation/rules.ts", "validation/rules.ts", True),
+    ])
+    def test_match_path(self, pattern, path, expected):
+        """Test matching of relative paths against applyTo patterns."""
+        assert match_path(path, pattern) is expected
+
+    def test_compile_pattern_is_cached(self):
+        """Test patterns are compiled once and reused."""
+        assert compile_pattern("**/*.py") is compile_pattern("**/*.py")
+
+    def test_prefilters(self):
+        """Test literal prefix and suffix prefilters derived from a pattern."""
+        compiled = compile_pattern("{src,lib}/**/*.{ts,tsx}")
+        assert compiled.prefixes == ("lib/", "src/")
+        assert compiled.suffixes == frozenset({".ts", ".tsx"})
+        assert not compiled.suffix_only
+
+        assert compile_pattern("**/*.py").suffix_only
+        assert compile_pattern("*.md").suffix_only
+        assert compile_pattern("src/**").suffixes is None
+
+    def test_may_match_under(self):
+        """Test directory-level pruning by literal prefix."""
+        compiled = compile_pattern("src/app/**/*.py")
+        assert compiled.may_match_under("src/app")
+        assert compiled.may_match_under("src/app/models")
+        assert not compiled.may_match_under("src")
+        assert not compiled.may_match_under("lib")
+        assert compile_pattern("*.py").may_match_under("")
+
+    def test_thread_safety(self):
+        """Test concurrent matching gives consistent results."""
+        paths = [f"src/module{i}/file{i}.py" for i in range(200)]
+        errors = []
+
+        def worker():
+            for path in paths:
+                if not match_path(path, "src/**/*.py") or match_path(path, "lib/**/*.py"):
+                    errors.append(path)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+
+
+class TestBraceExpansion:
+    """Test brace expansion helpers."""
+
+    def test_expand_nested_braces(self):
+        """Test nested groups expand in source order."""
+        assert expand_braces("{src,lib/{core,util}}/*.{ts,js}") == [
+            "src/*.ts", "src/*.js",
+            "lib/core/*.ts", "lib/core/*.js",
+            "lib/util/*.ts", "lib/util/*.js",
+        ]
+
+    def test_expand_without_braces(self):
+        """Test patterns without braces are returned unchanged."""
+        assert expand_braces("**/*.py") == ["**/*.py"]
+
+    def test_expand_unbalanced_brace_is_literal(self):
+        """Test an unbalanced brace is kept literally."""
+        assert expand_braces("src/{a,b") == ["src/{a,b"]
+        assert match_path("src/{a,b", "src/{a,b")
+
+    def test_expand_limit(self):
+        """Test expansion stops when exceeding the limit."""
+        assert expand_braces("{a,b}{c,d}{e,f}", limit=4) is None
+
+    def test_pattern_key_groups_equivalent_spellings(self):
+        """Test equivalent brace spellings share a grouping key."""
+        assert pattern_key("**/*.{ts,tsx}") == pattern_key("**/*.{tsx,ts}")
+        assert pattern_key("**/*.ts") != pattern_key("**/*.tsx")
+
+    def test_literal_directory(self):
+        """Test extraction of the literal leading directory."""
+        assert literal_directory("src/app/**/*.py") == "src/app"
+        assert literal_directory("docs/*.md") == "docs"
+        assert literal_directory("**/*.py") is None
+        assert literal_directory("*.py") is None
+
+
+class TestGlobMatcher:
+    """Test bulk matching of many paths against many patterns."""
+
+    def test_match_and_match_paths_agree(self):
+        """Test bulk results equal per-path results."""
+        patterns = ["**/*.py", "src/**/*.{ts,tsx}", "*.md", "**/tests/**", "docs/*.md"]
+        paths = [
+            "README.md", "setup.py", "src/app.ts", "src/ui/Button.tsx",
+            "lib/util.ts", "docs/guide.md", "docs/api/ref.md", "pkg/tests/unit/test_a.py",
+        ]
+        matcher = GlobMatcher(patterns)
+
+        bulk = matcher.match_paths(paths)
+        for pattern in patterns:
+            expected = [path for path in paths if match_path(path, pattern)]
+            assert sorted(bulk[pattern]) == sorted(expected)
+
+        assert matcher.match("src/ui/Button.tsx") == ["src/**/*.{ts,tsx}"]
+        assert matcher.match("pkg/tests/unit/test_a.py") == ["**/*.py", "**/tests/**"]
+        assert matcher.match("docs/api/ref.md") == ["*.md"]
@@ -0,0 +1,89 @@
+"""Unit tests for the bitset pattern x directory match matrix."""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from apm_cli.compilation.file_index import ProjectFileIndex
+from apm_cli.compilation.match_matrix import DirectoryMatchMatrix, iter_bits, popcount
+
+
+class TestDirectoryMatchMatrix:
+    """Test bitset queries over numbered directories."""
+
+    @pytest.fixture
+    def matrix(self):
+        """Create a match matrix over a small project tree."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base = Path(temp_dir).resolve()
+            for directory in ["src/api", "src/ui/widgets", "docs", "empty/leaf"]:
+                (base / directory).mkdir(parents=True)
+
+            (base / "README.md").write_text("")
+            (base / "src" / "main.py").write_text("")
+            (base / "src" / "api" / "routes.py").write_text("")
+            (base / "src" / "ui" / "app.tsx").write_text("")
+            (base / "src" / "ui" / "widgets" / "button.tsx").write_text("")
+            (base / "docs" / "guide.md").write_text("")
+            (base / "empty" / "leaf" / "notes.md").write_text("")
+            for i in range(11):
+                (base / "src" / "api" / f"schema{i}.json").write_text("")
+
+            yield DirectoryMatchMatrix(ProjectFileIndex.build(base)), base
+
+    def test_subtree_masks(self, matrix):
+        """Test subtree masks cover exactly a directory and its descendants."""
+        matrix, base = matrix
+        src = matrix.ids[base / "src"]
+        assert matrix.paths_of(matrix.subtree_mask(src)) == [
+            base / "src", base / "src" / "api", base / "src" / "ui", base / "src" / "ui" / "widgets"
+        ]
+        assert matrix.subtree_mask(0) == (1 << len(matrix)) - 1
+
+    def test_covers(self, matrix):
+        """Test single-placement coverage checks."""
+        matrix, base = matrix
+        tsx = matrix.row("**/*.tsx").matches
+        assert matrix.covers(matrix.ids[base / "src"], tsx)
+        assert matrix.covers(matrix.ids[base / "src" / "ui"], tsx)
+        assert not matrix.covers(matrix.ids[base / "src" / "ui" / "widgets"], tsx)
+        assert not matrix.covers(matrix.ids[base / "docs"], tsx)
+
+    def test_ancestor_closure_and_files_mask(self, matrix):
+        """Test ancestor closure includes directories without files."""
+        matrix, base = matrix
+        leaf = matrix.bits_of([base / "empty" / "leaf"])
+        closure = matrix.ancestor_closure(leaf)
+        assert matrix.paths_of(closure) == [base, base / "empty", base / "empty" / "leaf"]
+        assert matrix.paths_of(closure & matrix.files_mask) == [base, base / "empty" / "leaf"]
+
+    def test_pattern_rows(self, matrix):
+        """Test match and weak-relevance bitsets."""
+        matrix, base = matrix
+        row = matrix.row("**/*.py")
+        assert matrix.paths_of(row.matches) == [base / "src", base / "src" / "api"]
+        # routes.py is 1 of 12 files in src/api
+        assert matrix.paths_of(row.weak) == [base / "src" / "api"]
+        assert matrix.row("**/*.py") is row
+
+    def test_inheritance_pollution(self, matrix):
+        """Test pollution penalties from direct children with files."""
+        matrix, base = matrix
+        # src/api is weakly relevant (0.2); src/ui has no Python files (0.5)
+        assert matrix.inheritance_pollution(matrix.ids[base / "src"], "**/*.py") == 0.2 + 0.5
+        # Root children with files: docs (0.5) and src (relevant)
+        assert matrix.inheritance_pollution(0, "**/*.py") == 0.5
+
+    def test_depth_counts(self, matrix):
+        """Test per-depth popcounts."""
+        matrix, base = matrix
+        assert matrix.depth_counts(matrix.row("**/*.md").matches) == {0: 1, 1: 1, 2: 1}
+
+
+def test_bit_helpers():
+    """Test popcount and ascending bit iteration."""
+    bits = (1 << 0) | (1 << 5) | (1 << 130)
+    assert popcount(bits) == 3
+    assert list(iter_bits(bits)) == [0, 5, 130]
+    assert list(iter_bits(0)) == []
@@ -0,0 +1,117 @@
+"""Unit tests for the install-time primitive manifest of dependency packages."""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from apm_cli.core.script_runner import PromptCompiler
+from apm_cli.primitives.discovery import scan_dependency_primitives
+from apm_cli.primitives.models import PrimitiveCollection
+from apm_cli.primitives.package_index import (
+    PACKAGE_INDEX_FILE,
+    PackageIndex,
+    load_package_index,
+    write_package_index,
+)
+
+
+# Well before the racy window of the manifest write
+_OLD = time.time() - 3600
+
+
+def _backdate(*paths: Path) -> None:
+    for path in paths:
+        os.utime(path, (_OLD, _OLD))
+
+
+@pytest.fixture
+def project():
+    """Create a project with one installed dependency package."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        package = root / "apm_modules" / "acme" / "rules"
+        apm_dir = package / ".apm"
+        (apm_dir / "instructions").mkdir(parents=True)
+        (apm_dir / "chatmodes").mkdir()
+        (package / "apm.yml").write_text("name: rules\nversion: 1.0.0\n")
+        (apm_dir / "instructions" / "style.instructions.md").write_text(
+            "---\ndescription: Style\napplyTo: \"**/*.py\"\n---\nFollow PEP 8.\n"
+        )
+        (apm_dir / "chatmodes" / "reviewer.chatmode.md").write_text(
+            "---\ndescription: Reviewer\n---\nReview carefully.\n"
+        )
+        (package / "audit.prompt.md").write_text("---\ndescription: Audit\n---\nAudit the code.\n")
+        (root / "apm.yml").write_text(
+            "name: project\nversion: 1.0.0\ndependencies:\n  apm:\n    - acme/rules\n"
+        )
+        write_package_index(package)
+        # As if installed an hour ago: rebuild the manifest over the older mtimes
+        _backdate(apm_dir / "instructions", apm_dir / "chatmodes", apm_dir, package)
+        PackageIndex.build(package).write(package)
+        yield root
+
+
+def _package(root: Path) -> Path:
+    return root / "apm_modules" / "acme" / "rules"
+
+
+class TestPackageIndex:
+    """Test writing, trusting and rebuilding package manifests."""
+
+    def test_manifest_lists_primitives(self, project):
+        """Test that the manifest records type, name, applyTo, hash and size."""
+        index = PackageIndex.load(_package(project))
+
+        assert [(entry.type, entry.name, entry.path) for entry in index.primitives] == [
+            ("chatmode", "reviewer", ".apm/chatmodes/reviewer.chatmode.md"),
+            ("instruction", "style", ".apm/instructions/style.instructions.md"),
+            ("prompt", "audit", "audit.prompt.md"),
+        ]
+        instruction = index.files("instruction")[0]
+        assert instruction.apply_to == "**/*.py"
+        assert instruction.size == len((_package(project) / instruction.path).read_bytes())
+        assert len(instruction.sha256) == 64
+
+    def test_current_manifest_is_trusted(self, project):
+        """Test that an unchanged package is not scanned again."""
+        package = _package(project)
+        manifest = json.loads((package / PACKAGE_INDEX_FILE).read_text())
+        manifest["primitives"] = manifest["primitives"][:1]
+        (package / PACKAGE_INDEX_FILE).write_text(json.dumps(manifest))
+
+        assert load_package_index(package).count("instruction") == 0
+
+    def test_added_file_makes_manifest_stale(self, project):
+        """Test that a file added after the install is found by a rescan."""
+        package = _package(project)
+        (package / ".apm" / "instructions" / "docs.instructions.md").write_text(
+            "---\napplyTo: \"docs/**\"\n---\nWrite clearly.\n"
+        )
+
+        assert load_package_index(package).count("instruction") == 2
+        assert PackageIndex.load(package).count("instruction") == 2
+
+    def test_discovery_reads_manifest(self, project):
+        """Test that dependency discovery parses the files the manifest lists."""
+        collection = PrimitiveCollection()
+        scan_dependency_primitives(str(project), collection)
+
+        assert [primitive.name for primitive in collection.instructions] == ["style"]
+        assert collection.instructions[0].source == "dependency:acme/rules"
+        assert [primitive.name for primitive in collection.chatmodes] == ["reviewer"]
+
+    def test_prompt_resolution_reads_manifest(self, project):
+        """Test that dependency prompts are resolved from the manifest."""
+        original_dir = os.getcwd()
+        try:
+            os.chdir(project)
+            assert PromptCompiler()._resolve_prompt_file("audit.prompt.md") == \
+                Path("apm_modules/acme/rules/audit.prompt.md")
+            with pytest.raises(FileNotFoundError):
+                PromptCompiler()._resolve_prompt_file("missing.prompt.md")
+        finally:
+            os.chdir(original_dir)
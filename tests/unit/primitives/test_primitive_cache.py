@@ -0,0 +1,108 @@
+"""Unit tests for the persistent parsed-primitive cache."""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from apm_cli.primitives.cache import PRIMITIVE_CACHE_FILE, PrimitiveCache
+from apm_cli.primitives.discovery import discover_primitives
+from apm_cli.primitives.models import Instruction
+
+
+# Well before the racy window of the next load
+_OLD = time.time() - 3600
+
+
+def _backdate(path: Path) -> None:
+    os.utime(path, (_OLD, _OLD))
+
+
+def _discover(root: Path) -> PrimitiveCache:
+    cache = PrimitiveCache.load(root)
+    discover_primitives(str(root), cache=cache)
+    cache.save()
+    return cache
+
+
+@pytest.fixture
+def project():
+    """Create a project with an instruction and a chatmode."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        apm_dir = root / ".apm"
+        (apm_dir / "instructions").mkdir(parents=True)
+        (apm_dir / "chatmodes").mkdir()
+        (apm_dir / "instructions" / "python.instructions.md").write_text(
+            "---\ndescription: Python rules\napplyTo: \"**/*.py\"\n---\nUse type hints.\n"
+        )
+        (apm_dir / "chatmodes" / "reviewer.chatmode.md").write_text(
+            "---\ndescription: Reviewer\n---\nReview carefully.\n"
+        )
+        for path in (apm_dir / "instructions").iterdir():
+            _backdate(path)
+        for path in (apm_dir / "chatmodes").iterdir():
+            _backdate(path)
+        yield root
+
+
+class TestPrimitiveCache:
+    """Test reuse and per-file invalidation of cached primitives."""
+
+    def test_reuses_unchanged_primitives(self, project):
+        """Test that a second discovery reads no primitive file."""
+        assert _discover(project).stats == {"primitives_parsed": 2, "primitives_reused": 0}
+        assert (project / PRIMITIVE_CACHE_FILE).exists()
+
+        cache = PrimitiveCache.load(project)
+        collection = discover_primitives(str(project), cache=cache)
+
+        assert cache.stats == {"primitives_parsed": 0, "primitives_reused": 2}
+        instruction = collection.instructions[0]
+        assert isinstance(instruction, Instruction)
+        assert instruction.apply_to == "**/*.py"
+        assert instruction.content == "Use type hints."
+        assert instruction.file_path == project / ".apm" / "instructions" / "python.instructions.md"
+
+    def test_changed_file_is_reparsed(self, project):
+        """Test that only the changed file is parsed again."""
+        _discover(project)
+        path = project / ".apm" / "instructions" / "python.instructions.md"
+        path.write_text("---\napplyTo: \"src/**\"\n---\nUse dataclasses.\n")
+        # Same mtime as before: the size tells the change apart
+        _backdate(path)
+
+        cache = PrimitiveCache.load(project)
+        collection = discover_primitives(str(project), cache=cache)
+
+        assert cache.stats == {"primitives_parsed": 1, "primitives_reused": 1}
+        assert collection.instructions[0].apply_to == "src/**"
+
+    def test_recently_modified_file_is_not_trusted(self, project):
+        """Test that a file changed within the racy window of the last save is reparsed."""
+        path = project / ".apm" / "chatmodes" / "reviewer.chatmode.md"
+        os.utime(path, None)
+        _discover(project)
+
+        cache = PrimitiveCache.load(project)
+        discover_primitives(str(project), cache=cache)
+
+        assert cache.stats == {"primitives_parsed": 1, "primitives_reused": 1}
+
+    def test_outdated_cache_file_is_ignored(self, project):
+        """Test that a corrupt or foreign cache file starts an empty cache."""
+        (project / PRIMITIVE_CACHE_FILE).parent.mkdir(parents=True)
+        (project / PRIMITIVE_CACHE_FILE).write_bytes(b"not a cache")
+
+        assert _discover(project).stats == {"primitives_parsed": 2, "primitives_reused": 0}
+        assert PrimitiveCache.load(project)._records
+
+    def test_unreadable_file_is_skipped(self, project):
+        """Test that primitive files that are not UTF-8 text are skipped without an error."""
+        (project / ".apm" / "chatmodes" / "reviewer.chatmode.md").write_bytes(b"\xff\xfe\x00binary")
+
+        collection = discover_primitives(str(project), cache=PrimitiveCache.load(project))
+
+        assert [primitive.name for primitive in collection.all_primitives()] == ["python"]
@@ -5,9 +5,11 @@ import tempfile
 import unittest
 from pathlib import Path
 
-from apm_cli.primitives.models import Chatmode, Instruction, Context, PrimitiveCollection
+from apm_cli.primitives.models import Chatmode, Instruction, Context, PrimitiveCollection, content_in_memory
 from apm_cli.primitives.parser import parse_primitive_file, validate_primitive, _extract_primitive_name
-from apm_cli.primitives.discovery import discover_primitives, find_primitive_files
+from apm_cli.primitives.discovery import (
+    LOCAL_PRIMITIVE_PATTERNS, discover_primitives, find_local_primitive_files, find_primitive_files
+)
 
 
 class TestPrimitiveModels(unittest.TestCase):
@@ -118,6 +120,31 @@ class TestPrimitiveModels(unittest.TestCase):
         self.assertEqual(len(collection.contexts), 1)
         self.assertEqual(len(collection.all_primitives()), 3)
 
+    def test_primitive_collection_indexes(self):
+        """Test name and source lookups, including after a local primitive replaces a dependency one."""
+        collection = PrimitiveCollection()
+        for name, source in [("a", "dependency:x"), ("b", "dependency:y"), ("c", "dependency:x"),
+                             ("a", "local"), ("b", "dependency:x")]:
+            collection.add_primitive(
+                Instruction(name, Path(f"{name}.instructions.md"), "desc", "**", name, source=source)
+            )
+        
+        self.assertEqual([(i.name, i.source) for i in collection.instructions],
+                         [("a", "local"), ("b", "dependency:y"), ("c", "dependency:x")])
+        self.assertEqual([i.name for i in collection.get_primitives_by_source("local")], ["a"])
+        self.assertEqual([i.name for i in collection.get_primitives_by_source("dependency:x")], ["c"])
+        self.assertEqual(collection.get_primitive("instruction", "b").source, "dependency:y")
+        self.assertIsNone(collection.get_primitive("chatmode", "a"))
+        self.assertEqual(len(collection.conflicts), 2)
+
+    def test_primitives_are_slotted(self):
+        """Test that primitive records carry no per-instance __dict__."""
+        context = Context("test", Path("test.context.md"), "content")
+        self.assertFalse(hasattr(context, "__dict__"))
+        self.assertEqual(context, Context("test", Path("test.context.md"), "content"))
+        with self.assertRaises(AttributeError):
+            context.extra = True
+
 
 class TestPrimitiveParser(unittest.TestCase):
     """Test cases for the primitive parser."""
@@ -428,6 +455,61 @@ description: Test context
         self.assertEqual(len(found_files), 1)
         self.assertTrue(found_files[0].name.endswith('.chatmode.md'))
 
+    def test_find_local_primitive_files_matches_per_pattern_search(self):
+        """Test that the one-pass scan finds the same files as the per-type pattern search."""
+        for file_rel_path in [
+            ".github/instructions/b.instructions.md",
+            "pkg/.apm/memory/notes.memory.md",
+            "pkg/api/local.instructions.md",
+            "pkg/api/plain.md",
+            "pkg/api/x.context.md",
+            "top.chatmode.md",
+        ]:
+            file_path = os.path.join(self.temp_dir_path, file_rel_path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "w") as f:
+                f.write("---\ndescription: Test\n---\n\n# Test")
+        
+        found = find_local_primitive_files(self.temp_dir_path)
+        
+        for primitive_type, patterns in LOCAL_PRIMITIVE_PATTERNS.items():
+            self.assertEqual(found[primitive_type], find_primitive_files(self.temp_dir_path, patterns))
+        self.assertEqual(
+            [path.name for path in found["context"]],
+            ["notes.memory.md", "x.context.md"]
+        )
+    
+    def test_find_local_primitive_files_skips_apm_modules(self):
+        """Test that dependency primitives are never found as local files."""
+        # apm_modules is skipped even when an ignore file re-includes it
+        with open(os.path.join(self.temp_dir_path, ".apmignore"), "w") as f:
+            f.write("!apm_modules/\n")
+        dependency_dir = os.path.join(self.temp_dir_path, "apm_modules", "org", "dep", ".apm", "instructions")
+        os.makedirs(dependency_dir)
+        with open(os.path.join(dependency_dir, "dep.instructions.md"), "w") as f:
+            f.write("---\napplyTo: \"**\"\n---\n\n# Dep")
+        
+        found = find_local_primitive_files(self.temp_dir_path)
+        
+        self.assertNotIn("dep.instructions.md", [path.name for path in found["instruction"]])
+    
+    def test_discovered_bodies_are_loaded_on_demand(self):
+        """Test that discovery keeps no bodies in memory and reads them when used."""
+        file_path = os.path.join(self.temp_dir_path, ".apm", "instructions", "style.instructions.md")
+        with open(file_path, "w") as f:
+            f.write("---\napplyTo: \"**\"\n---\n\nUse black.\n")
+        
+        instruction = discover_primitives(self.temp_dir_path).instructions[0]
+        
+        self.assertIsNone(content_in_memory(instruction))
+        self.assertEqual(instruction.content, "Use black.")
+        self.assertEqual(instruction.content, parse_primitive_file(file_path).content)
+        
+        # An edited file is read again, not served from the body cache
+        with open(file_path, "w") as f:
+            f.write("---\napplyTo: \"**\"\n---\n\nUse ruff format.\n")
+        self.assertEqual(instruction.content, "Use ruff format.")
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""Tests for downloading packages as tarballs over HTTP."""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from apm_cli.deps.archive_downloader import ArchiveDownloader, _is_selected, get_download_backend
+from apm_cli.deps.github_downloader import PACKAGE_SPARSE_PATTERNS, GitHubPackageDownloader
+from apm_cli.deps.install_timings import InstallTimings
+
+from ..utils.local_archive import LocalArchiveServer
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+
+@pytest.fixture
+def server():
+    """acme/rules, with documentation besides the package files, served as archives."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        host = LocalGitHost(root / "host")
+        host.add_package("acme/rules", {
+            "prompts/review.prompt.md": "Review the change.\n",
+            "docs/guide.md": "Not part of the package.\n",
+        })
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment())
+        with patch.dict(os.environ, env, clear=True), LocalArchiveServer(host) as server:
+            server.root = root
+            yield server
+
+
+def _downloader(server, backend="auto"):
+    return GitHubPackageDownloader(backend=backend, archive=ArchiveDownloader(archive_url=server.archive_url))
+
+
+class TestArchiveDownload:
+    """Test the archive backend and its fallback to git."""
+
+    def test_extracts_package_files_only(self, server):
+        """Test that the archive replaces git and only the package files are written."""
+        downloader = _downloader(server)
+        downloader.timings = InstallTimings()
+        target = server.root / "apm_modules" / "acme" / "rules"
+        with patch.object(downloader, "_fetch_commit") as fetch_commit:
+            package_info = downloader.download_package("acme/rules", target)
+            fetch_commit.assert_not_called()
+
+        assert package_info.resolved_reference.resolved_commit == server.host.head("acme/rules")
+        assert (target / "apm.yml").is_file()
+        assert (target / ".apm" / "instructions" / "rules.instructions.md").is_file()
+        assert (target / "prompts" / "review.prompt.md").is_file()
+        assert not (target / "docs").exists()
+        assert server.requests == 1
+        timings = downloader.timings.packages["acme/rules"]
+        assert timings.source == "archive"
+        assert 0 < timings.bytes_received < 4096
+
+    def test_falls_back_to_git(self, server):
+        """Test that a wrong commit or a missing archive is downloaded with git instead."""
+        first = server.host.head("acme/rules")
+        server.host.commit("acme/rules", {"docs/guide.md": "Changed.\n"})
+        head = server.host.head("acme/rules")
+        server.substitutes[head] = first
+        downloader = _downloader(server)
+        target = server.root / "apm_modules" / "acme" / "rules"
+        with patch.object(downloader, "_fetch_commit", wraps=downloader._fetch_commit) as fetch_commit:
+            package_info = downloader.download_package("acme/rules", target)
+            fetch_commit.assert_called_once()
+
+        assert package_info.resolved_reference.resolved_commit == head
+        assert not (target / "docs").exists()
+
+        server.host.add_package("acme/other")
+        with patch.object(downloader.archive, "archive_url", server.archive_url.replace("tar.gz", "missing")):
+            downloader.download_package("acme/other", server.root / "apm_modules" / "acme" / "other")
+        assert (server.root / "apm_modules" / "acme" / "other" / "apm.yml").is_file()
+
+    def test_archive_backend_does_not_fall_back(self, server):
+        """Test that the archive-only backend reports archive failures."""
+        server.substitutes[server.host.head("acme/rules")] = "0" * 40
+        with pytest.raises(RuntimeError, match="archive"):
+            _downloader(server, backend="archive").download_package("acme/rules", server.root / "rules")
+
+    def test_included_files_use_git(self, server):
+        """Test that packages including files beyond the package directories are checked out with git."""
+        server.host.commit("acme/rules", {"apm.yml": "name: rules\nversion: 1.0.0\ninclude:\n  - docs/\n"})
+        target = server.root / "apm_modules" / "acme" / "rules"
+
+        _downloader(server).download_package("acme/rules", target)
+
+        assert (target / "docs" / "guide.md").is_file()
+
+    def test_connections_are_reused(self, server):
+        """Test that consecutive archives are fetched over one pooled connection."""
+        for index in range(3):
+            server.host.add_package(f"acme/pkg{index}")
+        downloader = _downloader(server)
+        for index in range(3):
+            downloader.download_package(f"acme/pkg{index}", server.root / f"pkg{index}")
+
+        assert server.requests == 3
+        assert server.connections == 1
+
+
+class TestArchiveSettings:
+    """Test backend selection and pattern matching."""
+
+    def test_backend_from_environment(self):
+        with patch.dict(os.environ, {"APM_DOWNLOAD_BACKEND": "Archive"}):
+            assert get_download_backend() == "archive"
+        with patch.dict(os.environ, {"APM_DOWNLOAD_BACKEND": "ftp"}):
+            assert get_download_backend() == "auto"
+
+    def test_sparse_patterns(self):
+        patterns = PACKAGE_SPARSE_PATTERNS
+        assert _is_selected("apm.yml", patterns)
+        assert _is_selected(".apm/instructions/a.instructions.md", patterns)
+        assert _is_selected("review.prompt.md", patterns)
+        assert not _is_selected("docs/review.prompt.md", patterns)
+        assert not _is_selected("sub/apm.yml", patterns)
+        assert not _is_selected(".apm", patterns)
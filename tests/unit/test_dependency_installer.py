@@ -0,0 +1,149 @@
+"""Tests for concurrent installation of APM dependency packages."""
+
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+from apm_cli.deps.installer import InstallTask, get_install_path, install_packages
+from apm_cli.models.apm_package import DependencyReference
+from apm_cli.primitives.package_index import PACKAGE_INDEX_FILE
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+
+def _tasks(root: Path, *repos: str):
+    return [
+        InstallTask(dep_ref, get_install_path(root, dep_ref))
+        for dep_ref in (DependencyReference.parse(repo) for repo in repos)
+    ]
+
+
+@pytest.fixture
+def apm_modules():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir) / "apm_modules"
+
+
+class TestInstallPackages:
+    """Test ordering, failure modes and directory creation of concurrent installs."""
+
+    def test_results_keep_installation_order(self, apm_modules):
+        """Test that results come back in task order whatever order downloads finish in."""
+        delays = {"acme/slow": 0.2, "acme/medium": 0.1, "acme/fast": 0.0}
+        finished = []
+
+        def download(repo_ref, target_path):
+            time.sleep(delays[repo_ref])
+            return repo_ref
+
+        results = install_packages(
+            _tasks(apm_modules, *delays), download, jobs=3,
+            on_result=lambda result: finished.append(result.task.dep_ref.repo_url),
+        )
+
+        assert [result.package_info for result in results] == list(delays)
+        assert finished == ["acme/fast", "acme/medium", "acme/slow"]
+
+    def test_downloads_run_concurrently_within_jobs(self, apm_modules):
+        """Test that no more than `jobs` downloads run at once."""
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def download(repo_ref, target_path):
+            with lock:
+                running.append(repo_ref)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(repo_ref)
+            return repo_ref
+
+        install_packages(_tasks(apm_modules, *(f"acme/pkg{i}" for i in range(8))), download, jobs=3)
+
+        assert max(peak) == 3
+
+    def test_keep_going_installs_other_packages(self, apm_modules):
+        """Test that a failed package does not stop the others by default."""
+        def download(repo_ref, target_path):
+            if repo_ref == "acme/broken":
+                raise RuntimeError("not an APM package")
+            return repo_ref
+
+        results = install_packages(_tasks(apm_modules, "acme/broken", "acme/a", "acme/b"), download, jobs=1)
+
+        assert [result.success for result in results] == [False, True, True]
+        assert str(results[0].error) == "not an APM package"
+
+    def test_fail_fast_skips_remaining_packages(self, apm_modules):
+        """Test that fail-fast starts no download after the first failure."""
+        started = []
+
+        def download(repo_ref, target_path):
+            started.append(repo_ref)
+            if repo_ref == "acme/broken":
+                raise RuntimeError("not an APM package")
+            return repo_ref
+
+        tasks = _tasks(apm_modules, "acme/broken", *(f"acme/pkg{i}" for i in range(6)))
+        results = install_packages(tasks, download, jobs=2, fail_fast=True)
+
+        assert results[0].error is not None
+        assert len(started) <= 3
+        assert all(result.skipped for result in results if result.task.dep_ref.repo_url not in started)
+
+    def test_fail_fast_does_not_count_duplicates_as_skipped(self, apm_modules):
+        """Test that tasks sharing an install path are not reported as stopped by fail-fast."""
+        def download(repo_ref, target_path):
+            raise RuntimeError("not an APM package")
+
+        results = install_packages(
+            _tasks(apm_modules, "acme/broken", "acme/a", "acme/broken"), download, jobs=1, fail_fast=True
+        )
+
+        assert [result.skipped for result in results] == [False, True, False]
+        assert [result.duplicate for result in results] == [False, False, True]
+
+    def test_shared_org_directory_is_created_once(self, apm_modules):
+        """Test that packages of one org share its directory and duplicates download once."""
+        downloads = []
+
+        def download(repo_ref, target_path):
+            assert target_path.parent.is_dir()
+            downloads.append(repo_ref)
+            return repo_ref
+
+        results = install_packages(
+            _tasks(apm_modules, "acme/a", "acme/b", "acme/a", "other/c"), download, jobs=4
+        )
+
+        assert sorted(downloads) == ["acme/a", "acme/b", "other/c"]
+        assert results[2].duplicate and not results[2].skipped
+        assert sorted(path.name for path in apm_modules.iterdir()) == ["acme", "other"]
+
+    def test_installs_from_local_git_host(self, apm_modules):
+        """Test concurrent downloads through git against local bare repositories."""
+        host = LocalGitHost(apm_modules.parent / "host")
+        repos = [f"acme/pkg{i}" for i in range(4)]
+        for repo in repos:
+            host.add_package(repo, {".apm/instructions/style.instructions.md": "---\napplyTo: '**'\n---\nBe terse.\n"})
+
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment())
+        with patch.dict(os.environ, env, clear=True):
+            downloader = GitHubPackageDownloader()
+            results = install_packages(_tasks(apm_modules, *repos), downloader.download_package, jobs=4)
+
+        assert all(result.success for result in results), [result.error for result in results]
+        for repo in repos:
+            package_path = apm_modules / repo
+            assert (package_path / "apm.yml").is_file()
+            assert (package_path / PACKAGE_INDEX_FILE).is_file()
+            assert not (package_path / ".git").exists()
+        assert results[0].package_info.package.resolved_commit == host.head("acme/pkg0")
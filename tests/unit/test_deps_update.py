@@ -0,0 +1,91 @@
+"""Tests for `apm deps update` through repository mirrors."""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from apm_cli.cli import cli
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+from apm_cli.deps.lockfile import LOCKFILE_NAME, Lockfile
+from apm_cli.deps.mirror_cache import MirrorCache
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+
+@pytest.fixture
+def project(monkeypatch):
+    """A project with acme/rules#main installed and locked."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        host = LocalGitHost(root / "host")
+        host.add_package("acme/rules", {".apm/context/notes.context.md": "first\n"})
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment())
+        project = root / "project"
+        project.mkdir()
+        (project / "apm.yml").write_text("name: app\nversion: 1.0.0\ndependencies:\n  apm:\n    - acme/rules#main\n")
+        monkeypatch.chdir(project)
+        with patch.dict(os.environ, env, clear=True):
+            result = CliRunner().invoke(cli, ["install", "--only", "apm"])
+            assert result.exit_code == 0, result.output
+            yield host, project
+
+
+def _update():
+    result = CliRunner().invoke(cli, ["deps", "update"])
+    assert result.exit_code == 0, result.output
+    return result
+
+
+class TestDepsUpdate:
+    """Test updating installed packages."""
+
+    def test_unchanged_package_is_only_resolved(self, project):
+        """Test that a package still at its locked commit costs one ls-remote."""
+        host, project = project
+        installed = project / "apm_modules" / "acme" / "rules"
+        inode = installed.stat().st_ino
+
+        with patch.object(GitHubPackageDownloader, "_checkout_from_mirror") as checkout, \
+                patch.object(GitHubPackageDownloader, "_list_remote_refs",
+                             autospec=True, side_effect=GitHubPackageDownloader._list_remote_refs) as ls_remote:
+            result = _update()
+            checkout.assert_not_called()
+
+        assert ls_remote.call_count == 1
+        assert "1 already up to date" in result.output
+        assert installed.stat().st_ino == inode
+
+    def test_changed_package_is_fetched_into_mirror_and_swapped(self, project):
+        """Test that new commits are fetched into the mirror and replace the installed package."""
+        host, project = project
+        installed = project / "apm_modules" / "acme" / "rules"
+        for version in ("second", "third"):
+            host.commit("acme/rules", {".apm/context/notes.context.md": f"{version}\n"})
+            _update()
+
+            assert (installed / ".apm" / "context" / "notes.context.md").read_text() == f"{version}\n"
+            assert not (installed / ".git").exists()
+            assert Lockfile.load(project / LOCKFILE_NAME).dependencies["acme/rules"].resolved_commit == \
+                host.head("acme/rules")
+        assert [path.name for path in installed.parent.iterdir()] == ["rules"]
+
+        mirror = MirrorCache().path("acme/rules")
+        assert (mirror / "refs" / "heads" / "main").read_text().strip() == host.head("acme/rules")
+        # Neither remote URLs nor worktrees are left behind
+        assert "remote" not in (mirror / "config").read_text()
+        assert not (mirror / "worktrees").exists()
+
+    def test_update_without_partial_clone_support(self, project):
+        """Test updating from servers that cannot send files on their own (protocol v0)."""
+        host, project = project
+        host.commit("acme/rules", {".apm/context/notes.context.md": "second\n"})
+        with patch.dict(os.environ, host.environment(extra_config=[("protocol.version", "0")])):
+            _update()
+
+        installed = project / "apm_modules" / "acme" / "rules"
+        assert (installed / ".apm" / "context" / "notes.context.md").read_text() == "second\n"
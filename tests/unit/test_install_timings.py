@@ -0,0 +1,105 @@
+"""Tests for `apm install --timings` and `--timings-json`."""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from apm_cli.cli import cli
+from apm_cli.deps.install_timings import InstallTimings, format_bytes, format_duration
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+
+@pytest.fixture
+def project(monkeypatch):
+    """A project depending on acme/app, which depends on acme/base."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        host = LocalGitHost(root / "host")
+        host.add_package("acme/base")
+        host.add_package("acme/app", {"apm.yml": "name: app\nversion: 1.0.0\ndependencies:\n  apm:\n    - acme/base\n"})
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment())
+        project = root / "project"
+        project.mkdir()
+        (project / "apm.yml").write_text("name: project\nversion: 1.0.0\ndependencies:\n  apm:\n    - acme/app\n")
+        monkeypatch.chdir(project)
+        with patch.dict(os.environ, env, clear=True):
+            yield project
+
+
+def _install(*args):
+    result = CliRunner().invoke(cli, ["install", "--only", "apm", *args])
+    assert result.exit_code == 0, result.output
+    return result
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestInstallTimings:
+    """Test the timings recorded while installing."""
+
+    def test_json_records_phases_per_package(self, project):
+        """Test that each package reports its phases, source and bytes, followed by a summary."""
+        _install("--timings-json", "timings.ndjson")
+
+        *packages, summary = _records(project / "timings.ndjson")
+        assert [record["package"] for record in packages] == ["acme/app", "acme/base"]
+        for record in packages:
+            assert record["source"] == "git"
+            assert record["cache"] == "miss"
+            assert record["bytes_received"] > 0
+            assert {"resolve", "apm.yml", "fetch", "checkout", "validate", "manifest"} <= set(record["phases_ms"])
+            assert record["elapsed_ms"] > 0
+        assert summary["type"] == "summary"
+        assert summary["packages"] == 2 and summary["cache_hits"] == 0
+        assert {"total", "resolution", "download"} <= set(summary["stages_ms"])
+
+    def test_cache_hits(self, project):
+        """Test that intact installed packages and stored packages are reported as hits."""
+        _install()
+        _install("--timings-json", "installed.ndjson")
+        assert [record["source"] for record in _records(project / "installed.ndjson")[:-1]] == ["installed"] * 2
+
+        shutil.rmtree(project / "apm_modules")
+        _install("--timings-json", "stored.ndjson")
+        records = _records(project / "stored.ndjson")
+        assert [record["source"] for record in records[:-1]] == ["store"] * 2
+        assert records[-1]["cache_hits"] == 2
+        assert all(record["bytes_received"] == 0 for record in records[:-1])
+
+    def test_table(self, project):
+        """Test that --timings prints a row per package."""
+        result = _install("--timings")
+
+        table = result.output.split("APM Install Timings", 1)[1].splitlines()
+        assert [line.split()[:2] for line in table[2:4]] == [["acme/app", "git"], ["acme/base", "git"]]
+        assert "download" in table[4]
+
+    def test_formatting(self):
+        assert format_duration(None) == "-"
+        assert format_duration(0.0123) == "12ms"
+        assert format_duration(2.5) == "2.50s"
+        assert format_bytes(0) == "-"
+        assert format_bytes(512) == "512B"
+        assert format_bytes(3 * 1024 * 1024) == "3.0MB"
+
+    def test_phases_accumulate(self):
+        timings = InstallTimings()
+        for _ in range(2):
+            with timings.phase("acme/app", "fetch"):
+                pass
+        timings.add_bytes("acme/app", 10)
+        timings.add_bytes("acme/app", 5)
+
+        assert list(timings.packages["acme/app"].phases) == ["fetch"]
+        assert timings.packages["acme/app"].bytes_received == 15
+        assert timings.rows()[0][0] == "acme/app"
@@ -0,0 +1,148 @@
+"""Tests for integrity manifests of installed packages."""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from apm_cli.cli import cli
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+from apm_cli.deps.integrity import INTEGRITY_MANIFEST_FILE, IntegrityManifest, check_installed_package
+from apm_cli.deps.lockfile import LOCKFILE_NAME, Lockfile
+from apm_cli.deps.package_store import hash_tree
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+COMMIT = "a" * 40
+
+
+@pytest.fixture
+def package():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        package = Path(temp_dir).resolve() / "pkg"
+        (package / ".apm" / "instructions").mkdir(parents=True)
+        (package / "apm.yml").write_text("name: pkg\nversion: 1.0.0\n")
+        (package / ".apm" / "instructions" / "rule.instructions.md").write_text("Rule.\n")
+        IntegrityManifest.build(package, COMMIT).save(package)
+        yield package
+
+
+class TestIntegrityManifest:
+    """Test building and checking manifests."""
+
+    def test_round_trip(self, package):
+        """Test that a saved manifest loads back and matches the store's tree hash."""
+        manifest = IntegrityManifest.load(package)
+
+        assert manifest == IntegrityManifest.build(package, COMMIT)
+        assert sorted(manifest.files) == [".apm/instructions/rule.instructions.md", "apm.yml"]
+        assert manifest.tree == hash_tree(package)[0]
+        assert check_installed_package(package, COMMIT) == (manifest, None)
+
+    def test_detects_missing_and_modified_files(self, package):
+        """Test that stat checks catch removed and rewritten files."""
+        rule = package / ".apm" / "instructions" / "rule.instructions.md"
+        rule.write_text("Changed rule.\n")
+        assert check_installed_package(package, COMMIT)[1] == ".apm/instructions/rule.instructions.md was modified"
+
+        rule.unlink()
+        assert check_installed_package(package, COMMIT)[1] == ".apm/instructions/rule.instructions.md is missing"
+
+    def test_detects_added_files(self, package):
+        """Test that files dropped into an installed package are caught, with or without --verify."""
+        (package / ".apm" / "instructions" / "evil.instructions.md").write_text("Injected.\n")
+
+        for deep in (False, True):
+            assert check_installed_package(package, COMMIT, deep=deep)[1] == \
+                ".apm/instructions/evil.instructions.md was added"
+
+    def test_deep_check_hashes_contents(self, package):
+        """Test that --verify catches edits that kept the size and mtime."""
+        rule = package / ".apm" / "instructions" / "rule.instructions.md"
+        rule_stat = rule.stat()
+        rule.write_text("Rul3.\n")
+        os.utime(rule, ns=(rule_stat.st_atime_ns, rule_stat.st_mtime_ns))
+
+        assert check_installed_package(package, COMMIT)[1] is None
+        assert check_installed_package(package, COMMIT, deep=True)[1] == \
+            ".apm/instructions/rule.instructions.md was modified"
+
+    def test_other_commit_or_no_manifest(self, package):
+        """Test that packages at another commit or without a manifest are not trusted."""
+        assert check_installed_package(package, "b" * 40)[1] == "installed at aaaaaaaa, expected bbbbbbbb"
+
+        (package / INTEGRITY_MANIFEST_FILE).unlink()
+        assert check_installed_package(package, COMMIT) == (None, "no integrity manifest")
+        assert check_installed_package(package.parent / "missing", COMMIT) == (None, "not installed")
+
+
+class TestInstallVerification:
+    """Test that `apm install` re-installs only damaged or outdated packages."""
+
+    @pytest.fixture
+    def project(self, monkeypatch):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir).resolve()
+            host = LocalGitHost(root / "host")
+            host.add_package("acme/rules")
+            host.add_package("acme/style")
+            env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+            env.update(host.environment())
+            project = root / "project"
+            project.mkdir()
+            (project / "apm.yml").write_text("name: app\nversion: 1.0.0\ndependencies:\n  apm:\n"
+                                             "    - acme/rules\n    - acme/style\n")
+            monkeypatch.chdir(project)
+            with patch.dict(os.environ, env, clear=True):
+                assert self._install().exit_code == 0
+                yield host, project
+
+    @staticmethod
+    def _install(*args):
+        with patch.object(GitHubPackageDownloader, "download_package", autospec=True,
+                          side_effect=GitHubPackageDownloader.download_package) as download:
+            result = CliRunner().invoke(cli, ["install", "--only", "apm", *args])
+        result.downloaded = sorted(call.args[1] for call in download.call_args_list)
+        return result
+
+    def test_damaged_package_is_installed_again(self, project):
+        """Test that only the package with a missing file is downloaded again."""
+        host, project = project
+        (project / "apm_modules" / "acme" / "rules" / "apm.yml").unlink()
+
+        result = self._install()
+
+        assert result.exit_code == 0, result.output
+        assert result.downloaded == ["acme/rules"]
+        assert "apm.yml is missing" in result.output
+        assert (project / "apm_modules" / "acme" / "rules" / "apm.yml").is_file()
+        assert self._install().downloaded == []
+
+    def test_intact_packages_are_kept_without_lockfile(self, project):
+        """Test that without apm.lock only packages behind their reference are downloaded again."""
+        host, project = project
+        (project / LOCKFILE_NAME).unlink()
+        host.commit("acme/style", {"apm.yml": "name: style\nversion: 2.0.0\n"})
+
+        result = self._install()
+
+        assert result.exit_code == 0, result.output
+        assert result.downloaded == ["acme/style"]
+        locked = Lockfile.load(project / LOCKFILE_NAME).dependencies
+        assert locked["acme/rules"].resolved_commit == host.head("acme/rules")
+        assert locked["acme/style"].resolved_commit == host.head("acme/style")
+        assert locked["acme/rules"].ref_type == "branch"
+
+    def test_update_keeps_unchanged_packages(self, project):
+        """Test that --update only downloads packages whose branch moved."""
+        host, project = project
+        host.commit("acme/style", {"apm.yml": "name: style\nversion: 2.0.0\n"})
+
+        result = self._install("--update")
+
+        assert result.exit_code == 0, result.output
+        assert result.downloaded == ["acme/style"]
+        assert "version: 2.0.0" in (project / "apm_modules" / "acme" / "style" / "apm.yml").read_text()
@@ -0,0 +1,129 @@
+"""Tests for the apm.lock lockfile and locked installs."""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from apm_cli.cli import cli
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+from apm_cli.deps.lockfile import LOCKFILE_NAME, LockedDependency, Lockfile, LockfileError
+from apm_cli.models.apm_package import DependencyReference
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir).resolve()
+
+
+class TestLockfile:
+    """Test reading, writing and checking lockfiles."""
+
+    def test_round_trip(self, temp_dir):
+        """Test that a saved lockfile loads back unchanged."""
+        lockfile = Lockfile()
+        lockfile.dependencies["acme/rules"] = LockedDependency("acme/rules", "main", "branch", "a" * 40, "t" * 64)
+        lockfile.dependencies["acme/base"] = LockedDependency("acme/base", "v1.0.0", "tag", "b" * 40, None, "acme/rules")
+        lockfile.save(temp_dir / LOCKFILE_NAME)
+
+        loaded = Lockfile.load(temp_dir / LOCKFILE_NAME)
+
+        assert loaded == lockfile
+        assert list(loaded.dependencies) == ["acme/base", "acme/rules"]
+
+    def test_missing_and_invalid_lockfiles(self, temp_dir):
+        """Test that a missing lockfile is None and a broken one is an error."""
+        assert Lockfile.load(temp_dir / LOCKFILE_NAME) is None
+
+        (temp_dir / LOCKFILE_NAME).write_text("lockfile_version: 1\ndependencies:\n  acme/rules:\n    resolved_commit: main\n")
+        with pytest.raises(LockfileError):
+            Lockfile.load(temp_dir / LOCKFILE_NAME)
+
+    def test_find_outdated(self):
+        """Test detecting dependencies added, removed or re-pointed in apm.yml."""
+        lockfile = Lockfile()
+        lockfile.dependencies["acme/rules"] = LockedDependency("acme/rules", "main", "branch", "a" * 40)
+        lockfile.dependencies["acme/old"] = LockedDependency("acme/old", None, "branch", "b" * 40)
+
+        problems = lockfile.find_outdated([DependencyReference.parse("acme/rules#v2"),
+                                           DependencyReference.parse("acme/new")])
+
+        assert problems == [
+            "acme/rules is locked at 'main' but apm.yml asks for 'v2'",
+            "acme/new is not locked",
+            "acme/old is locked but no longer a dependency",
+        ]
+        assert lockfile.get(DependencyReference.parse("acme/rules#main")) is not None
+        assert lockfile.get(DependencyReference.parse("acme/rules#v2")) is None
+
+
+class TestLockedInstall:
+    """Test `apm install` with apm.lock against a local git host."""
+
+    @pytest.fixture
+    def project(self, temp_dir, monkeypatch):
+        host = LocalGitHost(temp_dir / "host")
+        host.add_package("acme/rules")
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment())
+        project = temp_dir / "project"
+        project.mkdir()
+        (project / "apm.yml").write_text("name: app\nversion: 1.0.0\ndependencies:\n  apm:\n    - acme/rules#main\n")
+        monkeypatch.chdir(project)
+        with patch.dict(os.environ, env, clear=True):
+            yield host, project
+
+    def _install(self, *args):
+        result = CliRunner().invoke(cli, ["install", "--only", "apm", *args])
+        return result
+
+    def test_install_writes_lockfile(self, project):
+        """Test that installing records the resolved commit and tree."""
+        host, project = project
+        result = self._install()
+        assert result.exit_code == 0, result.output
+
+        locked = Lockfile.load(project / LOCKFILE_NAME).dependencies["acme/rules"]
+        assert (locked.reference, locked.ref_type) == ("main", "branch")
+        assert locked.resolved_commit == host.head("acme/rules")
+        assert locked.tree
+
+    def test_locked_install_skips_resolution(self, project):
+        """Test that a fresh checkout installs the locked commit even after the branch moved."""
+        host, project = project
+        assert self._install().exit_code == 0
+        locked_commit = host.head("acme/rules")
+        host.commit("acme/rules", {"apm.yml": "name: rules\nversion: 2.0.0\n"})
+        shutil.rmtree(project / "apm_modules")
+
+        with patch.object(GitHubPackageDownloader, "resolve_git_reference") as resolve:
+            result = self._install("--frozen")
+            resolve.assert_not_called()
+
+        assert result.exit_code == 0, result.output
+        assert "version: 1.0.0" in (project / "apm_modules" / "acme" / "rules" / "apm.yml").read_text()
+        assert Lockfile.load(project / LOCKFILE_NAME).dependencies["acme/rules"].resolved_commit == locked_commit
+
+        # --update resolves the branch again and moves the lock
+        assert self._install("--update").exit_code == 0
+        assert Lockfile.load(project / LOCKFILE_NAME).dependencies["acme/rules"].resolved_commit == host.head("acme/rules")
+
+    def test_frozen_fails_when_lockfile_is_out_of_date(self, project):
+        """Test that --frozen refuses a missing or stale lockfile."""
+        host, project = project
+        result = self._install("--frozen")
+        assert result.exit_code != 0
+        assert "requires apm.lock" in result.output
+
+        assert self._install().exit_code == 0
+        (project / "apm.yml").write_text("name: app\nversion: 1.0.0\ndependencies:\n  apm:\n    - acme/rules#v2\n")
+        result = self._install("--frozen")
+        assert result.exit_code != 0
+        assert "out of date" in result.output
@@ -0,0 +1,203 @@
+"""Tests for the machine-wide content-addressed package store."""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from apm_cli.commands.cache import cache, format_size, parse_size
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+from apm_cli.deps import package_store
+from apm_cli.deps.package_store import PackageStore, StoreCorruptedError
+from apm_cli.models.apm_package import DependencyReference, GitReferenceType, ResolvedReference
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir).resolve()
+
+
+def _stage(store: PackageStore, files) -> Path:
+    staging = store.create_staging_dir()
+    for relative_path, text in files.items():
+        (staging / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (staging / relative_path).write_text(text)
+    return staging
+
+
+class TestPackageStore:
+    """Test storing, linking and evicting package trees."""
+
+    def test_add_and_materialize_with_hardlinks(self, temp_dir):
+        """Test that a stored package is linked into projects, not copied."""
+        store = PackageStore(temp_dir / "store")
+        package_dir = store.add(_stage(store, {"apm.yml": "name: a\n", ".apm/x.md": "x"}), "c1" * 20, "acme/a")
+
+        assert store.lookup("c1" * 20) == package_dir
+        target = temp_dir / "project" / "apm_modules" / "acme" / "a"
+        store.materialize(package_dir, target)
+
+        assert (target / ".apm" / "x.md").read_text() == "x"
+        assert os.stat(target / "apm.yml").st_ino == os.stat(package_dir / "apm.yml").st_ino
+
+    def test_identical_trees_are_stored_once(self, temp_dir):
+        """Test that two commits with the same files share one tree."""
+        store = PackageStore(temp_dir / "store")
+        first = store.add(_stage(store, {"apm.yml": "name: a\n"}), "c1" * 20, "acme/a")
+        second = store.add(_stage(store, {"apm.yml": "name: a\n"}), "c2" * 20, "fork/a")
+
+        assert first == second
+        assert len(store.entries()) == 1
+        assert not list(store.staging_root.iterdir())
+
+    def test_modified_file_is_detected(self, temp_dir):
+        """Test that editing a file through a hardlink invalidates the entry."""
+        store = PackageStore(temp_dir / "store")
+        package_dir = store.add(_stage(store, {"apm.yml": "name: a\n"}), "c1" * 20, "acme/a")
+        target = temp_dir / "project"
+        store.materialize(package_dir, target)
+        with open(target / "apm.yml", "a") as f:
+            f.write("description: edited\n")
+
+        with pytest.raises(StoreCorruptedError):
+            store.materialize(package_dir, temp_dir / "other")
+
+    def test_prune_evicts_least_recently_used(self, temp_dir):
+        """Test that pruning evicts the oldest entries until the store fits the cap."""
+        store = PackageStore(temp_dir / "store")
+        for index, name in enumerate(["old", "middle", "new"]):
+            store.add(_stage(store, {"apm.yml": name * 100}), f"{index}" * 40, f"acme/{name}")
+            # Last use one hour apart, "old" first
+            last_use = time.time() - 3600 * (3 - index)
+            metadata = next(path for path in store.packages_dir.glob("*.json")
+                            if store._read_json(path)["source"] == f"acme/{name}")
+            os.utime(metadata, (last_use, last_use))
+        store.lookup("0" * 40)  # Using "old" makes "middle" the least recently used
+
+        evicted = store.prune(max_size=700)
+
+        assert [entry.source for entry in evicted] == ["acme/middle"]
+        assert store.lookup("1" * 40) is None
+        assert sorted(entry.source for entry in store.entries()) == ["acme/new", "acme/old"]
+
+    def test_refs_are_remembered(self, temp_dir):
+        """Test recording the last resolution of a branch."""
+        store = PackageStore(temp_dir / "store")
+        store.remember_ref("acme/a", "main", "branch", "c1" * 20)
+
+        assert store.recall_ref("acme/a", "main") == ("branch", "c1" * 20)
+        assert store.recall_ref("acme/a", "dev") is None
+
+
+class TestDownloaderWithStore:
+    """Test that downloads go through the store and warm installs need no network."""
+
+    def _download(self, host, repo_ref, target):
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment())
+        with patch.dict(os.environ, env, clear=True):
+            return GitHubPackageDownloader().download_package(repo_ref, target)
+
+    def test_warm_install_without_network(self, temp_dir):
+        """Test that a stored package installs into a new project with the remote unreachable."""
+        host = LocalGitHost(temp_dir / "host")
+        host.add_package("acme/rules")
+        commit = host.head("acme/rules")
+        self._download(host, "acme/rules", temp_dir / "one" / "acme" / "rules")
+        # The remote is gone: only the store can serve the package now
+        shutil.rmtree(host.root)
+
+        with patch("apm_cli.deps.github_downloader.Repo") as mock_repo:
+            by_branch = self._download(host, "acme/rules", temp_dir / "two" / "acme" / "rules")
+            by_commit = self._download(host, f"acme/rules#{commit}", temp_dir / "three" / "acme" / "rules")
+            mock_repo.init.assert_not_called()
+
+        assert by_branch.resolved_reference.resolved_commit == commit
+        assert by_commit.resolved_reference.resolved_commit == commit
+        assert (temp_dir / "three" / "acme" / "rules" / "apm.yml").is_file()
+
+    def test_corrupted_entry_is_downloaded_again(self, temp_dir):
+        """Test that a stored package edited through a hardlink is fetched again."""
+        host = LocalGitHost(temp_dir / "host")
+        host.add_package("acme/rules")
+        first = temp_dir / "one" / "acme" / "rules"
+        self._download(host, "acme/rules", first)
+        original = (first / "apm.yml").read_text()
+        with open(first / "apm.yml", "a") as f:
+            f.write("# local edit\n")
+
+        second = temp_dir / "two" / "acme" / "rules"
+        self._download(host, "acme/rules", second)
+
+        assert (second / "apm.yml").read_text() == original
+
+    def test_failed_link_does_not_leave_a_partial_package(self, temp_dir):
+        """Test that a package whose linking fails partway is copied whole, or not installed at all."""
+        host = LocalGitHost(temp_dir / "host")
+        host.add_package("acme/rules", {".apm/instructions/a.instructions.md": "---\napplyTo: '**'\n---\nA.\n"})
+        real_link_file = package_store._link_file
+        calls = []
+
+        def link_file(source, target):
+            calls.append(target)
+            if len(calls) == 2:
+                raise OSError(28, "No space left on device")
+            real_link_file(source, target)
+
+        target = temp_dir / "one" / "acme" / "rules"
+        with patch.object(package_store, "_link_file", side_effect=link_file):
+            self._download(host, "acme/rules", target)
+        assert sorted(str(path.relative_to(target)) for path in target.rglob("*") if path.is_file()) == [
+            ".apm-index.json", ".apm-integrity.json", ".apm/instructions/a.instructions.md",
+            ".apm/instructions/rules.instructions.md", "apm.yml"]
+
+        target = temp_dir / "two" / "acme" / "rules"
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment())
+        with patch.dict(os.environ, env, clear=True), \
+                patch.object(package_store, "_link_file", side_effect=OSError(28, "No space left on device")), \
+                patch("apm_cli.deps.github_downloader.shutil.copytree", side_effect=OSError(28, "No space left on device")), \
+                pytest.raises(RuntimeError, match="No space left"):
+            GitHubPackageDownloader()._download_into_store(
+                DependencyReference.parse("acme/rules"),
+                ResolvedReference("acme/rules", GitReferenceType.COMMIT, host.head("acme/rules"), "main"), target)
+        assert not target.exists()
+
+
+class TestCacheCommand:
+    """Test the `apm cache` command group."""
+
+    def test_parse_and_format_size(self):
+        """Test size parsing and formatting."""
+        assert parse_size("500M") == 500 * 1024 ** 2
+        assert parse_size("2GB") == 2 * 1024 ** 3
+        assert parse_size("1024") == 1024
+        with pytest.raises(ValueError):
+            parse_size("lots")
+        assert format_size(1536) == "1.5KB"
+
+    def test_stats_and_prune(self, temp_dir, monkeypatch):
+        """Test reporting and pruning the store from the command line."""
+        monkeypatch.setenv("APM_STORE_DIR", str(temp_dir / "store"))
+        store = PackageStore()
+        store.add(_stage(store, {"apm.yml": "a" * 2048}), "c1" * 20, "acme/a")
+
+        result = CliRunner().invoke(cache, ["stats"])
+        assert result.exit_code == 0
+        assert "Packages: 1 (1 files, 2.0KB)" in result.output
+
+        result = CliRunner().invoke(cache, ["prune", "--max-size", "1K", "--dry-run"])
+        assert "Would evict 1 packages" in result.output
+        assert len(store.entries()) == 1
+
+        result = CliRunner().invoke(cache, ["prune", "--max-size", "1K"])
+        assert result.exit_code == 0
+        assert store.entries() == []
@@ -0,0 +1,167 @@
+"""Unit tests for the gitignore-aware project walker."""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from apm_cli.compilation.distributed_compiler import DistributedAgentsCompiler
+from apm_cli.compilation.file_index import ProjectFileIndex
+from apm_cli.primitives.discovery import discover_primitives
+from apm_cli.utils.project_walker import ProjectWalker, is_ignored, parse_ignore_lines
+
+
+def _write(root: Path, relative_path: str, content: str = "") -> None:
+    path = root / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+@pytest.fixture
+def project():
+    """Create a project with ignored, excluded and virtualenv directories."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        _write(root, "src/main.py")
+        _write(root, "src/debug.log")
+        _write(root, "src/generated/out.py")
+        _write(root, "docs/guide.md")
+        _write(root, "node_modules/pkg/index.js")
+        _write(root, "env/pyvenv.cfg")
+        _write(root, "env/lib/site.py")
+        _write(root, ".hidden/secret.py")
+        _write(root, ".gitignore", "*.log\ngenerated/\n")
+        yield root
+
+
+def _walked_paths(walker: ProjectWalker):
+    return {walked.relative_path: walked.files for walked in walker.walk()}
+
+
+class TestIgnoreRules:
+    """Test gitignore pattern semantics."""
+
+    @pytest.mark.parametrize("lines, path, is_dir, expected", [
+        (["*.log"], "a/b/c.log", False, True),
+        (["/build"], "build", True, True),
+        (["/build"], "src/build", True, False),
+        (["docs/*.md"], "docs/a.md", False, True),
+        (["docs/*.md"], "docs/sub/a.md", False, False),
+        (["**/tmp"], "a/b/tmp", True, True),
+        (["out/"], "out", False, False),
+        (["out/"], "out", True, True),
+        (["*.log", "!keep.log"], "keep.log", False, False),
+        (["# comment", ""], "comment", False, False),
+        (["file[0-9].txt"], "file7.txt", False, True),
+    ])
+    def test_patterns(self, lines, path, is_dir, expected):
+        """Test matching of individual patterns."""
+        assert is_ignored((("", parse_ignore_lines(lines)),), path, is_dir) is expected
+
+    def test_nested_rules_are_relative_to_their_directory(self):
+        """Test that a nested ignore file is anchored at its own directory and takes precedence."""
+        groups = (
+            ("", parse_ignore_lines(["*.md"])),
+            ("docs", parse_ignore_lines(["/api", "!*.md"])),
+        )
+        assert is_ignored(groups, "docs/api", True)
+        assert not is_ignored(groups, "src/api", True)
+        assert not is_ignored(groups, "docs/guide.md", False)
+        assert is_ignored(groups, "README.md", False)
+
+
+class TestProjectWalker:
+    """Test pruning and memoization of the walk."""
+
+    def test_prunes_ignored_excluded_hidden_and_virtualenv_directories(self, project):
+        """Test that pruned directories are never walked."""
+        walker = ProjectWalker(project)
+
+        assert _walked_paths(walker) == {
+            "": [],
+            "docs": ["guide.md"],
+            "src": ["main.py"],
+        }
+        root = next(walker.walk())
+        assert root.directories == ["docs", "src"]
+        assert root.hidden_directories == [".hidden"]
+        assert walker.ignore_files == [".gitignore"]
+
+    def test_never_descends_into_pruned_directories(self, project):
+        """Test that pruned directories are not even listed."""
+        listed = []
+        original = os.scandir
+
+        def tracking_scandir(path):
+            listed.append(Path(path))
+            return original(path)
+
+        with patch("apm_cli.utils.project_walker.os.scandir", side_effect=tracking_scandir):
+            list(ProjectWalker(project).walk())
+
+        assert sorted(listed) == [project, project / "docs", project / "env", project / "src"]
+
+    def test_walk_is_memoized(self, project):
+        """Test that later walks replay the first one."""
+        walker = ProjectWalker(project)
+        first = list(walker.walk())
+        _write(project, "new/file.py")
+
+        assert list(walker.walk()) == first
+
+    def test_apmignore_and_apm_yml_excludes(self, project):
+        """Test .apmignore re-includes and compilation.exclude from apm.yml."""
+        _write(project, ".apmignore", "!generated/\n")
+        _write(project, "apm.yml", "name: test\ncompilation:\n  exclude:\n    - docs/\n")
+
+        walked = _walked_paths(ProjectWalker.for_project(project))
+
+        assert "docs" not in walked
+        assert walked["src/generated"] == ["out.py"]
+
+    def test_reuses_recorded_listings(self, project):
+        """Test that the reuse callback replaces listing unchanged directories."""
+        walker = ProjectWalker(project)
+        previous = {walked.path: walked.listing for walked in walker.walk()}
+
+        reused = ProjectWalker(project)
+        walked = list(reused.walk(lambda path, mtime_ns: previous.get(path)))
+
+        assert all(directory.reused for directory in walked)
+        assert _walked_paths(reused) == _walked_paths(walker)
+
+
+class TestSharedWalk:
+    """Test that discovery, the file index and orphan detection share one walk."""
+
+    def test_consumers_honor_ignore_rules(self, project):
+        """Test that every consumer sees the same pruned tree."""
+        _write(project, ".apm/instructions/python.instructions.md",
+               "---\napplyTo: \"**/*.py\"\n---\nUse type hints.\n")
+        _write(project, "src/generated/gen.instructions.md", "---\napplyTo: \"**\"\n---\nIgnored.\n")
+        _write(project, "src/generated/AGENTS.md")
+        _write(project, "docs/AGENTS.md")
+
+        walker = ProjectWalker(project)
+        primitives = discover_primitives(str(project), walker=walker)
+        index = ProjectFileIndex.build(project, walker)
+        compiler = DistributedAgentsCompiler(str(project), walker=walker)
+
+        assert [instruction.name for instruction in primitives.instructions] == ["python"]
+        assert project / "src" / "generated" not in index
+        assert compiler._find_orphaned_agents_files([]) == [project / "docs" / "AGENTS.md"]
+
+    def test_compile_walks_once(self, project):
+        """Test that a compile lists each walked directory a single time."""
+        _write(project, ".apm/instructions/python.instructions.md",
+               "---\napplyTo: \"**/*.py\"\n---\nUse type hints.\n")
+
+        with patch.object(ProjectWalker, "_walk", autospec=True, side_effect=ProjectWalker._walk) as walk:
+            compiler = DistributedAgentsCompiler(str(project), walker=ProjectWalker(project))
+            primitives = discover_primitives(str(project), walker=compiler.walker)
+            result = compiler.compile_distributed(primitives, {"dry_run": True})
+
+        assert result.success
+        assert walk.call_count == 1
@@ -0,0 +1,87 @@
+"""Tests for memoized MCP server resolution."""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from apm_cli.adapters.client.base import MCPClientAdapter
+from apm_cli.core.conflict_detector import MCPConflictDetector
+from apm_cli.registry.operations import MCPServerOperations
+from apm_cli.registry.session import ServerResolutionSession
+
+
+def _server(reference):
+    return {"id": f"{reference}-uuid", "name": f"io.github.acme/{reference}"}
+
+
+class TestServerResolutionSession(unittest.TestCase):
+    """Test that references are looked up once."""
+
+    def setUp(self):
+        self.client = Mock()
+        self.client.find_server_by_reference.side_effect = lambda reference: \
+            None if reference == "missing" else _server(reference)
+        self.session = ServerResolutionSession(self.client)
+
+    def test_resolve_is_memoized(self):
+        """Test that repeated lookups are answered from the session."""
+        self.assertEqual(self.session.resolve("github"), _server("github"))
+        self.assertEqual(self.session.resolve("github"), _server("github"))
+        self.assertIsNone(self.session.resolve("missing"))
+        self.assertIsNone(self.session.resolve("missing"))
+
+        self.assertEqual(self.client.find_server_by_reference.call_count, 2)
+        self.assertEqual((self.session.hits, self.session.misses), (2, 2))
+
+    def test_resolve_many_deduplicates(self):
+        """Test that bulk resolution looks each new reference up once."""
+        self.session.resolve("github")
+        result = self.session.resolve_many(["github", "notion", "notion", "missing"])
+
+        self.assertEqual(result, {"github": _server("github"), "notion": _server("notion"), "missing": None})
+        self.assertEqual(sorted(call.args[0] for call in self.client.find_server_by_reference.call_args_list),
+                         ["github", "missing", "notion"])
+        self.assertEqual((self.session.hits, self.session.misses), (1, 3))
+
+    def test_errors_are_remembered(self):
+        """Test that a failed lookup fails the same way without another request."""
+        self.client.find_server_by_reference.side_effect = ConnectionError("registry down")
+
+        self.assertEqual(self.session.resolve_many(["github"]), {"github": None})
+        with self.assertRaises(ConnectionError):
+            self.session.resolve("github")
+        self.assertEqual(self.client.find_server_by_reference.call_count, 1)
+
+
+class TestInstallResolution(unittest.TestCase):
+    """Test that an MCP install resolves each server once across all its steps."""
+
+    def test_one_lookup_per_server(self):
+        servers = [f"server{index}" for index in range(15)]
+        operations = MCPServerOperations()
+        operations.registry_client.find_server_by_reference = Mock(side_effect=_server)
+        runtimes = ["copilot", "codex", "vscode"]
+
+        with patch.object(operations, "_get_installed_server_ids", return_value=set()) as installed_ids:
+            valid, invalid = operations.validate_servers_exist(servers)
+            to_install = operations.check_servers_needing_installation(runtimes, valid)
+        server_info_cache = operations.batch_fetch_server_info(to_install)
+        for runtime in runtimes:
+            adapter = Mock(spec=MCPClientAdapter)
+            adapter.registry_client = Mock()
+            adapter.get_current_config.return_value = {}
+            detector = MCPConflictDetector(adapter, operations.session)
+            for server in to_install:
+                self.assertFalse(detector.check_server_exists(server))
+            adapter.registry_client.find_server_by_reference.assert_not_called()
+
+        self.assertEqual(invalid, [])
+        self.assertEqual(sorted(server_info_cache), sorted(servers))
+        self.assertEqual(installed_ids.call_count, len(runtimes))
+        self.assertEqual(operations.registry_client.find_server_by_reference.call_count, 15)
+        self.assertEqual(operations.session.misses, 15)
+        # Installation check, batch fetch and conflict detection in 3 runtimes
+        self.assertEqual(operations.session.hits, 15 + 15 + 45)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""Tests for resolving transitive APM dependencies from their apm.yml."""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from apm_cli.cli import cli
+from apm_cli.deps.apm_resolver import APMDependencyResolver
+from apm_cli.deps.github_downloader import GitHubPackageDownloader
+from apm_cli.deps.integrity import IntegrityManifest
+from apm_cli.deps.lockfile import LOCKFILE_NAME, LockedDependency, Lockfile
+
+from ..utils.local_git import TOKEN_VARIABLES, LocalGitHost
+
+
+def _manifest(name, *dependencies):
+    lines = [f"name: {name}", "version: 1.0.0"]
+    if dependencies:
+        lines += ["dependencies:", "  apm:"] + [f"    - {dep}" for dep in dependencies]
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def host():
+    """A diamond: acme/app -> acme/ui, acme/api -> acme/base."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        host = LocalGitHost(root / "host")
+        host.add_package("acme/base")
+        host.add_package("acme/ui", {"apm.yml": _manifest("ui", "acme/base")})
+        host.add_package("acme/api", {"apm.yml": _manifest("api", "acme/base#main")})
+        env = {key: value for key, value in os.environ.items() if key not in TOKEN_VARIABLES}
+        env.update(host.environment())
+        project = root / "project"
+        project.mkdir()
+        (project / "apm.yml").write_text(_manifest("app", "acme/ui", "acme/api"))
+        with patch.dict(os.environ, env, clear=True):
+            yield host, project
+
+
+class TestTransitiveResolution:
+    """Test building the dependency tree from fetched apm.yml files."""
+
+    def test_resolves_sub_dependencies(self, host):
+        """Test that sub-dependencies are fetched and a shared one resolved once."""
+        host, project = host
+        downloader = GitHubPackageDownloader()
+        with patch.object(downloader, "fetch_manifest", wraps=downloader.fetch_manifest) as fetch_manifest:
+            graph = APMDependencyResolver(downloader=downloader).resolve_dependencies(project)
+
+        assert graph.is_valid()
+        assert graph.flattened_dependencies.install_order == ["acme/api", "acme/ui", "acme/base"]
+        base = graph.dependency_tree.get_node("acme/base")
+        assert base.depth == 2
+        assert base.package.resolved_commit == host.head("acme/base")
+        assert sorted(call.args[0] for call in fetch_manifest.call_args_list) == ["acme/api", "acme/base", "acme/ui"]
+
+    def test_without_downloader_stays_local(self, host):
+        """Test that without a downloader only installed packages are read."""
+        host, project = host
+        installed = project / "apm_modules" / "acme" / "ui"
+        installed.mkdir(parents=True)
+        (installed / "apm.yml").write_text(_manifest("ui", "acme/local"))
+
+        graph = APMDependencyResolver().resolve_dependencies(project)
+
+        assert sorted(graph.flattened_dependencies.dependencies) == ["acme/api", "acme/local", "acme/ui"]
+
+    def test_circular_dependencies_are_detected(self, host):
+        """Test that a cycle across fetched packages is reported."""
+        host, project = host
+        host.commit("acme/base", {"apm.yml": _manifest("base", "acme/ui")})
+
+        graph = APMDependencyResolver(downloader=GitHubPackageDownloader()).resolve_dependencies(project)
+
+        assert graph.has_circular_dependencies()
+
+    def test_locked_commits_are_read_without_resolving(self, host):
+        """Test that apm.yml is read at the locked commit, not the branch head."""
+        host, project = host
+        lockfile = Lockfile()
+        downloader = GitHubPackageDownloader()
+        graph = APMDependencyResolver(downloader=downloader).resolve_dependencies(project)
+        for node in graph.dependency_tree.nodes.values():
+            dep_ref = node.dependency_ref
+            lockfile.dependencies[dep_ref.repo_url] = LockedDependency(
+                dep_ref.repo_url, dep_ref.reference, "branch", node.package.resolved_commit)
+        host.commit("acme/ui", {"apm.yml": _manifest("ui", "acme/new")})
+
+        with patch.object(GitHubPackageDownloader, "resolve_git_reference") as resolve:
+            graph = APMDependencyResolver(downloader=GitHubPackageDownloader(), lockfile=lockfile).resolve_dependencies(project)
+            resolve.assert_not_called()
+
+        assert "acme/new" not in graph.flattened_dependencies.dependencies
+
+    def test_installed_manifest_at_another_commit_is_not_read(self, host):
+        """Test that a locked package installed at an older commit is read at the locked commit."""
+        host, project = host
+        lockfile = Lockfile()
+        lockfile.dependencies["acme/ui"] = LockedDependency("acme/ui", None, "branch", host.head("acme/ui"))
+        installed = project / "apm_modules" / "acme" / "ui"
+        installed.mkdir(parents=True)
+        (installed / "apm.yml").write_text(_manifest("ui", "acme/stale-dep"))
+
+        def resolve():
+            resolver = APMDependencyResolver(downloader=GitHubPackageDownloader(), lockfile=lockfile)
+            return sorted(resolver.resolve_dependencies(project).flattened_dependencies.dependencies)
+
+        # Without an integrity manifest, and installed at another commit
+        assert resolve() == ["acme/api", "acme/base", "acme/ui"]
+        IntegrityManifest.build(installed, "b" * 40).save(installed)
+        assert resolve() == ["acme/api", "acme/base", "acme/ui"]
+
+        # Installed at the locked commit
+        IntegrityManifest.build(installed, host.head("acme/ui")).save(installed)
+        assert "acme/stale-dep" in resolve()
+
+    def test_manifest_without_partial_clone_support(self, host):
+        """Test reading apm.yml from servers that cannot send a single file (protocol v0)."""
+        host, project = host
+        with patch.dict(os.environ, host.environment(extra_config=[("protocol.version", "0")])):
+            resolved_ref, text = GitHubPackageDownloader().fetch_manifest("acme/ui")
+
+        assert resolved_ref.resolved_commit == host.head("acme/ui")
+        assert "acme/base" in text
+
+
+class TestTransitiveInstall:
+    """Test that `apm install` installs and locks sub-dependencies."""
+
+    def test_install_locks_parents(self, host, monkeypatch):
+        """Test that sub-dependencies are installed and locked with the package that declared them."""
+        host, project = host
+        monkeypatch.chdir(project)
+
+        with patch.object(GitHubPackageDownloader, "resolve_git_reference",
+                          autospec=True, side_effect=GitHubPackageDownloader.resolve_git_reference) as resolve:
+            result = CliRunner().invoke(cli, ["install", "--only", "apm"])
+
+        assert result.exit_code == 0, result.output
+        # References resolved while fetching apm.yml are not resolved again to install
+        assert resolve.call_count == 3
+        assert (project / "apm_modules" / "acme" / "base" / "apm.yml").is_file()
+        locked = Lockfile.load(project / LOCKFILE_NAME).dependencies
+        assert sorted(locked) == ["acme/api", "acme/base", "acme/ui"]
+        assert locked["acme/base"].parent == "acme/ui"
+        assert locked["acme/ui"].parent is None
@@ -0,0 +1,100 @@
+"""Local stand-in for GitHub's archive server (codeload), over HTTP.
+
+``LocalArchiveServer`` serves ``GET /<org>/<repo>/tar.gz/<commit>`` with
+``git archive`` output of the bare repositories of a ``LocalGitHost``,
+prefixed and commit-stamped like codeload's. Pass ``server.archive_url`` to
+``ArchiveDownloader`` to run the archive download path without network.
+"""
+
+from __future__ import annotations
+
+import re
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+from .local_git import LocalGitHost
+
+_PATH = re.compile(r"^/(?P<repo>[^/]+/[^/]+)/tar\.gz/(?P<commit>[0-9a-f]{40})$")
+
+
+class LocalArchiveServer:
+    """Threaded HTTP/1.1 server of commit archives; use as a context manager."""
+
+    def __init__(self, host: LocalGitHost, latency: float = 0.0):
+        """
+        Args:
+            host: Repositories to serve.
+            latency: Seconds each new connection waits before being served,
+                standing in for the TCP and TLS handshakes.
+        """
+        self.host = host
+        self.latency = latency
+        self.requests = 0
+        self.connections = 0
+        # Requested commit -> commit actually archived, to serve wrong archives
+        self.substitutes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def archive_url(self) -> str:
+        """URL template for ``ArchiveDownloader``."""
+        return f"http://127.0.0.1:{self._server.server_address[1]}/{{repo}}/tar.gz/{{commit}}"
+
+    def __enter__(self) -> "LocalArchiveServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                match = _PATH.match(self.path)
+                bare = server.host.root / f"{match.group('repo')}.git" if match else None
+                if bare is None or not bare.exists():
+                    self._reply(404, b"Not Found")
+                    return
+                commit = match.group("commit")
+                commit = server.substitutes.get(commit, commit)
+                prefix = f"{match.group('repo').replace('/', '-')}-{commit[:7]}/"
+                result = subprocess.run(
+                    ["git", "--git-dir", str(bare), "archive", "--format=tar.gz", f"--prefix={prefix}", commit],
+                    capture_output=True,
+                )
+                if result.returncode != 0:
+                    self._reply(404, b"Not Found")
+                    return
+                self._reply(200, result.stdout, "application/x-gzip")
+
+            def _reply(self, status: int, body: bytes, content_type: str = "text/plain"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,120 @@
+"""Local stand-in for GitHub: bare git repositories served over file://.
+
+``LocalGitHost.environment()`` returns git configuration (passed through
+``GIT_CONFIG_COUNT`` / ``GIT_CONFIG_KEY_<n>`` environment variables, which
+the downloader's git environment inherits) that rewrites GitHub URLs to the
+local repositories, so the real download code paths run without network.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+# Environment variables that would make the downloader use token URLs
+TOKEN_VARIABLES = ("GITHUB_APM_PAT", "GITHUB_TOKEN", "GH_TOKEN", "GITHUB_COPILOT_PAT")
+
+_IDENTITY = ["-c", "user.name=APM Tests", "-c", "user.email=tests@example.com", "-c", "commit.gpgsign=false"]
+
+
+def git(*args: str, cwd: Optional[Path] = None) -> str:
+    """Run a git command and return its output."""
+    result = subprocess.run(
+        ["git", *_IDENTITY, *args], cwd=cwd, check=True, capture_output=True, text=True,
+        env={**os.environ, "GIT_CONFIG_NOSYSTEM": "1", "GIT_CONFIG_GLOBAL": os.devnull},
+    )
+    return result.stdout.strip()
+
+
+class LocalGitHost:
+    """Bare repositories laid out as ``<root>/<org>/<repo>.git``."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def add_package(self, repo: str, files: Optional[Dict[str, str]] = None, branch: str = "main") -> Path:
+        """Create a bare repository holding a valid APM package.
+
+        Args:
+            repo: ``org/repo`` name.
+            files: Extra files to commit, by relative path.
+            branch: Default branch.
+
+        Returns:
+            Path: The bare repository.
+        """
+        name = repo.split("/")[-1]
+        contents = {
+            "apm.yml": f"name: {name}\nversion: 1.0.0\ndescription: Test package {repo}\n",
+            f".apm/instructions/{name}.instructions.md": f"---\napplyTo: '**'\n---\nFollow {repo}.\n",
+        }
+        contents.update(files or {})
+        return self.commit(repo, contents, branch=branch)
+
+    def commit(self, repo: str, files: Dict[str, str], branch: str = "main", message: str = "Update") -> Path:
+        """Commit files to a branch of a repository, creating it if needed.
+
+        Returns:
+            Path: The bare repository.
+        """
+        bare = self.root / f"{repo}.git"
+        work = self.root / ".work" / repo
+        if not bare.exists():
+            bare.parent.mkdir(parents=True, exist_ok=True)
+            git("init", "-q", "--bare", "-b", branch, str(bare))
+            # Like GitHub, serve partial clones (--filter=blob:none)
+            git("--git-dir", str(bare), "config", "uploadpack.allowFilter", "true")
+        if not work.exists():
+            git("clone", "-q", str(bare), str(work))
+        if git("branch", "--list", "-a", f"*{branch}", cwd=work):
+            git("checkout", "-q", branch, cwd=work)
+        else:
+            git("checkout", "-q", "--orphan", branch, cwd=work)
+        for relative_path, text in files.items():
+            path = work / relative_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+        git("add", "-A", cwd=work)
+        git("commit", "-q", "-m", message, cwd=work)
+        git("push", "-q", "origin", f"HEAD:refs/heads/{branch}", cwd=work)
+        return bare
+
+    def tag(self, repo: str, tag: str) -> None:
+        """Tag the latest commit of a repository's working copy."""
+        work = self.root / ".work" / repo
+        git("tag", tag, cwd=work)
+        git("push", "-q", "origin", tag, cwd=work)
+
+    def head(self, repo: str, branch: str = "main") -> str:
+        """Get the commit SHA a branch points to."""
+        return git("--git-dir", str(self.root / f"{repo}.git"), "rev-parse", branch)
+
+    def environment(self, latency: float = 0.0, extra_config: Sequence[Tuple[str, str]] = ()) -> Dict[str, str]:
+        """Get environment variables that route GitHub URLs to this host.
+
+        Args:
+            latency: Seconds each git connection waits before being served,
+                standing in for network round-trips (file:// is instant). Uses
+                git's ``ext::`` transport around the same bare repositories.
+            extra_config: More git configuration, e.g. ``("protocol.version", "0")``.
+        """
+        if latency:
+            # Serve protocol v2 like GitHub (ext:: otherwise speaks v0)
+            base = f"ext::sh -c sleep% {latency};% GIT_PROTOCOL=version=2% %S% {self.root.as_posix()}/"
+        else:
+            base = self.root.resolve().as_uri() + "/"
+        config = [
+            (f"url.{base}.insteadOf", "git@github.com:"),
+            (f"url.{base}.insteadOf", "https://github.com/"),
+            ("protocol.ext.allow", "always"),
+            ("protocol.file.allow", "always"),
+            *extra_config,
+        ]
+        env = {"GIT_CONFIG_COUNT": str(len(config))}
+        for index, (key, value) in enumerate(config):
+            env[f"GIT_CONFIG_KEY_{index}"] = key
+            env[f"GIT_CONFIG_VALUE_{index}"] = value
+        return env